@@ -0,0 +1,232 @@
+from PyQt6 import QtCore, QtWidgets
+from typing import Any, Dict, List, Optional
+
+from lib.bestiary import COLUMNS, Bestiary, BestiaryEntry, is_bestiary
+from lib.bestiary_search import SearchPage, SearchQuery, SearchWorker
+from lib.challenge_rating import challenge_rating_label
+
+HEADERS = ("Name", "CR", "AC", "HP", "Unit save", "Unit resistance")
+# Keystrokes in the filter are coalesced before a new search starts
+FILTER_DELAY = 250
+
+
+class BestiaryTableModel(QtCore.QAbstractTableModel):
+    """
+    Table over a bestiary that loads its rows a page at a time, as the view scrolls, from a background search
+    """
+
+    page_loaded = QtCore.pyqtSignal(object)
+
+    def __init__(self, path: str, *args, **kwargs):
+        super(BestiaryTableModel, self).__init__(*args, **kwargs)
+        self.entries: List[BestiaryEntry] = []
+        self.total = 0
+        self.query = SearchQuery()
+        self.generation = 0
+        self.loading = False
+        self.error: Optional[str] = None
+        # Pages are delivered on the worker thread: the signal queues them to the GUI thread
+        self.page_loaded.connect(self.add_page)
+        self.worker = SearchWorker(path, self.page_loaded.emit)
+        self.worker.start()
+        self.search(self.query)
+
+    def search(self, query: SearchQuery) -> None:
+        self.query = query
+        self.beginResetModel()
+        self.entries = []
+        self.total = 0
+        self.loading = True
+        self.error = None
+        self.generation = self.worker.search(query)
+        self.endResetModel()
+
+    def set_name_filter(self, name: str) -> None:
+        self.search(self.query._replace(name=name.strip() or None))
+
+    def add_page(self, page: SearchPage) -> None:
+        if page.generation != self.generation or page.offset != len(self.entries):
+            return
+        self.loading = False
+        if page.error is not None:
+            # Stop fetching: the rows loaded so far are all there is
+            self.error = page.error
+            self.total = len(self.entries)
+            return
+        if page.total is not None:
+            self.total = page.total
+        if not page.entries:
+            self.total = len(self.entries)
+            return
+        first = len(self.entries)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(page.entries) - 1)
+        self.entries.extend(page.entries)
+        self.endInsertRows()
+
+    def canFetchMore(self, parent=None) -> bool:
+        if parent is not None and parent.isValid():
+            return False
+        return not self.loading and len(self.entries) < self.total
+
+    def fetchMore(self, parent=None) -> None:
+        if not self.canFetchMore(parent):
+            return
+        self.loading = True
+        self.worker.fetch(self.generation, len(self.entries))
+
+    def rowCount(self, parent=None):
+        if parent is not None and parent.isValid():
+            return 0
+        return len(self.entries)
+
+    def columnCount(self, parent=None):
+        if parent is not None and parent.isValid():
+            return 0
+        return len(HEADERS)
+
+    def data(self, index, role=None):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        # Cells are formatted when the view paints them, i.e. only for visible rows
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            value = entry[index.column() + 1]
+            if COLUMNS[index.column()] == "challenge_rating":
+                return challenge_rating_label(value)
+            if COLUMNS[index.column()] == "saving_throw":
+                return f"{value}+"
+            return str(value)
+        if role == QtCore.Qt.ItemDataRole.TextAlignmentRole and index.column() > 0:
+            return QtCore.Qt.AlignmentFlag.AlignCenter
+
+    def headerData(self, section, orientation, role=None):
+        if (
+            role == QtCore.Qt.ItemDataRole.DisplayRole
+            and orientation == QtCore.Qt.Orientation.Horizontal
+        ):
+            return HEADERS[section]
+
+    def sort(self, column, order=QtCore.Qt.SortOrder.AscendingOrder):
+        self.search(
+            self.query._replace(
+                order_by=COLUMNS[column],
+                descending=order == QtCore.Qt.SortOrder.DescendingOrder,
+            )
+        )
+
+    def entry(self, row: int) -> BestiaryEntry:
+        return self.entries[row]
+
+    def close(self) -> None:
+        self.worker.quit()
+        self.worker.join()
+
+
+class BestiaryBrowser(QtWidgets.QDockWidget):
+    """
+    Dock panel to search a bestiary and open its stat blocks
+    """
+
+    stat_block_opened = QtCore.pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super(BestiaryBrowser, self).__init__("Bestiary", parent)
+        self.setObjectName("bestiaryBrowser")
+        self.path: Optional[str] = None
+        self.bestiary: Optional[Bestiary] = None
+        self.table_model: Optional[BestiaryTableModel] = None
+
+        widget = QtWidgets.QWidget(self)
+        layout = QtWidgets.QVBoxLayout(widget)
+        self.openButton = QtWidgets.QPushButton("Open bestiary...", widget)
+        self.openButton.clicked.connect(self.open)
+        layout.addWidget(self.openButton)
+        self.filterInput = QtWidgets.QLineEdit(widget)
+        self.filterInput.setPlaceholderText("Filter by name")
+        self.filterInput.setClearButtonEnabled(True)
+        self.filterInput.setEnabled(False)
+        layout.addWidget(self.filterInput)
+        self.tableView = QtWidgets.QTableView(widget)
+        self.tableView.setSortingEnabled(True)
+        self.tableView.setSelectionBehavior(
+            QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows
+        )
+        self.tableView.setSelectionMode(
+            QtWidgets.QAbstractItemView.SelectionMode.SingleSelection
+        )
+        self.tableView.verticalHeader().setVisible(False)
+        # Fixed row heights let the view lay out a large table without measuring every row
+        self.tableView.verticalHeader().setSectionResizeMode(
+            QtWidgets.QHeaderView.ResizeMode.Fixed
+        )
+        self.tableView.activated.connect(self.open_stat_block)
+        layout.addWidget(self.tableView)
+        self.statusText = QtWidgets.QLabel(widget)
+        layout.addWidget(self.statusText)
+        self.setWidget(widget)
+
+        self.filterTimer = QtCore.QTimer(self)
+        self.filterTimer.setSingleShot(True)
+        self.filterTimer.setInterval(FILTER_DELAY)
+        self.filterTimer.timeout.connect(self.update_filter)
+        self.filterInput.textChanged.connect(lambda _: self.filterTimer.start())
+
+    def open(self):
+        dialog = QtWidgets.QFileDialog()
+        dialog.setFileMode(QtWidgets.QFileDialog.FileMode.ExistingFile)
+        dialog.setAcceptMode(QtWidgets.QFileDialog.AcceptMode.AcceptOpen)
+        dialog.setNameFilter("Bestiary (*.sqlite *.db)")
+        if dialog.exec():
+            files = dialog.selectedFiles()
+            if not len(files) == 1:
+                raise RuntimeError
+            self.load(files[0])
+
+    def load(self, path: str):
+        # Opening a bestiary creates its tables: any other database is left untouched
+        if not is_bestiary(path):
+            QtWidgets.QMessageBox.warning(
+                self, "Open bestiary", f"{path} is not a bestiary."
+            )
+            return
+        self.close_bestiary()
+        self.path = path
+        # Stat blocks are decoded on the GUI thread only when opened
+        self.bestiary = Bestiary(path)
+        self.table_model = BestiaryTableModel(path, self)
+        self.table_model.modelReset.connect(self.update_status)
+        self.table_model.page_loaded.connect(self.update_status)
+        self.tableView.setModel(self.table_model)
+        self.tableView.horizontalHeader().setSortIndicator(
+            0, QtCore.Qt.SortOrder.AscendingOrder
+        )
+        self.filterInput.setEnabled(True)
+        self.update_status()
+
+    def update_filter(self):
+        if self.table_model is not None:
+            self.table_model.set_name_filter(self.filterInput.text())
+
+    def update_status(self, *args: Any):
+        if self.table_model is None:
+            self.statusText.setText("")
+        elif self.table_model.error is not None:
+            self.statusText.setText(f"Search failed: {self.table_model.error}")
+        elif self.table_model.loading and not self.table_model.entries:
+            self.statusText.setText("Searching...")
+        else:
+            self.statusText.setText(f"{self.table_model.total} stat blocks")
+
+    def open_stat_block(self, index: QtCore.QModelIndex):
+        entry = self.table_model.entry(index.row())
+        record: Dict[str, Any] = self.bestiary.record(entry.id)
+        self.stat_block_opened.emit(record)
+
+    def close_bestiary(self):
+        if self.table_model is not None:
+            self.tableView.setModel(None)
+            self.table_model.close()
+            self.table_model = None
+        if self.bestiary is not None:
+            self.bestiary.close()
+            self.bestiary = None
@@ -1,3 +1,4 @@
+import io
 import pathlib
 import math
 import matplotlib as mpl
@@ -8,10 +9,17 @@ import re
 from PIL import Image
 from matplotlib.axes import Axes
 from matplotlib import font_manager
-from typing import Tuple, List
+from typing import Tuple, List, Optional
 
 from lib import __version__
 from lib.interfaces import UnitStatBlock, StatBlock, CreatureAttack
+from lib.render_cache import (
+    RenderCache,
+    render_key,
+    stat_block_render_key,
+    unit_stat_block_render_key,
+)
+from lib.unit_analytics import efficiency_table, SAVING_THROWS
 
 mpl.use("QtAgg")
 resource_folder = pathlib.Path(__file__).parent.parent.joinpath("resources")
@@ -53,6 +61,8 @@ RED = "#58170d"
 DARKER_CELL = f"{RED}1A"
 PAPER_COLOR = "#eee7d7"
 SPACE_BETWEEN_ATTACKS = 77
+# Bump whenever the drawing code changes so that cached renders are not reused
+RENDERER_VERSION = f"{__version__}-1"
 
 
 def draw_separator_line(
@@ -138,7 +148,80 @@ def dotted_line(x: float, y: float, length: int, ax: Axes):
     ax.plot(x, y, linestyle=(0, (1, 4)), linewidth=1, color=RED)
 
 
-def datasheet_from_unit_stat_block(stat_block: UnitStatBlock) -> plt.Figure:
+EFFICIENCY_RESISTANCES = (2, 4, 6, 8, 10, 12)
+EFFICIENCY_HIT_POINTS = 1
+
+
+def draw_efficiency_table(stat_block: UnitStatBlock, ax: Axes) -> None:
+    table = efficiency_table(stat_block)
+    x = 1500
+    y = 90
+    column_width = 210
+    row_height = 70
+
+    ax.text(
+        x,
+        y,
+        f"Creatures slain per activation ({EFFICIENCY_HIT_POINTS} HP, no invulnerable save)",
+        color="w",
+        fontfamily="Scala Sans",
+        fontweight="bold",
+        fontsize=15,
+        verticalalignment="center",
+    )
+    y += row_height
+    ax.text(
+        x,
+        y,
+        "Save / Def",
+        color="w",
+        fontfamily="Scala Sans",
+        fontweight="bold",
+        fontsize=13,
+        verticalalignment="center",
+    )
+    for column, resistance in enumerate(EFFICIENCY_RESISTANCES, start=1):
+        ax.text(
+            x + column * column_width,
+            y,
+            str(resistance),
+            color="w",
+            fontfamily="Scala Sans",
+            fontweight="bold",
+            fontsize=13,
+            horizontalalignment="center",
+            verticalalignment="center",
+        )
+    for saving_throw in SAVING_THROWS:
+        y += row_height
+        ax.text(
+            x,
+            y,
+            f"{saving_throw}+",
+            color="w",
+            fontfamily="Scala Sans",
+            fontweight="bold",
+            fontsize=13,
+            verticalalignment="center",
+        )
+        for column, resistance in enumerate(EFFICIENCY_RESISTANCES, start=1):
+            value = table.slain(saving_throw, None, resistance, EFFICIENCY_HIT_POINTS)
+            ax.text(
+                x + column * column_width,
+                y,
+                f"{value:.2f}",
+                color="w",
+                fontfamily="Scala Sans",
+                fontweight="regular",
+                fontsize=13,
+                horizontalalignment="center",
+                verticalalignment="center",
+            )
+
+
+def datasheet_from_unit_stat_block(
+    stat_block: UnitStatBlock, efficiency: bool = False
+) -> plt.Figure:
     figure = plt.figure(figsize=(15, 10))
     ax = figure.add_subplot(111)
     figure.subplots_adjust(0.0, 0.0, 1.0, 1.0)
@@ -244,6 +327,9 @@ def datasheet_from_unit_stat_block(stat_block: UnitStatBlock) -> plt.Figure:
 
         x += interval
 
+    if efficiency:
+        draw_efficiency_table(stat_block, ax)
+
     y = 650
     interval = 300
     font_size = 20
@@ -1195,23 +1281,79 @@ def datasheet_from_stat_block(stat_block: StatBlock) -> plt.Figure:
     return figure
 
 
-def export_datasheet_from_unit_stat_block(
-    stat_block: UnitStatBlock, path: pathlib.Path
-) -> None:
-    fig = datasheet_from_unit_stat_block(stat_block)
+def figure_to_png(fig: plt.Figure) -> bytes:
     fig.subplots_adjust(0.0, 0.0, 1.0, 1.0)
     fig.canvas.draw()
     img = Image.frombytes(
         "RGB", fig.canvas.get_width_height(), fig.canvas.tostring_rgb()
     )
-    img.save(path)
+    plt.close(fig)
+    buffer = io.BytesIO()
+    img.save(buffer, format="png")
+    return buffer.getvalue()
+
+
+def render_unit_stat_block(
+    stat_block: UnitStatBlock,
+    efficiency: bool = False,
+    cache: Optional[RenderCache] = None,
+) -> bytes:
+    """
+    Renders the datasheet of a unit stat block as a png image
+    :param stat_block: The unit stat block
+    :param efficiency: Whether to draw the efficiency table
+    :param cache: The render cache to look the image up in, if any
+    :return: The png image bytes
+    """
+
+    def render() -> bytes:
+        return figure_to_png(datasheet_from_unit_stat_block(stat_block, efficiency))
+
+    if cache is None:
+        return render()
+    key = render_key(
+        unit_stat_block_render_key(stat_block),
+        RENDERER_VERSION,
+        plt.rcParams["figure.dpi"],
+        {"efficiency": efficiency},
+    )
+    return cache.get_or_render(key, render)
+
+
+def render_stat_block(
+    stat_block: StatBlock, cache: Optional[RenderCache] = None
+) -> bytes:
+    """
+    Renders the datasheet of a 5e stat block as a png image
+    :param stat_block: The 5e stat block
+    :param cache: The render cache to look the image up in, if any
+    :return: The png image bytes
+    """
+
+    def render() -> bytes:
+        return figure_to_png(datasheet_from_stat_block(stat_block))
+
+    if cache is None:
+        return render()
+    key = render_key(
+        stat_block_render_key(stat_block),
+        RENDERER_VERSION,
+        plt.rcParams["figure.dpi"],
+        {},
+    )
+    return cache.get_or_render(key, render)
 
 
-def export_datasheet_from_stat_block(stat_block: StatBlock, path: pathlib.Path) -> None:
-    fig = datasheet_from_stat_block(stat_block)
-    fig.subplots_adjust(0.0, 0.0, 1.0, 1.0)
-    fig.canvas.draw()
-    img = Image.frombytes(
-        "RGB", fig.canvas.get_width_height(), fig.canvas.tostring_rgb()
-    )
-    img.save(path)
+def export_datasheet_from_unit_stat_block(
+    stat_block: UnitStatBlock,
+    path: pathlib.Path,
+    efficiency: bool = False,
+    cache: Optional[RenderCache] = None,
+) -> None:
+    path.write_bytes(render_unit_stat_block(stat_block, efficiency, cache))
+
+
+def export_datasheet_from_stat_block(
+    stat_block: StatBlock, path: pathlib.Path, cache: Optional[RenderCache] = None
+) -> None:
+    path.write_bytes(render_stat_block(stat_block, cache))
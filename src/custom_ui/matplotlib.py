@@ -1,3 +1,4 @@
+import io
 import matplotlib.pyplot as plt
 
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
@@ -24,3 +25,10 @@ class MplCanvas(FigureCanvasQTAgg):
         self.axes.imshow(img)
         self.axes.set_axis_off()
         self.draw()
+
+    def update_preview_png(self, data: bytes):
+        self.axes.clear()
+        img = Image.open(io.BytesIO(data))
+        self.axes.imshow(img)
+        self.axes.set_axis_off()
+        self.draw()
@@ -0,0 +1,249 @@
+import functools
+import itertools
+import math
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .combat import unsaved_wound_probability_array
+from .dice import get_average_damage
+from .interfaces import UnitStatBlock
+from .points import DEFAULT_FORMULA, PointsFormula, price, valuations
+from .unit_analytics import wounds_per_kill
+
+
+class InvalidArmyParamError(ValueError):
+    pass
+
+
+class Army(NamedTuple):
+    """
+    An army composition
+    """
+
+    # The number of creatures of each unit
+    counts: Dict[str, int]
+    points: int
+    # How much faster the army destroys the enemy army than the other way around (> 1 is favorable)
+    score: float
+
+
+def _profile_keys(stat_block: UnitStatBlock) -> tuple:
+    profiles = [[attack] for attack in stat_block.attacks]
+    profiles.extend(stat_block.multiattacks.values())
+    return tuple(
+        tuple(
+            (
+                attack.number_of_attacks,
+                attack.attack_skill,
+                attack.strength,
+                attack.armor_penetration,
+                attack.damage,
+            )
+            for attack in profile
+        )
+        for profile in profiles
+    )
+
+
+def _defense_key(stat_block: UnitStatBlock) -> tuple:
+    return (
+        stat_block.resistance,
+        stat_block.saving_throw,
+        stat_block.invulnerable_saving_throw,
+        stat_block.hit_points,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _slain(profiles: tuple, defense: tuple) -> float:
+    resistance, saving_throw, invulnerable_saving_throw, hit_points = defense
+    best = 0.0
+    for profile in profiles:
+        slain = 0.0
+        for attacks, skill, strength, ap, damage in profile:
+            unsaved = unsaved_wound_probability_array(
+                1 if skill is None else skill,
+                strength,
+                ap,
+                resistance,
+                saving_throw,
+                7 if invulnerable_saving_throw is None else invulnerable_saving_throw,
+            )
+            slain += (
+                get_average_damage(attacks)[0]
+                * float(unsaved)
+                / wounds_per_kill(damage, hit_points)[-1]
+            )
+        best = max(best, slain)
+    return best
+
+
+def slain_per_activation(attacker: UnitStatBlock, defender: UnitStatBlock) -> float:
+    """
+    Returns the expected defending creatures slain by one activation of an attacking creature.
+    Results are cached by attack and defense profile.
+    :param attacker: The attacking unit
+    :param defender: The defending unit
+    :return: The expected creatures slain by the attacker's best attack or multiattack
+    """
+    return _slain(_profile_keys(attacker), _defense_key(defender))
+
+
+def _slain_row(
+    attacker: UnitStatBlock, defenders: Sequence[UnitStatBlock]
+) -> List[float]:
+    return [slain_per_activation(attacker, defender) for defender in defenders]
+
+
+def matchup_matrix(
+    attackers: Sequence[UnitStatBlock],
+    defenders: Sequence[UnitStatBlock],
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> np.ndarray:
+    """
+    Returns the expected creatures slain by one activation of each attacker against each defender
+    :param attackers: The attacking units
+    :param defenders: The defending units
+    :param executor: The executor the rows are computed on or None to compute them in this process
+    :return: An array indexed by [attacker, defender]
+    """
+    if executor is None:
+        rows = [_slain_row(attacker, defenders) for attacker in attackers]
+    else:
+        rows = list(executor.map(_slain_row, attackers, itertools.repeat(defenders)))
+    return np.array(rows, dtype=float).reshape(len(attackers), len(defenders))
+
+
+def _scores(
+    counts: np.ndarray,
+    offense: np.ndarray,
+    exposure: np.ndarray,
+    enemy_size: int,
+) -> np.ndarray:
+    # Both armies spread their attacks proportionally to the size of the opposing units
+    size = counts.sum(axis=1)
+    our_kills = counts @ offense
+    enemy_kills = np.divide(
+        counts @ exposure, size, out=np.zeros(len(counts)), where=size > 0
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Ratio of the rounds needed by the enemy to destroy us and by us to destroy the enemy
+        scores = (our_kills / enemy_size) / (enemy_kills / np.maximum(size, 1))
+    scores[our_kills == 0] = 0.0
+    return scores
+
+
+def army_score(
+    army: Sequence[Tuple[UnitStatBlock, int]],
+    enemy: Sequence[Tuple[UnitStatBlock, int]],
+) -> float:
+    """
+    Returns how much faster an army destroys the enemy army than the other way around,
+    with both armies spreading their attacks proportionally to the size of the opposing units
+    :param army: Pairs of unit and number of creatures
+    :param enemy: Pairs of enemy unit and number of creatures
+    :return: The score (> 1 is favorable, inf if the enemy can not harm the army)
+    """
+    units = [unit for unit, _ in army]
+    enemies = [unit for unit, _ in enemy]
+    enemy_counts = np.array([count for _, count in enemy], dtype=float)
+    if enemy_counts.sum() <= 0:
+        raise InvalidArmyParamError("enemy should contain at least one creature.")
+    offense = matchup_matrix(units, enemies) @ (enemy_counts / enemy_counts.sum())
+    exposure = enemy_counts @ matchup_matrix(enemies, units)
+    counts = np.array([[count for _, count in army]], dtype=float)
+    return float(_scores(counts, offense, exposure, enemy_counts.sum())[0])
+
+
+def optimize_army(
+    candidates: Sequence[UnitStatBlock],
+    enemy: Sequence[Tuple[UnitStatBlock, int]],
+    budget: int,
+    *,
+    formula: PointsFormula = DEFAULT_FORMULA,
+    beam_width: int = 32,
+    max_creatures: Optional[int] = None,
+    top: int = 1,
+    workers: Optional[int] = 1,
+) -> List[Army]:
+    """
+    Searches the army compositions within a points budget that perform best against an enemy army.
+    Armies are grown one creature at a time keeping the *beam_width* best compositions of each size.
+    :param candidates: The units the army can be made of (with unique names)
+    :param enemy: Pairs of enemy unit and number of creatures
+    :param budget: The points budget
+    :param formula: The points formula pricing the candidates
+    :param beam_width: The number of compositions kept at each step
+    :param max_creatures: The maximum number of creatures in the army or None
+    :param top: The number of armies to return
+    :param workers: The number of worker processes computing the matchups. If 1, they are computed in this process
+    :return: The best armies found, best first
+    """
+    names = [candidate.name for candidate in candidates]
+    if not names or len(set(names)) != len(names):
+        raise InvalidArmyParamError(
+            f"candidates should be a non-empty sequence of units with unique names. Got {names}."
+        )
+    if not isinstance(budget, int) or budget < 1:
+        raise InvalidArmyParamError(
+            f"budget should be a positive integer. Got {budget}."
+        )
+    for name, value in (("beam_width", beam_width), ("top", top)):
+        if not isinstance(value, int) or value < 1:
+            raise InvalidArmyParamError(
+                f"{name} should be a positive integer. Got {value}."
+            )
+    if max_creatures is not None and (
+        not isinstance(max_creatures, int) or max_creatures < 1
+    ):
+        raise InvalidArmyParamError(
+            f"max_creatures should be a positive integer or None. Got {max_creatures}."
+        )
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise InvalidArmyParamError(
+            f"workers should be a positive integer or None. Got {workers}."
+        )
+    enemies = [unit for unit, _ in enemy]
+    enemy_counts = np.array([count for _, count in enemy], dtype=float)
+    if enemy_counts.sum() <= 0:
+        raise InvalidArmyParamError("enemy should contain at least one creature.")
+
+    executor = None if workers == 1 else ProcessPoolExecutor(max_workers=workers)
+    try:
+        offense = matchup_matrix(candidates, enemies, executor) @ (
+            enemy_counts / enemy_counts.sum()
+        )
+        exposure = enemy_counts @ matchup_matrix(enemies, candidates, executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    costs = price(valuations(candidates), formula)
+
+    found: Dict[bytes, Tuple[float, int, np.ndarray]] = {}
+    beam = np.zeros((1, len(candidates)), dtype=int)
+    steps = max_creatures if max_creatures is not None else math.inf
+    while beam.size and steps > 0:
+        steps -= 1
+        # Every affordable composition with one more creature
+        grown = (beam[:, np.newaxis, :] + np.eye(len(candidates), dtype=int)).reshape(
+            -1, len(candidates)
+        )
+        grown = np.unique(grown[grown @ costs <= budget], axis=0)
+        if not grown.size:
+            break
+        scores = _scores(grown, offense, exposure, enemy_counts.sum())
+        order = np.lexsort((grown @ costs, -scores))[:beam_width]
+        beam = grown[order]
+        for counts, score in zip(beam, scores[order]):
+            found[counts.tobytes()] = (float(score), int(counts @ costs), counts)
+    best = sorted(found.values(), key=lambda army: (-army[0], army[1]))[:top]
+    return [
+        Army(
+            {name: int(count) for name, count in zip(names, counts) if count},
+            points,
+            score,
+        )
+        for score, points, counts in best
+    ]
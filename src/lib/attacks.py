@@ -1,5 +1,7 @@
+import copy
+
 from abc import ABC
-from typing import Optional
+from typing import Optional, NamedTuple, Tuple
 
 from .ability_scores import Scores
 from .dice import get_average_damage, InvalidDamageExpressionError
@@ -9,12 +11,49 @@ from .interfaces import (
     CreatureAttack as CreatureAttackInterface,
     StatBlock,
 )
+from .recharge import check_limited_use
 
 
 class InvalidAttackParamError(ValueError):
     pass
 
 
+class AttackScaling(NamedTuple):
+    """
+    How an attack template scales with the creature's ability scores and proficiency
+    """
+
+    # *to hit* bonus before the creature modifiers
+    base_to_hit: int
+    # The ability scores whose highest modifier is added to the *to hit* bonus
+    to_hit_abilities: Tuple[Scores, ...]
+    # Whether the proficiency modifier is added to the *to hit* bonus
+    to_hit_proficiency: bool
+    # Damage expression before the creature modifiers
+    base_damage: str
+    # The ability scores whose highest modifier is added to the damage
+    damage_abilities: Tuple[Scores, ...]
+    # Whether the proficiency modifier is added to the damage
+    damage_proficiency: bool
+
+
+def _with_base_damage(attack: Attack, base_damage: str) -> Attack:  # pragma: no cover
+    try:
+        damage, _, _ = get_average_damage(base_damage)
+    except InvalidDamageExpressionError:
+        raise InvalidAttackParamError(
+            f"base_damage should be a valid damage expression string. Got {base_damage}"
+        )
+    if damage <= 0:
+        raise InvalidAttackParamError(
+            f"base_damage should be an expression with and average damage > 0. Got {damage}"
+        )
+    # Every other field was already validated: copy instead of constructing a new template
+    scaled = copy.copy(attack)
+    scaled._base_damage = base_damage
+    return scaled
+
+
 class CreatureAttack(CreatureAttackInterface, ABC):
     """
     Generic 5e creature attack
@@ -30,6 +69,9 @@ class CreatureAttack(CreatureAttackInterface, ABC):
         total_average_damage: float,
         dice_average_damage: float,
         fixed_damage: float,
+        recharge: Optional[int] = None,
+        uses: Optional[int] = None,
+        is_saving_throw: bool = False,
     ):
         """
         A generic 5e creature attack
@@ -41,6 +83,9 @@ class CreatureAttack(CreatureAttackInterface, ABC):
         :param total_average_damage: the total average damage
         :param dice_average_damage: the dice average damage
         :param fixed_damage: the fixed damage
+        :param recharge: the minimum d6 roll that recharges the attack or None if it does not need to recharge
+        :param uses: the number of uses per day of the attack or None if unlimited
+        :param is_saving_throw: whether the targets make a saving throw against a DC of to_hit + 8 instead of being hit by an attack roll
         """
         if not name or not isinstance(name, str):
             raise InvalidAttackParamError(
@@ -79,6 +124,7 @@ class CreatureAttack(CreatureAttackInterface, ABC):
             raise InvalidAttackParamError(
                 f"fixed_damage should be a float. Got {fixed_damage}."
             )
+        check_limited_use(recharge, uses, InvalidAttackParamError)
         self._name: str = name
         self._multiattack: int = multiattack
         self._weapon_range: int = weapon_range
@@ -87,6 +133,9 @@ class CreatureAttack(CreatureAttackInterface, ABC):
         self._total_average_damage: float = total_average_damage
         self._dice_average_damage: float = dice_average_damage
         self._fixed_damage: float = fixed_damage
+        self._recharge: Optional[int] = recharge
+        self._uses: Optional[int] = uses
+        self._is_saving_throw: bool = bool(is_saving_throw)
 
     @property
     def name(self) -> str:
@@ -120,6 +169,18 @@ class CreatureAttack(CreatureAttackInterface, ABC):
     def fixed_damage(self) -> float:
         return self._fixed_damage
 
+    @property
+    def recharge(self) -> Optional[int]:
+        return self._recharge
+
+    @property
+    def uses(self) -> Optional[int]:
+        return self._uses
+
+    @property
+    def is_saving_throw(self) -> bool:
+        return self._is_saving_throw
+
 
 class CreatureMeleeAttack(CreatureAttack):
     """
@@ -142,6 +203,9 @@ class CreatureMeleeAttack(CreatureAttack):
             and self._total_average_damage == other._total_average_damage
             and self._dice_average_damage == other._dice_average_damage
             and self._fixed_damage == other._fixed_damage
+            and self._recharge == other._recharge
+            and self._uses == other._uses
+            and self._is_saving_throw == other._is_saving_throw
         )
 
 
@@ -166,6 +230,9 @@ class CreatureRangedAttack(CreatureAttack):
             and self._total_average_damage == other._total_average_damage
             and self._dice_average_damage == other._dice_average_damage
             and self._fixed_damage == other._fixed_damage
+            and self._recharge == other._recharge
+            and self._uses == other._uses
+            and self._is_saving_throw == other._is_saving_throw
         )
 
 
@@ -188,6 +255,8 @@ class AttackRollAttack(Attack):
         to_hit_proficiency: bool = True,
         damage_scaling: bool = True,
         damage_proficiency: bool = False,
+        recharge: Optional[int] = None,
+        uses_per_day: Optional[int] = None,
     ):
         """
         A generic 5e creature attack template for attacks based on attack rolls
@@ -203,6 +272,8 @@ class AttackRollAttack(Attack):
         :param to_hit_proficiency: Whether to add the proficiency modifier to the *to hit* value of the attack
         :param damage_scaling: Whether to add the ability_score_scaling modifier to the attack's damage
         :param damage_proficiency: Whether to add the proficiency modifier to the attack's damage
+        :param recharge: The minimum d6 roll that recharges the attack (i.e. 5 for *Recharge 5-6*) or None
+        :param uses_per_day: The number of times per day the attack can be used or None if unlimited
         """
         if not name or not isinstance(name, str):
             raise InvalidAttackParamError(
@@ -248,6 +319,7 @@ class AttackRollAttack(Attack):
             raise InvalidAttackParamError(
                 f"ability_score_scaling should be an instance of Scoring. Got instance of {type(ability_score_scaling)}: {ability_score_scaling}."
             )
+        check_limited_use(recharge, uses_per_day, InvalidAttackParamError)
         self._name: str = name
         self._range: int = weapon_range
         self._multiattack: int = multiattack
@@ -260,11 +332,28 @@ class AttackRollAttack(Attack):
         self._to_hit_proficiency: bool = bool(to_hit_proficiency)
         self._damage_proficiency: bool = bool(damage_proficiency)
         self._ranged: bool = bool(ranged)
+        self._recharge: Optional[int] = recharge
+        self._uses_per_day: Optional[int] = uses_per_day
 
     @property
     def name(self) -> str:
         return self._name
 
+    @property
+    def scaling(self) -> AttackScaling:
+        ability = (self._ability_score_scaling,)
+        return AttackScaling(
+            self._base_to_hit,
+            ability if self._to_hit_scaling else (),
+            self._to_hit_proficiency,
+            self._base_damage,
+            ability if self._damage_scaling else (),
+            self._damage_proficiency,
+        )
+
+    def with_base_damage(self, base_damage: str) -> Attack:
+        return _with_base_damage(self, base_damage)
+
     def combine(self, other: Attack) -> Attack:
         if not self._equals(other):
             raise InvalidAttackParamError(
@@ -284,6 +373,8 @@ class AttackRollAttack(Attack):
             self._to_hit_proficiency,
             self._damage_scaling,
             self._damage_proficiency,
+            self._recharge,
+            self._uses_per_day,
         )
 
     def _equals(self, other: object) -> bool:
@@ -301,6 +392,8 @@ class AttackRollAttack(Attack):
             and self._to_hit_proficiency == other._to_hit_proficiency
             and self._damage_proficiency == other._damage_proficiency
             and self._ranged == other._ranged
+            and self._recharge == other._recharge
+            and self._uses_per_day == other._uses_per_day
         )
 
     def __eq__(self, other) -> bool:
@@ -319,6 +412,8 @@ class AttackRollAttack(Attack):
             and self._to_hit_proficiency == other._to_hit_proficiency
             and self._damage_proficiency == other._damage_proficiency
             and self._ranged == other._ranged
+            and self._recharge == other._recharge
+            and self._uses_per_day == other._uses_per_day
         )
 
     def from_creature(self, stat_block: StatBlock) -> CreatureAttack:
@@ -348,6 +443,8 @@ class AttackRollAttack(Attack):
                 average_total,
                 average_dice,
                 fixed,
+                self._recharge,
+                self._uses_per_day,
             )
         return CreatureMeleeAttack(
             self._name,
@@ -358,6 +455,8 @@ class AttackRollAttack(Attack):
             average_total,
             average_dice,
             fixed,
+            self._recharge,
+            self._uses_per_day,
         )
 
 
@@ -378,6 +477,8 @@ class SavingThrowAttack(Attack):
         ability_score_scaling: Scores = None,
         damage_scaling: bool = True,
         damage_proficiency: bool = False,
+        recharge: Optional[int] = None,
+        uses_per_day: Optional[int] = None,
     ):
         """
         A generic 5e creature attack template for attacks based on saving throws
@@ -391,6 +492,8 @@ class SavingThrowAttack(Attack):
         :param ability_score_scaling: The ability score the attack scales on
         :param damage_scaling: Whether to add the ability_score_scaling modifier to the attack's damage
         :param damage_proficiency: Whether to add the proficiency modifier to the attack's damage
+        :param recharge: The minimum d6 roll that recharges the attack (i.e. 5 for *Recharge 5-6*) or None
+        :param uses_per_day: The number of times per day the attack can be used or None if unlimited
         """
         if not name or not isinstance(name, str):
             raise InvalidAttackParamError(
@@ -420,6 +523,7 @@ class SavingThrowAttack(Attack):
             )
         if not isinstance(dc, int):
             raise InvalidAttackParamError(f"dc should be an integer. Got {dc}")
+        check_limited_use(recharge, uses_per_day, InvalidAttackParamError)
         self._name: str = name
         self._range: int = weapon_range
         self._multiattack: int = multiattack
@@ -430,11 +534,34 @@ class SavingThrowAttack(Attack):
         self._ability_score_scaling: Optional[Scores] = ability_score_scaling
         self._damage_scaling: bool = bool(damage_scaling)
         self._damage_proficiency: bool = bool(damage_proficiency)
+        self._recharge: Optional[int] = recharge
+        self._uses_per_day: Optional[int] = uses_per_day
 
     @property
     def name(self) -> str:
         return self._name
 
+    @property
+    def scaling(self) -> AttackScaling:
+        damage_abilities: Tuple[Scores, ...] = ()
+        if self._damage_scaling:
+            damage_abilities = (
+                (self._ability_score_scaling,)
+                if self._ability_score_scaling is not None
+                else (Scores.INTELLIGENCE, Scores.WISDOM, Scores.CHARISMA)
+            )
+        return AttackScaling(
+            self._dc - 8,
+            (),
+            False,
+            self._base_damage,
+            damage_abilities,
+            self._damage_proficiency,
+        )
+
+    def with_base_damage(self, base_damage: str) -> Attack:
+        return _with_base_damage(self, base_damage)
+
     def combine(self, other: Attack) -> Attack:
         if not self._equals(other):
             raise InvalidAttackParamError(
@@ -452,6 +579,8 @@ class SavingThrowAttack(Attack):
             self._ability_score_scaling,
             self._damage_scaling,
             self._damage_proficiency,
+            self._recharge,
+            self._uses_per_day,
         )
 
     def __eq__(self, other) -> bool:
@@ -468,6 +597,8 @@ class SavingThrowAttack(Attack):
             and self._ability_score_scaling == other._ability_score_scaling
             and self._damage_scaling == other._damage_scaling
             and self._damage_proficiency == other._damage_proficiency
+            and self._recharge == other._recharge
+            and self._uses_per_day == other._uses_per_day
         )
 
     def _equals(self, other: object) -> bool:
@@ -483,6 +614,8 @@ class SavingThrowAttack(Attack):
             and self._ability_score_scaling == other._ability_score_scaling
             and self._damage_scaling == other._damage_scaling
             and self._damage_proficiency == other._damage_proficiency
+            and self._recharge == other._recharge
+            and self._uses_per_day == other._uses_per_day
         )
 
     def from_creature(self, stat_block: StatBlock) -> CreatureAttack:
@@ -514,6 +647,9 @@ class SavingThrowAttack(Attack):
                 average_total,
                 average_dice,
                 fixed,
+                self._recharge,
+                self._uses_per_day,
+                True,
             )
         return CreatureMeleeAttack(
             self._name,
@@ -524,4 +660,7 @@ class SavingThrowAttack(Attack):
             average_total,
             average_dice,
             fixed,
+            self._recharge,
+            self._uses_per_day,
+            True,
         )
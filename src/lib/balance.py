@@ -0,0 +1,262 @@
+import bisect
+import functools
+import json
+import numpy as np
+
+from typing import Tuple, NamedTuple, Dict, Any, Optional, Mapping
+
+
+class InvalidBalanceProfileError(ValueError):
+    pass
+
+
+class ThresholdTable(NamedTuple):
+    """
+    A step function: values[i] applies from bounds[i - 1] (included) to bounds[i] (excluded)
+    """
+
+    bounds: Tuple[int, ...]
+    values: Tuple[Optional[int], ...]
+
+    def validate(self, name: str, low: int, high: int, optional: bool = False) -> None:
+        """
+        Raises InvalidBalanceProfileError if the table is not consistent
+        :param name: The name of the table in error messages
+        :param low: The minimum value of the table
+        :param high: The maximum value of the table
+        :param optional: Whether None is an accepted value
+        """
+        if (
+            not isinstance(self.bounds, tuple)
+            or any(not isinstance(b, int) for b in self.bounds)
+            or list(self.bounds) != sorted(self.bounds)
+        ):
+            raise InvalidBalanceProfileError(
+                f"{name} bounds should be non-decreasing integers. Got {self.bounds}."
+            )
+        if (
+            not isinstance(self.values, tuple)
+            or len(self.values) != len(self.bounds) + 1
+        ):
+            raise InvalidBalanceProfileError(
+                f"{name} should have one more value than bounds. Got {self.values}."
+            )
+        for value in self.values:
+            if value is None and optional:
+                continue
+            if not isinstance(value, int) or value < low or value > high:
+                raise InvalidBalanceProfileError(
+                    f"{name} values should be integers between {low} and {high}"
+                    f"{' or None' if optional else ''}. Got {self.values}."
+                )
+
+    def lookup(self, value: int) -> Optional[int]:
+        """
+        Returns the value of the table for a single input
+        :param value: The input
+        :return: The table's value
+        """
+        return self.values[bisect.bisect_right(self.bounds, value)]
+
+    def lookup_array(self, values: Any, missing: int = 0) -> np.ndarray:
+        """
+        Returns the values of the table for an array of inputs
+        :param values: The array-like inputs
+        :param missing: The value that replaces None in the output
+        :return: The integer array of the table's values
+        """
+        bounds, table = _compile_table(self, missing)
+        return table[np.searchsorted(bounds, np.asarray(values), side="right")]
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_table(
+    table: ThresholdTable, missing: int
+) -> Tuple[np.ndarray, np.ndarray]:  # pragma: no cover
+    bounds = np.array(table.bounds, dtype=np.int64)
+    values = np.array(
+        [missing if value is None else value for value in table.values],
+        dtype=np.int64,
+    )
+    bounds.setflags(write=False)
+    values.setflags(write=False)
+    return bounds, values
+
+
+class AttackBalance(NamedTuple):
+    """
+    Parameters of the conversion of 5e attacks to unit attacks
+    """
+
+    # Attack skill by *to hit* bonus
+    attack_skill: ThresholdTable = ThresholdTable((0, 2, 5, 10), (6, 5, 4, 3, 2))
+    # strength = floor(sqrt(total average damage + 1)) + to hit + strength_offset
+    strength_offset: int = -1
+    # Average damage that grants one more point of armor penetration
+    armor_penetration_damage_step: int = 20
+    # *to hit* bonus that grants one more point of armor penetration
+    armor_penetration_to_hit_step: int = 7
+    # Armor penetration granted by the *to hit* of area of effect attacks
+    area_of_effect_armor_penetration: int = 1
+    # 5e average damage per unit damage point
+    damage_scale: int = 20
+    # Multiplier of the number of attacks of melee attacks
+    melee_attacks_multiplier: int = 2
+
+
+class DefenseBalance(NamedTuple):
+    """
+    Parameters of the conversion of 5e defenses to unit defenses
+    """
+
+    # Saving throw by armor class
+    saving_throw: ThresholdTable = ThresholdTable((10, 13, 16, 20), (6, 5, 4, 3, 2))
+    # Invulnerable saving throw by armor class (None for no invulnerable saving throw)
+    invulnerable_saving_throw: ThresholdTable = ThresholdTable(
+        (17, 21, 23), (None, 6, 5, 4)
+    )
+    # resistance = resistance_base + constitution modifier + proficiency // resistance_proficiency_divisor
+    resistance_base: int = 2
+    resistance_proficiency_divisor: int = 2
+    # 5e hit points per unit hit point
+    hit_points_scale: int = 20
+
+
+class BalanceProfile(NamedTuple):
+    """
+    A complete set of conversion parameters (a balance patch)
+    """
+
+    attack: AttackBalance = AttackBalance()
+    defense: DefenseBalance = DefenseBalance()
+
+    def replace(self, values: Dict[str, Any]) -> "BalanceProfile":
+        """
+        Returns a copy of the profile with some parameters replaced
+        :param values: Mapping of "attack.<name>" or "defense.<name>" to the new value
+        :return: The new profile
+        """
+        changes: Dict[str, Dict[str, Any]] = {"attack": {}, "defense": {}}
+        for key, value in values.items():
+            section, _, name = key.partition(".")
+            if section not in changes or name not in getattr(self, section)._fields:
+                raise InvalidBalanceProfileError(f"Unknown balance parameter: {key}")
+            changes[section][name] = value
+        profile = BalanceProfile(
+            self.attack._replace(**changes["attack"]),
+            self.defense._replace(**changes["defense"]),
+        )
+        profile.validate()
+        return profile
+
+    def validate(self) -> None:
+        """
+        Raises InvalidBalanceProfileError if the profile is not consistent
+        """
+        for name, table, optional in (
+            ("attack.attack_skill", self.attack.attack_skill, False),
+            ("defense.saving_throw", self.defense.saving_throw, False),
+            (
+                "defense.invulnerable_saving_throw",
+                self.defense.invulnerable_saving_throw,
+                True,
+            ),
+        ):
+            if not isinstance(table, ThresholdTable):
+                raise InvalidBalanceProfileError(
+                    f"{name} should be a ThresholdTable. Got {table}."
+                )
+            table.validate(name, 2, 6, optional)
+        for name in (
+            "attack.armor_penetration_damage_step",
+            "attack.armor_penetration_to_hit_step",
+            "attack.damage_scale",
+            "attack.melee_attacks_multiplier",
+            "defense.resistance_proficiency_divisor",
+            "defense.hit_points_scale",
+        ):
+            section, _, field = name.partition(".")
+            value = getattr(getattr(self, section), field)
+            if not isinstance(value, int) or value < 1:
+                raise InvalidBalanceProfileError(
+                    f"{name} should be a positive integer. Got {value}."
+                )
+
+
+DEFAULT_PROFILE = BalanceProfile()
+
+
+def profile_from_dict(data: Mapping[str, Any]) -> BalanceProfile:
+    """
+    Builds a balance profile from its JSON representation. Missing parameters keep their default value.
+    :param data: Mapping of "attack" and "defense" to mappings of parameter names to values.
+    Threshold tables are mappings with "bounds" and "values" lists
+    :return: The validated balance profile
+    """
+    if not isinstance(data, Mapping):
+        raise InvalidBalanceProfileError(
+            f"A balance profile should be a mapping. Got {data}."
+        )
+    values = {}
+    for section, parameters in data.items():
+        if not isinstance(parameters, Mapping):
+            raise InvalidBalanceProfileError(
+                f"{section} should be a mapping of parameters. Got {parameters}."
+            )
+        for name, value in parameters.items():
+            if isinstance(value, Mapping):
+                try:
+                    value = ThresholdTable(
+                        tuple(value["bounds"]), tuple(value["values"])
+                    )
+                except (KeyError, TypeError):
+                    raise InvalidBalanceProfileError(
+                        f"{section}.{name} should have bounds and values. Got {value}."
+                    )
+            values[f"{section}.{name}"] = value
+    return DEFAULT_PROFILE.replace(values)
+
+
+def profile_to_dict(profile: BalanceProfile) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the JSON representation of a balance profile
+    :param profile: The balance profile
+    :return: Mapping of "attack" and "defense" to mappings of parameter names to values
+    """
+    data: Dict[str, Dict[str, Any]] = {}
+    for section in BalanceProfile._fields:
+        data[section] = {}
+        for name, value in getattr(profile, section)._asdict().items():
+            if isinstance(value, ThresholdTable):
+                value = {"bounds": list(value.bounds), "values": list(value.values)}
+            data[section][name] = value
+    return data
+
+
+def load_profiles(path: str) -> Dict[str, BalanceProfile]:
+    """
+    Loads named balance profiles from a JSON file
+    :param path: The path of a JSON object mapping profile names to profiles
+    :return: Mapping of profile names to balance profiles
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise InvalidBalanceProfileError(
+            f"{path} should contain a mapping of profile names to profiles."
+        )
+    return {name: profile_from_dict(profile) for name, profile in data.items()}
+
+
+def save_profiles(path: str, profiles: Mapping[str, BalanceProfile]) -> None:
+    """
+    Saves named balance profiles to a JSON file
+    :param path: The path of the JSON file
+    :param profiles: Mapping of profile names to balance profiles
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(
+            {name: profile_to_dict(profile) for name, profile in profiles.items()},
+            f,
+            indent=2,
+        )
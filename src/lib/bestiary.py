@@ -0,0 +1,419 @@
+import os
+import pathlib
+import sqlite3
+
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .balance import BalanceProfile, DEFAULT_PROFILE, profile_to_dict
+from .block_format import encode, decode, read, stat_block_from_record
+from .challenge_rating import columns_from_stat_blocks, estimate_challenge_ratings
+from .fingerprint import fingerprint
+from .incremental import DEFENSES
+from .stat_block import StatBlock
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stat_blocks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    challenge_rating REAL NOT NULL,
+    armor_class INTEGER NOT NULL,
+    hit_points INTEGER NOT NULL,
+    saving_throw INTEGER NOT NULL,
+    resistance INTEGER NOT NULL,
+    block BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stat_blocks_name ON stat_blocks (name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS stat_blocks_challenge_rating ON stat_blocks (challenge_rating);
+CREATE INDEX IF NOT EXISTS stat_blocks_armor_class ON stat_blocks (armor_class);
+CREATE INDEX IF NOT EXISTS stat_blocks_hit_points ON stat_blocks (hit_points);
+CREATE INDEX IF NOT EXISTS stat_blocks_saving_throw ON stat_blocks (saving_throw);
+CREATE INDEX IF NOT EXISTS stat_blocks_resistance ON stat_blocks (resistance);
+"""
+# The indexed columns that can be filtered by range and sorted on
+COLUMNS = (
+    "name",
+    "challenge_rating",
+    "armor_class",
+    "hit_points",
+    "saving_throw",
+    "resistance",
+)
+_ENTRY_COLUMNS = "id, " + ", ".join(COLUMNS)
+_TABLES = ("meta", "stat_blocks")
+
+
+class InvalidBestiaryParamError(ValueError):
+    pass
+
+
+class BestiaryEntry(NamedTuple):
+    """
+    The indexed columns of a stored stat block
+    """
+
+    id: int
+    name: str
+    challenge_rating: float
+    armor_class: int
+    hit_points: int
+    # The derived unit's saving throw and resistance under the bestiary's balance profile
+    saving_throw: int
+    resistance: int
+
+
+def is_bestiary(path: str) -> bool:
+    """
+    Checks whether a file is a bestiary without writing to it
+    :param path: The path of the file
+    :return: Whether the file is a SQLite database with the bestiary tables
+    """
+    if not os.path.isfile(path):
+        return False
+    uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+    try:
+        connection = sqlite3.connect(uri, uri=True)
+        try:
+            tables = {
+                row[0]
+                for row in connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+        finally:
+            connection.close()
+    except sqlite3.DatabaseError:
+        return False
+    return tables.issuperset(_TABLES)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class Bestiary:
+    """
+    Single file SQLite library of 5e stat blocks with indexed columns for search
+    """
+
+    def __init__(self, path: str, profile: BalanceProfile = DEFAULT_PROFILE):
+        """
+        A stat block library. The derived unit columns are recomputed on open if the balance profile changed.
+        :param path: The path of the SQLite database (":memory:" for an in-memory library)
+        :param profile: The balance profile the unit columns are derived with
+        """
+        if not isinstance(profile, BalanceProfile):
+            raise InvalidBestiaryParamError(
+                f"profile should be a BalanceProfile. Got {type(profile)}: {profile}."
+            )
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+        self._profile: BalanceProfile = profile
+        self._check_profile()
+
+    def _check_profile(self) -> None:
+        # Only the defense parameters affect the stored columns
+        profile = fingerprint(profile_to_dict(self._profile)["defense"])
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'profile'"
+        ).fetchone()
+        if row is not None and row[0] == profile:
+            return
+        rows = self._connection.execute("SELECT id, block FROM stat_blocks").fetchall()
+        with self._connection:
+            self._connection.executemany(
+                "UPDATE stat_blocks SET saving_throw = ?, resistance = ? WHERE id = ?",
+                [
+                    (*self._unit_columns(stat_block_from_record(decode(block))), id_)
+                    for id_, block in rows
+                ],
+            )
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('profile', ?)",
+                (profile,),
+            )
+
+    def _unit_columns(self, stat_block: StatBlock) -> Tuple[int, int]:
+        return (
+            DEFENSES["saving_throw"](stat_block, self._profile.defense),
+            DEFENSES["resistance"](stat_block, self._profile.defense),
+        )
+
+    def _rows(self, records: Sequence[Dict[str, Any]]) -> List[Tuple[Any, ...]]:
+        stat_blocks = [stat_block_from_record(record) for record in records]
+        challenge_ratings = estimate_challenge_ratings(
+            columns_from_stat_blocks(stat_blocks)
+        ).challenge_rating
+        return [
+            (
+                stat_block.name,
+                float(challenge_rating),
+                stat_block.armor_class,
+                stat_block.hit_points,
+                *self._unit_columns(stat_block),
+                encode(record),
+            )
+            for stat_block, challenge_rating, record in zip(
+                stat_blocks, challenge_ratings, records
+            )
+        ]
+
+    def add(self, record: Dict[str, Any]) -> int:
+        """
+        Stores a stat block
+        :param record: The stat block record (see block_format)
+        :return: The id of the stored stat block
+        """
+        return self.add_many([record])[0]
+
+    def add_many(
+        self, records: Iterable[Dict[str, Any]], batch_size: int = 1024
+    ) -> List[int]:
+        """
+        Stores many stat blocks in a single transaction. If any record is invalid nothing is stored.
+        :param records: The stat block records (see block_format)
+        :param batch_size: The number of records whose columns are derived together
+        :return: The ids of the stored stat blocks, in order
+        """
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise InvalidBestiaryParamError(
+                f"batch_size should be a positive integer. Got {batch_size}."
+            )
+        ids: List[int] = []
+        with self._connection:
+            next_id = (
+                self._connection.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM stat_blocks"
+                ).fetchone()[0]
+                + 1
+            )
+            batch: List[Dict[str, Any]] = []
+            for record in records:
+                batch.append(record)
+                if len(batch) == batch_size:
+                    next_id = self._insert(batch, next_id, ids)
+                    batch = []
+            if batch:
+                self._insert(batch, next_id, ids)
+        return ids
+
+    def _insert(
+        self, records: List[Dict[str, Any]], next_id: int, ids: List[int]
+    ) -> int:
+        rows = self._rows(records)
+        new_ids = range(next_id, next_id + len(rows))
+        self._connection.executemany(
+            f"INSERT INTO stat_blocks ({_ENTRY_COLUMNS}, block) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(id_, *row) for id_, row in zip(new_ids, rows)],
+        )
+        ids.extend(new_ids)
+        return new_ids.stop
+
+    def import_files(self, paths: Iterable[str]) -> List[int]:
+        """
+        Stores the stat blocks of .5eblock files (legacy pickled files included) in a single transaction
+        :param paths: The file paths
+        :return: The ids of the stored stat blocks, in order
+        """
+
+        def records():
+            for path in paths:
+                with open(path, "rb") as file:
+                    yield read(file.read())[0]
+
+        return self.add_many(records())
+
+    def replace(self, id_: int, record: Dict[str, Any]) -> None:
+        """
+        Replaces a stored stat block
+        :param id_: The id of the stat block
+        :param record: The new stat block record
+        """
+        (row,) = self._rows([record])
+        with self._connection:
+            cursor = self._connection.execute(
+                "UPDATE stat_blocks SET name = ?, challenge_rating = ?, armor_class = ?, hit_points = ?, "
+                "saving_throw = ?, resistance = ?, block = ? WHERE id = ?",
+                (*row, id_),
+            )
+        if not cursor.rowcount:
+            raise KeyError(id_)
+
+    def remove(self, ids: Iterable[int]) -> None:
+        """
+        Removes stored stat blocks
+        :param ids: The ids of the stat blocks
+        """
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM stat_blocks WHERE id = ?", [(id_,) for id_ in ids]
+            )
+
+    def _where(
+        self,
+        name: Optional[str],
+        ranges: Dict[str, Optional[Tuple[Optional[float], Optional[float]]]],
+    ) -> Tuple[str, List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if name:
+            clauses.append("name LIKE ? ESCAPE '\\'")
+            params.append(f"%{_escape_like(name)}%")
+        for column, bounds in ranges.items():
+            if bounds is None:
+                continue
+            low, high = bounds
+            if low is not None:
+                clauses.append(f"{column} >= ?")
+                params.append(low)
+            if high is not None:
+                clauses.append(f"{column} <= ?")
+                params.append(high)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def search(
+        self,
+        name: Optional[str] = None,
+        *,
+        challenge_rating: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        armor_class: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        hit_points: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        saving_throw: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        resistance: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        order_by: str = "name",
+        descending: bool = False,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[BestiaryEntry]:
+        """
+        Searches the library. Ranges are (low, high) pairs, both included, with None for an open end.
+        Only the indexed columns are read: stat blocks are decoded on demand with record or stat_block.
+        :param name: Text the name contains (case insensitive) or None
+        :param challenge_rating: The challenge rating range or None
+        :param armor_class: The armor class range or None
+        :param hit_points: The hit points range or None
+        :param saving_throw: The unit saving throw range or None
+        :param resistance: The unit resistance range or None
+        :param order_by: The column the results are sorted on
+        :param descending: Whether the results are sorted in descending order
+        :param limit: The maximum number of results or None
+        :param offset: The number of results to skip
+        :return: The matching entries
+        """
+        if order_by not in COLUMNS:
+            raise InvalidBestiaryParamError(
+                f"order_by should be one of {COLUMNS}. Got {order_by}."
+            )
+        if limit is not None and (not isinstance(limit, int) or limit < 0):
+            raise InvalidBestiaryParamError(
+                f"limit should be a non-negative integer or None. Got {limit}."
+            )
+        if not isinstance(offset, int) or offset < 0:
+            raise InvalidBestiaryParamError(
+                f"offset should be a non-negative integer. Got {offset}."
+            )
+        where, params = self._where(
+            name,
+            {
+                "challenge_rating": challenge_rating,
+                "armor_class": armor_class,
+                "hit_points": hit_points,
+                "saving_throw": saving_throw,
+                "resistance": resistance,
+            },
+        )
+        collate = " COLLATE NOCASE" if order_by == "name" else ""
+        direction = "DESC" if descending else "ASC"
+        rows = self._connection.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM stat_blocks{where} "
+            f"ORDER BY {order_by}{collate} {direction}, id {direction} LIMIT ? OFFSET ?",
+            (*params, -1 if limit is None else limit, offset),
+        )
+        return [BestiaryEntry(*row) for row in rows]
+
+    def count(
+        self,
+        name: Optional[str] = None,
+        *,
+        challenge_rating: Optional[Tuple[Optional[float], Optional[float]]] = None,
+        armor_class: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        hit_points: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        saving_throw: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        resistance: Optional[Tuple[Optional[int], Optional[int]]] = None,
+    ) -> int:
+        """
+        Returns the number of stat blocks matching a search (see search for the filters)
+        """
+        where, params = self._where(
+            name,
+            {
+                "challenge_rating": challenge_rating,
+                "armor_class": armor_class,
+                "hit_points": hit_points,
+                "saving_throw": saving_throw,
+                "resistance": resistance,
+            },
+        )
+        return self._connection.execute(
+            f"SELECT COUNT(*) FROM stat_blocks{where}", params
+        ).fetchone()[0]
+
+    def entry(self, id_: int) -> BestiaryEntry:
+        """
+        Returns the indexed columns of a stored stat block
+        :param id_: The id of the stat block
+        :return: The entry
+        """
+        row = self._connection.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM stat_blocks WHERE id = ?", (id_,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(id_)
+        return BestiaryEntry(*row)
+
+    def record(self, id_: int) -> Dict[str, Any]:
+        """
+        Decodes a stored stat block
+        :param id_: The id of the stat block
+        :return: The stat block record
+        """
+        row = self._connection.execute(
+            "SELECT block FROM stat_blocks WHERE id = ?", (id_,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(id_)
+        return decode(row[0])
+
+    def stat_block(self, id_: int) -> StatBlock:
+        """
+        Builds a stored stat block
+        :param id_: The id of the stat block
+        :return: The 5e stat block
+        """
+        return stat_block_from_record(self.record(id_))
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM stat_blocks").fetchone()[
+            0
+        ]
+
+    def interrupt(self) -> None:
+        """
+        Aborts the running query, if any, with a sqlite3.OperationalError. Can be called from any thread.
+        """
+        self._connection.interrupt()
+
+    def close(self) -> None:
+        """
+        Closes the library
+        """
+        self._connection.close()
+
+    def __enter__(self) -> "Bestiary":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
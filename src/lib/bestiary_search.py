@@ -0,0 +1,200 @@
+import sqlite3
+import threading
+
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .balance import BalanceProfile, DEFAULT_PROFILE
+from .bestiary import COLUMNS, Bestiary, BestiaryEntry, InvalidBestiaryParamError
+
+Range = Optional[Tuple[Optional[float], Optional[float]]]
+
+
+class InvalidSearchParamError(ValueError):
+    pass
+
+
+class SearchQuery(NamedTuple):
+    """
+    The filters and sort order of a bestiary search (see Bestiary.search)
+    """
+
+    name: Optional[str] = None
+    challenge_rating: Range = None
+    armor_class: Range = None
+    hit_points: Range = None
+    saving_throw: Range = None
+    resistance: Range = None
+    order_by: str = "name"
+    descending: bool = False
+
+    def filters(self) -> Dict[str, Any]:
+        """
+        Returns the range filters as keyword arguments of Bestiary.search and Bestiary.count
+        :return: The filters
+        """
+        return {
+            "challenge_rating": self.challenge_rating,
+            "armor_class": self.armor_class,
+            "hit_points": self.hit_points,
+            "saving_throw": self.saving_throw,
+            "resistance": self.resistance,
+        }
+
+
+class SearchPage(NamedTuple):
+    """
+    A page of search results
+    """
+
+    # The search the page belongs to. A page can race with a newer search: compare it with the latest generation
+    generation: int
+    query: SearchQuery
+    offset: int
+    # The number of matching stat blocks, only counted for the first page
+    total: Optional[int]
+    entries: List[BestiaryEntry]
+    # Why the search failed, if it did: the page then has no entries
+    error: Optional[str] = None
+
+
+class SearchWorker(threading.Thread):
+    """
+    Runs bestiary searches on a background thread, one page at a time. A new search cancels the previous one,
+    interrupting its query if it is running.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        callback: Callable[[SearchPage], None],
+        profile: BalanceProfile = DEFAULT_PROFILE,
+        page_size: int = 256,
+    ):
+        """
+        A search worker. The library is opened on the worker thread, so it must be a file.
+        :param path: The path of the bestiary
+        :param callback: Called on the worker thread with each page, including the failed ones
+        :param profile: The balance profile of the bestiary
+        :param page_size: The number of entries per page
+        """
+        if not isinstance(page_size, int) or page_size < 1:
+            raise InvalidSearchParamError(
+                f"page_size should be a positive integer. Got {page_size}."
+            )
+        super().__init__(daemon=True)
+        self._path: str = path
+        self._callback: Callable[[SearchPage], None] = callback
+        self._profile: BalanceProfile = profile
+        self._page_size: int = page_size
+        self._bestiary: Optional[Bestiary] = None
+        self._query: SearchQuery = SearchQuery()
+        self._generation: int = 0
+        self._running: Optional[int] = None
+        self._requests: Deque[Tuple[int, int]] = deque()
+        self._close = False
+        self._condition = threading.Condition()
+
+    @property
+    def page_size(self) -> int:
+        """
+        The number of entries per page
+        """
+        return self._page_size
+
+    def search(self, query: SearchQuery) -> int:
+        """
+        Starts a search, cancelling the previous one. The first page holds the number of results.
+        :param query: The search
+        :return: The generation of the search
+        """
+        if query.order_by not in COLUMNS:
+            raise InvalidSearchParamError(
+                f"order_by should be one of {COLUMNS}. Got {query.order_by}."
+            )
+        with self._condition:
+            self._generation += 1
+            self._query = query
+            self._requests.clear()
+            self._requests.append((self._generation, 0))
+            if self._running is not None and self._bestiary is not None:
+                self._bestiary.interrupt()
+            self._condition.notify()
+            return self._generation
+
+    def fetch(self, generation: int, offset: int) -> None:
+        """
+        Requests another page of a search. Requests for superseded searches are ignored.
+        :param generation: The generation of the search
+        :param offset: The index of the first entry of the page
+        """
+        with self._condition:
+            if generation != self._generation or (generation, offset) in self._requests:
+                return
+            self._requests.append((generation, offset))
+            self._condition.notify()
+
+    def quit(self) -> None:
+        """
+        Stops the worker once the running query ends
+        """
+        with self._condition:
+            self._close = True
+            if self._running is not None and self._bestiary is not None:
+                self._bestiary.interrupt()
+            self._condition.notify()
+
+    def run(self):
+        bestiary = None
+        error = None
+        try:
+            bestiary = Bestiary(self._path, self._profile)
+        except (sqlite3.Error, InvalidBestiaryParamError) as e:
+            # Every search fails with the reason instead of the thread dying silently
+            error = str(e)
+        with self._condition:
+            self._bestiary = bestiary
+        try:
+            while True:
+                with self._condition:
+                    while not self._requests and not self._close:
+                        self._condition.wait()
+                    if self._close:
+                        return
+                    generation, offset = self._requests.popleft()
+                    query = self._query
+                    self._running = generation
+                if bestiary is None:
+                    page = SearchPage(generation, query, offset, None, [], error)
+                else:
+                    try:
+                        page = self._page(generation, query, offset)
+                    except (sqlite3.Error, InvalidBestiaryParamError) as e:
+                        page = SearchPage(generation, query, offset, None, [], str(e))
+                with self._condition:
+                    self._running = None
+                    # A page interrupted by a newer search or by quit is dropped, any other failure is delivered
+                    if self._close or generation != self._generation:
+                        continue
+                self._callback(page)
+        finally:
+            with self._condition:
+                self._bestiary = None
+            if bestiary is not None:
+                bestiary.close()
+
+    def _page(
+        self, generation: int, query: SearchQuery, offset: int
+    ) -> SearchPage:  # pragma: no cover
+        total = None
+        if offset == 0:
+            total = self._bestiary.count(query.name, **query.filters())
+        entries = self._bestiary.search(
+            query.name,
+            **query.filters(),
+            order_by=query.order_by,
+            descending=query.descending,
+            limit=self._page_size,
+            offset=offset,
+        )
+        return SearchPage(generation, query, offset, total, entries)
@@ -0,0 +1,473 @@
+import io
+import json
+import pickle
+import struct
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import targets
+from .ability_scores import AbilityScores, Scores
+from .attacks import AttackRollAttack, SavingThrowAttack
+from .stat_block import StatBlock
+
+MAGIC = b"5EBLOCK"
+VERSION = 2
+BINARY = 0
+JSON = 1
+TARGET_NAMES = (
+    "single target",
+    "cone",
+    "cube",
+    "square",
+    "cylinder",
+    "sphere",
+    "circle",
+    "line",
+)
+ABILITY_FIELDS = ("str", "dex", "con", "int", "wis", "cha")
+# The scalar fields of a stat block record
+FIELDS = (*ABILITY_FIELDS, "hp", "ac", "speed", "name", "proficiency")
+ATTACK_ROLL = "attack_roll"
+SAVING_THROW = "saving_throw"
+# Limited-use fields of every attack kind, None if the attack is at will
+LIMITED_USE_FIELDS = ("recharge", "uses_per_day")
+# Boolean fields of each attack kind, packed as bits in this order
+FLAGS = {
+    ATTACK_ROLL: (
+        "ranged",
+        "to_hit_scaling",
+        "to_hit_proficiency",
+        "damage_scaling",
+        "damage_proficiency",
+    ),
+    SAVING_THROW: ("ranged", "damage_scaling", "damage_proficiency"),
+}
+_TARGETS: Dict[str, Callable[[int, int], targets.Target]] = {
+    "single target": lambda first, second: targets.SingleTarget(),
+    "cone": lambda first, second: targets.Cone(first),
+    "cube": lambda first, second: targets.Cube(first),
+    "square": lambda first, second: targets.Square(first),
+    "cylinder": targets.Cylinder,
+    "sphere": lambda first, second: targets.Sphere(first),
+    "circle": lambda first, second: targets.Circle(first),
+    "line": targets.Line,
+}
+# The classes legacy pickle files may contain
+LEGACY_CLASSES = {
+    ("model", "StatBlockModel"),
+    ("model", "AttackRollModel"),
+    ("model", "SavingThrowModel"),
+    ("model", "TargetModel"),
+}
+
+_HEADER = struct.Struct("<7sBB")
+_STAT_BLOCK = struct.Struct("<6BIHHb")
+# Version 2 appended the recharge and the uses per day (0 if None)
+_ATTACK = struct.Struct("<BIHBiiiBBBH")
+_ATTACK_V1 = struct.Struct("<BIHBiiiBB")
+_LENGTH = struct.Struct("<H")
+
+
+class InvalidBlockFormatError(ValueError):
+    pass
+
+
+def _default_record() -> Dict[str, Any]:
+    record: Dict[str, Any] = {field: 10 for field in ABILITY_FIELDS}
+    record.update(
+        {
+            "hp": 1,
+            "ac": 10,
+            "speed": 30,
+            "name": "creature name",
+            "proficiency": 2,
+            "attacks": [],
+            "multiattacks": {},
+        }
+    )
+    return record
+
+
+def _write_string(parts: List[bytes], value: str) -> None:
+    encoded = value.encode("utf-8")
+    parts.append(_LENGTH.pack(len(encoded)))
+    parts.append(encoded)
+
+
+def _read_string(data: memoryview, offset: int) -> Tuple[str, int]:
+    (length,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    return str(data[offset : offset + length], "utf-8"), offset + length
+
+
+def _encode_binary(record: Dict[str, Any]) -> bytes:
+    parts = [
+        _STAT_BLOCK.pack(
+            *(record[field] for field in ABILITY_FIELDS),
+            record["hp"],
+            record["ac"],
+            record["speed"],
+            record["proficiency"],
+        )
+    ]
+    _write_string(parts, record["name"])
+    parts.append(_LENGTH.pack(len(record["attacks"])))
+    for attack in record["attacks"]:
+        kind = attack["kind"]
+        target = attack["target"]
+        ability = attack["ability_score_scaling"]
+        flags = 0
+        for bit, field in enumerate(FLAGS[kind]):
+            flags |= bool(attack[field]) << bit
+        parts.append(
+            _ATTACK.pack(
+                0 if kind == ATTACK_ROLL else 1,
+                attack["weapon_range"],
+                attack["multiattack"],
+                TARGET_NAMES.index(target["name"]),
+                target["first_param"],
+                target["second_param"],
+                attack["base_to_hit"] if kind == ATTACK_ROLL else attack["dc"],
+                0 if ability is None else ability.value,
+                flags,
+                *(attack.get(field) or 0 for field in LIMITED_USE_FIELDS),
+            )
+        )
+        _write_string(parts, attack["name"])
+        _write_string(parts, attack["base_damage"])
+    parts.append(_LENGTH.pack(len(record["multiattacks"])))
+    for name, attack_names in record["multiattacks"].items():
+        _write_string(parts, name)
+        parts.append(_LENGTH.pack(len(attack_names)))
+        for attack_name in attack_names:
+            _write_string(parts, attack_name)
+    return b"".join(parts)
+
+
+def _decode_binary(data: memoryview, version: int) -> Dict[str, Any]:
+    attack_struct = _ATTACK if version >= 2 else _ATTACK_V1
+    values = _STAT_BLOCK.unpack_from(data, 0)
+    offset = _STAT_BLOCK.size
+    record: Dict[str, Any] = dict(zip(ABILITY_FIELDS, values))
+    record["hp"], record["ac"], record["speed"], record["proficiency"] = values[6:]
+    record["name"], offset = _read_string(data, offset)
+    (count,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    attacks = []
+    for _ in range(count):
+        (
+            kind,
+            weapon_range,
+            multiattack,
+            target,
+            first_param,
+            second_param,
+            to_hit,
+            ability,
+            flags,
+            *limited_use,
+        ) = attack_struct.unpack_from(data, offset)
+        offset += attack_struct.size
+        kind = ATTACK_ROLL if kind == 0 else SAVING_THROW
+        attack: Dict[str, Any] = {
+            "kind": kind,
+            "weapon_range": weapon_range,
+            "multiattack": multiattack,
+            "target": {
+                "name": TARGET_NAMES[target],
+                "first_param": first_param,
+                "second_param": second_param,
+            },
+            "base_to_hit" if kind == ATTACK_ROLL else "dc": to_hit,
+            "ability_score_scaling": None if ability == 0 else Scores(ability),
+        }
+        for bit, field in enumerate(FLAGS[kind]):
+            attack[field] = bool(flags >> bit & 1)
+        for field, value in zip(LIMITED_USE_FIELDS, limited_use or (0, 0)):
+            attack[field] = value or None
+        attack["name"], offset = _read_string(data, offset)
+        attack["base_damage"], offset = _read_string(data, offset)
+        attacks.append(attack)
+    record["attacks"] = attacks
+    (count,) = _LENGTH.unpack_from(data, offset)
+    offset += _LENGTH.size
+    multiattacks = {}
+    for _ in range(count):
+        name, offset = _read_string(data, offset)
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        attack_names = []
+        for _ in range(length):
+            attack_name, offset = _read_string(data, offset)
+            attack_names.append(attack_name)
+        multiattacks[name] = attack_names
+    record["multiattacks"] = multiattacks
+    if offset != len(data):
+        raise InvalidBlockFormatError(
+            f"Unexpected {len(data) - offset} trailing bytes."
+        )
+    return record
+
+
+def _to_json(record: Dict[str, Any]) -> Dict[str, Any]:
+    converted = dict(record)
+    converted["attacks"] = []
+    for attack in record["attacks"]:
+        attack = dict(attack)
+        ability = attack["ability_score_scaling"]
+        attack["ability_score_scaling"] = None if ability is None else ability.name
+        converted["attacks"].append(attack)
+    return converted
+
+
+def _from_json(record: Dict[str, Any]) -> Dict[str, Any]:
+    for attack in record["attacks"]:
+        ability = attack["ability_score_scaling"]
+        attack["ability_score_scaling"] = None if ability is None else Scores[ability]
+        for field in LIMITED_USE_FIELDS:
+            attack.setdefault(field, None)
+    return record
+
+
+def encode(record: Dict[str, Any], encoding: Optional[int] = None) -> bytes:
+    """
+    Encodes a stat block record. The record mirrors StatBlockModel: ability scores, hp, ac, speed, name,
+    proficiency, attacks (dictionaries with a "kind" and the fields of AttackRollModel or SavingThrowModel,
+    their target as a dictionary of the fields of TargetModel, and their recharge and uses_per_day, None if the attack
+    is at will) and multiattacks.
+    :param record: The stat block record
+    :param encoding: BINARY, JSON or None to use the binary encoding whenever the values fit it
+    :return: The encoded stat block
+    """
+    if encoding not in (None, BINARY, JSON):
+        raise InvalidBlockFormatError(
+            f"encoding should be BINARY, JSON or None. Got {encoding}."
+        )
+    if encoding != JSON:
+        try:
+            return _HEADER.pack(MAGIC, VERSION, BINARY) + _encode_binary(record)
+        except (struct.error, ValueError, KeyError):
+            if encoding == BINARY:
+                raise InvalidBlockFormatError(
+                    f"{record.get('name')} does not fit the binary encoding."
+                )
+    return _HEADER.pack(MAGIC, VERSION, JSON) + json.dumps(
+        _to_json(record), separators=(",", ":")
+    ).encode("utf-8")
+
+
+def is_block_format(data: bytes) -> bool:
+    """
+    Returns whether the data starts with the .5eblock header (as opposed to a legacy pickle)
+    :param data: The file contents
+    :return: Whether the data is in the versioned format
+    """
+    return bytes(data[: len(MAGIC)]) == MAGIC
+
+
+def decode(data: bytes) -> Dict[str, Any]:
+    """
+    Decodes a stat block record
+    :param data: The encoded stat block
+    :return: The stat block record
+    """
+    if len(data) < _HEADER.size or not is_block_format(data):
+        raise InvalidBlockFormatError("Missing .5eblock header.")
+    _, version, encoding = _HEADER.unpack_from(data, 0)
+    if version > VERSION:
+        raise InvalidBlockFormatError(
+            f"Unsupported .5eblock version {version}: this version reads up to {VERSION}."
+        )
+    body = memoryview(data)[_HEADER.size :]
+    try:
+        if encoding == BINARY:
+            return _decode_binary(body, version)
+        if encoding == JSON:
+            record = _default_record()
+            record.update(json.loads(str(body, "utf-8")))
+            return _from_json(record)
+    except (struct.error, UnicodeDecodeError, IndexError, KeyError, ValueError) as e:
+        raise InvalidBlockFormatError(f"Corrupted .5eblock data: {e}")
+    raise InvalidBlockFormatError(f"Unknown .5eblock encoding {encoding}.")
+
+
+def _attack_from_record(attack: Dict[str, Any]) -> Any:
+    target = attack["target"]
+    target = _TARGETS[target["name"]](target["first_param"], target["second_param"])
+    if attack["kind"] == ATTACK_ROLL:
+        return AttackRollAttack(
+            attack["name"],
+            attack["weapon_range"],
+            attack["multiattack"],
+            target,
+            attack["base_damage"],
+            attack["base_to_hit"],
+            attack["ranged"],
+            attack["ability_score_scaling"],
+            attack["to_hit_scaling"],
+            attack["to_hit_proficiency"],
+            attack["damage_scaling"],
+            attack["damage_proficiency"],
+            attack.get("recharge"),
+            attack.get("uses_per_day"),
+        )
+    return SavingThrowAttack(
+        attack["name"],
+        attack["weapon_range"],
+        attack["multiattack"],
+        target,
+        attack["base_damage"],
+        attack["dc"],
+        attack["ranged"],
+        attack["ability_score_scaling"],
+        attack["damage_scaling"],
+        attack["damage_proficiency"],
+        attack.get("recharge"),
+        attack.get("uses_per_day"),
+    )
+
+
+def stat_block_from_record(record: Dict[str, Any]) -> StatBlock:
+    """
+    Builds the 5e stat block a record describes
+    :param record: The stat block record
+    :return: The 5e stat block
+    """
+    try:
+        stat_block = StatBlock(
+            record["name"],
+            AbilityScores(*(record[field] for field in ABILITY_FIELDS)),
+            record["proficiency"],
+            record["ac"],
+            record["hp"],
+            record["speed"],
+            [_attack_from_record(attack) for attack in record["attacks"]],
+        )
+    except KeyError as e:
+        raise InvalidBlockFormatError(f"Missing field in stat block record: {e}")
+    for multiattack_name, attack_names in record["multiattacks"].items():
+        stat_block.create_multiattack(multiattack_name, attack_names)
+    return stat_block
+
+
+class _LegacyObject:
+    # Stand-in for the model classes of legacy files: only keeps the pickled attributes
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+    @property
+    def class_name(self) -> str:
+        return type(self).__name__
+
+
+_LEGACY_TYPES = {
+    name: type(name, (_LegacyObject,), {}) for _, name in sorted(LEGACY_CLASSES)
+}
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    def find_class(self, module: str, name: str) -> Any:
+        if (module, name) in LEGACY_CLASSES:
+            return _LEGACY_TYPES[name]
+        if (module, name) == ("lib.ability_scores", "Scores"):
+            return Scores
+        # Protocols 0 and 1 name these with their Python 2 module names
+        if module in ("copyreg", "copy_reg") and name == "_reconstructor":
+            return _reconstructor
+        if module in ("builtins", "__builtin__") and name == "object":
+            return object
+        raise InvalidBlockFormatError(
+            f"Legacy file references {module}.{name}, which is not allowed."
+        )
+
+
+def _reconstructor(cls: Any, base: Any, state: Any) -> Any:
+    # Protocol 0 and 1 pickles rebuild plain objects through copyreg._reconstructor
+    return cls()
+
+
+def _legacy_attack(attack: _LegacyObject) -> Dict[str, Any]:
+    kind = ATTACK_ROLL if attack.class_name == "AttackRollModel" else SAVING_THROW
+    target = getattr(attack, "target", None)
+    record = {
+        "kind": kind,
+        "name": getattr(attack, "name", ""),
+        "weapon_range": getattr(attack, "weapon_range", 5),
+        "multiattack": getattr(attack, "multiattack", 1),
+        "target": {
+            "name": getattr(target, "name", "single target"),
+            "first_param": getattr(target, "first_param", 1),
+            "second_param": getattr(target, "second_param", 1),
+        },
+        "base_damage": getattr(attack, "base_damage", ""),
+        "ability_score_scaling": getattr(attack, "ability_score_scaling", None),
+        "ranged": getattr(attack, "ranged", False),
+    }
+    if kind == ATTACK_ROLL:
+        record["base_to_hit"] = getattr(attack, "base_to_hit", 0)
+        record["to_hit_scaling"] = getattr(attack, "to_hit_scaling", False)
+        record["to_hit_proficiency"] = getattr(attack, "to_hit_proficiency", True)
+        record["damage_scaling"] = getattr(attack, "damage_scaling", False)
+    else:
+        record["dc"] = getattr(attack, "dc", 10)
+        record["damage_scaling"] = getattr(attack, "damage_scaling", True)
+    record["damage_proficiency"] = getattr(attack, "damage_proficiency", False)
+    for field in LIMITED_USE_FIELDS:
+        record[field] = None
+    return record
+
+
+def decode_legacy(data: bytes) -> Dict[str, Any]:
+    """
+    Reads a legacy pickled StatBlockModel without executing arbitrary code: only the model classes
+    and Scores can be referenced, and no model code is run
+    :param data: The legacy file contents
+    :return: The stat block record
+    """
+    try:
+        block = _LegacyUnpickler(io.BytesIO(data)).load()
+    except InvalidBlockFormatError:
+        raise
+    except Exception as e:
+        raise InvalidBlockFormatError(f"Corrupted legacy stat block: {e}")
+    if not isinstance(block, _LegacyObject) or block.class_name != "StatBlockModel":
+        raise InvalidBlockFormatError(
+            f"Expected a StatBlockModel instance. Got {type(block)}."
+        )
+    record = _default_record()
+    for field in (*ABILITY_FIELDS, "hp", "ac", "speed", "name", "proficiency"):
+        record[field] = getattr(block, field, record[field])
+    record["attacks"] = [
+        _legacy_attack(attack) for attack in getattr(block, "attacks", [])
+    ]
+    record["multiattacks"] = {
+        name: list(attack_names)
+        for name, attack_names in getattr(block, "multiattacks", {}).items()
+    }
+    return record
+
+
+def read(data: bytes) -> Tuple[Dict[str, Any], bool]:
+    """
+    Decodes a stat block file in the versioned format or as a legacy pickle
+    :param data: The file contents
+    :return: The stat block record and whether the file was a legacy pickle
+    """
+    if is_block_format(data):
+        return decode(data), False
+    return decode_legacy(data), True
+
+
+def migrate_file(path: str) -> bool:
+    """
+    Rewrites a legacy pickled stat block file in the versioned format
+    :param path: The file path
+    :return: Whether the file was migrated (False if it already was in the versioned format)
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    record, legacy = read(data)
+    if legacy:
+        with open(path, "wb") as file:
+            file.write(encode(record))
+    return legacy
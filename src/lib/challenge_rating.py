@@ -0,0 +1,219 @@
+import numpy as np
+
+from fractions import Fraction
+from typing import Iterable, List, NamedTuple, Sequence, Tuple
+
+from .interfaces import CreatureAttack, StatBlock
+from .recharge import usage_rate
+
+# Rows of the "Monster Statistics by Challenge Rating" table of the Dungeon Master's Guide
+CHALLENGE_RATINGS = np.array(
+    [0, 1 / 8, 1 / 4, 1 / 2, *range(1, 31)],
+    dtype=float,
+)
+ARMOR_CLASSES = np.array(
+    [13, 13, 13, 13, 13, 13, 13, 14, 15, 15, 15, 16, 16, 17, 17, 17, 18]
+    + [18, 18, 18, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19, 19]
+)
+# The highest hit points of each row
+HIT_POINTS = np.array(
+    [6, 35, 49, 70, 85, 100, 115, 130, 145, 160, 175, 190, 205, 220, 235, 250, 265]
+    + [280, 295, 310, 325, 340, 355, 400, 445, 490, 535, 580, 625, 670, 715, 760]
+    + [805, 850]
+)
+ATTACK_BONUSES = np.array(
+    [3, 3, 3, 3, 3, 3, 4, 5, 6, 6, 6, 7, 7, 7, 8, 8, 8, 8, 8, 9, 10, 10, 10, 10]
+    + [11, 11, 11, 12, 12, 12, 13, 13, 13, 14]
+)
+# The highest damage per round of each row
+DAMAGE_PER_ROUND = np.array(
+    [1, 3, 5, 8, 14, 20, 26, 32, 38, 44, 50, 56, 62, 68, 74, 80, 86, 92, 98, 104]
+    + [110, 116, 122, 140, 158, 176, 194, 212, 230, 248, 266, 284, 302, 320]
+)
+SAVE_DCS = np.array(
+    [13, 13, 13, 13, 13, 13, 13, 14, 15, 15, 15, 16, 16, 16, 17, 17, 18, 18, 18]
+    + [18, 19, 19, 19, 19, 20, 20, 20, 21, 21, 21, 22, 22, 22, 23]
+)
+# Damage is averaged over the first rounds of combat
+ROUNDS = 3
+# Area of effect attacks are assumed to hit this many targets
+AREA_OF_EFFECT_TARGETS = 2
+_MIDPOINTS = (CHALLENGE_RATINGS[1:] + CHALLENGE_RATINGS[:-1]) / 2
+
+
+class InvalidChallengeRatingParamError(ValueError):
+    pass
+
+
+class ChallengeRatingColumns(NamedTuple):
+    """
+    The columns of a bestiary the challenge rating is estimated from
+    """
+
+    names: Tuple[str, ...]
+    hit_points: np.ndarray
+    armor_class: np.ndarray
+    # The damage per round of the most damaging attack or multiattack
+    damage_per_round: np.ndarray
+    # The *to hit* bonus of its main attack (the DC is *to hit* + 8 for saving throws)
+    to_hit: np.ndarray
+    is_saving_throw: np.ndarray
+
+
+class ChallengeRatingEstimate(NamedTuple):
+    """
+    The estimated challenge ratings of a bestiary
+    """
+
+    defensive: np.ndarray
+    offensive: np.ndarray
+    challenge_rating: np.ndarray
+
+
+def _attack_damage(attack: CreatureAttack) -> float:
+    damage = attack.multiattack * attack.total_average_damage
+    if attack.target.is_aoe:
+        damage *= AREA_OF_EFFECT_TARGETS
+    if attack.recharge is not None or attack.uses is not None:
+        damage *= usage_rate(attack.recharge, attack.uses, ROUNDS)
+    return damage
+
+
+def _offense(stat_block: StatBlock) -> Tuple[float, int, bool]:
+    profiles: List[List[CreatureAttack]] = [
+        [attack] for attack in stat_block.attacks.values()
+    ]
+    profiles.extend(stat_block.multiattacks.values())
+    best = (0.0, 0, False)
+    for profile in profiles:
+        damages = [_attack_damage(attack) for attack in profile]
+        damage = sum(damages)
+        if damage > best[0]:
+            main = profile[damages.index(max(damages))]
+            best = (damage, main.to_hit_bonus, main.is_saving_throw)
+    return best
+
+
+def columns_from_stat_blocks(
+    stat_blocks: Iterable[StatBlock],
+) -> ChallengeRatingColumns:
+    """
+    Extracts the columns the challenge rating is estimated from
+    :param stat_blocks: The 5e stat blocks
+    :return: The bestiary columns
+    """
+    stat_blocks = list(stat_blocks)
+    offense = [_offense(stat_block) for stat_block in stat_blocks]
+    return ChallengeRatingColumns(
+        tuple(stat_block.name for stat_block in stat_blocks),
+        np.array([stat_block.hit_points for stat_block in stat_blocks], dtype=int),
+        np.array([stat_block.armor_class for stat_block in stat_blocks], dtype=int),
+        np.array([damage for damage, _, _ in offense], dtype=float),
+        np.array([to_hit for _, to_hit, _ in offense], dtype=int),
+        np.array([saving_throw for _, _, saving_throw in offense], dtype=bool),
+    )
+
+
+def _rows(upper_bounds: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # The first row whose upper bound is not exceeded, the last one above the table
+    return np.minimum(
+        np.searchsorted(upper_bounds, np.asarray(values)), CHALLENGE_RATINGS.size - 1
+    )
+
+
+def _adjusted(rows: np.ndarray, difference: np.ndarray) -> np.ndarray:
+    # One row for every 2 points of difference from the expected value
+    steps = np.fix(difference / 2).astype(int)
+    return np.clip(rows + steps, 0, CHALLENGE_RATINGS.size - 1)
+
+
+def estimate_challenge_ratings(
+    columns: ChallengeRatingColumns,
+) -> ChallengeRatingEstimate:
+    """
+    Estimates the challenge ratings of a bestiary following the method of the Dungeon Master's Guide.
+    The defensive rating comes from the hit points adjusted by the armor class and the offensive rating
+    from the damage per round adjusted by the attack bonus or save DC. The challenge rating is their average.
+    :param columns: The bestiary columns
+    :return: The estimated challenge ratings
+    """
+    hit_point_rows = _rows(HIT_POINTS, columns.hit_points)
+    defensive = _adjusted(
+        hit_point_rows,
+        np.asarray(columns.armor_class) - ARMOR_CLASSES[hit_point_rows],
+    )
+    damage_rows = _rows(DAMAGE_PER_ROUND, columns.damage_per_round)
+    to_hit = np.asarray(columns.to_hit)
+    offensive = _adjusted(
+        damage_rows,
+        np.where(
+            np.asarray(columns.is_saving_throw),
+            to_hit + 8 - SAVE_DCS[damage_rows],
+            to_hit - ATTACK_BONUSES[damage_rows],
+        ),
+    )
+    average = (CHALLENGE_RATINGS[defensive] + CHALLENGE_RATINGS[offensive]) / 2
+    challenge_rating = CHALLENGE_RATINGS[
+        np.searchsorted(_MIDPOINTS, average, side="right")
+    ]
+    return ChallengeRatingEstimate(
+        CHALLENGE_RATINGS[defensive], CHALLENGE_RATINGS[offensive], challenge_rating
+    )
+
+
+def estimate_challenge_rating(stat_block: StatBlock) -> float:
+    """
+    Estimates the challenge rating of a single stat block
+    :param stat_block: The 5e stat block
+    :return: The estimated challenge rating
+    """
+    return float(
+        estimate_challenge_ratings(
+            columns_from_stat_blocks([stat_block])
+        ).challenge_rating[0]
+    )
+
+
+def challenge_rating_label(challenge_rating: float) -> str:
+    """
+    Returns the challenge rating as written in a stat block (i.e. "1/8")
+    :param challenge_rating: The challenge rating
+    :return: The label
+    """
+    if challenge_rating not in CHALLENGE_RATINGS:
+        raise InvalidChallengeRatingParamError(
+            f"challenge_rating should be one of the DMG challenge ratings. Got {challenge_rating}."
+        )
+    return str(Fraction(challenge_rating))
+
+
+def challenge_rating_mask(
+    estimate: ChallengeRatingEstimate, low: float, high: float
+) -> np.ndarray:
+    """
+    Returns which stat blocks have an estimated challenge rating between low and high (included)
+    :param estimate: The estimated challenge ratings
+    :param low: The lowest challenge rating
+    :param high: The highest challenge rating
+    :return: A boolean mask over the bestiary
+    """
+    if low > high:
+        raise InvalidChallengeRatingParamError(
+            f"low should not be greater than high. Got {low} and {high}."
+        )
+    return (estimate.challenge_rating >= low) & (estimate.challenge_rating <= high)
+
+
+def calibration_dataset(
+    stat_blocks: Sequence[StatBlock],
+) -> List[Tuple[StatBlock, float]]:
+    """
+    Pairs each stat block with its estimated challenge rating, i.e. as the dataset of tuner.tune
+    :param stat_blocks: The 5e stat blocks
+    :return: Pairs of stat block and estimated challenge rating
+    """
+    estimate = estimate_challenge_ratings(columns_from_stat_blocks(stat_blocks))
+    return [
+        (stat_block, float(challenge_rating))
+        for stat_block, challenge_rating in zip(stat_blocks, estimate.challenge_rating)
+    ]
@@ -0,0 +1,209 @@
+import numpy as np
+
+from typing import Optional, Any
+
+from .dice import get_average_damage
+from .interfaces import UnitAttack
+
+
+def hit_roll(skill: Optional[int]) -> int:
+    """
+    Returns the minimum d6 roll needed to hit
+    :param skill: The attack's skill. If None, the attack always hits
+    :return: The minimum d6 roll needed to hit (1 if the attack always hits)
+    """
+    if skill is None:
+        return 1
+    return skill
+
+
+def hit_probability(skill: Optional[int]) -> float:
+    """
+    Returns the probability of an attack hitting
+    :param skill: The attack's skill. If None, the attack always hits
+    :return: The probability of hitting
+    """
+    return (7 - hit_roll(skill)) / 6
+
+
+def wound_roll(strength: int, resistance: int) -> int:
+    """
+    Returns the minimum d6 roll needed to wound
+    :param strength: The attack's strength
+    :param resistance: The defender's resistance
+    :return: The minimum d6 roll needed to wound
+    """
+    if strength >= 2 * resistance:
+        return 2
+    if strength > resistance:
+        return 3
+    if strength == resistance:
+        return 4
+    if 2 * strength > resistance:
+        return 5
+    return 6
+
+
+def wound_probability(strength: int, resistance: int) -> float:
+    """
+    Returns the probability of a hit wounding
+    :param strength: The attack's strength
+    :param resistance: The defender's resistance
+    :return: The probability of wounding
+    """
+    return (7 - wound_roll(strength, resistance)) / 6
+
+
+def save_roll(
+    saving_throw: int, invulnerable_saving_throw: Optional[int], ap: int
+) -> int:
+    """
+    Returns the minimum d6 roll needed to save a wound. The invulnerable saving throw is not modified by AP.
+    :param saving_throw: The defender's armor saving throw
+    :param invulnerable_saving_throw: The defender's invulnerable saving throw, if any
+    :param ap: The attack's armor penetration
+    :return: The minimum d6 roll needed to save (7 if the wound cannot be saved)
+    """
+    roll = min(saving_throw - ap, 7)
+    if invulnerable_saving_throw is not None:
+        roll = min(roll, invulnerable_saving_throw)
+    return max(roll, 2)
+
+
+def save_probability(
+    saving_throw: int, invulnerable_saving_throw: Optional[int], ap: int
+) -> float:
+    """
+    Returns the probability of a wound being saved
+    :param saving_throw: The defender's armor saving throw
+    :param invulnerable_saving_throw: The defender's invulnerable saving throw, if any
+    :param ap: The attack's armor penetration
+    :return: The probability of saving
+    """
+    return (7 - save_roll(saving_throw, invulnerable_saving_throw, ap)) / 6
+
+
+def unsaved_wound_probability(
+    attack: UnitAttack,
+    resistance: int,
+    saving_throw: int,
+    invulnerable_saving_throw: Optional[int],
+) -> float:
+    """
+    Returns the probability of a single attack hitting, wounding and not being saved
+    :param attack: The unit attack
+    :param resistance: The defender's resistance
+    :param saving_throw: The defender's armor saving throw
+    :param invulnerable_saving_throw: The defender's invulnerable saving throw, if any
+    :return: The probability of an unsaved wound
+    """
+    return (
+        hit_probability(attack.attack_skill)
+        * wound_probability(attack.strength, resistance)
+        * (
+            1
+            - save_probability(
+                saving_throw, invulnerable_saving_throw, attack.armor_penetration
+            )
+        )
+    )
+
+
+def expected_damage(
+    attack: UnitAttack,
+    resistance: int,
+    saving_throw: int,
+    invulnerable_saving_throw: Optional[int],
+    hit_points: Optional[int] = None,
+) -> float:
+    """
+    Returns the expected damage of a unit attack against a defender profile
+    :param attack: The unit attack
+    :param resistance: The defender's resistance
+    :param saving_throw: The defender's armor saving throw
+    :param invulnerable_saving_throw: The defender's invulnerable saving throw, if any
+    :param hit_points: If not None, the damage of each wound is capped to this value
+    :return: The expected damage
+    """
+    attacks, _, _ = get_average_damage(attack.number_of_attacks)
+    damage, _, _ = get_average_damage(attack.damage)
+    if hit_points is not None:
+        damage = min(damage, hit_points)
+    return (
+        attacks
+        * damage
+        * unsaved_wound_probability(
+            attack, resistance, saving_throw, invulnerable_saving_throw
+        )
+    )
+
+
+def hit_probability_array(skill: Any) -> np.ndarray:
+    """
+    Vectorized hit_probability
+    :param skill: The array-like attack skills (every attack must have a skill)
+    :return: The probabilities of hitting
+    """
+    return (7 - np.asarray(skill)) / 6
+
+
+def wound_probability_array(strength: Any, resistance: Any) -> np.ndarray:
+    """
+    Vectorized wound_probability
+    :param strength: The array-like attack strengths
+    :param resistance: The array-like defender resistances
+    :return: The probabilities of wounding
+    """
+    strength = np.asarray(strength)
+    resistance = np.asarray(resistance)
+    roll = np.select(
+        [
+            strength >= 2 * resistance,
+            strength > resistance,
+            strength == resistance,
+            2 * strength > resistance,
+        ],
+        [2, 3, 4, 5],
+        6,
+    )
+    return (7 - roll) / 6
+
+
+def save_probability_array(
+    saving_throw: Any, invulnerable_saving_throw: Any, ap: Any
+) -> np.ndarray:
+    """
+    Vectorized save_probability
+    :param saving_throw: The array-like defender armor saving throws
+    :param invulnerable_saving_throw: The array-like defender invulnerable saving throws (7 for none)
+    :param ap: The array-like attack armor penetrations
+    :return: The probabilities of saving
+    """
+    roll = np.minimum(np.asarray(saving_throw) - np.asarray(ap), 7)
+    roll = np.maximum(np.minimum(roll, invulnerable_saving_throw), 2)
+    return (7 - roll) / 6
+
+
+def unsaved_wound_probability_array(
+    skill: Any,
+    strength: Any,
+    ap: Any,
+    resistance: Any,
+    saving_throw: Any,
+    invulnerable_saving_throw: Any,
+) -> np.ndarray:
+    """
+    Vectorized unsaved_wound_probability over attack and defender profiles
+    :param skill: The array-like attack skills
+    :param strength: The array-like attack strengths
+    :param ap: The array-like attack armor penetrations
+    :param resistance: The array-like defender resistances
+    :param saving_throw: The array-like defender armor saving throws
+    :param invulnerable_saving_throw: The array-like defender invulnerable saving throws (7 for none)
+    :return: The probabilities of an unsaved wound
+    """
+    return (
+        hit_probability_array(skill)
+        * wound_probability_array(strength, resistance)
+        * (1 - save_probability_array(saving_throw, invulnerable_saving_throw, ap))
+    )
@@ -0,0 +1,213 @@
+import csv
+import functools
+import numpy as np
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, TextIO
+
+from .interfaces import CreatureAttack, StatBlock
+from .recharge import usage_rate
+
+ARMOR_CLASSES = np.arange(5, 31)
+SAVE_BONUSES = np.arange(-5, 16)
+SHAPE = (ARMOR_CLASSES.size, SAVE_BONUSES.size)
+CRITICAL_HIT_PROBABILITY = 0.05
+REFERENCE_ARMOR_CLASS = 15
+REFERENCE_SAVE_BONUS = 2
+
+
+class InvalidCreatureAnalyticsParamError(ValueError):
+    pass
+
+
+class StatBlockDPR(NamedTuple):
+    """
+    Expected damage per round of a 5e stat block against a single target.
+    Arrays are indexed by [armor class, save bonus] following ARMOR_CLASSES and SAVE_BONUSES:
+    attack rolls only vary with the armor class and saving throws only with the save bonus.
+    """
+
+    name: str
+    # The expected damage per round of each attack
+    attacks: Dict[str, np.ndarray]
+    # The expected damage per round of each multiattack
+    multiattacks: Dict[str, np.ndarray]
+    # The best attack or multiattack against each target
+    best: np.ndarray
+
+    def dpr(self, armor_class: int, save_bonus: int) -> float:
+        """
+        Returns the expected damage per round of the best attack or multiattack against a target
+        :param armor_class: The target's armor class
+        :param save_bonus: The target's saving throw bonus
+        :return: The expected damage per round
+        """
+        if armor_class not in ARMOR_CLASSES:
+            raise InvalidCreatureAnalyticsParamError(
+                f"armor_class should be between {ARMOR_CLASSES[0]} and {ARMOR_CLASSES[-1]}. Got {armor_class}."
+            )
+        if save_bonus not in SAVE_BONUSES:
+            raise InvalidCreatureAnalyticsParamError(
+                f"save_bonus should be between {SAVE_BONUSES[0]} and {SAVE_BONUSES[-1]}. Got {save_bonus}."
+            )
+        return float(
+            self.best[armor_class - ARMOR_CLASSES[0], save_bonus - SAVE_BONUSES[0]]
+        )
+
+
+def hit_probability_array(to_hit: int, armor_class: np.ndarray) -> np.ndarray:
+    """
+    Returns the probability of an attack roll hitting (a natural 20 always hits and a natural 1 always misses)
+    :param to_hit: The *to hit* bonus
+    :param armor_class: The armor classes of the target
+    :return: The hit probabilities
+    """
+    return np.clip((21 + to_hit - np.asarray(armor_class)) / 20, 0.05, 0.95)
+
+
+def failed_save_probability_array(dc: int, save_bonus: np.ndarray) -> np.ndarray:
+    """
+    Returns the probability of a target failing a saving throw
+    :param dc: The difficulty class of the saving throw
+    :param save_bonus: The saving throw bonuses of the target
+    :return: The failure probabilities
+    """
+    return np.clip((dc - 1 - np.asarray(save_bonus)) / 20, 0, 1)
+
+
+@functools.lru_cache(maxsize=4096)
+def _dpr(
+    to_hit: int,
+    total_average_damage: float,
+    dice_average_damage: float,
+    multiattack: int,
+    is_saving_throw: bool,
+    half_on_success: bool,
+) -> np.ndarray:  # pragma: no cover
+    if is_saving_throw:
+        failed = failed_save_probability_array(to_hit + 8, SAVE_BONUSES)
+        success_damage = total_average_damage / 2 if half_on_success else 0.0
+        damage = failed * total_average_damage + (1 - failed) * success_damage
+        grid = np.broadcast_to(multiattack * damage, SHAPE)
+    else:
+        hit = hit_probability_array(to_hit, ARMOR_CLASSES)
+        # A critical hit rolls the damage dice twice
+        damage = (
+            hit * total_average_damage + CRITICAL_HIT_PROBABILITY * dice_average_damage
+        )
+        grid = np.broadcast_to((multiattack * damage)[:, np.newaxis], SHAPE)
+    grid = grid.copy()
+    grid.setflags(write=False)
+    return grid
+
+
+def attack_dpr(
+    attack: CreatureAttack,
+    half_on_success: bool = True,
+    rounds: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Returns the expected damage per round of a creature attack against a single target.
+    Attack rolls account for critical hits, saving throws are made against a DC of *to hit* + 8.
+    :param attack: The creature attack
+    :param half_on_success: Whether a successful saving throw halves the damage instead of negating it
+    :param rounds: The length of the encounter to average recharge and limited uses over,
+    or None to assume the attack is always available
+    :return: A read-only array indexed by [armor class, save bonus]
+    """
+    grid = _dpr(
+        attack.to_hit_bonus,
+        float(attack.total_average_damage),
+        float(attack.dice_average_damage),
+        attack.multiattack,
+        attack.is_saving_throw,
+        half_on_success,
+    )
+    if rounds is None or (attack.recharge is None and attack.uses is None):
+        return grid
+    if not isinstance(rounds, int) or rounds < 1:
+        raise InvalidCreatureAnalyticsParamError(
+            f"rounds should be a positive integer or None. Got {rounds}."
+        )
+    grid = grid * usage_rate(attack.recharge, attack.uses, rounds)
+    grid.setflags(write=False)
+    return grid
+
+
+def stat_block_dpr(
+    stat_block: StatBlock,
+    half_on_success: bool = True,
+    rounds: Optional[int] = None,
+) -> StatBlockDPR:
+    """
+    Computes the expected damage per round of every attack and multiattack of a 5e stat block
+    against the armor classes and save bonuses in ARMOR_CLASSES and SAVE_BONUSES
+    :param stat_block: The 5e stat block
+    :param half_on_success: Whether a successful saving throw halves the damage instead of negating it
+    :param rounds: The length of the encounter to average recharge and limited uses over,
+    or None to assume every attack is always available
+    :return: The expected damage per round
+    """
+    attacks = {
+        name: attack_dpr(attack, half_on_success, rounds)
+        for name, attack in stat_block.attacks.items()
+    }
+    multiattacks = {}
+    for name, components in stat_block.multiattacks.items():
+        total = np.zeros(SHAPE)
+        for attack in components:
+            total = total + attack_dpr(attack, half_on_success, rounds)
+        multiattacks[name] = total
+    profiles = [*attacks.values(), *multiattacks.values()]
+    best = np.max(profiles, axis=0) if profiles else np.zeros(SHAPE)
+    return StatBlockDPR(stat_block.name, attacks, multiattacks, best)
+
+
+def _rows(dpr: StatBlockDPR) -> Iterable[List]:  # pragma: no cover
+    armor_class = int(np.searchsorted(ARMOR_CLASSES, REFERENCE_ARMOR_CLASS))
+    save_bonus = int(np.searchsorted(SAVE_BONUSES, REFERENCE_SAVE_BONUS))
+    profiles = [("attack", name, grid) for name, grid in dpr.attacks.items()]
+    profiles.extend(
+        ("multiattack", name, grid) for name, grid in dpr.multiattacks.items()
+    )
+    for kind, name, grid in profiles:
+        yield [
+            dpr.name,
+            kind,
+            name,
+            *(round(float(value), 4) for value in grid[:, save_bonus]),
+            *(round(float(value), 4) for value in grid[armor_class, :]),
+        ]
+
+
+def export_dpr(
+    stat_blocks: Iterable[StatBlock],
+    file: TextIO,
+    half_on_success: bool = True,
+    rounds: Optional[int] = None,
+) -> int:
+    """
+    Writes the expected damage per round of a bestiary as CSV, one row per attack and multiattack.
+    The ac_<n> columns are computed against a save bonus of REFERENCE_SAVE_BONUS and the save_<n>
+    columns against an armor class of REFERENCE_ARMOR_CLASS.
+    :param stat_blocks: The 5e stat blocks
+    :param file: The text file to write to
+    :param half_on_success: Whether a successful saving throw halves the damage instead of negating it
+    :param rounds: The length of the encounter to average recharge and limited uses over or None
+    :return: The number of rows written
+    """
+    writer = csv.writer(file)
+    writer.writerow(
+        [
+            "stat_block",
+            "kind",
+            "name",
+            *(f"ac_{armor_class}" for armor_class in ARMOR_CLASSES),
+            *(f"save_{save_bonus}" for save_bonus in SAVE_BONUSES),
+        ]
+    )
+    rows = 0
+    for stat_block in stat_blocks:
+        for row in _rows(stat_block_dpr(stat_block, half_on_success, rounds)):
+            writer.writerow(row)
+            rows += 1
+    return rows
@@ -1,5 +1,9 @@
+import functools
 import math
 import random
+import numpy as np
+
+from typing import Tuple
 
 
 class InvalidDieParamError(ValueError):
@@ -74,6 +78,13 @@ def get_average_damage(dice_damage_string: str) -> tuple[float, float, float]:
         raise InvalidDamageExpressionError(
             f"Expected a non empty die expression string"
         )
+    return _average_damage(dice_damage_string)
+
+
+@functools.lru_cache(maxsize=4096)
+def _average_damage(
+    dice_damage_string: str,
+) -> tuple[float, float, float]:
     dice_damage_string = "".join(
         dice_damage_string.lower().replace("-", "+-").replace("++", "+").split(" ")
     )
@@ -110,6 +121,100 @@ def get_average_damage(dice_damage_string: str) -> tuple[float, float, float]:
     return total_damage, dice_damage, fixed_damage
 
 
+@functools.lru_cache(maxsize=4096)
+def parse_die_expression(
+    dice_expression: str,
+) -> Tuple[Tuple[Tuple[int, int], ...], int]:
+    """
+    Parses a die expression into its dice and its fixed modifier
+    :param dice_expression: The die expression
+    :return: A tuple of (number of dice, sides of dice) and the fixed modifier
+    """
+    if not dice_expression or not isinstance(dice_expression, str):
+        raise InvalidDamageExpressionError(
+            f"Expected a non empty die expression string"
+        )
+    normalized = "".join(
+        dice_expression.lower().replace("-", "+-").replace("++", "+").split(" ")
+    )
+    if normalized.startswith("+"):
+        normalized = normalized[1:]
+    dice = []
+    fixed = 0
+    for part in normalized.split("+"):
+        try:
+            if "d" in part:
+                number_of_dice, sides_of_dice = part.split("d")
+                if number_of_dice in ("", "-"):
+                    number_of_dice += "1"
+                dice.append((int(number_of_dice), int(sides_of_dice)))
+            else:
+                fixed += int(part)
+        except ValueError:
+            raise InvalidDamageExpressionError(
+                f"Expected either a die expression or a number. Got {part}"
+            )
+    for _, sides in dice:
+        if sides < 1:
+            raise InvalidDamageExpressionError(
+                f"Expected dice with a positive number of sides. Got {sides}"
+            )
+    return tuple(dice), fixed
+
+
+def add_dice(dice_expression: str, count: int) -> str:
+    """
+    Adds dice to the group of the largest dice of a die expression (i.e. "2d6+1d4+3" plus 1 is "3d6+1d4+3")
+    :param dice_expression: The die expression
+    :param count: The number of dice to add (negative to remove dice, never below one die)
+    :return: The new die expression. Expressions without dice are returned unchanged
+    """
+    if not isinstance(count, int):
+        raise InvalidDamageExpressionError(f"count should be an integer. Got {count}.")
+    dice, fixed = parse_die_expression(dice_expression)
+    groups = [i for i, (number_of_dice, _) in enumerate(dice) if number_of_dice > 0]
+    if not groups:
+        return dice_expression
+    largest = max(groups, key=lambda i: dice[i][1])
+    parts = []
+    for i, (number_of_dice, sides) in enumerate(dice):
+        if i == largest:
+            number_of_dice = max(number_of_dice + count, 1)
+        parts.append(f"{number_of_dice}d{sides}")
+    if fixed:
+        parts.append(str(fixed))
+    return "+".join(parts).replace("+-", "-")
+
+
+@functools.lru_cache(maxsize=4096)
+def die_expression_distribution(dice_expression: str) -> np.ndarray:
+    """
+    Returns the probability distribution of a die expression. Results below 0 count as 0.
+    :param dice_expression: The die expression
+    :return: A read-only array whose i-th element is the probability of rolling i
+    """
+    dice, fixed = parse_die_expression(dice_expression)
+    offset = fixed
+    distribution = np.ones(1)
+    for number_of_dice, sides in dice:
+        count = abs(number_of_dice)
+        group = np.ones(1)
+        for _ in range(count):
+            group = np.convolve(group, np.full(sides, 1 / sides))
+        if number_of_dice > 0:
+            offset += count
+        else:
+            group = group[::-1]
+            offset -= count * sides
+        distribution = np.convolve(distribution, group)
+    # distribution[i] is now the probability of rolling offset + i
+    values = np.arange(distribution.size) + offset
+    result = np.zeros(max(values.max(), 0) + 1)
+    np.add.at(result, np.maximum(values, 0), distribution)
+    result.setflags(write=False)
+    return result
+
+
 def convert_to_d3_d6(damage: int) -> tuple[int, int, int]:
     """
     Converts an average value to a tuple (d6, d3, fixed)
@@ -0,0 +1,63 @@
+import hashlib
+import json
+
+from typing import Any
+
+from .interfaces import UnitAttack, UnitStatBlock
+
+
+def unit_attack_key(attack: UnitAttack) -> tuple:
+    """
+    Returns the canonical key of a unit attack. The attack's name is not part of the key.
+    :param attack: The unit attack
+    :return: The canonical key
+    """
+    return (
+        attack.range,
+        attack.number_of_attacks,
+        attack.attack_skill,
+        attack.strength,
+        attack.armor_penetration,
+        attack.damage,
+        attack.is_melee,
+        attack.is_aoe,
+    )
+
+
+def unit_stat_block_key(stat_block: UnitStatBlock) -> tuple:
+    """
+    Returns the canonical key of a unit stat block. Names are not part of the key.
+    :param stat_block: The unit stat block
+    :return: The canonical key
+    """
+    return (
+        stat_block.speed,
+        stat_block.resistance,
+        stat_block.saving_throw,
+        stat_block.invulnerable_saving_throw,
+        stat_block.hit_points,
+        tuple(unit_attack_key(attack) for attack in stat_block.attacks),
+        tuple(
+            tuple(unit_attack_key(attack) for attack in multiattack)
+            for multiattack in stat_block.multiattacks.values()
+        ),
+    )
+
+
+def fingerprint(key: Any) -> str:
+    """
+    Returns the hexadecimal digest of a canonical key made of JSON serializable values
+    :param key: The canonical key
+    :return: The fingerprint
+    """
+    encoded = json.dumps(key, separators=(",", ":"), sort_keys=True)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def unit_fingerprint(stat_block: UnitStatBlock) -> str:
+    """
+    Returns the fingerprint of a unit stat block
+    :param stat_block: The unit stat block
+    :return: The fingerprint
+    """
+    return fingerprint(unit_stat_block_key(stat_block))
@@ -0,0 +1,279 @@
+from collections import deque
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional
+
+from .block_format import FIELDS
+
+
+class InvalidHistoryParamError(ValueError):
+    pass
+
+
+def _freeze_attack(attack: Dict[str, Any]) -> MappingProxyType:  # pragma: no cover
+    return MappingProxyType(
+        dict(attack, target=MappingProxyType(dict(attack["target"])))
+    )
+
+
+class Version(Mapping):
+    """
+    Immutable stat block record (see block_format). Edits return a new version sharing every unchanged attack and
+    multiattack with the previous one, so versions can be handed to other threads and kept for undo without copies.
+    """
+
+    __slots__ = ("_fields",)
+
+    def __init__(self, fields: Dict[str, Any]):
+        """
+        A version. Use from_record to build one from a mutable record.
+        :param fields: The record fields, with attacks as a tuple of read-only mappings and multiattacks as a
+        read-only mapping of tuples. Not copied.
+        """
+        self._fields: Dict[str, Any] = fields
+
+    @staticmethod
+    def from_record(record: Dict[str, Any]) -> "Version":
+        """
+        Freezes a copy of a stat block record
+        :param record: The stat block record
+        :return: The version
+        """
+        fields = {field: record[field] for field in FIELDS}
+        fields["attacks"] = tuple(
+            _freeze_attack(attack) for attack in record["attacks"]
+        )
+        fields["multiattacks"] = MappingProxyType(
+            {
+                name: tuple(attack_names)
+                for name, attack_names in record["multiattacks"].items()
+            }
+        )
+        return Version(fields)
+
+    def to_record(self) -> Dict[str, Any]:
+        """
+        Returns a mutable copy of the stat block record
+        :return: The stat block record
+        """
+        record = {field: self._fields[field] for field in FIELDS}
+        record["attacks"] = [
+            dict(attack, target=dict(attack["target"])) for attack in self.attacks
+        ]
+        record["multiattacks"] = {
+            name: list(attack_names) for name, attack_names in self.multiattacks.items()
+        }
+        return record
+
+    def __getitem__(self, field: str) -> Any:
+        return self._fields[field]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    @property
+    def attacks(self) -> tuple:
+        """
+        The attacks, as read-only mappings
+        """
+        return self._fields["attacks"]
+
+    @property
+    def multiattacks(self) -> MappingProxyType:
+        """
+        The multiattacks, as a read-only mapping of attack name tuples
+        """
+        return self._fields["multiattacks"]
+
+    def attack_names(self) -> List[str]:
+        """
+        Returns the attack names, in order
+        :return: The attack names
+        """
+        return [attack["name"] for attack in self.attacks]
+
+    def _replace(self, **fields: Any) -> "Version":  # pragma: no cover
+        replaced = dict(self._fields)
+        replaced.update(fields)
+        return Version(replaced)
+
+    def set(self, field: str, value: Any) -> "Version":
+        """
+        Returns the version with a scalar field (ability scores, hp, ac, speed, name or proficiency) changed
+        :param field: The field name
+        :param value: The new value
+        :return: The new version
+        """
+        if field not in FIELDS:
+            raise InvalidHistoryParamError(
+                f"field should be one of {', '.join(FIELDS)}. Got {field}."
+            )
+        return self._replace(**{field: value})
+
+    def put_attack(
+        self, attack: Dict[str, Any], replace: Optional[str] = None
+    ) -> "Version":
+        """
+        Returns the version with an attack added or replaced. Multiattacks are left untouched.
+        :param attack: The attack record
+        :param replace: The name of the attack to replace in place. If None, the attack is appended
+        :return: The new version
+        """
+        attacks = list(self.attacks)
+        names = self.attack_names()
+        if replace is None:
+            attacks.append(_freeze_attack(attack))
+        elif replace in names:
+            attacks[names.index(replace)] = _freeze_attack(attack)
+        else:
+            raise InvalidHistoryParamError(f"Unknown attack {replace}.")
+        return self._replace(attacks=tuple(attacks))
+
+    def remove_attacks(self, names: Iterable[str]) -> "Version":
+        """
+        Returns the version without some attacks and without the multiattacks using them
+        :param names: The attack names
+        :return: The new version
+        """
+        names = set(names)
+        return self._replace(
+            attacks=tuple(
+                attack for attack in self.attacks if attack["name"] not in names
+            ),
+            multiattacks=MappingProxyType(
+                {
+                    name: attack_names
+                    for name, attack_names in self.multiattacks.items()
+                    if names.isdisjoint(attack_names)
+                }
+            ),
+        )
+
+    def put_multiattack(
+        self, name: str, attack_names: Iterable[str], replace: Optional[str] = None
+    ) -> "Version":
+        """
+        Returns the version with a multiattack added or changed. A renamed multiattack moves to the end.
+        :param name: The multiattack name
+        :param attack_names: The names of the attacks it makes
+        :param replace: The previous name of the multiattack, if it is being edited
+        :return: The new version
+        """
+        multiattacks = dict(self.multiattacks)
+        if replace is not None and replace != name:
+            if replace not in multiattacks:
+                raise InvalidHistoryParamError(f"Unknown multiattack {replace}.")
+            multiattacks.pop(replace)
+        multiattacks[name] = tuple(attack_names)
+        return self._replace(multiattacks=MappingProxyType(multiattacks))
+
+    def remove_multiattacks(self, names: Iterable[str]) -> "Version":
+        """
+        Returns the version without some multiattacks
+        :param names: The multiattack names
+        :return: The new version
+        """
+        names = set(names)
+        return self._replace(
+            multiattacks=MappingProxyType(
+                {
+                    name: attack_names
+                    for name, attack_names in self.multiattacks.items()
+                    if name not in names
+                }
+            )
+        )
+
+
+class History:
+    """
+    Undo and redo stacks of stat block versions
+    """
+
+    def __init__(self, version: Version, limit: Optional[int] = None):
+        """
+        A history
+        :param version: The initial version
+        :param limit: The maximum number of undo steps kept. If None, the history is unlimited
+        """
+        if limit is not None and (not isinstance(limit, int) or limit < 1):
+            raise InvalidHistoryParamError(
+                f"limit should be a positive integer or None. Got {limit}."
+            )
+        self._undo: Deque[Version] = deque(maxlen=limit)
+        self._redo: List[Version] = []
+        self._current: Version = version
+        self._group: Optional[str] = None
+
+    @property
+    def current(self) -> Version:
+        """
+        The current version
+        """
+        return self._current
+
+    @property
+    def can_undo(self) -> bool:
+        """
+        Whether there is a version to undo to
+        """
+        return len(self._undo) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        """
+        Whether there is a version to redo to
+        """
+        return len(self._redo) > 0
+
+    def commit(self, version: Version, group: Optional[str] = None) -> Version:
+        """
+        Makes a version current and drops the redo stack
+        :param version: The new version
+        :param group: Consecutive commits with the same group (e.g. keystrokes in the same field) are undone
+        together. If None, the commit is its own undo step
+        :return: The new version
+        """
+        if group is None or group != self._group:
+            self._undo.append(self._current)
+        self._redo.clear()
+        self._current = version
+        self._group = group
+        return version
+
+    def undo(self) -> Optional[Version]:
+        """
+        Goes back to the previous version
+        :return: The previous version or None if there is none
+        """
+        if not self._undo:
+            return None
+        self._redo.append(self._current)
+        self._current = self._undo.pop()
+        self._group = None
+        return self._current
+
+    def redo(self) -> Optional[Version]:
+        """
+        Goes forward to the last undone version
+        :return: The version or None if there is none
+        """
+        if not self._redo:
+            return None
+        self._undo.append(self._current)
+        self._current = self._redo.pop()
+        self._group = None
+        return self._current
+
+    def clear(self, version: Version) -> None:
+        """
+        Starts a new history, e.g. when another stat block is opened
+        :param version: The initial version
+        """
+        self._undo.clear()
+        self._redo.clear()
+        self._current = version
+        self._group = None
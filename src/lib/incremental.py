@@ -0,0 +1,249 @@
+from typing import Any, Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from .balance import BalanceProfile, DEFAULT_PROFILE
+from .interfaces import Attack, CreatureAttack, UnitAttack
+from .stat_block import StatBlock
+from .sweep import ABILITY_FIELDS
+from .unit_attacks import from_creature_attack
+from .unit_stat_block import (
+    UnitStatBlock,
+    speed_from_stat_block,
+    resistance_value_from_stat_block,
+    saving_throw_value_from_stat_block,
+    invulnerable_saving_throw_value_from_stat_block,
+    hit_points_per_creature_from_stat_block,
+)
+
+INPUTS = (
+    "name",
+    *ABILITY_FIELDS,
+    "proficiency",
+    "armor_class",
+    "hit_points",
+    "speed",
+)
+# The inputs each unit defense value depends on
+DEPENDENCIES: Dict[str, FrozenSet[str]] = {
+    "speed": frozenset({"speed"}),
+    "resistance": frozenset({"constitution", "proficiency"}),
+    "saving_throw": frozenset({"armor_class"}),
+    "invulnerable_saving_throw": frozenset({"armor_class"}),
+    "hit_points": frozenset({"hit_points"}),
+}
+# How each unit defense value is computed from a 5e stat block and a defense formula
+DEFENSES: Dict[str, Callable] = {
+    "speed": speed_from_stat_block,
+    "resistance": resistance_value_from_stat_block,
+    "saving_throw": saving_throw_value_from_stat_block,
+    "invulnerable_saving_throw": invulnerable_saving_throw_value_from_stat_block,
+    "hit_points": hit_points_per_creature_from_stat_block,
+}
+# Derived values that only affect the 5e stat block
+_CREATURE_NODES = ("attack:", "multiattack:", "template:")
+_SCORE_FIELDS = {score: name for name, score in ABILITY_FIELDS.items()}
+_MISSING = object()
+
+
+class Changes(NamedTuple):
+    """
+    The outcome of an incremental update
+    """
+
+    # The converted unit stat block (the previous instance if nothing changed)
+    unit_stat_block: UnitStatBlock
+    # The inputs that changed since the previous update
+    changed_inputs: FrozenSet[str]
+    # The derived values that changed: "speed", "resistance", "saving_throw", "invulnerable_saving_throw",
+    # "hit_points", "attack:<name>", "unit_attack:<name>", "multiattack:<name>", "unit_multiattack:<name>",
+    # "template:<attack or multiattack node>" and "order" (attacks added in between or reordered)
+    changed: FrozenSet[str]
+
+    @property
+    def creature_changed(self) -> bool:
+        """
+        Whether the 5e stat block changed
+        """
+        return bool(self.changed_inputs) or any(
+            node.startswith(_CREATURE_NODES) or node == "order" for node in self.changed
+        )
+
+    @property
+    def unit_changed(self) -> bool:
+        """
+        Whether the unit stat block changed
+        """
+        return "name" in self.changed_inputs or any(
+            not node.startswith(_CREATURE_NODES) for node in self.changed
+        )
+
+
+def stat_block_inputs(stat_block: StatBlock) -> Dict[str, Any]:
+    """
+    Returns the values of a stat block that unit conversions depend on
+    :param stat_block: The 5e stat block
+    :return: Mapping of each of INPUTS to its value
+    """
+    inputs: Dict[str, Any] = {"name": stat_block.name}
+    for name, score in ABILITY_FIELDS.items():
+        inputs[name] = stat_block.ability_scores.get_ability_score(score)
+    inputs["proficiency"] = stat_block.proficiency_modifier
+    inputs["armor_class"] = stat_block.armor_class
+    inputs["hit_points"] = stat_block.hit_points
+    inputs["speed"] = stat_block.speed
+    return inputs
+
+
+def attack_dependencies(template: Attack) -> FrozenSet[str]:
+    """
+    Returns the stat block inputs a creature attack depends on
+    :param template: The attack template
+    :return: The input names. Every input if the template does not describe its scaling
+    """
+    scaling = template.scaling
+    if scaling is None:
+        return frozenset(INPUTS)
+    dependencies = {
+        _SCORE_FIELDS[score]
+        for score in (*scaling.to_hit_abilities, *scaling.damage_abilities)
+    }
+    if scaling.to_hit_proficiency or scaling.damage_proficiency:
+        dependencies.add("proficiency")
+    return frozenset(dependencies)
+
+
+class IncrementalConverter:
+    """
+    Converts successive versions of a stat block recomputing only the derived values whose inputs changed
+    """
+
+    def __init__(self, profile: BalanceProfile = DEFAULT_PROFILE):
+        """
+        An incremental stat block converter
+        :param profile: The balance profile of the conversion
+        """
+        self._profile: BalanceProfile = profile
+        self._inputs: Dict[str, Any] = {}
+        self._defenses: Dict[str, Any] = {}
+        self._templates: Dict[str, Tuple[Attack, ...]] = {}
+        self._dependencies: Dict[str, FrozenSet[str]] = {}
+        self._creature_attacks: Dict[str, Tuple[CreatureAttack, ...]] = {}
+        self._unit_attacks: Dict[str, Tuple[UnitAttack, ...]] = {}
+        self._unit_stat_block: Optional[UnitStatBlock] = None
+
+    @property
+    def unit_stat_block(self) -> Optional[UnitStatBlock]:
+        """
+        The last converted unit stat block or None before the first update
+        """
+        return self._unit_stat_block
+
+    def reset(self) -> None:
+        """
+        Forgets every derived value: the next update converts the whole stat block
+        """
+        self._inputs = {}
+        self._defenses = {}
+        self._templates = {}
+        self._dependencies = {}
+        self._creature_attacks = {}
+        self._unit_attacks = {}
+        self._unit_stat_block = None
+
+    def _update_attack(
+        self,
+        node: str,
+        templates: Tuple[Attack, ...],
+        stat_block: StatBlock,
+        changed_inputs: FrozenSet[str],
+        changed: set,
+    ) -> None:
+        template_changed = self._templates.get(node) != templates
+        if template_changed:
+            changed.add(f"template:{node}")
+            self._templates[node] = templates
+            self._dependencies[node] = frozenset().union(
+                *(attack_dependencies(template) for template in templates)
+            )
+        elif not changed_inputs & self._dependencies[node]:
+            return
+        creature_attacks = tuple(
+            template.from_creature(stat_block) for template in templates
+        )
+        if self._creature_attacks.get(node) == creature_attacks:
+            return
+        changed.add(node)
+        self._creature_attacks[node] = creature_attacks
+        unit_attacks = tuple(
+            from_creature_attack(attack, self._profile) for attack in creature_attacks
+        )
+        if self._unit_attacks.get(node) != unit_attacks:
+            changed.add(f"unit_{node}")
+            self._unit_attacks[node] = unit_attacks
+
+    def update(self, stat_block: StatBlock) -> Changes:
+        """
+        Converts a new version of the stat block
+        :param stat_block: The 5e stat block
+        :return: The converted unit stat block and what changed since the previous update
+        """
+        inputs = stat_block_inputs(stat_block)
+        changed_inputs = frozenset(
+            name for name in INPUTS if self._inputs.get(name, _MISSING) != inputs[name]
+        )
+        self._inputs = inputs
+        changed: set = set()
+
+        for node, dependencies in DEPENDENCIES.items():
+            if node in self._defenses and not changed_inputs & dependencies:
+                continue
+            value = DEFENSES[node](stat_block, self._profile.defense)
+            if self._defenses.get(node, _MISSING) != value:
+                changed.add(node)
+                self._defenses[node] = value
+
+        nodes: List[Tuple[str, Tuple[Attack, ...]]] = [
+            (f"attack:{name}", (template,))
+            for name, template in stat_block.attack_templates.items()
+        ]
+        nodes.extend(
+            (f"multiattack:{name}", tuple(templates))
+            for name, templates in stat_block.multiattack_templates.items()
+        )
+        current = {node for node, _ in nodes}
+        for node in list(self._templates):
+            if node not in current:
+                changed.update((node, f"unit_{node}"))
+                del self._templates[node]
+                del self._dependencies[node]
+                self._creature_attacks.pop(node, None)
+                self._unit_attacks.pop(node, None)
+        for node, templates in nodes:
+            self._update_attack(node, templates, stat_block, changed_inputs, changed)
+        order = [node for node, _ in nodes]
+        if [node for node in self._templates] != order:
+            # Attacks were added or reordered: keep the stat block's order
+            self._templates = {node: self._templates[node] for node in order}
+            changed.add("order")
+
+        changes = Changes(self._unit_stat_block, changed_inputs, frozenset(changed))
+        if self._unit_stat_block is None or changes.unit_changed:
+            self._unit_stat_block = UnitStatBlock(
+                stat_block.name,
+                self._defenses["speed"],
+                self._defenses["resistance"],
+                self._defenses["saving_throw"],
+                self._defenses["invulnerable_saving_throw"],
+                self._defenses["hit_points"],
+                [
+                    self._unit_attacks[node][0]
+                    for node in order
+                    if node.startswith("attack:")
+                ],
+                {
+                    node[len("multiattack:") :]: list(self._unit_attacks[node])
+                    for node in order
+                    if node.startswith("multiattack:")
+                },
+            )
+            changes = changes._replace(unit_stat_block=self._unit_stat_block)
+        return changes
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Any
 
 from .ability_scores import AbilityScores
 
@@ -100,6 +100,29 @@ class CreatureAttack(ABC):
         The attack's fixed damage
         """
 
+    @property
+    def recharge(self) -> Optional[int]:
+        """
+        The minimum d6 roll that recharges the attack (i.e. 5 for *Recharge 5-6*).
+        If `None`, the attack does not need to recharge
+        """
+        return None
+
+    @property
+    def uses(self) -> Optional[int]:
+        """
+        The number of times per day the attack can be used.
+        If `None`, the attack can be used without limits
+        """
+        return None
+
+    @property
+    def is_saving_throw(self) -> bool:
+        """
+        Whether the targets make a saving throw against a DC of *to hit* + 8 instead of being hit by an attack roll
+        """
+        return False
+
 
 class StatBlock:
     """
@@ -191,6 +214,22 @@ class Attack(ABC):
         :return: The creature's attack
         """
 
+    @property
+    def scaling(self) -> Optional[Any]:
+        """
+        How the attack scales with the creature's ability scores and proficiency
+        or None if the template does not describe it
+        """
+        return None
+
+    def with_base_damage(self, base_damage: str) -> Optional["Attack"]:
+        """
+        Returns a copy of the template with another base damage
+        :param base_damage: The new base damage expression
+        :return: The new template or None if the template does not support it
+        """
+        return None
+
     @abstractmethod
     def combine(self, other: "Attack") -> "Attack":
         """
@@ -0,0 +1,325 @@
+import functools
+import math
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .ability_scores import score_modifier
+from .balance import (
+    AttackBalance,
+    DefenseBalance,
+    BalanceProfile,
+    DEFAULT_PROFILE,
+    ThresholdTable,
+)
+
+CONSTITUTION_SCORES = range(1, 31)
+PROFICIENCY_BONUSES = range(2, 10)
+TO_HIT_BONUSES = range(-5, 21)
+
+
+class InvalidInverseParamError(ValueError):
+    pass
+
+
+class Interval(NamedTuple):
+    """
+    A half-open interval [low, high). None means unbounded
+    """
+
+    low: Optional[float] = None
+    high: Optional[float] = None
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, (int, float)):
+            return False
+        return (self.low is None or value >= self.low) and (
+            self.high is None or value < self.high
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return self.low is not None and self.high is not None and self.low >= self.high
+
+    def intersect(self, other: "Interval") -> "Interval":
+        """
+        Returns the intersection of two intervals
+        :param other: The other interval
+        :return: The intersection (possibly empty)
+        """
+        low = self.low if other.low is None else other.low
+        if self.low is not None and other.low is not None:
+            low = max(self.low, other.low)
+        high = self.high if other.high is None else other.high
+        if self.high is not None and other.high is not None:
+            high = min(self.high, other.high)
+        return Interval(low, high)
+
+
+class DefenseRegion(NamedTuple):
+    """
+    A region of 5e stat block parameters converting to the same unit defenses
+    """
+
+    armor_class: Interval
+    proficiency: int
+    constitution: Interval
+    hit_points: Interval
+
+
+class AttackRegion(NamedTuple):
+    """
+    A region of 5e attack parameters converting to the same unit skill, strength and armor penetration
+    """
+
+    to_hit: int
+    total_average_damage: Interval
+
+
+@functools.lru_cache(maxsize=None)
+def inverse_table(
+    table: ThresholdTable,
+) -> Dict[Optional[int], Tuple[Interval, ...]]:
+    """
+    Returns the inverse interval index of a threshold table
+    :param table: The threshold table
+    :return: Mapping of each output value to the input intervals that produce it
+    """
+    edges = (None, *table.bounds, None)
+    index: Dict[Optional[int], List[Interval]] = {}
+    for i, value in enumerate(table.values):
+        interval = Interval(edges[i], edges[i + 1])
+        if interval.is_empty:
+            continue
+        intervals = index.setdefault(value, [])
+        if intervals and intervals[-1].high == interval.low:
+            intervals[-1] = Interval(intervals[-1].low, interval.high)
+        else:
+            intervals.append(interval)
+    return {value: tuple(intervals) for value, intervals in index.items()}
+
+
+def _intersect_all(
+    first: Sequence[Interval], second: Sequence[Interval]
+) -> List[Interval]:  # pragma: no cover
+    result = []
+    for a in first:
+        for b in second:
+            intersection = a.intersect(b)
+            if not intersection.is_empty:
+                result.append(intersection)
+    return result
+
+
+def armor_class_intervals(
+    saving_throw: int,
+    invulnerable_saving_throw: Optional[int],
+    profile: DefenseBalance = DEFAULT_PROFILE.defense,
+) -> List[Interval]:
+    """
+    Returns the armor classes converting to the given saving throws
+    :param saving_throw: The desired saving throw
+    :param invulnerable_saving_throw: The desired invulnerable saving throw or None
+    :param profile: The defense balance parameters
+    :return: The armor class intervals
+    """
+    intervals = _intersect_all(
+        inverse_table(profile.saving_throw).get(saving_throw, ()),
+        inverse_table(profile.invulnerable_saving_throw).get(
+            invulnerable_saving_throw, ()
+        ),
+    )
+    return _intersect_all(intervals, (Interval(1, None),))
+
+
+def constitution_interval(modifier_low: int, modifier_high: int) -> Interval:
+    """
+    Returns the constitution scores whose modifier is in [modifier_low, modifier_high]
+    :param modifier_low: The minimum modifier
+    :param modifier_high: The maximum modifier
+    :return: The constitution score interval within the valid scores
+    """
+    low = max(2 * modifier_low + 10, CONSTITUTION_SCORES.start)
+    high = min(2 * modifier_high + 12, CONSTITUTION_SCORES.stop)
+    return Interval(low, max(low, high))
+
+
+def resistance_regions(
+    resistance: int,
+    profile: DefenseBalance = DEFAULT_PROFILE.defense,
+    proficiencies: Sequence[int] = PROFICIENCY_BONUSES,
+) -> List[Tuple[int, Interval]]:
+    """
+    Returns the proficiency bonus and constitution scores converting to the given resistance
+    :param resistance: The desired resistance
+    :param profile: The defense balance parameters
+    :param proficiencies: The proficiency bonuses to consider
+    :return: Pairs of proficiency bonus and constitution score interval
+    """
+    lowest = score_modifier(CONSTITUTION_SCORES.start)
+    regions = []
+    for proficiency in proficiencies:
+        offset = (
+            profile.resistance_base
+            + proficiency // profile.resistance_proficiency_divisor
+        )
+        modifier = resistance - offset
+        interval = (
+            constitution_interval(lowest, modifier)
+            if resistance == 1
+            else constitution_interval(modifier, modifier)
+        )
+        if not interval.is_empty:
+            regions.append((proficiency, interval))
+    return regions
+
+
+def hit_points_interval(
+    hit_points: int, profile: DefenseBalance = DEFAULT_PROFILE.defense
+) -> Interval:
+    """
+    Returns the 5e hit points converting to the given unit hit points
+    :param hit_points: The desired hit points of each creature in the unit
+    :param profile: The defense balance parameters
+    :return: The hit points interval
+    """
+    scale = profile.hit_points_scale
+    return Interval((hit_points - 1) * scale + 1, hit_points * scale + 1)
+
+
+def stat_block_regions(
+    saving_throw: int,
+    invulnerable_saving_throw: Optional[int],
+    resistance: int,
+    hit_points: int,
+    profile: BalanceProfile = DEFAULT_PROFILE,
+    proficiencies: Sequence[int] = PROFICIENCY_BONUSES,
+) -> List[DefenseRegion]:
+    """
+    Enumerates the regions of armor class, proficiency bonus, constitution and hit points of a 5e stat block
+    converting to the given unit defenses
+    :param saving_throw: The desired saving throw
+    :param invulnerable_saving_throw: The desired invulnerable saving throw or None
+    :param resistance: The desired resistance
+    :param hit_points: The desired hit points of each creature in the unit
+    :param profile: The balance profile
+    :param proficiencies: The proficiency bonuses to consider
+    :return: The feasible regions. Empty if the unit defenses can not be obtained
+    """
+    if not isinstance(hit_points, int) or hit_points < 1:
+        raise InvalidInverseParamError(
+            f"hit_points should be a positive integer. Got {hit_points}."
+        )
+    if not isinstance(resistance, int) or resistance < 1:
+        raise InvalidInverseParamError(
+            f"resistance should be a positive integer. Got {resistance}."
+        )
+    armor_classes = armor_class_intervals(
+        saving_throw, invulnerable_saving_throw, profile.defense
+    )
+    hp = hit_points_interval(hit_points, profile.defense)
+    return [
+        DefenseRegion(armor_class, proficiency, constitution, hp)
+        for armor_class in armor_classes
+        for proficiency, constitution in resistance_regions(
+            resistance, profile.defense, proficiencies
+        )
+    ]
+
+
+def to_hit_intervals(
+    attack_skill: Optional[int], profile: AttackBalance = DEFAULT_PROFILE.attack
+) -> List[Interval]:
+    """
+    Returns the *to hit* bonuses converting to the given attack skill
+    :param attack_skill: The desired attack skill
+    :param profile: The attack balance parameters
+    :return: The *to hit* intervals
+    """
+    return list(inverse_table(profile.attack_skill).get(attack_skill, ()))
+
+
+def _floor_interval(
+    value: int, step: float, minimum: float = 0
+) -> Interval:  # pragma: no cover
+    # The x >= minimum such that floor(x / step) == value
+    return Interval(value * step, (value + 1) * step).intersect(Interval(minimum, None))
+
+
+def strength_damage_interval(
+    strength: int, to_hit: int, profile: AttackBalance = DEFAULT_PROFILE.attack
+) -> Interval:
+    """
+    Returns the total average damage converting to the given strength for a *to hit* bonus
+    :param strength: The desired strength
+    :param to_hit: The *to hit* bonus
+    :param profile: The attack balance parameters
+    :return: The total average damage interval (possibly empty)
+    """
+    root = strength - to_hit - profile.strength_offset
+    if strength == 1:
+        # Strength is clamped to 1: every root up to the computed one qualifies
+        return Interval(0, (root + 1) ** 2 - 1) if root >= 1 else Interval(0, 0)
+    if strength < 1 or root < 1:
+        return Interval(0, 0)
+    return Interval(root**2 - 1, (root + 1) ** 2 - 1)
+
+
+def armor_penetration_damage_interval(
+    armor_penetration: int,
+    to_hit: int,
+    is_aoe: bool,
+    profile: AttackBalance = DEFAULT_PROFILE.attack,
+) -> Interval:
+    """
+    Returns the total average damage converting to the given armor penetration for a *to hit* bonus
+    :param armor_penetration: The desired armor penetration (non-positive)
+    :param to_hit: The *to hit* bonus
+    :param is_aoe: Whether the attack is an area of effect attack
+    :param profile: The attack balance parameters
+    :return: The total average damage interval (possibly empty)
+    """
+    to_hit_pen = (
+        profile.area_of_effect_armor_penetration
+        if is_aoe
+        else math.floor(max(to_hit, 0) / profile.armor_penetration_to_hit_step)
+    )
+    damage_pen = -armor_penetration - to_hit_pen
+    if damage_pen < 0:
+        return Interval(0, 0)
+    return _floor_interval(damage_pen, profile.armor_penetration_damage_step)
+
+
+def attack_regions(
+    attack_skill: Optional[int],
+    strength: int,
+    armor_penetration: int,
+    is_aoe: bool = False,
+    profile: BalanceProfile = DEFAULT_PROFILE,
+    to_hit_bonuses: Sequence[int] = TO_HIT_BONUSES,
+) -> List[AttackRegion]:
+    """
+    Enumerates the *to hit* bonuses and total average damage ranges of a 5e attack
+    converting to the given unit attack skill, strength and armor penetration
+    :param attack_skill: The desired attack skill
+    :param strength: The desired strength
+    :param armor_penetration: The desired armor penetration (non-positive)
+    :param is_aoe: Whether the attack is an area of effect attack
+    :param profile: The balance profile
+    :param to_hit_bonuses: The *to hit* bonuses to consider
+    :return: The feasible regions. Empty if the unit attack can not be obtained
+    """
+    regions = []
+    for interval in to_hit_intervals(attack_skill, profile.attack):
+        for to_hit in to_hit_bonuses:
+            if to_hit not in interval:
+                continue
+            damage = strength_damage_interval(
+                strength, to_hit, profile.attack
+            ).intersect(
+                armor_penetration_damage_interval(
+                    armor_penetration, to_hit, is_aoe, profile.attack
+                )
+            )
+            if not damage.is_empty:
+                regions.append(AttackRegion(to_hit, damage))
+    return regions
@@ -0,0 +1,306 @@
+import json
+import os
+import struct
+import tempfile
+import zlib
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from .ability_scores import Scores
+from .block_format import FIELDS
+
+MAGIC = b"5EJOURNAL"
+VERSION = 1
+SUFFIX = ".journal"
+
+_HEADER = struct.Struct("<9sB")
+# Payload length and crc32
+_FRAME = struct.Struct("<II")
+
+
+class InvalidJournalError(ValueError):
+    pass
+
+
+def journal_path(path: str) -> str:
+    """
+    Returns the path of the journal kept alongside a stat block file
+    :param path: The stat block file path
+    :return: The journal path
+    """
+    return path + SUFFIX
+
+
+def _attack_to_json(attack: Dict[str, Any]) -> Dict[str, Any]:  # pragma: no cover
+    attack = dict(attack)
+    ability = attack["ability_score_scaling"]
+    attack["ability_score_scaling"] = None if ability is None else ability.name
+    return attack
+
+
+def _attack_from_json(attack: Dict[str, Any]) -> Dict[str, Any]:  # pragma: no cover
+    ability = attack["ability_score_scaling"]
+    attack["ability_score_scaling"] = None if ability is None else Scores[ability]
+    return attack
+
+
+def _copy(record: Dict[str, Any]) -> Dict[str, Any]:  # pragma: no cover
+    copied = {field: record[field] for field in FIELDS}
+    copied["attacks"] = [
+        dict(attack, target=dict(attack["target"])) for attack in record["attacks"]
+    ]
+    copied["multiattacks"] = {
+        name: list(attack_names)
+        for name, attack_names in record["multiattacks"].items()
+    }
+    return copied
+
+
+def snapshot(record: Dict[str, Any]) -> list:
+    """
+    Returns the journal entry holding a whole stat block record
+    :param record: The stat block record (see block_format)
+    :return: The entry
+    """
+    converted = {field: record[field] for field in FIELDS}
+    converted["attacks"] = [_attack_to_json(attack) for attack in record["attacks"]]
+    converted["multiattacks"] = record["multiattacks"]
+    return ["snapshot", converted]
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any]) -> List[list]:
+    """
+    Returns the journal entries turning a stat block record into another one. Attack names are unique, so
+    removed attacks are found by name and the remaining ones are compared by position.
+    :param old: The previous stat block record
+    :param new: The current stat block record
+    :return: The entries, empty if the records are equal
+    """
+    entries: List[list] = []
+    for field in FIELDS:
+        if old[field] != new[field]:
+            entries.append(["set", field, new[field]])
+    new_names = {attack["name"] for attack in new["attacks"]}
+    attacks = list(old["attacks"])
+    for i in reversed(range(len(attacks))):
+        if attacks[i]["name"] not in new_names and len(attacks) > len(new["attacks"]):
+            entries.append(["remove_attack", i])
+            attacks.pop(i)
+    for i in reversed(range(len(new["attacks"]), len(attacks))):
+        entries.append(["remove_attack", i])
+    for i, attack in enumerate(new["attacks"]):
+        if i >= len(attacks) or attacks[i] != attack:
+            entries.append(["attack", i, _attack_to_json(attack)])
+    for name in old["multiattacks"]:
+        if name not in new["multiattacks"]:
+            entries.append(["remove_multiattack", name])
+    for name, attack_names in new["multiattacks"].items():
+        if old["multiattacks"].get(name) != attack_names:
+            entries.append(["multiattack", name, attack_names])
+    # Multiattacks are shown in insertion order: fall back to a snapshot if replaying would reorder them
+    kept = [name for name in old["multiattacks"] if name in new["multiattacks"]]
+    added = [name for name in new["multiattacks"] if name not in old["multiattacks"]]
+    if kept + added != list(new["multiattacks"]):
+        return [snapshot(new)]
+    return entries
+
+
+def apply(record: Optional[Dict[str, Any]], entry: list) -> Dict[str, Any]:
+    """
+    Applies a journal entry to a stat block record
+    :param record: The stat block record (modified in place) or None before the first snapshot
+    :param entry: The entry
+    :return: The updated stat block record
+    """
+    try:
+        operation, *args = entry
+        if operation == "snapshot":
+            (converted,) = args
+            record = _copy(converted)
+            for attack in record["attacks"]:
+                _attack_from_json(attack)
+            return record
+        if record is None:
+            raise InvalidJournalError("The journal does not start with a snapshot.")
+        if operation == "set":
+            field, value = args
+            if field not in FIELDS:
+                raise InvalidJournalError(f"Unknown field {field}.")
+            record[field] = value
+        elif operation == "attack":
+            i, attack = args
+            attack = _attack_from_json(dict(attack, target=dict(attack["target"])))
+            if i == len(record["attacks"]):
+                record["attacks"].append(attack)
+            else:
+                record["attacks"][i] = attack
+        elif operation == "remove_attack":
+            (i,) = args
+            record["attacks"].pop(i)
+        elif operation == "multiattack":
+            name, attack_names = args
+            record["multiattacks"][name] = list(attack_names)
+        elif operation == "remove_multiattack":
+            (name,) = args
+            record["multiattacks"].pop(name)
+        else:
+            raise InvalidJournalError(f"Unknown journal entry {operation}.")
+    except (TypeError, ValueError, KeyError, IndexError) as e:
+        if isinstance(e, InvalidJournalError):
+            raise
+        raise InvalidJournalError(f"Invalid journal entry {entry}: {e}")
+    return record
+
+
+def _frame(entry: list) -> bytes:  # pragma: no cover
+    payload = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+    return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def read_journal(data: bytes) -> Tuple[List[list], int]:
+    """
+    Reads the entries of a journal. A torn or corrupted tail (e.g. a crash while appending) ends the journal.
+    :param data: The journal contents
+    :return: The entries and the length of the valid part of the data
+    """
+    if len(data) < _HEADER.size:
+        raise InvalidJournalError("Missing journal header.")
+    magic, version = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise InvalidJournalError("Missing journal header.")
+    if version > VERSION:
+        raise InvalidJournalError(
+            f"Unsupported journal version {version}: this version reads up to {VERSION}."
+        )
+    entries = []
+    offset = _HEADER.size
+    while offset + _FRAME.size <= len(data):
+        length, crc = _FRAME.unpack_from(data, offset)
+        start = offset + _FRAME.size
+        payload = bytes(data[start : start + length])
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        try:
+            entries.append(json.loads(payload.decode("utf-8")))
+        except (UnicodeDecodeError, ValueError):
+            break
+        offset = start + length
+    return entries, offset
+
+
+def replay(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Rebuilds the stat block record autosaved in a journal file
+    :param path: The journal path
+    :return: The stat block record or None if the journal is missing or holds no snapshot
+    """
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return None
+    entries, _ = read_journal(data)
+    record = None
+    for entry in entries:
+        record = apply(record, entry)
+    return record
+
+
+class Journal:
+    """
+    Append-only log of the edits of a stat block. Each autosave appends the few entries that changed instead of
+    rewriting the whole file, and the log is compacted into a single snapshot once it grows.
+    """
+
+    def __init__(self, path: str, compact_after: int = 256, fsync: bool = True):
+        """
+        A journal. The first record appended replaces any previous contents of the file.
+        :param path: The journal path (see journal_path)
+        :param compact_after: The number of entries after which the journal is rewritten as a snapshot
+        :param fsync: Whether to flush appends to the disk before returning
+        """
+        if not isinstance(compact_after, int) or compact_after < 1:
+            raise InvalidJournalError(
+                f"compact_after should be a positive integer. Got {compact_after}."
+            )
+        self._path: str = path
+        self._compact_after: int = compact_after
+        self._fsync: bool = fsync
+        self._record: Optional[Dict[str, Any]] = None
+        self._entries: int = 0
+
+    @property
+    def path(self) -> str:
+        """
+        The journal path
+        """
+        return self._path
+
+    @property
+    def entries(self) -> int:
+        """
+        The number of entries in the journal
+        """
+        return self._entries
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """
+        Journals the current state of the stat block
+        :param record: The stat block record (see block_format)
+        :return: The number of entries written
+        """
+        if self._record is None:
+            self.compact(record)
+            return 1
+        entries = diff(self._record, record)
+        if not entries:
+            return 0
+        if self._entries + len(entries) > self._compact_after:
+            self.compact(record)
+            return 1
+        with open(self._path, "ab") as file:
+            file.write(b"".join(_frame(entry) for entry in entries))
+            self._sync(file)
+        self._record = _copy(record)
+        self._entries += len(entries)
+        return len(entries)
+
+    def compact(self, record: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Atomically rewrites the journal as a single snapshot
+        :param record: The stat block record, the last one appended if None
+        """
+        if record is None:
+            record = self._record
+        if record is None:
+            raise InvalidJournalError("Nothing to compact.")
+        directory = os.path.dirname(os.path.abspath(self._path))
+        file, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(file, "wb") as temporary_file:
+                temporary_file.write(_HEADER.pack(MAGIC, VERSION))
+                temporary_file.write(_frame(snapshot(record)))
+                self._sync(temporary_file)
+            os.replace(temporary, self._path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self._record = _copy(record)
+        self._entries = 1
+
+    def discard(self) -> None:
+        """
+        Removes the journal, e.g. once the stat block has been saved
+        """
+        try:
+            os.remove(self._path)
+        except FileNotFoundError:
+            pass
+        self._record = None
+        self._entries = 0
+
+    def _sync(self, file) -> None:  # pragma: no cover
+        if self._fsync:
+            file.flush()
+            os.fsync(file.fileno())
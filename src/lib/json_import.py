@@ -0,0 +1,505 @@
+import json
+import os
+import re
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from fractions import Fraction
+from collections import deque
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from .block_format import (
+    ABILITY_FIELDS,
+    ATTACK_ROLL,
+    SAVING_THROW,
+    stat_block_from_record,
+)
+
+# Ability score fields of the SRD monster JSON by record field
+ABILITY_KEYS = dict(
+    zip(
+        ABILITY_FIELDS,
+        ("strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma"),
+    )
+)
+_NUMBERS = {
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+}
+_ATTACK = re.compile(
+    r"(Melee or Ranged|Melee|Ranged) (?:Weapon|Spell) Attack:\s*([-+−–]\s*\d+) to hit"
+    r"(?:,\s*reach (\d+) ft\.)?(?:\s*or)?(?:,?\s*range (\d+)(?:/\d+)? ft\.)?",
+    re.IGNORECASE,
+)
+_SAVE = re.compile(
+    r"DC (\d+) (Strength|Dexterity|Constitution|Intelligence|Wisdom|Charisma) saving throw",
+    re.IGNORECASE,
+)
+# The average and the dice of a damage roll, i.e. "13 (2d8 + 4)" or a fixed "1"
+_DAMAGE = re.compile(
+    r"(\d+)(?:\s*\(([^)]*\d+d\d+[^)]*)\))?\s+\w+\s+damage", re.IGNORECASE
+)
+# Only rolls joined by "plus" add up: any other roll is an alternative (i.e. versatile or thrown damage)
+_PLUS = re.compile(r"[\s,]*plus\b", re.IGNORECASE)
+_HIT = re.compile(r"Hit:(.*?)(?:\.(?:\s|$)|$)", re.IGNORECASE | re.DOTALL)
+_LINE = re.compile(
+    r"(\d+)-(?:foot|ft\.?)[- ]line(?: that is (\d+) (?:feet|foot|ft\.?) wide)?",
+    re.IGNORECASE,
+)
+_CYLINDER = re.compile(
+    r"(\d+)-(?:foot|ft\.?)[- ]radius,? (\d+)-(?:foot|ft\.?)[- ](?:high|tall) cylinder",
+    re.IGNORECASE,
+)
+_AREA = re.compile(
+    r"(\d+)-(?:foot|ft\.?)(?:[- ]radius)? (cone|cube|square|sphere|circle)",
+    re.IGNORECASE,
+)
+_RANGE = re.compile(r"(?:within|range of) (\d+) (?:feet|ft\.?)", re.IGNORECASE)
+# The usage limit of an action name, i.e. "Fire Breath (Recharge 5-6)" or "Fireball (3/Day)"
+_LIMITED_USE = re.compile(
+    r"\s*\((?:recharge (\d)(?:\s*[-−–]\s*6)?|(\d+)\s*/\s*day(?: each)?|(recharges after a (?:short or )?long rest))\)\s*$",
+    re.IGNORECASE,
+)
+_MULTIATTACK_COUNT = re.compile(
+    r"\b(one|two|three|four|five|six|seven|eight|nine|ten|\d+)\b(?: \w+)?? (?:with|using) (?:its|his|her|their) ([\w' -]+?)(?=,| and\b| or\b|\.|$)",
+    re.IGNORECASE,
+)
+_MULTIATTACK_TOTAL = re.compile(
+    r"makes (one|two|three|four|five|six|seven|eight|nine|ten|\d+) ([\w' -]+?) attacks",
+    re.IGNORECASE,
+)
+
+
+class InvalidJsonImportError(ValueError):
+    pass
+
+
+class ImportResult(NamedTuple):
+    """
+    The outcome of the conversion of a monster
+    """
+
+    # The position of the monster in the source
+    index: int
+    name: Optional[str]
+    # The stat block record (see block_format) or None if the conversion failed
+    record: Optional[Dict[str, Any]]
+    # Why the conversion failed or None
+    error: Optional[str]
+    # The actions that could not be converted to attacks
+    skipped: Tuple[str, ...] = ()
+
+
+def _number(text: str) -> int:
+    text = text.lower()
+    return _NUMBERS[text] if text in _NUMBERS else int(text)
+
+
+def _damage(hit: str) -> Optional[str]:
+    # The first damage roll and the ones added to it, i.e. "2d8+4+2d6" for "13 (2d8 + 4) slashing damage plus
+    # 7 (2d6) fire damage" and "1d8+3" for "7 (1d8 + 3) slashing damage, or 8 (1d10 + 3) slashing damage if used
+    # with two hands"
+    parts = []
+    end = None
+    for match in _DAMAGE.finditer(hit):
+        if end is not None and _PLUS.match(hit, end, match.start()) is None:
+            break
+        average, dice = match.groups()
+        parts.append("".join(dice.split()) if dice else average)
+        end = match.end()
+    if not parts:
+        return None
+    return "+".join(parts).replace("−", "-").replace("–", "-").replace("+-", "-")
+
+
+def _target(description: str) -> Tuple[str, int, int]:
+    match = _LINE.search(description)
+    if match is not None:
+        return "line", int(match.group(1)), int(match.group(2) or 5)
+    match = _CYLINDER.search(description)
+    if match is not None:
+        return "cylinder", int(match.group(1)), int(match.group(2))
+    match = _AREA.search(description)
+    if match is not None:
+        return match.group(2).lower(), int(match.group(1)), 1
+    return "single target", 1, 1
+
+
+def parse_action_name(name: str) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Splits the usage limit off an action name (i.e. "Fire Breath (Recharge 5-6)"). An action that recharges after
+    a rest is counted as one use per day.
+    :param name: The action name
+    :return: The name without the limit, the minimum d6 roll that recharges the action or None and its uses per day
+    or None
+    """
+    match = _LIMITED_USE.search(name)
+    if match is None:
+        return name, None, None
+    recharge, uses_per_day, rest = match.groups()
+    return (
+        name[: match.start()].strip(),
+        None if recharge is None else int(recharge),
+        1 if rest is not None else None if uses_per_day is None else int(uses_per_day),
+    )
+
+
+def parse_action_description(description: str) -> Optional[Dict[str, Any]]:
+    """
+    Parses the description of a stat block action written in the SRD style (i.e. "Melee Weapon Attack: +6 to hit,
+    reach 5 ft., one target. Hit: 13 (2d8 + 4) bludgeoning damage.").
+    To hit bonuses and damage are read as written, so the attack does not scale with the creature.
+    :param description: The action description
+    :return: The fields of an attack record (see block_format) but its name, or None if the action is not an attack
+    """
+    attack = _ATTACK.search(description)
+    if attack is not None:
+        hit = _HIT.search(description, attack.end())
+        damage = _damage(hit.group(1) if hit is not None else "")
+        if damage is None:
+            return None
+        kind, to_hit, reach, weapon_range = attack.groups()
+        ranged = kind.lower() == "ranged" or (
+            reach is None and weapon_range is not None
+        )
+        return {
+            "kind": ATTACK_ROLL,
+            "weapon_range": int(
+                (weapon_range if ranged else reach) or reach or weapon_range or 5
+            ),
+            "multiattack": 1,
+            "target": {"name": "single target", "first_param": 1, "second_param": 1},
+            "base_damage": damage,
+            "base_to_hit": int(
+                "".join(to_hit.replace("−", "-").replace("–", "-").split())
+            ),
+            "ranged": ranged,
+            "ability_score_scaling": None,
+            "to_hit_scaling": False,
+            "to_hit_proficiency": False,
+            "damage_scaling": False,
+            "damage_proficiency": False,
+            "recharge": None,
+            "uses_per_day": None,
+        }
+    save = _SAVE.search(description)
+    if save is None:
+        return None
+    # Damage on a failed save is written after the saving throw
+    damage = _damage(description[save.end() :]) or _damage(description)
+    if damage is None:
+        return None
+    name, first_param, second_param = _target(description)
+    within = _RANGE.search(description)
+    if within is not None:
+        weapon_range = int(within.group(1))
+    elif name == "single target":
+        weapon_range = 5
+    else:
+        weapon_range = first_param
+    return {
+        "kind": SAVING_THROW,
+        "weapon_range": weapon_range,
+        "multiattack": 1,
+        "target": {
+            "name": name,
+            "first_param": first_param,
+            "second_param": second_param,
+        },
+        "base_damage": damage,
+        "dc": int(save.group(1)),
+        "ranged": weapon_range > 5,
+        "ability_score_scaling": None,
+        "damage_scaling": False,
+        "damage_proficiency": False,
+        "recharge": None,
+        "uses_per_day": None,
+    }
+
+
+def _attack_name(phrase: str, attack_names: Iterable[str]) -> Optional[str]:
+    # The longest attack name the phrase starts with, so that "claws" matches "Claw"
+    phrase = phrase.strip().lower()
+    matches = [
+        name for name in attack_names if phrase.startswith(name.lower().rstrip("s"))
+    ]
+    return max(matches, key=len) if matches else None
+
+
+def parse_multiattack(
+    description: str, attack_names: Iterable[str]
+) -> Optional[List[str]]:
+    """
+    Parses the description of a Multiattack action (i.e. "The dragon makes three attacks: one with its bite
+    and two with its claws.")
+    :param description: The action description
+    :param attack_names: The names of the creature's attacks
+    :return: The names of the attacks of the multiattack or None if they can not be determined
+    """
+    attack_names = list(attack_names)
+    names: List[str] = []
+    for count, phrase in _MULTIATTACK_COUNT.findall(description):
+        name = _attack_name(phrase, attack_names)
+        if name is None:
+            continue
+        names.extend([name] * _number(count))
+    if names:
+        return names
+    total = _MULTIATTACK_TOTAL.search(description)
+    if total is None:
+        return None
+    name = _attack_name(total.group(2), attack_names)
+    if name is None and len(attack_names) == 1:
+        # "makes two melee attacks" with a single attack
+        name = attack_names[0]
+    if name is None:
+        return None
+    return [name] * _number(total.group(1))
+
+
+def _first_int(value: Any, default: Optional[int] = None) -> int:
+    if isinstance(value, bool):
+        raise InvalidJsonImportError(f"Expected a number. Got {value}.")
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, list) and value:
+        return _first_int(value[0], default)
+    if isinstance(value, dict):
+        for key in ("value", "walk"):
+            if key in value:
+                return _first_int(value[key], default)
+        if value:
+            return _first_int(next(iter(value.values())), default)
+    if isinstance(value, str):
+        match = re.search(r"\d+", value)
+        if match is not None:
+            return int(match.group())
+    if default is None:
+        raise InvalidJsonImportError(f"Expected a number. Got {value}.")
+    return default
+
+
+def _proficiency(monster: Dict[str, Any]) -> int:
+    if "proficiency_bonus" in monster:
+        return _first_int(monster["proficiency_bonus"])
+    challenge_rating = monster.get("challenge_rating", monster.get("cr", 0))
+    challenge_rating = Fraction(str(challenge_rating).strip() or "0")
+    return 2 + max(int(challenge_rating) - 1, 0) // 4
+
+
+def record_from_monster(
+    monster: Dict[str, Any],
+) -> Tuple[Dict[str, Any], Tuple[str, ...]]:
+    """
+    Converts a monster of the SRD JSON format (as in the 5e SRD API and Open5e dumps) to a stat block record
+    :param monster: The monster
+    :return: The stat block record (see block_format) and the names of the actions that are not attacks
+    """
+    if not isinstance(monster, dict):
+        raise InvalidJsonImportError(f"Expected a JSON object. Got {type(monster)}.")
+    try:
+        record: Dict[str, Any] = {
+            field: _first_int(monster[key]) for field, key in ABILITY_KEYS.items()
+        }
+        record["name"] = str(monster["name"])
+        record["hp"] = _first_int(monster["hit_points"])
+        record["ac"] = _first_int(monster["armor_class"])
+    except KeyError as e:
+        raise InvalidJsonImportError(f"Missing field {e}.")
+    record["speed"] = _first_int(monster.get("speed"), 30)
+    record["proficiency"] = _proficiency(monster)
+    attacks: Dict[str, Dict[str, Any]] = {}
+    multiattacks = []
+    skipped = []
+    for action in monster.get("actions") or []:
+        name = str(action.get("name", "")).strip()
+        description = str(action.get("desc", ""))
+        if not name:
+            continue
+        if name.lower() == "multiattack":
+            multiattacks.append(description)
+            continue
+        attack = parse_action_description(description)
+        attack_name, recharge, uses_per_day = parse_action_name(name)
+        if attack is None or attack_name in attacks:
+            skipped.append(name)
+            continue
+        attack["name"] = attack_name
+        attack["recharge"] = recharge
+        attack["uses_per_day"] = uses_per_day
+        attacks[attack_name] = attack
+    record["attacks"] = list(attacks.values())
+    record["multiattacks"] = {}
+    for i, description in enumerate(multiattacks):
+        attack_names = parse_multiattack(description, attacks)
+        if attack_names is None:
+            skipped.append("Multiattack")
+            continue
+        record["multiattacks"][
+            "Multiattack" if i == 0 else f"Multiattack {i + 1}"
+        ] = attack_names
+    return record, tuple(skipped)
+
+
+def convert_monster(index: int, monster: Any) -> ImportResult:
+    """
+    Converts a monster to a validated stat block record, reporting failures instead of raising
+    :param index: The position of the monster in the source
+    :param monster: The monster
+    :return: The outcome of the conversion
+    """
+    name = monster.get("name") if isinstance(monster, dict) else None
+    try:
+        record, skipped = record_from_monster(monster)
+        # Building the stat block validates every value of the record
+        stat_block_from_record(record)
+    except ValueError as e:
+        return ImportResult(index, name, None, str(e))
+    return ImportResult(index, name, record, None, skipped)
+
+
+def _convert_batch(start: int, monsters: List[Any]) -> List[ImportResult]:
+    return [convert_monster(start + i, monster) for i, monster in enumerate(monsters)]
+
+
+def iter_json(
+    file: IO[str], chunk_size: int = 1 << 16, max_record_size: int = 1 << 26
+) -> Iterator[Any]:
+    """
+    Lazily parses the values of a JSON array, of NDJSON or of concatenated JSON values.
+    Only one value and one chunk are held in memory at a time.
+    :param file: The text file
+    :param chunk_size: The number of characters read at a time
+    :param max_record_size: The size in characters above which an incomplete value is considered malformed
+    :return: An iterator over the values
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    consumed = 0
+    eof = False
+    in_array = None
+
+    def fill(size: int) -> bool:
+        nonlocal buffer, position, eof
+        chunk = file.read(size)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[position:] + chunk
+        position = 0
+        return True
+
+    while True:
+        # Skip the separators
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer) or not fill(chunk_size):
+                break
+        if position >= len(buffer):
+            return
+        if in_array is None:
+            in_array = buffer[position] == "["
+            if in_array:
+                position += 1
+                continue
+        if in_array and buffer[position] == "]":
+            position += 1
+            in_array = False
+            continue
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as e:
+            if not eof and len(buffer) - position < max_record_size:
+                # The value may continue in the next chunk: read as much again to keep parsing linear
+                fill(max(chunk_size, len(buffer) - position))
+                continue
+            raise InvalidJsonImportError(
+                f"Malformed JSON at character {consumed + e.pos - position}: {e.msg}."
+            )
+        if end == len(buffer) and not eof and fill(chunk_size):
+            # A number may continue in the next chunk
+            continue
+        consumed += end - position
+        position = end
+        yield value
+
+
+def import_monsters(
+    file: IO[str],
+    workers: Optional[int] = 1,
+    batch_size: int = 256,
+    key: Optional[str] = None,
+) -> Iterator[ImportResult]:
+    """
+    Streams the monsters of a JSON or NDJSON file and converts them to stat block records.
+    Conversion errors are reported per monster and do not stop the import.
+    :param file: The text file (a JSON array, NDJSON or concatenated JSON objects)
+    :param workers: The number of worker processes converting the monsters. If 1, they are converted in this process
+    :param batch_size: The number of monsters sent to a worker at a time
+    :param key: The field holding the array of monsters of each value (i.e. "results" for Open5e pages) or None
+    :return: An iterator over the results, in source order
+    """
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise InvalidJsonImportError(
+            f"workers should be a positive integer or None. Got {workers}."
+        )
+    if not isinstance(batch_size, int) or batch_size < 1:
+        raise InvalidJsonImportError(
+            f"batch_size should be a positive integer. Got {batch_size}."
+        )
+
+    def monsters():
+        for value in iter_json(file):
+            if key is None:
+                yield value
+            elif isinstance(value, dict) and isinstance(value.get(key), list):
+                yield from value[key]
+            else:
+                raise InvalidJsonImportError(f"Expected an object with a {key} array.")
+
+    def batches():
+        batch = []
+        start = 0
+        for monster in monsters():
+            batch.append(monster)
+            if len(batch) == batch_size:
+                yield start, batch
+                start += len(batch)
+                batch = []
+        if batch:
+            yield start, batch
+
+    if workers == 1:
+        for start, batch in batches():
+            yield from _convert_batch(start, batch)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # At most two batches per worker are in flight, so memory does not grow with the file
+        pending: Deque[Future] = deque()
+        limit = 2 * (workers or os.cpu_count() or 1)
+        for start, batch in batches():
+            pending.append(executor.submit(_convert_batch, start, batch))
+            if len(pending) >= limit:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
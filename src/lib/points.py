@@ -0,0 +1,230 @@
+import functools
+import numpy as np
+
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from .combat import expected_damage, unsaved_wound_probability
+from .interfaces import UnitAttack, UnitStatBlock
+from .reference import (
+    REFERENCE_RESISTANCE,
+    REFERENCE_SAVING_THROW,
+    REFERENCE_HIT_POINTS,
+    REFERENCE_ATTACK,
+)
+from .unit_attacks import MeleeUnitAttack
+
+
+class InvalidPointsFormulaError(ValueError):
+    pass
+
+
+class PointsFormula(NamedTuple):
+    """
+    The weights of the point cost of a unit's creature.
+    Durability is the number of reference attacks needed to slay one creature and offense the expected damage
+    of its best attack or multiattack against the reference defender, each attack weighted by its range.
+    """
+
+    base: float = 5.0
+    durability: float = 2.0
+    offense: float = 10.0
+    # Offense multiplier added for each foot of range
+    range: float = 0.005
+    # Points for each foot of speed
+    speed: float = 0.1
+    # Costs are rounded up to a multiple of this
+    step: int = 1
+
+    def validate(self) -> None:
+        """
+        Raises InvalidPointsFormulaError if the formula is not consistent
+        """
+        for name in ("base", "durability", "offense", "range", "speed"):
+            value = getattr(self, name)
+            if not isinstance(value, (int, float)) or value < 0:
+                raise InvalidPointsFormulaError(
+                    f"{name} should be a non-negative number. Got {value}."
+                )
+        if not isinstance(self.step, int) or self.step < 1:
+            raise InvalidPointsFormulaError(
+                f"step should be a positive integer. Got {self.step}."
+            )
+
+
+DEFAULT_FORMULA = PointsFormula()
+
+
+class AttackValuation(NamedTuple):
+    """
+    The formula independent valuation of a unit attack
+    """
+
+    expected_damage: float
+    range: int
+
+
+class UnitValuations(NamedTuple):
+    """
+    The formula independent valuations of many units as columns.
+    The attacks and multiattacks of the i-th unit are the profiles from profile_offsets[i]
+    to profile_offsets[i + 1].
+    """
+
+    names: Tuple[str, ...]
+    durability: np.ndarray
+    speed: np.ndarray
+    # The expected damage of each profile
+    profile_damage: np.ndarray
+    # The sum of the expected damage times the range of each attack of each profile
+    profile_range_damage: np.ndarray
+    profile_offsets: np.ndarray
+
+
+@functools.lru_cache(maxsize=None)
+def _attack_valuation(
+    weapon_range: int,
+    attacks: str,
+    skill: Optional[int],
+    strength: int,
+    ap: int,
+    damage: str,
+    aoe: bool,
+) -> AttackValuation:  # pragma: no cover
+    attack = MeleeUnitAttack(
+        "profile", weapon_range, attacks, skill, strength, ap, damage, aoe
+    )
+    return AttackValuation(
+        expected_damage(
+            attack,
+            REFERENCE_RESISTANCE,
+            REFERENCE_SAVING_THROW,
+            None,
+            REFERENCE_HIT_POINTS,
+        ),
+        weapon_range,
+    )
+
+
+def attack_valuation(attack: UnitAttack) -> AttackValuation:
+    """
+    Returns the formula independent valuation of a unit attack.
+    Valuations are cached by attack profile (every field but the name), so units sharing a weapon reuse them.
+    :param attack: The unit attack
+    :return: The expected damage against the reference defender and the range
+    """
+    return _attack_valuation(
+        attack.range,
+        attack.number_of_attacks,
+        attack.attack_skill,
+        attack.strength,
+        attack.armor_penetration,
+        attack.damage,
+        attack.is_aoe,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def durability(
+    resistance: int,
+    saving_throw: int,
+    invulnerable_saving_throw: Optional[int],
+    hit_points: int,
+) -> float:
+    """
+    Returns the number of reference attacks needed to slay one creature
+    :param resistance: The unit's resistance
+    :param saving_throw: The unit's saving throw
+    :param invulnerable_saving_throw: The unit's invulnerable saving throw or None
+    :param hit_points: The hit points of each creature in the unit
+    :return: The expected number of reference attacks
+    """
+    return hit_points / unsaved_wound_probability(
+        REFERENCE_ATTACK, resistance, saving_throw, invulnerable_saving_throw
+    )
+
+
+def valuations(stat_blocks: Iterable[UnitStatBlock]) -> UnitValuations:
+    """
+    Values the components of many units. Component valuations are cached, so units sharing
+    weapons or defenses reuse them, and the result can be priced with any formula.
+    :param stat_blocks: The unit stat blocks
+    :return: The valuations as columns
+    """
+    names: List[str] = []
+    durabilities: List[float] = []
+    speeds: List[int] = []
+    damages: List[float] = []
+    range_damages: List[float] = []
+    offsets: List[int] = []
+    for stat_block in stat_blocks:
+        names.append(stat_block.name)
+        durabilities.append(
+            durability(
+                stat_block.resistance,
+                stat_block.saving_throw,
+                stat_block.invulnerable_saving_throw,
+                stat_block.hit_points,
+            )
+        )
+        speeds.append(stat_block.speed)
+        offsets.append(len(damages))
+        profiles = [[attack] for attack in stat_block.attacks]
+        profiles.extend(stat_block.multiattacks.values())
+        for profile in profiles:
+            attack_valuations = [attack_valuation(attack) for attack in profile]
+            damages.append(sum(v.expected_damage for v in attack_valuations))
+            range_damages.append(
+                sum(v.expected_damage * v.range for v in attack_valuations)
+            )
+    offsets.append(len(damages))
+    return UnitValuations(
+        tuple(names),
+        np.array(durabilities, dtype=float),
+        np.array(speeds, dtype=float),
+        np.array(damages, dtype=float),
+        np.array(range_damages, dtype=float),
+        np.array(offsets, dtype=int),
+    )
+
+
+def price(
+    unit_valuations: UnitValuations, formula: PointsFormula = DEFAULT_FORMULA
+) -> np.ndarray:
+    """
+    Prices valued units with a formula in one vectorized pass
+    :param unit_valuations: The unit valuations
+    :param formula: The points formula
+    :return: The point cost of each unit's creature
+    """
+    formula.validate()
+    profile_offense = (
+        unit_valuations.profile_damage
+        + formula.range * unit_valuations.profile_range_damage
+    )
+    offsets = unit_valuations.profile_offsets
+    offense = np.zeros(unit_valuations.durability.size)
+    has_profiles = offsets[1:] > offsets[:-1]
+    if profile_offense.size:
+        # reduceat needs valid starting indices: units without profiles are masked out
+        offense[has_profiles] = np.maximum.reduceat(
+            profile_offense, offsets[:-1][has_profiles]
+        )
+    points = (
+        formula.base
+        + formula.durability * unit_valuations.durability
+        + formula.offense * offense
+        + formula.speed * unit_valuations.speed
+    )
+    return (np.ceil(points / formula.step) * formula.step).astype(int)
+
+
+def unit_points(
+    stat_block: UnitStatBlock, formula: PointsFormula = DEFAULT_FORMULA
+) -> int:
+    """
+    Returns the point cost of a unit's creature
+    :param stat_block: The unit stat block
+    :param formula: The points formula
+    :return: The point cost
+    """
+    return int(price(valuations([stat_block]), formula)[0])
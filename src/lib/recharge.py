@@ -0,0 +1,240 @@
+import functools
+import numpy as np
+
+from typing import Optional, Tuple, Type
+
+from .interfaces import CreatureAttack
+
+
+class InvalidRechargeParamError(ValueError):
+    pass
+
+
+def check_limited_use(
+    recharge: Optional[int],
+    uses: Optional[int],
+    error: Type[ValueError] = InvalidRechargeParamError,
+) -> None:
+    """
+    Validates the recharge and uses of a limited-use attack
+    :param recharge: The minimum d6 roll that recharges the attack or None
+    :param uses: The number of uses of the attack or None if unlimited
+    :param error: The exception type to raise
+    """
+    if recharge is not None and (
+        not isinstance(recharge, int) or recharge < 2 or recharge > 6
+    ):
+        raise error(
+            f"recharge should be an integer between 2 and 6 or None. Got {recharge}."
+        )
+    if uses is not None and (not isinstance(uses, int) or uses < 1):
+        raise error(f"uses should be a positive integer or None. Got {uses}.")
+
+
+def _check_params(recharge: Optional[int], uses: Optional[int], rounds: int) -> None:
+    check_limited_use(recharge, uses)
+    if not isinstance(rounds, int) or rounds < 0:
+        raise InvalidRechargeParamError(
+            f"rounds should be a non-negative integer. Got {rounds}."
+        )
+
+
+def recharge_probability(recharge: Optional[int]) -> float:
+    """
+    Returns the probability that an attack recharges on a single d6 roll
+    :param recharge: The minimum d6 roll that recharges the attack
+    :return: The probability of recharging
+    """
+    if recharge is None:
+        return 1.0
+    return (7 - recharge) / 6
+
+
+@functools.lru_cache(maxsize=None)
+def _states(recharge: Optional[int], uses: Optional[int]) -> Tuple[Tuple[bool, int]]:
+    charges = [True] if recharge is None else [True, False]
+    remaining = [-1] if uses is None else list(range(uses, -1, -1))
+    return tuple((charged, left) for left in remaining for charged in charges)
+
+
+@functools.lru_cache(maxsize=None)
+def _transition_matrices(
+    recharge: Optional[int], uses: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    states = _states(recharge, uses)
+    index = {state: i for i, state in enumerate(states)}
+    p = recharge_probability(recharge)
+    size = len(states)
+    hold = np.zeros((size, size))
+    use = np.zeros((size, size))
+    usable = np.zeros(size, dtype=bool)
+
+    def next_turn(matrix: np.ndarray, row: int, charged: bool, left: int):
+        # The recharge roll happens at the start of the creature's next turn
+        if charged:
+            matrix[row, index[(True, left)]] += 1.0
+            return
+        matrix[row, index[(True, left)]] += p
+        matrix[row, index[(False, left)]] += 1.0 - p
+
+    for i, (charged, left) in enumerate(states):
+        next_turn(hold, i, charged, left)
+        if charged and left != 0:
+            usable[i] = True
+            next_turn(use, i, recharge is None, left - 1 if left > 0 else left)
+        else:
+            use[i] = hold[i]
+    for matrix in (hold, use, usable):
+        matrix.setflags(write=False)
+    return hold, use, usable
+
+
+class RechargeSolution:
+    """
+    Exact solution of the usage of a recharge or limited-use attack over a number of rounds
+    """
+
+    def __init__(
+        self,
+        states: Tuple[Tuple[bool, int]],
+        policy: np.ndarray,
+        round_damage: np.ndarray,
+        round_uses: np.ndarray,
+    ):
+        """
+        Solution of the recharge Markov chain
+        :param states: The (charged, uses left) states of the chain. Unlimited uses are marked with -1
+        :param policy: Boolean matrix (rounds x states). True if the attack should be used
+        :param round_damage: The expected damage of each round following the policy
+        :param round_uses: The expected number of uses of the attack in each round
+        """
+        self._states = states
+        self._policy = policy
+        self._round_damage = round_damage
+        self._round_uses = round_uses
+
+    @property
+    def states(self) -> Tuple[Tuple[bool, int]]:
+        return self._states
+
+    @property
+    def policy(self) -> np.ndarray:
+        return self._policy
+
+    @property
+    def rounds(self) -> int:
+        return len(self._round_damage)
+
+    @property
+    def round_damage(self) -> np.ndarray:
+        return self._round_damage
+
+    @property
+    def expected_damage(self) -> float:
+        return float(self._round_damage.sum())
+
+    @property
+    def expected_uses(self) -> float:
+        return float(self._round_uses.sum())
+
+    def should_use(self, round_number: int, charged: bool, uses_left: int) -> bool:
+        """
+        Whether the attack should be used in the given situation
+        :param round_number: The 0-based round number
+        :param charged: Whether the attack is currently charged
+        :param uses_left: The number of uses left (ignored if uses are unlimited)
+        :return: True if the optimal policy uses the attack
+        """
+        for i, (state_charged, state_left) in enumerate(self._states):
+            if state_charged == charged and state_left in (uses_left, -1):
+                return bool(self._policy[round_number, i])
+        return False
+
+
+@functools.lru_cache(maxsize=1024)
+def solve_recharge(
+    special_damage: float,
+    fallback_damage: float,
+    rounds: int,
+    recharge: Optional[int] = None,
+    uses: Optional[int] = None,
+) -> RechargeSolution:
+    """
+    Computes the optimal usage pattern of a recharge or limited-use attack with finite horizon dynamic programming
+    :param special_damage: The expected damage of a round in which the attack is used
+    :param fallback_damage: The expected damage of a round in which the attack is not used
+    :param rounds: The number of rounds
+    :param recharge: The minimum d6 roll that recharges the attack or None
+    :param uses: The number of uses of the attack or None if unlimited
+    :return: The solution of the chain
+    """
+    _check_params(recharge, uses, rounds)
+    states = _states(recharge, uses)
+    hold, use, usable = _transition_matrices(recharge, uses)
+    policy = np.zeros((rounds, len(states)), dtype=bool)
+    value = np.zeros(len(states))
+    for r in range(rounds - 1, -1, -1):
+        hold_value = fallback_damage + hold @ value
+        use_value = np.where(usable, special_damage + use @ value, -np.inf)
+        policy[r] = use_value >= hold_value
+        value = np.where(policy[r], use_value, hold_value)
+    distribution = np.zeros(len(states))
+    distribution[0] = 1.0
+    round_damage = np.zeros(rounds)
+    round_uses = np.zeros(rounds)
+    for r in range(rounds):
+        used = np.where(policy[r], distribution, 0.0)
+        held = distribution - used
+        round_uses[r] = used.sum()
+        round_damage[r] = special_damage * round_uses[r] + fallback_damage * held.sum()
+        distribution = used @ use + held @ hold
+    for array in (policy, round_damage, round_uses):
+        array.setflags(write=False)
+    return RechargeSolution(states, policy, round_damage, round_uses)
+
+
+def usage_rate(recharge: Optional[int], uses: Optional[int], rounds: int) -> float:
+    """
+    Returns the expected fraction of rounds in which an attack is used when used as soon as available
+    :param recharge: The minimum d6 roll that recharges the attack or None
+    :param uses: The number of uses of the attack or None if unlimited
+    :param rounds: The number of rounds
+    :return: The expected fraction of rounds the attack is used
+    """
+    if rounds == 0:
+        return 0.0
+    return solve_recharge(1.0, 0.0, rounds, recharge, uses).expected_uses / rounds
+
+
+def solve_creature_attack(
+    attack: CreatureAttack, rounds: int, fallback_damage: float = 0.0
+) -> RechargeSolution:
+    """
+    Computes the optimal usage pattern of a creature attack over a number of rounds.
+    The attack is assumed to hit all its targets with every hit.
+    :param attack: The creature attack
+    :param rounds: The number of rounds
+    :param fallback_damage: The expected damage of a round in which the attack is not used
+    :return: The solution of the chain
+    """
+    damage = (
+        attack.total_average_damage
+        * attack.multiattack
+        * attack.target.number_of_targets
+    )
+    return solve_recharge(
+        float(damage), float(fallback_damage), rounds, attack.recharge, attack.uses
+    )
+
+
+def expected_damage(
+    attack: CreatureAttack, rounds: int, fallback_damage: float = 0.0
+) -> float:
+    """
+    Returns the expected total damage of a creature attack over a number of rounds
+    :param attack: The creature attack
+    :param rounds: The number of rounds
+    :param fallback_damage: The expected damage of a round in which the attack is not used
+    :return: The expected total damage
+    """
+    return solve_creature_attack(attack, rounds, fallback_damage).expected_damage
@@ -0,0 +1,7 @@
+from .unit_attacks import MeleeUnitAttack
+
+# The reference defender and attacker the conversion parameters are tuned and valued against
+REFERENCE_RESISTANCE = 4
+REFERENCE_SAVING_THROW = 4
+REFERENCE_HIT_POINTS = 1
+REFERENCE_ATTACK = MeleeUnitAttack("reference attack", 5, "1", 4, 4, 0, "1", False)
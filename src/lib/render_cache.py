@@ -0,0 +1,220 @@
+import os
+import pathlib
+import re
+import tempfile
+import threading
+
+from typing import Any, Callable, Dict, Optional, Union
+
+from .fingerprint import fingerprint, unit_stat_block_key
+from .interfaces import StatBlock, UnitStatBlock
+
+_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+class InvalidRenderCacheParamError(ValueError):
+    pass
+
+
+def stat_block_render_key(stat_block: StatBlock) -> tuple:
+    """
+    Returns the canonical key of everything a 5e stat block datasheet shows, names included
+    :param stat_block: The 5e stat block
+    :return: The canonical key
+    """
+    scores = stat_block.ability_scores
+    return (
+        stat_block.name,
+        (
+            scores.strength,
+            scores.dexterity,
+            scores.constitution,
+            scores.intelligence,
+            scores.wisdom,
+            scores.charisma,
+        ),
+        stat_block.proficiency_modifier,
+        stat_block.armor_class,
+        stat_block.hit_points,
+        stat_block.speed,
+        tuple(
+            (
+                name,
+                attack.is_melee,
+                attack.multiattack,
+                attack.range,
+                attack.target.description,
+                attack.to_hit_bonus,
+                attack.total_average_damage,
+                attack.is_saving_throw,
+            )
+            for name, attack in stat_block.attacks.items()
+        ),
+        tuple(
+            (name, tuple((attack.name, attack.multiattack) for attack in multiattack))
+            for name, multiattack in stat_block.multiattacks.items()
+        ),
+    )
+
+
+def unit_stat_block_render_key(stat_block: UnitStatBlock) -> tuple:
+    """
+    Returns the canonical key of everything a unit datasheet shows, names included
+    :param stat_block: The unit stat block
+    :return: The canonical key
+    """
+    return (
+        stat_block.name,
+        unit_stat_block_key(stat_block),
+        tuple(attack.name for attack in stat_block.attacks),
+        tuple(
+            (name, tuple(attack.name for attack in multiattack))
+            for name, multiattack in stat_block.multiattacks.items()
+        ),
+    )
+
+
+def render_key(
+    content: Any, renderer: str, dpi: Union[int, float], style: Dict[str, Any]
+) -> str:
+    """
+    Returns the content address of a rendered image
+    :param content: The canonical key of the rendered content
+    :param renderer: The renderer version
+    :param dpi: The resolution of the image
+    :param style: The options of the renderer
+    :return: The key
+    """
+    return fingerprint(
+        {"content": content, "renderer": renderer, "dpi": dpi, "style": style}
+    )
+
+
+class RenderCache:
+    """
+    Size-capped on-disk store of rendered images keyed by content address, evicting the least recently used ones
+    """
+
+    def __init__(self, directory: Union[str, pathlib.Path], max_size: int = 1 << 28):
+        """
+        A render cache. Files are written atomically, so the directory can be shared by several processes.
+        :param directory: The cache directory (created if missing)
+        :param max_size: The maximum total size of the stored images in bytes
+        """
+        if not isinstance(max_size, int) or max_size < 1:
+            raise InvalidRenderCacheParamError(
+                f"max_size should be a positive integer. Got {max_size}."
+            )
+        self._directory: pathlib.Path = pathlib.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_size: int = max_size
+        self._lock = threading.Lock()
+        self._size: int = sum(path.stat().st_size for path in self._files())
+
+    def _files(self):  # pragma: no cover
+        return self._directory.glob("*/*.png")
+
+    def _path(self, key: str) -> pathlib.Path:
+        if not isinstance(key, str) or not _KEY.match(key):
+            raise InvalidRenderCacheParamError(
+                f"key should be a hexadecimal sha256 digest. Got {key}."
+            )
+        return self._directory.joinpath(key[:2], f"{key}.png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns a stored image, if any, and marks it as recently used
+        :param key: The render key
+        :return: The image bytes or None
+        """
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Stores an image atomically and evicts the least recently used ones over the size limit
+        :param key: The render key
+        :param data: The image bytes
+        """
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        file, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(file, "wb") as temporary_file:
+                temporary_file.write(data)
+            with self._lock:
+                previous = path.stat().st_size if path.exists() else 0
+                os.replace(temporary, path)
+                self._size += len(data) - previous
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        self.evict()
+
+    def get_or_render(self, key: str, render: Callable[[], bytes]) -> bytes:
+        """
+        Returns a stored image or renders and stores it
+        :param key: The render key
+        :param render: Renders the image bytes
+        :return: The image bytes
+        """
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used images until the cache fits its maximum size
+        """
+        with self._lock:
+            if self._size <= self._max_size:
+                return
+            entries = []
+            for path in self._files():
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+            self._size = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if self._size <= self._max_size:
+                    break
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                self._size -= size
+
+    @property
+    def size(self) -> int:
+        """
+        The total size of the stored images in bytes
+        """
+        return self._size
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._files())
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def clear(self) -> None:
+        """
+        Removes every stored image
+        """
+        with self._lock:
+            for path in self._files():
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+            self._size = 0
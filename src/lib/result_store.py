@@ -0,0 +1,219 @@
+import json
+import sqlite3
+import time
+
+from typing import Optional, Dict, Any, List, Tuple
+
+from . import __version__
+from .fingerprint import fingerprint
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    kind TEXT NOT NULL,
+    first TEXT NOT NULL,
+    second TEXT NOT NULL,
+    engine TEXT NOT NULL,
+    params TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access INTEGER NOT NULL,
+    PRIMARY KEY (kind, first, second, engine, params)
+);
+CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access);
+"""
+
+
+class InvalidResultStoreParamError(ValueError):
+    pass
+
+
+class ResultStore:
+    """
+    Persistent SQLite store for simulation and analytics results keyed by unit fingerprints
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_size: Optional[int] = None,
+        batch_size: int = 256,
+        balance_version: str = __version__,
+    ):
+        """
+        A persistent result store. Results computed with another balance patch are discarded on open.
+        :param path: The path of the SQLite database (":memory:" for an in-memory store)
+        :param max_size: The maximum total size of the stored payloads in bytes. If None, the store is unbounded
+        :param batch_size: The number of pending writes that triggers a flush
+        :param balance_version: The balance patch the results are computed with
+        """
+        if max_size is not None and (not isinstance(max_size, int) or max_size < 1):
+            raise InvalidResultStoreParamError(
+                f"max_size should be a positive integer or None. Got {max_size}."
+            )
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise InvalidResultStoreParamError(
+                f"batch_size should be a positive integer. Got {batch_size}."
+            )
+        self._connection = sqlite3.connect(path)
+        self._connection.executescript(_SCHEMA)
+        self._max_size: Optional[int] = max_size
+        self._batch_size: int = batch_size
+        self._pending: Dict[Tuple[str, str, str, str, str], str] = {}
+        self._touched: Dict[Tuple[str, str, str, str, str], int] = {}
+        self._check_version(balance_version)
+
+    def _check_version(self, balance_version: str) -> None:
+        row = self._connection.execute(
+            "SELECT value FROM meta WHERE key = 'balance_version'"
+        ).fetchone()
+        if row is not None and row[0] == balance_version:
+            return
+        with self._connection:
+            self._connection.execute("DELETE FROM results")
+            self._connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('balance_version', ?)",
+                (balance_version,),
+            )
+
+    @staticmethod
+    def _key(
+        kind: str, first: str, second: str, engine: str, params: Dict[str, Any]
+    ) -> Tuple[str, str, str, str, str]:
+        return kind, first, second or "", str(engine), fingerprint(params)
+
+    def get(
+        self,
+        kind: str,
+        first: str,
+        second: Optional[str],
+        engine: str,
+        params: Dict[str, Any],
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns a stored result, if any
+        :param kind: The kind of result (i.e. "matchup")
+        :param first: The fingerprint of the first unit
+        :param second: The fingerprint of the second unit or None for single unit analytics
+        :param engine: The version of the engine that computed the result
+        :param params: The parameters of the computation (seed, precision...)
+        :return: The stored payload or None
+        """
+        key = self._key(kind, first, second, engine, params)
+        if key in self._pending:
+            return json.loads(self._pending[key])
+        row = self._connection.execute(
+            "SELECT payload FROM results WHERE kind = ? AND first = ? AND second = ? AND engine = ? AND params = ?",
+            key,
+        ).fetchone()
+        if row is None:
+            return None
+        self._touched[key] = time.time_ns()
+        return json.loads(row[0])
+
+    def put(
+        self,
+        kind: str,
+        first: str,
+        second: Optional[str],
+        engine: str,
+        params: Dict[str, Any],
+        payload: Dict[str, Any],
+    ) -> None:
+        """
+        Stores a result. Writes are batched: call flush (or close the store) to persist them.
+        :param kind: The kind of result (i.e. "matchup")
+        :param first: The fingerprint of the first unit
+        :param second: The fingerprint of the second unit or None for single unit analytics
+        :param engine: The version of the engine that computed the result
+        :param params: The parameters of the computation (seed, precision...)
+        :param payload: The JSON serializable result
+        """
+        self._pending[self._key(kind, first, second, engine, params)] = json.dumps(
+            payload, separators=(",", ":")
+        )
+        if len(self._pending) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes the pending results and access times in a single transaction and enforces the size limit
+        """
+        now = time.time_ns()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results (kind, first, second, engine, params, payload, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (*key, payload, len(payload), now)
+                    for key, payload in self._pending.items()
+                ],
+            )
+            self._connection.executemany(
+                "UPDATE results SET last_access = ? WHERE kind = ? AND first = ? AND second = ? AND engine = ? AND params = ?",
+                [(access, *key) for key, access in self._touched.items()],
+            )
+        self._pending.clear()
+        self._touched.clear()
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Removes the least recently used results until the store fits its maximum size
+        """
+        if self._max_size is None:
+            return
+        excess = self.size - self._max_size
+        if excess <= 0:
+            return
+        rows = self._connection.execute(
+            "SELECT rowid, size FROM results ORDER BY last_access ASC"
+        )
+        to_delete: List[Tuple[int]] = []
+        for rowid, size in rows:
+            if excess <= 0:
+                break
+            to_delete.append((rowid,))
+            excess -= size
+        with self._connection:
+            self._connection.executemany(
+                "DELETE FROM results WHERE rowid = ?", to_delete
+            )
+
+    @property
+    def size(self) -> int:
+        """
+        The total size of the stored payloads in bytes
+        """
+        return self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM results"
+        ).fetchone()[0]
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def clear(self) -> None:
+        """
+        Removes every stored result
+        """
+        self._pending.clear()
+        self._touched.clear()
+        with self._connection:
+            self._connection.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        """
+        Flushes the pending writes and closes the store
+        """
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self) -> "ResultStore":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,155 @@
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from .ability_scores import Scores
+from .balance import BalanceProfile, DEFAULT_PROFILE
+from .dice import add_dice
+from .interfaces import Attack
+from .stat_block import StatBlock
+from .unit_stat_block import UnitStatBlock
+from .variants import StatBlockVariant, to_unit_stat_block
+
+
+class InvalidScalingParamError(ValueError):
+    pass
+
+
+class ScalingTier(NamedTuple):
+    """
+    How a tier changes a stat block
+    """
+
+    name: str
+    # Added to the proficiency modifier
+    proficiency: int = 0
+    # Added to every ability score (within 1 and 30)
+    ability_scores: int = 0
+    # Multiplies the hit points
+    hit_points: float = 1.0
+    # Dice added to the largest dice group of every attack
+    damage_dice: int = 0
+
+    def validate(self) -> None:
+        """
+        Raises InvalidScalingParamError if the tier is not consistent
+        """
+        if not self.name or not isinstance(self.name, str):
+            raise InvalidScalingParamError(
+                f"name should be a non-empty string. Got {self.name}."
+            )
+        for field in ("proficiency", "ability_scores", "damage_dice"):
+            if not isinstance(getattr(self, field), int):
+                raise InvalidScalingParamError(
+                    f"{field} should be an integer. Got {getattr(self, field)}."
+                )
+        if not isinstance(self.hit_points, (int, float)) or self.hit_points <= 0:
+            raise InvalidScalingParamError(
+                f"hit_points should be a positive number. Got {self.hit_points}."
+            )
+
+
+DEFAULT_TIERS: Tuple[ScalingTier, ...] = (
+    ScalingTier("minion", -1, -2, 0.5, 0),
+    ScalingTier("standard"),
+    ScalingTier("veteran", 1, 2, 1.5, 1),
+    ScalingTier("elite", 2, 4, 2.0, 1),
+    ScalingTier("champion", 3, 6, 3.0, 2),
+)
+
+
+def _scaled_templates(
+    stat_block: StatBlock, damage_dice: int, cache: Dict[Tuple[int, int], Attack]
+) -> Dict[str, Attack]:  # pragma: no cover
+    scaled = {}
+    for name, template in stat_block.attack_templates.items():
+        key = (id(template), damage_dice)
+        if key not in cache:
+            scaling = template.scaling
+            new_template = (
+                None
+                if scaling is None
+                else template.with_base_damage(
+                    add_dice(scaling.base_damage, damage_dice)
+                )
+            )
+            cache[key] = template if new_template is None else new_template
+        if cache[key] is not template:
+            scaled[name] = cache[key]
+    return scaled
+
+
+def _scale(
+    stat_block: StatBlock,
+    tier: ScalingTier,
+    templates: Dict[Tuple[int, int], Attack],
+) -> StatBlockVariant:  # pragma: no cover
+    scores = None
+    if tier.ability_scores:
+        scores = {
+            score: min(
+                max(
+                    stat_block.ability_scores.get_ability_score(score)
+                    + tier.ability_scores,
+                    1,
+                ),
+                30,
+            )
+            for score in Scores
+        }
+    return StatBlockVariant(
+        stat_block,
+        f"{stat_block.name} ({tier.name})",
+        scores,
+        stat_block.proficiency_modifier + tier.proficiency,
+        hp=max(round(stat_block.hit_points * tier.hit_points), 1),
+        attacks=(
+            _scaled_templates(stat_block, tier.damage_dice, templates)
+            if tier.damage_dice
+            else None
+        ),
+    )
+
+
+def scale_stat_block(stat_block: StatBlock, tier: ScalingTier) -> StatBlockVariant:
+    """
+    Returns a stat block scaled to a tier as a variant of the original
+    :param stat_block: The 5e stat block
+    :param tier: The scaling tier
+    :return: The scaled variant
+    """
+    tier.validate()
+    return _scale(stat_block, tier, {})
+
+
+def scale_bestiary(
+    stat_blocks: Iterable[StatBlock],
+    tiers: Sequence[ScalingTier] = DEFAULT_TIERS,
+    profile: BalanceProfile = DEFAULT_PROFILE,
+) -> List[Dict[str, UnitStatBlock]]:
+    """
+    Scales every stat block of a bestiary to every tier and converts the results in one batch.
+    Tiers are variants of the original stat block: scaled attack templates are built once per number of
+    extra dice and derived attacks whose inputs do not change are shared across tiers.
+    :param stat_blocks: The 5e stat blocks
+    :param tiers: The scaling tiers (with unique names)
+    :param profile: The balance profile of the conversion
+    :return: For each stat block, the converted unit stat block of each tier by tier name
+    """
+    names = [tier.name for tier in tiers]
+    if not names or len(set(names)) != len(names):
+        raise InvalidScalingParamError(
+            f"tiers should be a non-empty sequence of tiers with unique names. Got {names}."
+        )
+    for tier in tiers:
+        tier.validate()
+    results = []
+    for stat_block in stat_blocks:
+        templates: Dict[Tuple[int, int], Attack] = {}
+        results.append(
+            {
+                tier.name: to_unit_stat_block(
+                    _scale(stat_block, tier, templates), profile
+                )
+                for tier in tiers
+            }
+        )
+    return results
@@ -0,0 +1,509 @@
+import math
+import random
+import statistics
+
+from typing import Optional, List, Tuple, NamedTuple
+
+from .combat import hit_roll, wound_roll, save_roll, expected_damage
+from .dice import parse_die_expression
+from .fingerprint import unit_fingerprint
+from .interfaces import UnitStatBlock, UnitAttack
+from .result_store import ResultStore
+
+ENGINE_VERSION = "2"
+DEFAULT_UNIT_SIZE = 10
+DEFAULT_MAX_ROUNDS = 10
+METRICS = ("win_rate", "attacker_casualties", "defender_casualties")
+
+
+class InvalidSimulationParamError(ValueError):
+    pass
+
+
+class DiceRoller:
+    """
+    Seeded d6-style dice roller supporting antithetic rolls
+    """
+
+    def __init__(self, seed: Optional[int] = None, antithetic: bool = False):
+        """
+        A seeded dice roller
+        :param seed: The seed of the random stream
+        :param antithetic: If True, every roll is mirrored (a roll of x on a dN becomes N + 1 - x)
+        """
+        self._random = random.Random(seed)
+        self._antithetic = bool(antithetic)
+
+    def roll(self, sides: int) -> int:
+        """
+        Roll a die
+        :param sides: The number of sides of the die
+        :return: The roll result
+        """
+        result = int(self._random.random() * sides) + 1
+        if self._antithetic:
+            return sides + 1 - result
+        return result
+
+    def roll_expression(self, dice_expression: str) -> int:
+        """
+        Roll a die expression
+        :param dice_expression: The die expression to roll
+        :return: The result, never below 0
+        """
+        dice, total = parse_die_expression(dice_expression)
+        for number_of_dice, sides in dice:
+            sign = 1 if number_of_dice > 0 else -1
+            for _ in range(abs(number_of_dice)):
+                total += sign * self.roll(sides)
+        return max(total, 0)
+
+
+class Estimate(NamedTuple):
+    """
+    A Monte Carlo estimate with its confidence interval
+    """
+
+    mean: float
+    half_width: float
+    trials: int
+    # The center of the confidence interval or None if it is centered on the mean
+    center: Optional[float] = None
+
+    @property
+    def width(self) -> float:
+        return 2 * self.half_width
+
+    @property
+    def lower(self) -> float:
+        return self._center - self.half_width
+
+    @property
+    def upper(self) -> float:
+        return self._center + self.half_width
+
+    @property
+    def _center(self) -> float:
+        return self.mean if self.center is None else self.center
+
+
+class TrialResult(NamedTuple):
+    """
+    The outcome of a single simulated matchup
+    """
+
+    attacker_won: bool
+    defender_won: bool
+    attacker_casualties: int
+    defender_casualties: int
+    rounds: int
+
+    def metric(self, metric: str) -> float:
+        if metric == "win_rate":
+            return float(self.attacker_won)
+        return float(getattr(self, metric))
+
+
+class MatchupResult(NamedTuple):
+    """
+    The aggregated outcome of a simulated matchup
+    """
+
+    win_rate: Estimate
+    attacker_casualties: Estimate
+    defender_casualties: Estimate
+    trials: int
+
+
+class _RunningStat:
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def half_width(self, z: float, proportion: bool = False) -> float:
+        if self.count < 2:
+            return math.inf
+        if proportion:
+            # Wilson score interval, well behaved for lopsided matchups
+            n = self.count
+            p = self.mean
+            return (
+                z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+            )
+        return z * math.sqrt(self._m2 / (self.count - 1) / self.count)
+
+    def center(self, z: float, proportion: bool = False) -> Optional[float]:
+        if not proportion or self.count < 2:
+            return None
+        # The Wilson score interval is centered on the mean shrunk towards 1/2
+        n = self.count
+        return (self.mean + z * z / (2 * n)) / (1 + z * z / n)
+
+
+def best_profile(attacker: UnitStatBlock, defender: UnitStatBlock) -> List[UnitAttack]:
+    """
+    Returns the attack or multiattack with the highest expected damage against the defender
+    :param attacker: The attacking unit
+    :param defender: The defending unit
+    :return: The list of attacks of the chosen profile
+    """
+    candidates = [[attack] for attack in attacker.attacks]
+    candidates.extend(attacker.multiattacks.values())
+    if not candidates:
+        return []
+
+    def profile_damage(profile: List[UnitAttack]) -> float:
+        return sum(
+            expected_damage(
+                attack,
+                defender.resistance,
+                defender.saving_throw,
+                defender.invulnerable_saving_throw,
+                defender.hit_points,
+            )
+            for attack in profile
+        )
+
+    return max(candidates, key=profile_damage)
+
+
+class _ResolvedAttack(NamedTuple):
+    attacks: str
+    hit: int
+    wound: int
+    save: int
+    damage: str
+
+
+def _resolve_profile(
+    profile: List[UnitAttack], defender: UnitStatBlock
+) -> Tuple[_ResolvedAttack, ...]:
+    return tuple(
+        _ResolvedAttack(
+            attack.number_of_attacks,
+            hit_roll(attack.attack_skill),
+            wound_roll(attack.strength, defender.resistance),
+            save_roll(
+                defender.saving_throw,
+                defender.invulnerable_saving_throw,
+                attack.armor_penetration,
+            ),
+            attack.damage,
+        )
+        for attack in profile
+    )
+
+
+class _UnitState:
+    def __init__(self, hit_points: int, size: int):
+        self.hit_points = hit_points
+        self.alive = size
+        self.damage_taken = 0
+
+    def take(self, damage: int) -> None:
+        # Excess damage is lost: it does not spill over to the next creature
+        if self.alive == 0 or damage <= 0:
+            return
+        self.damage_taken += damage
+        if self.damage_taken >= self.hit_points:
+            self.alive -= 1
+            self.damage_taken = 0
+
+
+def _activate(
+    profile: Tuple[_ResolvedAttack, ...],
+    creatures: int,
+    defender: _UnitState,
+    roller: DiceRoller,
+) -> None:
+    for _ in range(creatures):
+        for attack in profile:
+            for _ in range(roller.roll_expression(attack.attacks)):
+                if defender.alive == 0:
+                    return
+                if attack.hit > 1 and roller.roll(6) < attack.hit:
+                    continue
+                if roller.roll(6) < attack.wound:
+                    continue
+                if attack.save <= 6 and roller.roll(6) >= attack.save:
+                    continue
+                defender.take(roller.roll_expression(attack.damage))
+
+
+def simulate_trial(
+    attacker: UnitStatBlock,
+    defender: UnitStatBlock,
+    roller: DiceRoller,
+    unit_size: int = DEFAULT_UNIT_SIZE,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+) -> TrialResult:
+    """
+    Simulates a single fight between two units. The attacker activates first in each round.
+    :param attacker: The attacking unit
+    :param defender: The defending unit
+    :param roller: The dice roller
+    :param unit_size: The number of creatures in each unit
+    :param max_rounds: The maximum number of rounds before the fight is a draw
+    :return: The result of the fight
+    """
+    attacker_profile = _resolve_profile(best_profile(attacker, defender), defender)
+    defender_profile = _resolve_profile(best_profile(defender, attacker), attacker)
+    return _fight(
+        attacker,
+        defender,
+        attacker_profile,
+        defender_profile,
+        roller,
+        unit_size,
+        max_rounds,
+    )
+
+
+def _fight(
+    attacker: UnitStatBlock,
+    defender: UnitStatBlock,
+    attacker_profile: Tuple[_ResolvedAttack, ...],
+    defender_profile: Tuple[_ResolvedAttack, ...],
+    roller: DiceRoller,
+    unit_size: int,
+    max_rounds: int,
+) -> TrialResult:
+    attacker_state = _UnitState(attacker.hit_points, unit_size)
+    defender_state = _UnitState(defender.hit_points, unit_size)
+    rounds = 0
+    while rounds < max_rounds and attacker_state.alive and defender_state.alive:
+        rounds += 1
+        _activate(attacker_profile, attacker_state.alive, defender_state, roller)
+        if defender_state.alive:
+            _activate(defender_profile, defender_state.alive, attacker_state, roller)
+    return TrialResult(
+        defender_state.alive == 0,
+        attacker_state.alive == 0,
+        unit_size - attacker_state.alive,
+        unit_size - defender_state.alive,
+        rounds,
+    )
+
+
+def _check_params(
+    metric: str,
+    target_width: Optional[float],
+    confidence: float,
+    batch_size: int,
+    max_trials: int,
+) -> None:
+    if metric not in METRICS:
+        raise InvalidSimulationParamError(
+            f"metric should be one of {METRICS}. Got {metric}."
+        )
+    if target_width is not None and (
+        not isinstance(target_width, (int, float)) or target_width <= 0
+    ):
+        raise InvalidSimulationParamError(
+            f"target_width should be a positive number or None. Got {target_width}."
+        )
+    if not isinstance(confidence, float) or not 0 < confidence < 1:
+        raise InvalidSimulationParamError(
+            f"confidence should be a float between 0 and 1. Got {confidence}."
+        )
+    if not isinstance(batch_size, int) or batch_size < 2:
+        raise InvalidSimulationParamError(
+            f"batch_size should be an integer > 1. Got {batch_size}."
+        )
+    if not isinstance(max_trials, int) or max_trials < 1:
+        raise InvalidSimulationParamError(
+            f"max_trials should be a positive integer. Got {max_trials}."
+        )
+
+
+def _z_score(confidence: float) -> float:
+    return statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def simulate_matchup(
+    attacker: UnitStatBlock,
+    defender: UnitStatBlock,
+    *,
+    seed: Optional[int] = None,
+    target_width: Optional[float] = None,
+    metric: str = "win_rate",
+    confidence: float = 0.95,
+    batch_size: int = 500,
+    max_trials: int = 10000,
+    antithetic: bool = False,
+    unit_size: int = DEFAULT_UNIT_SIZE,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    store: Optional[ResultStore] = None,
+) -> MatchupResult:
+    """
+    Simulates a matchup between two units, in batches, until the confidence interval of *metric*
+    is narrower than *target_width* or *max_trials* trials have been run.
+    :param attacker: The attacking unit
+    :param defender: The defending unit
+    :param seed: The seed of the simulation
+    :param target_width: The requested width of the confidence interval. If None, all *max_trials* trials are run
+    :param metric: The metric driving the stopping rule. One of "win_rate", "attacker_casualties", "defender_casualties"
+    :param confidence: The confidence level of the intervals
+    :param batch_size: The number of trials between two checks of the stopping rule
+    :param max_trials: The maximum number of trials
+    :param antithetic: Whether to pair each trial with its antithetic (mirrored dice) trial
+    :param unit_size: The number of creatures in each unit
+    :param max_rounds: The maximum number of rounds of each fight
+    :param store: If not None, seeded results are looked up in and saved to this store
+    :return: The estimates of the matchup
+    """
+    _check_params(metric, target_width, confidence, batch_size, max_trials)
+    store_key = None
+    if store is not None and seed is not None:
+        store_key = (
+            "matchup",
+            unit_fingerprint(attacker),
+            unit_fingerprint(defender),
+            ENGINE_VERSION,
+            {
+                "seed": seed,
+                "target_width": target_width,
+                "metric": metric,
+                "confidence": confidence,
+                "batch_size": batch_size,
+                "max_trials": max_trials,
+                "antithetic": antithetic,
+                "unit_size": unit_size,
+                "max_rounds": max_rounds,
+            },
+        )
+        stored = store.get(*store_key)
+        if stored is not None:
+            return MatchupResult(
+                *(Estimate(*stored[m]) for m in METRICS), stored["trials"]
+            )
+    z = _z_score(confidence)
+    attacker_profile = _resolve_profile(best_profile(attacker, defender), defender)
+    defender_profile = _resolve_profile(best_profile(defender, attacker), attacker)
+    seeds = random.Random(seed)
+    stats = {m: _RunningStat() for m in METRICS}
+    trials = 0
+    while trials < max_trials:
+        for _ in range(batch_size):
+            if trials >= max_trials:
+                break
+            trial_seed = seeds.getrandbits(64)
+            results = [
+                _fight(
+                    attacker,
+                    defender,
+                    attacker_profile,
+                    defender_profile,
+                    DiceRoller(trial_seed, mirrored),
+                    unit_size,
+                    max_rounds,
+                )
+                for mirrored in ((False, True) if antithetic else (False,))
+            ]
+            trials += len(results)
+            for m in METRICS:
+                stats[m].add(statistics.fmean(r.metric(m) for r in results))
+        if target_width is not None:
+            half_width = stats[metric].half_width(
+                z, metric == "win_rate" and not antithetic
+            )
+            if 2 * half_width <= target_width:
+                break
+    result = MatchupResult(
+        *(
+            Estimate(
+                stats[m].mean,
+                stats[m].half_width(z, m == "win_rate" and not antithetic),
+                trials,
+                stats[m].center(z, m == "win_rate" and not antithetic),
+            )
+            for m in METRICS
+        ),
+        trials,
+    )
+    if store_key is not None:
+        payload = {m: list(getattr(result, m)) for m in METRICS}
+        payload["trials"] = trials
+        store.put(*store_key, payload)
+    return result
+
+
+def compare_variants(
+    variant: UnitStatBlock,
+    baseline: UnitStatBlock,
+    opponent: UnitStatBlock,
+    *,
+    seed: Optional[int] = None,
+    target_width: Optional[float] = None,
+    metric: str = "win_rate",
+    confidence: float = 0.95,
+    batch_size: int = 500,
+    max_trials: int = 10000,
+    antithetic: bool = False,
+    unit_size: int = DEFAULT_UNIT_SIZE,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+) -> Estimate:
+    """
+    Estimates the difference of *metric* between two variants of a unit fighting the same opponent.
+    Both variants use common random numbers: each pair of trials shares the same dice stream.
+    :param variant: The unit variant
+    :param baseline: The baseline unit
+    :param opponent: The defending unit both variants fight
+    :param seed: The seed of the simulation
+    :param target_width: The requested width of the confidence interval. If None, all *max_trials* pairs are run
+    :param metric: The metric to compare. One of "win_rate", "attacker_casualties", "defender_casualties"
+    :param confidence: The confidence level of the interval
+    :param batch_size: The number of paired trials between two checks of the stopping rule
+    :param max_trials: The maximum number of paired trials
+    :param antithetic: Whether to pair each trial with its antithetic (mirrored dice) trial
+    :param unit_size: The number of creatures in each unit
+    :param max_rounds: The maximum number of rounds of each fight
+    :return: The estimate of metric(variant) - metric(baseline)
+    """
+    _check_params(metric, target_width, confidence, batch_size, max_trials)
+    z = _z_score(confidence)
+    profiles = []
+    for unit in (variant, baseline):
+        profiles.append(
+            (
+                _resolve_profile(best_profile(unit, opponent), opponent),
+                _resolve_profile(best_profile(opponent, unit), unit),
+            )
+        )
+    seeds = random.Random(seed)
+    difference = _RunningStat()
+    trials = 0
+    while trials < max_trials:
+        for _ in range(batch_size):
+            if trials >= max_trials:
+                break
+            trial_seed = seeds.getrandbits(64)
+            values = []
+            for unit, (unit_profile, opponent_profile) in zip(
+                (variant, baseline), profiles
+            ):
+                results = [
+                    _fight(
+                        unit,
+                        opponent,
+                        unit_profile,
+                        opponent_profile,
+                        DiceRoller(trial_seed, mirrored),
+                        unit_size,
+                        max_rounds,
+                    )
+                    for mirrored in ((False, True) if antithetic else (False,))
+                ]
+                values.append(statistics.fmean(r.metric(metric) for r in results))
+            trials += 1
+            difference.add(values[0] - values[1])
+        if target_width is not None and 2 * difference.half_width(z) <= target_width:
+            break
+    return Estimate(difference.mean, difference.half_width(z), trials)
@@ -0,0 +1,365 @@
+import numpy as np
+import os
+import struct
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .ability_scores import Scores
+from .balance import BalanceProfile, DEFAULT_PROFILE
+from .block_format import (
+    ABILITY_FIELDS,
+    ATTACK_ROLL,
+    FLAGS,
+    LIMITED_USE_FIELDS,
+    SAVING_THROW,
+    TARGET_NAMES,
+    stat_block_from_record,
+)
+from .stat_block import StatBlock
+from .unit_stat_block import UnitStatBlock, from_stat_block
+
+MAGIC = b"5ESNAP\x00\x00"
+VERSION = 2
+# Magic, version and the number of stat blocks, attacks, multiattacks, multiattack members and string bytes
+_HEADER = struct.Struct("<8sI5Q")
+STAT_BLOCK_DTYPE = np.dtype(
+    [(field, "u1") for field in ABILITY_FIELDS]
+    + [
+        ("hp", "<u4"),
+        ("ac", "<u2"),
+        ("speed", "<u2"),
+        ("proficiency", "i1"),
+        ("name_offset", "<u8"),
+        ("name_length", "<u4"),
+        ("attack_start", "<u4"),
+        ("attack_count", "<u4"),
+        ("multiattack_start", "<u4"),
+        ("multiattack_count", "<u4"),
+    ]
+)
+_ATTACK_FIELDS = [
+    ("kind", "u1"),
+    ("weapon_range", "<u4"),
+    ("multiattack", "<u2"),
+    ("target", "u1"),
+    ("first_param", "<i4"),
+    ("second_param", "<i4"),
+    # The base to hit of attack rolls and the DC of saving throws
+    ("to_hit", "<i4"),
+    # 0 for no scaling, else the Scores value
+    ("ability", "u1"),
+    ("flags", "u1"),
+    ("name_offset", "<u8"),
+    ("name_length", "<u4"),
+    ("damage_offset", "<u8"),
+    ("damage_length", "<u4"),
+]
+# Version 2 added the recharge and the uses per day (0 if None)
+ATTACK_DTYPE = np.dtype(_ATTACK_FIELDS + [("recharge", "u1"), ("uses_per_day", "<u2")])
+_ATTACK_DTYPE_V1 = np.dtype(_ATTACK_FIELDS)
+MULTIATTACK_DTYPE = np.dtype(
+    [
+        ("name_offset", "<u8"),
+        ("name_length", "<u4"),
+        ("member_start", "<u4"),
+        ("member_count", "<u4"),
+    ]
+)
+# Index of each attack of a multiattack within its stat block's attacks
+MEMBER_DTYPE = np.dtype("<u4")
+
+
+class InvalidSnapshotError(ValueError):
+    pass
+
+
+class _StringTable:
+    def __init__(self):
+        self.parts: List[bytes] = []
+        self.size: int = 0
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+
+    def add(self, value: str) -> Tuple[int, int]:
+        # Repeated strings (attack names, damage expressions) are stored once
+        if value not in self._offsets:
+            encoded = value.encode("utf-8")
+            self._offsets[value] = (self.size, len(encoded))
+            self.parts.append(encoded)
+            self.size += len(encoded)
+        return self._offsets[value]
+
+
+def _table(rows: List[tuple], dtype: np.dtype) -> np.ndarray:
+    try:
+        return np.array(rows, dtype=dtype)
+    except (OverflowError, ValueError) as e:
+        raise InvalidSnapshotError(f"A value does not fit the snapshot columns: {e}")
+
+
+def write_snapshot(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    Writes stat block records (see block_format) to a snapshot file
+    :param path: The snapshot path
+    :param records: The stat block records, i.e. the records of a Bestiary search
+    :return: The number of stat blocks written
+    """
+    strings = _StringTable()
+    stat_blocks: List[tuple] = []
+    attacks: List[tuple] = []
+    multiattacks: List[tuple] = []
+    members: List[int] = []
+    for record in records:
+        attack_start = len(attacks)
+        indexes = {}
+        for attack in record["attacks"]:
+            kind = attack["kind"]
+            ability = attack["ability_score_scaling"]
+            flags = 0
+            for bit, field in enumerate(FLAGS[kind]):
+                flags |= bool(attack[field]) << bit
+            indexes[attack["name"]] = len(attacks) - attack_start
+            attacks.append(
+                (
+                    0 if kind == ATTACK_ROLL else 1,
+                    attack["weapon_range"],
+                    attack["multiattack"],
+                    TARGET_NAMES.index(attack["target"]["name"]),
+                    attack["target"]["first_param"],
+                    attack["target"]["second_param"],
+                    attack["base_to_hit"] if kind == ATTACK_ROLL else attack["dc"],
+                    0 if ability is None else ability.value,
+                    flags,
+                    *strings.add(attack["name"]),
+                    *strings.add(attack["base_damage"]),
+                    *(attack.get(field) or 0 for field in LIMITED_USE_FIELDS),
+                )
+            )
+        multiattack_start = len(multiattacks)
+        for name, attack_names in record["multiattacks"].items():
+            multiattacks.append((*strings.add(name), len(members), len(attack_names)))
+            members.extend(indexes[attack_name] for attack_name in attack_names)
+        stat_blocks.append(
+            (
+                *(record[field] for field in ABILITY_FIELDS),
+                record["hp"],
+                record["ac"],
+                record["speed"],
+                record["proficiency"],
+                *strings.add(record["name"]),
+                attack_start,
+                len(attacks) - attack_start,
+                multiattack_start,
+                len(multiattacks) - multiattack_start,
+            )
+        )
+    tables = (
+        _table(stat_blocks, STAT_BLOCK_DTYPE),
+        _table(attacks, ATTACK_DTYPE),
+        _table(multiattacks, MULTIATTACK_DTYPE),
+        _table(members, MEMBER_DTYPE),
+    )
+    with open(path, "wb") as file:
+        file.write(
+            _HEADER.pack(
+                MAGIC, VERSION, *(len(table) for table in tables), strings.size
+            )
+        )
+        for table in tables:
+            file.write(table.tobytes())
+        for part in strings.parts:
+            file.write(part)
+    return len(stat_blocks)
+
+
+class Snapshot:
+    """
+    Read-only memory-mapped bestiary snapshot.
+    Columns are views of the mapping: nothing is parsed on open and stat blocks are built on access.
+    Pickling a snapshot only pickles its path, so worker processes map the same file instead of copying it.
+    """
+
+    def __init__(self, path: str):
+        """
+        Maps a snapshot file
+        :param path: The snapshot path
+        """
+        self._path: str = path
+        if os.path.getsize(path) < _HEADER.size:
+            raise InvalidSnapshotError(f"{path} is not a bestiary snapshot.")
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        magic, version, *counts = _HEADER.unpack(bytes(data[: _HEADER.size]))
+        if magic != MAGIC:
+            raise InvalidSnapshotError(f"{path} is not a bestiary snapshot.")
+        if version > VERSION:
+            raise InvalidSnapshotError(
+                f"Unsupported snapshot version {version}: this version reads up to {VERSION}."
+            )
+        dtypes = (
+            STAT_BLOCK_DTYPE,
+            ATTACK_DTYPE if version >= 2 else _ATTACK_DTYPE_V1,
+            MULTIATTACK_DTYPE,
+            MEMBER_DTYPE,
+        )
+        sizes = [count * dtype.itemsize for count, dtype in zip(counts, dtypes)]
+        if _HEADER.size + sum(sizes) + counts[-1] != len(data):
+            raise InvalidSnapshotError(f"{path} is truncated or corrupted.")
+        offset = _HEADER.size
+        tables = []
+        for size, dtype in zip(sizes, dtypes):
+            tables.append(data[offset : offset + size].view(dtype))
+            offset += size
+        self._stat_blocks, self._attacks, self._multiattacks, self._members = tables
+        self._strings: np.ndarray = data[offset:]
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def __reduce__(self):
+        return Snapshot, (self._path,)
+
+    def __len__(self) -> int:
+        return len(self._stat_blocks)
+
+    def column(self, field: str) -> np.ndarray:
+        """
+        Returns a stat block column without copying it (i.e. "hp", "ac", "str")
+        :param field: The field name
+        :return: A read-only array with a value for each stat block
+        """
+        if field not in STAT_BLOCK_DTYPE.names:
+            raise InvalidSnapshotError(
+                f"field should be one of {STAT_BLOCK_DTYPE.names}. Got {field}."
+            )
+        return self._stat_blocks[field]
+
+    def _string(self, offset: int, length: int) -> str:
+        return str(self._strings[offset : offset + length].tobytes(), "utf-8")
+
+    def _index(self, index: int) -> int:
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"snapshot index {index} out of range")
+        return index % len(self)
+
+    def name(self, index: int) -> str:
+        """
+        Returns the name of a stat block without decoding the rest of it
+        :param index: The stat block index
+        :return: The name
+        """
+        row = self._stat_blocks[self._index(index)]
+        return self._string(int(row["name_offset"]), int(row["name_length"]))
+
+    def _attack(self, row: np.void) -> Dict[str, Any]:
+        kind = ATTACK_ROLL if row["kind"] == 0 else SAVING_THROW
+        attack: Dict[str, Any] = {
+            "kind": kind,
+            "name": self._string(int(row["name_offset"]), int(row["name_length"])),
+            "weapon_range": int(row["weapon_range"]),
+            "multiattack": int(row["multiattack"]),
+            "target": {
+                "name": TARGET_NAMES[row["target"]],
+                "first_param": int(row["first_param"]),
+                "second_param": int(row["second_param"]),
+            },
+            "base_damage": self._string(
+                int(row["damage_offset"]), int(row["damage_length"])
+            ),
+            "base_to_hit" if kind == ATTACK_ROLL else "dc": int(row["to_hit"]),
+            "ability_score_scaling": (
+                None if row["ability"] == 0 else Scores(int(row["ability"]))
+            ),
+        }
+        for bit, field in enumerate(FLAGS[kind]):
+            attack[field] = bool(int(row["flags"]) >> bit & 1)
+        for field in LIMITED_USE_FIELDS:
+            value = int(row[field]) if field in row.dtype.names else 0
+            attack[field] = value or None
+        return attack
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """
+        Decodes a stat block record
+        :param index: The stat block index
+        :return: The stat block record (see block_format)
+        """
+        row = self._stat_blocks[self._index(index)]
+        record: Dict[str, Any] = {
+            field: int(row[field])
+            for field in (*ABILITY_FIELDS, "hp", "ac", "speed", "proficiency")
+        }
+        record["name"] = self._string(int(row["name_offset"]), int(row["name_length"]))
+        start = int(row["attack_start"])
+        attacks = [
+            self._attack(attack)
+            for attack in self._attacks[start : start + int(row["attack_count"])]
+        ]
+        record["attacks"] = attacks
+        record["multiattacks"] = {}
+        start = int(row["multiattack_start"])
+        for multiattack in self._multiattacks[
+            start : start + int(row["multiattack_count"])
+        ]:
+            first = int(multiattack["member_start"])
+            members = self._members[first : first + int(multiattack["member_count"])]
+            record["multiattacks"][
+                self._string(
+                    int(multiattack["name_offset"]), int(multiattack["name_length"])
+                )
+            ] = [attacks[member]["name"] for member in members]
+        return record
+
+    def stat_block(self, index: int) -> StatBlock:
+        """
+        Builds a stat block
+        :param index: The stat block index
+        :return: The 5e stat block
+        """
+        return stat_block_from_record(self.record(index))
+
+    def unit_stat_block(
+        self, index: int, profile: BalanceProfile = DEFAULT_PROFILE
+    ) -> UnitStatBlock:
+        """
+        Builds a stat block and converts it
+        :param index: The stat block index
+        :param profile: The balance profile of the conversion
+        :return: The unit stat block
+        """
+        return from_stat_block(self.stat_block(index), profile)
+
+    def __iter__(self) -> Iterator[StatBlock]:
+        for index in range(len(self)):
+            yield self.stat_block(index)
+
+    def find(self, name: str) -> Optional[int]:
+        """
+        Returns the index of the first stat block with a name
+        :param name: The name
+        :return: The index or None
+        """
+        encoded = np.frombuffer(name.encode("utf-8"), dtype=np.uint8)
+        lengths = self._stat_blocks["name_length"]
+        offsets = self._stat_blocks["name_offset"]
+        for index in np.flatnonzero(lengths == len(encoded)):
+            offset = int(offsets[index])
+            if np.array_equal(self._strings[offset : offset + len(encoded)], encoded):
+                return int(index)
+        return None
+
+    def close(self) -> None:
+        """
+        Releases the mapping (it is unmapped once no returned column is referenced)
+        """
+        empty = np.empty(0, dtype=np.uint8)
+        self._stat_blocks = empty.view(STAT_BLOCK_DTYPE)
+        self._attacks = empty.view(ATTACK_DTYPE)
+        self._multiattacks = empty.view(MULTIATTACK_DTYPE)
+        self._members = empty.view(MEMBER_DTYPE)
+        self._strings = empty
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
@@ -0,0 +1,116 @@
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class InvalidSortedIndexParamError(ValueError):
+    pass
+
+
+class SortedIndex:
+    """
+    Sorted multiset of names mapping each distinct name to a row, for list views. Rows are found by bisection,
+    so single changes cost O(log n) comparisons instead of re-sorting.
+    """
+
+    def __init__(self, keys: Iterable[str] = ()):
+        """
+        A sorted index
+        :param keys: The initial names. Repeated names are counted
+        """
+        self._counts: Dict[str, int] = dict(Counter(keys))
+        self._keys: List[str] = sorted(self._counts)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __getitem__(self, row: int) -> str:
+        return self._keys[row]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._counts
+
+    def count(self, key: str) -> int:
+        """
+        Returns how many times a name is in the index
+        :param key: The name
+        :return: The count, 0 if missing
+        """
+        return self._counts.get(key, 0)
+
+    def row(self, key: str) -> Optional[int]:
+        """
+        Returns the row of a name
+        :param key: The name
+        :return: The row or None if missing
+        """
+        if key not in self._counts:
+            return None
+        return bisect_left(self._keys, key)
+
+    def insertion_row(self, key: str) -> int:
+        """
+        Returns the row a name has or would have once inserted
+        :param key: The name
+        :return: The row
+        """
+        return bisect_left(self._keys, key)
+
+    def set_count(self, key: str, count: int) -> None:
+        """
+        Sets how many times a name is in the index, inserting or removing its row as needed
+        :param key: The name
+        :param count: The count
+        """
+        if not isinstance(count, int) or count < 0:
+            raise InvalidSortedIndexParamError(
+                f"count should be a non-negative integer. Got {count}."
+            )
+        if count == 0:
+            self.discard(key)
+            return
+        if key not in self._counts:
+            self._keys.insert(bisect_left(self._keys, key), key)
+        self._counts[key] = count
+
+    def add(self, key: str) -> None:
+        """
+        Adds a name once
+        :param key: The name
+        """
+        self.set_count(key, self.count(key) + 1)
+
+    def remove(self, key: str) -> None:
+        """
+        Removes a name once
+        :param key: The name
+        """
+        if key not in self._counts:
+            raise InvalidSortedIndexParamError(f"{key} is not in the index.")
+        self.set_count(key, self._counts[key] - 1)
+
+    def discard(self, key: str) -> None:
+        """
+        Removes every occurrence of a name, if any
+        :param key: The name
+        """
+        if self._counts.pop(key, None) is not None:
+            self._keys.pop(bisect_left(self._keys, key))
+
+    def diff(self, keys: Iterable[str]) -> Tuple[List[str], Dict[str, int]]:
+        """
+        Compares the index with another multiset of names
+        :param keys: The names
+        :return: The names to remove and the new counts of the names to insert or update
+        """
+        counts = Counter(keys)
+        removed = [key for key in self._keys if key not in counts]
+        changed = {
+            key: count
+            for key, count in counts.items()
+            if self._counts.get(key) != count
+        }
+        return removed, changed
@@ -12,6 +12,23 @@ class InvalidAttackNameError(ValueError):
     pass
 
 
+def _combine_attacks(
+    attacks: Dict[str, Attack], attack_names: List[str]
+) -> List[Attack]:
+    d = {}
+    for attack_name in attack_names:
+        if attack_name not in d.keys():
+            d[attack_name] = 0
+        d[attack_name] += 1
+    multi = []
+    for attack_name, number_of_attacks in d.items():
+        attack = attacks[attack_name]
+        for _ in range(number_of_attacks - 1):
+            attack = attack.combine(attacks[attack_name])
+        multi.append(attack)
+    return multi
+
+
 class StatBlock(StatBlockInterface):
     """
     5e stat block
@@ -82,6 +99,7 @@ class StatBlock(StatBlockInterface):
         self._speed: int = speed
         self._attacks: Dict[str, Attack] = {}
         self._multiattacks: Dict[str, List[Attack]] = {}
+        self._multiattack_attack_names: Dict[str, List[str]] = {}
         for a in attacks:
             self._attacks[a.name] = a
 
@@ -126,21 +144,34 @@ class StatBlock(StatBlockInterface):
             ret[multiattack_name] = multi
         return ret
 
+    @property
+    def attack_templates(self) -> Dict[str, Attack]:
+        """
+        The creature's attack templates by name
+        """
+        return dict(self._attacks)
+
+    @property
+    def multiattack_templates(self) -> Dict[str, List[Attack]]:
+        """
+        The creature's combined multiattack templates by name
+        """
+        return {name: list(multi) for name, multi in self._multiattacks.items()}
+
+    @property
+    def multiattack_attack_names(self) -> Dict[str, List[str]]:
+        """
+        The names of the attacks each multiattack was created from
+        """
+        return {
+            name: list(names) for name, names in self._multiattack_attack_names.items()
+        }
+
     def create_multiattack(self, name: str, attack_names: List[str]) -> None:
         if name in self._multiattacks.keys():
             raise InvalidAttackNameError(f"multiattack {name} already present")
         for attack_name in attack_names:
             if attack_name not in self._attacks.keys():
                 raise InvalidAttackNameError(f"{attack_name} not in creature's attacks")
-        d = {}
-        for attack_name in attack_names:
-            if attack_name not in d.keys():
-                d[attack_name] = 0
-            d[attack_name] += 1
-        multi = []
-        for attack_name, number_of_attacks in d.items():
-            attack = self._attacks[attack_name]
-            for _ in range(number_of_attacks - 1):
-                attack = attack.combine(self._attacks[attack_name])
-            multi.append(attack)
-        self._multiattacks[name] = multi
+        self._multiattacks[name] = _combine_attacks(self._attacks, attack_names)
+        self._multiattack_attack_names[name] = list(attack_names)
@@ -0,0 +1,268 @@
+import numpy as np
+
+from typing import Dict, Sequence, NamedTuple, Any, Optional, Tuple
+
+from .ability_scores import Scores
+from .balance import BalanceProfile, DEFAULT_PROFILE
+from .combat import unsaved_wound_probability_array
+from .dice import get_average_damage
+from .interfaces import Attack
+from .reference import (
+    REFERENCE_RESISTANCE,
+    REFERENCE_SAVING_THROW,
+    REFERENCE_HIT_POINTS,
+    REFERENCE_ATTACK,
+)
+from .stat_block import StatBlock
+from .unit_attacks import number_of_attacks_from_attack
+
+ABILITY_FIELDS = {
+    "strength": Scores.STRENGTH,
+    "dexterity": Scores.DEXTERITY,
+    "constitution": Scores.CONSTITUTION,
+    "intelligence": Scores.INTELLIGENCE,
+    "wisdom": Scores.WISDOM,
+    "charisma": Scores.CHARISMA,
+}
+FIELDS = (*ABILITY_FIELDS, "proficiency", "armor_class", "hit_points", "damage_dice")
+DEFAULT_RANGES = {
+    "strength": range(10, 31),
+    "dexterity": range(10, 31),
+    "constitution": range(10, 31),
+    "intelligence": range(10, 31),
+    "wisdom": range(10, 31),
+    "charisma": range(10, 31),
+    "proficiency": range(2, 10),
+    "armor_class": range(10, 26),
+    "hit_points": range(10, 301, 10),
+    "damage_dice": range(1, 6),
+}
+
+
+class InvalidSweepParamError(ValueError):
+    pass
+
+
+class SweepResult(NamedTuple):
+    """
+    Unit datasheet values over a grid of stat block fields.
+    Every array has one axis per swept field, in the order of *axes*.
+    """
+
+    # The values of each swept field
+    axes: Dict[str, np.ndarray]
+    # resistance, saving_throw, invulnerable_saving_throw (7 for none), hit_points
+    # and durability (reference attacks needed to slay one creature)
+    defense: Dict[str, np.ndarray]
+    # For each attack: to_hit, attack_skill, strength, armor_penetration, damage (average),
+    # number_of_attacks (average), expected_damage (against the reference defender) and valid
+    attacks: Dict[str, Dict[str, np.ndarray]]
+    # The expected damage of each multiattack against the reference defender
+    multiattacks: Dict[str, np.ndarray]
+
+
+def _modifier(score: Any) -> np.ndarray:
+    return np.floor_divide(np.asarray(score) - 10, 2)
+
+
+def _highest_modifier(
+    grids: Dict[str, np.ndarray], stat_block: StatBlock, abilities: Tuple[Scores, ...]
+) -> Any:
+    modifier: Any = 0
+    for i, ability in enumerate(abilities):
+        name = next(key for key, value in ABILITY_FIELDS.items() if value is ability)
+        score = grids.get(name, stat_block.ability_scores.get_ability_score(ability))
+        modifier = (
+            _modifier(score) if i == 0 else np.maximum(modifier, _modifier(score))
+        )
+    return modifier
+
+
+def _scaled_dice_average(scaled_dice: np.ndarray) -> np.ndarray:
+    # Average of convert_to_d3_d6: exact below 4, d6s and a fixed remainder above
+    d6 = np.floor(scaled_dice / 3.5)
+    return np.where(
+        scaled_dice < 4, scaled_dice, 3.5 * d6 + np.floor(scaled_dice - 3.5 * d6)
+    )
+
+
+def _sweep_attack(
+    template: Attack,
+    stat_block: StatBlock,
+    grids: Dict[str, np.ndarray],
+    profile: BalanceProfile,
+    defense: Tuple[int, int, Optional[int], int],
+) -> Dict[str, np.ndarray]:
+    scaling = template.scaling
+    if scaling is None:
+        raise InvalidSweepParamError(
+            f"{template.name} does not describe how it scales with the creature."
+        )
+    creature_attack = template.from_creature(stat_block)
+    proficiency = grids.get("proficiency", stat_block.proficiency_modifier)
+    dice_multiplier = grids.get("damage_dice", 1)
+
+    to_hit = scaling.base_to_hit + _highest_modifier(
+        grids, stat_block, scaling.to_hit_abilities
+    )
+    if scaling.to_hit_proficiency:
+        to_hit = to_hit + proficiency
+    to_hit = np.asarray(to_hit)
+
+    _, base_dice, base_fixed = get_average_damage(scaling.base_damage)
+    dice = base_dice * np.asarray(dice_multiplier, dtype=float)
+    total = (
+        dice
+        + base_fixed
+        + _highest_modifier(grids, stat_block, scaling.damage_abilities)
+        + (proficiency if scaling.damage_proficiency else 0)
+    )
+
+    attack_profile = profile.attack
+    skill = attack_profile.attack_skill.lookup_array(to_hit)
+    strength = np.maximum(
+        np.floor(np.sqrt(np.maximum(total, 0) + 1))
+        + to_hit
+        + attack_profile.strength_offset,
+        1,
+    ).astype(int)
+    to_hit_pen = (
+        attack_profile.area_of_effect_armor_penetration
+        if creature_attack.target.is_aoe
+        else np.floor_divide(
+            np.maximum(to_hit, 0), attack_profile.armor_penetration_to_hit_step
+        )
+    )
+    ap = -(
+        np.floor_divide(total, attack_profile.armor_penetration_damage_step).astype(int)
+        + to_hit_pen
+    )
+    scaled_dice = np.ceil(dice / attack_profile.damage_scale)
+    scaled_fixed = np.ceil(total / attack_profile.damage_scale) - scaled_dice
+    damage = _scaled_dice_average(scaled_dice) + scaled_fixed
+    attacks, _, _ = get_average_damage(
+        number_of_attacks_from_attack(creature_attack, profile)
+    )
+    resistance, saving_throw, invulnerable_saving_throw, hit_points = defense
+    expected = (
+        attacks
+        * np.minimum(damage, hit_points)
+        * unsaved_wound_probability_array(
+            skill,
+            strength,
+            ap,
+            resistance,
+            saving_throw,
+            7 if invulnerable_saving_throw is None else invulnerable_saving_throw,
+        )
+    )
+    valid = (total >= 0) & (damage > 0)
+    return {
+        "to_hit": to_hit,
+        "attack_skill": skill,
+        "strength": strength,
+        "armor_penetration": ap,
+        "damage": damage,
+        "number_of_attacks": np.asarray(attacks),
+        "expected_damage": np.where(valid, expected, 0.0),
+        "valid": valid,
+    }
+
+
+def sweep(
+    stat_block: StatBlock,
+    fields: Dict[str, Optional[Sequence[float]]],
+    profile: BalanceProfile = DEFAULT_PROFILE,
+    defender: Tuple[int, int, Optional[int], int] = (
+        REFERENCE_RESISTANCE,
+        REFERENCE_SAVING_THROW,
+        None,
+        REFERENCE_HIT_POINTS,
+    ),
+) -> SweepResult:
+    """
+    Evaluates the unit datasheet of a stat block over a grid of field values in one vectorized pass.
+    The stat block is never rebuilt: the fields not swept keep the stat block's values.
+    :param stat_block: The 5e stat block
+    :param fields: Mapping of field names (see FIELDS) to the values to sweep, or None for DEFAULT_RANGES.
+    "damage_dice" multiplies the number of damage dice of every attack
+    :param profile: The balance profile of the conversion
+    :param defender: The resistance, saving throw, invulnerable saving throw and hit points of the
+    defender the expected damage is computed against
+    :return: The swept values as NumPy grids
+    """
+    if not fields:
+        raise InvalidSweepParamError("At least one field should be swept.")
+    axes = {}
+    for name, values in fields.items():
+        if name not in FIELDS:
+            raise InvalidSweepParamError(
+                f"Unknown field {name}. Expected one of {', '.join(FIELDS)}."
+            )
+        axis = np.asarray(DEFAULT_RANGES[name] if values is None else values)
+        if axis.ndim != 1 or axis.size == 0:
+            raise InvalidSweepParamError(
+                f"{name} should be a non-empty sequence of values. Got {values}."
+            )
+        axes[name] = axis
+    shape = tuple(axis.size for axis in axes.values())
+    grids = dict(zip(axes, np.meshgrid(*axes.values(), indexing="ij", sparse=True)))
+
+    def full(array: Any) -> np.ndarray:
+        return np.broadcast_to(array, shape)
+
+    defense_profile = profile.defense
+    armor_class = grids.get("armor_class", stat_block.armor_class)
+    resistance = np.maximum(
+        defense_profile.resistance_base
+        + _highest_modifier(grids, stat_block, (Scores.CONSTITUTION,))
+        + np.floor_divide(
+            grids.get("proficiency", stat_block.proficiency_modifier),
+            defense_profile.resistance_proficiency_divisor,
+        ),
+        1,
+    )
+    saving_throw = defense_profile.saving_throw.lookup_array(armor_class)
+    invulnerable_saving_throw = defense_profile.invulnerable_saving_throw.lookup_array(
+        armor_class, missing=7
+    )
+    hit_points = np.ceil(
+        np.asarray(grids.get("hit_points", stat_block.hit_points))
+        / defense_profile.hit_points_scale
+    ).astype(int)
+    durability = hit_points / unsaved_wound_probability_array(
+        REFERENCE_ATTACK.attack_skill,
+        REFERENCE_ATTACK.strength,
+        REFERENCE_ATTACK.armor_penetration,
+        resistance,
+        saving_throw,
+        invulnerable_saving_throw,
+    )
+    defense = {
+        "resistance": full(resistance),
+        "saving_throw": full(saving_throw),
+        "invulnerable_saving_throw": full(invulnerable_saving_throw),
+        "hit_points": full(hit_points),
+        "durability": full(durability),
+    }
+
+    attacks = {}
+    for name, template in stat_block.attack_templates.items():
+        attacks[name] = {
+            key: full(value)
+            for key, value in _sweep_attack(
+                template, stat_block, grids, profile, defender
+            ).items()
+        }
+    multiattacks = {}
+    for name, templates in stat_block.multiattack_templates.items():
+        total = np.zeros(shape)
+        for template in templates:
+            total = (
+                total
+                + _sweep_attack(template, stat_block, grids, profile, defender)[
+                    "expected_damage"
+                ]
+            )
+        multiattacks[name] = total
+    return SweepResult(axes, defense, attacks, multiattacks)
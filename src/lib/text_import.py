@@ -0,0 +1,181 @@
+import re
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .json_import import ABILITY_KEYS, ImportResult, convert_monster
+
+_SIZE = re.compile(
+    r"^(?:Tiny|Small|Medium|Large|Huge|Gargantuan)\b", re.IGNORECASE | re.MULTILINE
+)
+_ARMOR_CLASS = re.compile(r"^\s*Armor Class\s+(\d+)", re.IGNORECASE | re.MULTILINE)
+_HIT_POINTS = re.compile(r"^\s*Hit Points\s+(\d+)", re.IGNORECASE | re.MULTILINE)
+_SPEED = re.compile(r"^\s*Speed\s+(\d+)", re.IGNORECASE | re.MULTILINE)
+_SCORES_HEADER = re.compile(r"\bSTR\b", re.MULTILINE)
+# A score followed by its modifier, i.e. "14 (+2)"
+_SCORE = re.compile(r"(\d+)\s*\(\s*[-+−–]?\s*\d+\s*\)")
+_CHALLENGE = re.compile(r"^\s*Challenge\s+(\d+(?:/\d+)?)", re.IGNORECASE | re.MULTILINE)
+_PROFICIENCY = re.compile(
+    r"^\s*Proficiency Bonus\s+\+?(\d+)", re.IGNORECASE | re.MULTILINE
+)
+# The headers of the sections following the actions
+_SECTION = re.compile(
+    r"^\s*(Actions|Bonus Actions|Reactions|Legendary Actions|Lair Actions|Mythic Actions)\s*$",
+    re.IGNORECASE,
+)
+# An action starts with its name (optionally with a parenthetical such as "(Recharge 5-6)") followed by a period
+_ACTION = re.compile(r"^\s*([A-Z][\w' ,/-]{0,60}?(?:\s*\([^)\n]{0,40}\))?)\.\s+(\S.*)$")
+
+
+class InvalidTextImportError(ValueError):
+    pass
+
+
+def split_stat_blocks(text: str) -> List[str]:
+    """
+    Splits text holding consecutive stat blocks. Each block starts at its name, the line before the
+    size and type line preceding its "Armor Class" line.
+    :param text: The text
+    :return: The text of each stat block
+    """
+    lines = text.splitlines()
+    starts = []
+    for i, line in enumerate(lines):
+        if not _ARMOR_CLASS.match(line):
+            continue
+        start = i - 1
+        while start >= 0 and not lines[start].strip():
+            start -= 1
+        if start > 0 and _SIZE.match(lines[start].strip()):
+            start -= 1
+            while start > 0 and not lines[start].strip():
+                start -= 1
+        starts.append(max(start, starts[-1] + 1 if starts else 0))
+    starts.append(len(lines))
+    return ["\n".join(lines[start:end]) for start, end in zip(starts[:-1], starts[1:])]
+
+
+def _search(pattern: re.Pattern, text: str, field: str) -> str:  # pragma: no cover
+    match = pattern.search(text)
+    if match is None:
+        raise InvalidTextImportError(f"Missing field {field}.")
+    return match.group(1)
+
+
+def _actions(lines: List[str]) -> List[Dict[str, str]]:  # pragma: no cover
+    actions: List[Dict[str, str]] = []
+    in_actions = False
+    for line in lines:
+        section = _SECTION.match(line)
+        if section is not None:
+            in_actions = section.group(1).lower() == "actions"
+            continue
+        if not in_actions or not line.strip():
+            continue
+        action = _ACTION.match(line)
+        # Wrapped lines can look like an action name: a new action starts after a finished sentence
+        if action is not None and (
+            not actions or actions[-1]["desc"].rstrip().endswith(".")
+        ):
+            actions.append({"name": action.group(1).strip(), "desc": action.group(2)})
+        elif actions:
+            # Wrapped lines continue the previous action
+            actions[-1]["desc"] += " " + line.strip()
+    return actions
+
+
+def monster_from_text(text: str) -> Dict[str, Any]:
+    """
+    Parses the text of a stat block (as in the SRD) into the monster format of json_import
+    :param text: The stat block text
+    :return: The monster
+    """
+    lines = text.splitlines()
+    names = [line.strip() for line in lines if line.strip()]
+    if not names:
+        raise InvalidTextImportError("Empty stat block.")
+    monster: Dict[str, Any] = {
+        "name": names[0],
+        "armor_class": int(_search(_ARMOR_CLASS, text, "Armor Class")),
+        "hit_points": int(_search(_HIT_POINTS, text, "Hit Points")),
+    }
+    speed = _SPEED.search(text)
+    if speed is not None:
+        monster["speed"] = int(speed.group(1))
+    header = _SCORES_HEADER.search(text)
+    scores = _SCORE.findall(text, header.end() if header is not None else 0)
+    if len(scores) < 6:
+        raise InvalidTextImportError("Missing ability scores.")
+    for key, score in zip(ABILITY_KEYS.values(), scores):
+        monster[key] = int(score)
+    challenge_rating = _CHALLENGE.search(text)
+    if challenge_rating is not None:
+        monster["challenge_rating"] = challenge_rating.group(1)
+    proficiency = _PROFICIENCY.search(text)
+    if proficiency is not None:
+        monster["proficiency_bonus"] = int(proficiency.group(1))
+    monster["actions"] = _actions(lines)
+    return monster
+
+
+def _parse(index: int, text: str) -> ImportResult:  # pragma: no cover
+    try:
+        monster = monster_from_text(text)
+    except InvalidTextImportError as e:
+        names = [line.strip() for line in text.splitlines() if line.strip()]
+        return ImportResult(index, names[0] if names else None, None, str(e))
+    return convert_monster(index, monster)
+
+
+def parse_stat_blocks(text: str, start: int = 0) -> List[ImportResult]:
+    """
+    Parses text holding one or more stat blocks into stat block records. Errors are reported per stat block.
+    :param text: The text
+    :param start: The index of the first stat block
+    :return: A result for each stat block, in order
+    """
+    return [_parse(start + i, block) for i, block in enumerate(split_stat_blocks(text))]
+
+
+def parse_stat_block(text: str) -> Tuple[Dict[str, Any], Tuple[str, ...]]:
+    """
+    Parses the text of a single stat block
+    :param text: The stat block text
+    :return: The stat block record (see block_format) and the names of the actions that are not attacks
+    """
+    results = parse_stat_blocks(text)
+    if len(results) != 1:
+        raise InvalidTextImportError(
+            f"Expected a single stat block. Got {len(results)}."
+        )
+    (result,) = results
+    if result.error is not None:
+        raise InvalidTextImportError(result.error)
+    return result.record, result.skipped
+
+
+def _parse_file(path: str) -> List[ImportResult]:  # pragma: no cover
+    with open(path, encoding="utf-8") as file:
+        return parse_stat_blocks(file.read())
+
+
+def parse_files(
+    paths: Iterable[str], workers: Optional[int] = 1
+) -> Iterator[Tuple[str, List[ImportResult]]]:
+    """
+    Parses text files of stat blocks, one file per task
+    :param paths: The file paths
+    :param workers: The number of worker processes. If 1, the files are parsed in this process
+    :return: An iterator over the paths and their results, in order
+    """
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise InvalidTextImportError(
+            f"workers should be a positive integer or None. Got {workers}."
+        )
+    paths = list(paths)
+    if workers == 1:
+        for path in paths:
+            yield path, _parse_file(path)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from zip(paths, executor.map(_parse_file, paths))
@@ -0,0 +1,229 @@
+import functools
+import itertools
+import math
+import random
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Dict, Sequence, Any, Optional, NamedTuple, Iterator
+
+from .balance import (
+    AttackBalance,
+    DefenseBalance,
+    BalanceProfile,
+    DEFAULT_PROFILE,
+    InvalidBalanceProfileError,
+)
+from .combat import expected_damage, unsaved_wound_probability
+from .interfaces import StatBlock, CreatureAttack
+from .reference import (
+    REFERENCE_RESISTANCE,
+    REFERENCE_SAVING_THROW,
+    REFERENCE_HIT_POINTS,
+    REFERENCE_ATTACK,
+)
+from .unit_attacks import from_creature_attack
+from .unit_stat_block import (
+    resistance_value_from_stat_block,
+    saving_throw_value_from_stat_block,
+    invulnerable_saving_throw_value_from_stat_block,
+    hit_points_per_creature_from_stat_block,
+)
+
+
+class InvalidTunerParamError(ValueError):
+    pass
+
+
+class TuningResult(NamedTuple):
+    """
+    The outcome of a balance tuning run
+    """
+
+    profile: BalanceProfile
+    score: float
+    evaluated: int
+    pruned: int
+
+
+_dataset: List[Tuple[StatBlock, List[List[CreatureAttack]]]] = []
+_challenge_ratings: np.ndarray = np.zeros(0)
+
+
+def _init_worker(dataset: Sequence[Tuple[StatBlock, float]]) -> None:
+    global _dataset, _challenge_ratings
+    _dataset = []
+    for stat_block, _ in dataset:
+        profiles = [[attack] for attack in stat_block.attacks.values()]
+        profiles.extend(stat_block.multiattacks.values())
+        _dataset.append((stat_block, profiles))
+    _challenge_ratings = np.array([float(cr) for _, cr in dataset])
+    _offense.cache_clear()
+    _durability.cache_clear()
+
+
+@functools.lru_cache(maxsize=None)
+def _offense(index: int, profile: AttackBalance) -> float:
+    full_profile = BalanceProfile(profile, DEFAULT_PROFILE.defense)
+    best = 0.0
+    for attacks in _dataset[index][1]:
+        damage = 0.0
+        for attack in attacks:
+            damage += expected_damage(
+                from_creature_attack(attack, full_profile),
+                REFERENCE_RESISTANCE,
+                REFERENCE_SAVING_THROW,
+                None,
+                REFERENCE_HIT_POINTS,
+            )
+        best = max(best, damage)
+    return best
+
+
+@functools.lru_cache(maxsize=None)
+def _durability(index: int, profile: DefenseBalance) -> float:
+    stat_block = _dataset[index][0]
+    wound = unsaved_wound_probability(
+        REFERENCE_ATTACK,
+        resistance_value_from_stat_block(stat_block, profile),
+        saving_throw_value_from_stat_block(stat_block, profile),
+        invulnerable_saving_throw_value_from_stat_block(stat_block, profile),
+    )
+    return hit_points_per_creature_from_stat_block(stat_block, profile) / wound
+
+
+def _evaluate(profile: BalanceProfile, indices: Tuple[int, ...]) -> float:
+    power = np.array(
+        [_offense(i, profile.attack) * _durability(i, profile.defense) for i in indices]
+    )
+    challenge_ratings = _challenge_ratings[list(indices)]
+    if len(indices) < 2 or np.std(power) == 0 or np.std(challenge_ratings) == 0:
+        return -math.inf
+    return float(np.corrcoef(np.log1p(power), challenge_ratings)[0, 1])
+
+
+def evaluate_profile(
+    profile: BalanceProfile, dataset: Sequence[Tuple[StatBlock, float]]
+) -> float:
+    """
+    Returns how well the unit power of a balance profile tracks the challenge rating of a bestiary.
+    The unit power is the product of the expected damage against a reference defender
+    and the number of reference attacks needed to slay one creature. Both are the exact means
+    a simulation of the same matchups would converge to, so the candidates are scored analytically.
+    :param profile: The balance profile
+    :param dataset: Pairs of stat block and challenge rating
+    :return: The correlation between log unit power and challenge rating
+    """
+    _init_worker(dataset)
+    return _evaluate(profile, tuple(range(len(dataset))))
+
+
+def _candidates(
+    base: BalanceProfile,
+    search_space: Dict[str, Sequence[Any]],
+    samples: int,
+    rng: random.Random,
+) -> List[BalanceProfile]:
+    names = list(search_space.keys())
+    grid_size = math.prod(len(values) for values in search_space.values())
+    if grid_size <= samples:
+        combinations: Iterator[Tuple[Any, ...]] = itertools.product(
+            *search_space.values()
+        )
+    else:
+        combinations = (
+            tuple(rng.choice(search_space[name]) for name in names)
+            for _ in range(samples)
+        )
+    profiles = [base]
+    for combination in combinations:
+        try:
+            profile = base.replace(dict(zip(names, combination)))
+        except (InvalidBalanceProfileError, TypeError):
+            continue
+        if profile not in profiles:
+            profiles.append(profile)
+    return profiles
+
+
+def _evaluate_all(
+    executor: Optional[ProcessPoolExecutor],
+    profiles: List[BalanceProfile],
+    indices: Tuple[int, ...],
+) -> List[float]:
+    if executor is None:
+        return [_evaluate(profile, indices) for profile in profiles]
+    return list(executor.map(_evaluate, profiles, itertools.repeat(indices)))
+
+
+def tune(
+    dataset: Sequence[Tuple[StatBlock, float]],
+    search_space: Dict[str, Sequence[Any]],
+    base: BalanceProfile = DEFAULT_PROFILE,
+    *,
+    samples: int = 64,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    prune_fraction: float = 0.25,
+    prune_margin: float = 0.05,
+) -> TuningResult:
+    """
+    Searches the balance parameters whose unit power best tracks the challenge rating of a bestiary.
+    Every candidate is first scored on a fraction of the bestiary: candidates scoring worse than
+    the best one by more than *prune_margin* are pruned before the full evaluation.
+    :param dataset: Pairs of stat block and challenge rating
+    :param search_space: Mapping of "attack.<name>" or "defense.<name>" to the values to try
+    :param base: The profile the candidates are derived from
+    :param samples: The number of random candidates if the grid is larger than this
+    :param seed: The seed of the candidate sampling
+    :param workers: The number of worker processes. If 1, the search runs in this process
+    :param prune_fraction: The fraction of the bestiary used for pruning
+    :param prune_margin: The score margin under which a candidate is pruned
+    :return: The best profile found
+    """
+    if len(dataset) < 2:
+        raise InvalidTunerParamError(
+            f"dataset should contain at least 2 stat blocks. Got {len(dataset)}."
+        )
+    if not isinstance(samples, int) or samples < 1:
+        raise InvalidTunerParamError(
+            f"samples should be a positive integer. Got {samples}."
+        )
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise InvalidTunerParamError(
+            f"workers should be a positive integer or None. Got {workers}."
+        )
+    if not 0 < prune_fraction <= 1:
+        raise InvalidTunerParamError(
+            f"prune_fraction should be between 0 and 1. Got {prune_fraction}."
+        )
+    rng = random.Random(seed)
+    candidates = _candidates(base, search_space, samples, rng)
+    indices = list(range(len(dataset)))
+    rng.shuffle(indices)
+    subset = tuple(indices[: max(2, math.ceil(len(indices) * prune_fraction))])
+    full = tuple(range(len(dataset)))
+
+    executor = None
+    if workers == 1:
+        _init_worker(dataset)
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(dataset,)
+        )
+    try:
+        partial_scores = _evaluate_all(executor, candidates, subset)
+        best_partial = max(partial_scores)
+        survivors = [
+            candidate
+            for candidate, score in zip(candidates, partial_scores)
+            if score >= best_partial - prune_margin
+        ]
+        scores = _evaluate_all(executor, survivors, full)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    best_score, best_profile = max(zip(scores, survivors), key=lambda scored: scored[0])
+    return TuningResult(
+        best_profile, best_score, len(candidates), len(candidates) - len(survivors)
+    )
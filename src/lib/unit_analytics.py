@@ -0,0 +1,178 @@
+import functools
+import numpy as np
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .combat import unsaved_wound_probability_array
+from .dice import die_expression_distribution, get_average_damage
+from .interfaces import UnitAttack, UnitStatBlock
+
+SAVING_THROWS: Tuple[int, ...] = (2, 3, 4, 5, 6)
+INVULNERABLE_SAVING_THROWS: Tuple[Optional[int], ...] = (None, 4, 5, 6)
+RESISTANCES: Tuple[int, ...] = tuple(range(1, 13))
+HIT_POINTS: Tuple[int, ...] = tuple(range(1, 11))
+SHAPE = (
+    len(SAVING_THROWS),
+    len(INVULNERABLE_SAVING_THROWS),
+    len(RESISTANCES),
+    len(HIT_POINTS),
+)
+
+
+class EfficiencyTable(NamedTuple):
+    """
+    Expected creatures slain per activation against the reference defenders.
+    Arrays are indexed by [saving throw, invulnerable saving throw, resistance, hit points]
+    following SAVING_THROWS, INVULNERABLE_SAVING_THROWS, RESISTANCES and HIT_POINTS.
+    """
+
+    name: str
+    # The table of each attack
+    attacks: Dict[str, np.ndarray]
+    # The table of each multiattack
+    multiattacks: Dict[str, np.ndarray]
+    # The best attack or multiattack against each defender
+    best: np.ndarray
+
+    def slain(
+        self,
+        saving_throw: int,
+        invulnerable_saving_throw: Optional[int],
+        resistance: int,
+        hit_points: int,
+    ) -> float:
+        """
+        Returns the expected creatures slain per activation against a reference defender
+        :param saving_throw: The defender's saving throw
+        :param invulnerable_saving_throw: The defender's invulnerable saving throw or None
+        :param resistance: The defender's resistance
+        :param hit_points: The hit points of each defending creature
+        :return: The expected creatures slain by the best profile
+        """
+        return float(
+            self.best[
+                SAVING_THROWS.index(saving_throw),
+                INVULNERABLE_SAVING_THROWS.index(invulnerable_saving_throw),
+                RESISTANCES.index(resistance),
+                HIT_POINTS.index(hit_points),
+            ]
+        )
+
+
+@functools.lru_cache(maxsize=1024)
+def wounds_per_kill(damage: str, max_hit_points: int = HIT_POINTS[-1]) -> np.ndarray:
+    """
+    Returns the expected number of unsaved wounds needed to slay a creature. Excess damage is lost.
+    :param damage: The damage expression of each wound
+    :param max_hit_points: The highest hit points to compute
+    :return: A read-only array whose i-th element refers to a creature with i + 1 hit points (inf if unkillable)
+    """
+    distribution = die_expression_distribution(damage)
+    no_damage = distribution[0]
+    expected = np.zeros(max_hit_points + 1)
+    for hit_points in range(1, max_hit_points + 1):
+        if no_damage >= 1:
+            expected[hit_points] = np.inf
+            continue
+        # E[h] = 1 + sum_d P(d) E[h - d], with E[h] = 0 for h <= 0
+        remaining = 0.0
+        for damage_value in range(1, min(hit_points, distribution.size)):
+            remaining += (
+                distribution[damage_value] * expected[hit_points - damage_value]
+            )
+        expected[hit_points] = (1 + remaining) / (1 - no_damage)
+    result = expected[1:]
+    result.setflags(write=False)
+    return result
+
+
+def _profiles(
+    stat_block: UnitStatBlock,
+) -> List[Tuple[str, List[UnitAttack]]]:  # pragma: no cover
+    profiles = [(attack.name, [attack]) for attack in stat_block.attacks]
+    profiles.extend(stat_block.multiattacks.items())
+    return profiles
+
+
+def _slain(attacks: List[UnitAttack]) -> np.ndarray:  # pragma: no cover
+    # One broadcast evaluation over (attack, saving throw, invulnerable, resistance, hit points)
+    skill = np.array([1 if a.attack_skill is None else a.attack_skill for a in attacks])
+    strength = np.array([a.strength for a in attacks])
+    ap = np.array([a.armor_penetration for a in attacks])
+    number_of_attacks = np.array(
+        [get_average_damage(a.number_of_attacks)[0] for a in attacks]
+    )
+    kills = np.array([wounds_per_kill(a.damage, HIT_POINTS[-1]) for a in attacks])
+    saving_throw = np.array(SAVING_THROWS).reshape(1, -1, 1, 1, 1)
+    invulnerable = np.array(
+        [7 if s is None else s for s in INVULNERABLE_SAVING_THROWS]
+    ).reshape(1, 1, -1, 1, 1)
+    resistance = np.array(RESISTANCES).reshape(1, 1, 1, -1, 1)
+    unsaved = unsaved_wound_probability_array(
+        skill.reshape(-1, 1, 1, 1, 1),
+        strength.reshape(-1, 1, 1, 1, 1),
+        ap.reshape(-1, 1, 1, 1, 1),
+        resistance,
+        saving_throw,
+        invulnerable,
+    )
+    wounds = number_of_attacks.reshape(-1, 1, 1, 1, 1) * unsaved
+    return wounds / kills[:, np.newaxis, np.newaxis, np.newaxis, :]
+
+
+def batch_efficiency_tables(
+    stat_blocks: Iterable[UnitStatBlock],
+) -> List[EfficiencyTable]:
+    """
+    Computes the efficiency tables of many units in one vectorized evaluation
+    :param stat_blocks: The unit stat blocks
+    :return: The efficiency table of each unit
+    """
+    stat_blocks = list(stat_blocks)
+    attacks: List[UnitAttack] = []
+    offsets: List[int] = []
+    for stat_block in stat_blocks:
+        for _, profile in _profiles(stat_block):
+            offsets.append(len(attacks))
+            attacks.extend(profile)
+    offsets.append(len(attacks))
+    bounds = np.array(offsets)
+    profiles = np.zeros((bounds.size - 1, *SHAPE))
+    has_attacks = bounds[1:] > bounds[:-1]
+    if attacks:
+        # reduceat needs valid starting indices: empty multiattacks are masked out and slay nothing
+        profiles[has_attacks] = np.add.reduceat(
+            _slain(attacks), bounds[:-1][has_attacks], axis=0
+        )
+    tables = []
+    start = 0
+    for stat_block in stat_blocks:
+        attack_count = len(stat_block.attacks)
+        unit_profiles = profiles[
+            start : start + attack_count + len(stat_block.multiattacks)
+        ]
+        start += len(unit_profiles)
+        tables.append(
+            EfficiencyTable(
+                stat_block.name,
+                {
+                    attack.name: table
+                    for attack, table in zip(
+                        stat_block.attacks, unit_profiles[:attack_count]
+                    )
+                },
+                dict(zip(stat_block.multiattacks, unit_profiles[attack_count:])),
+                unit_profiles.max(axis=0) if len(unit_profiles) else np.zeros(SHAPE),
+            )
+        )
+    return tables
+
+
+def efficiency_table(stat_block: UnitStatBlock) -> EfficiencyTable:
+    """
+    Computes the expected creatures slain by one activation of a unit's creature against a grid of reference defenders.
+    Each profile's unsaved wounds are divided by the expected wounds needed to slay one defending creature.
+    :param stat_block: The unit stat block
+    :return: The efficiency table
+    """
+    return batch_efficiency_tables([stat_block])[0]
@@ -4,6 +4,7 @@ from abc import ABC
 from typing import Optional
 
 from .attacks import InvalidAttackParamError
+from .balance import AttackBalance, BalanceProfile, DEFAULT_PROFILE
 from .dice import (
     get_average_damage,
     convert_to_d3_d6,
@@ -153,75 +154,85 @@ class MeleeUnitAttack(UnitAttack):
         return True
 
 
-def _range_from_attack(attack: CreatureAttack) -> int:  # pragma: no cover
+def _range_from_attack(
+    attack: CreatureAttack, profile: AttackBalance = DEFAULT_PROFILE.attack
+) -> int:  # pragma: no cover
     return attack.range
 
 
 def _attack_skill_from_attack(
-    attack: CreatureAttack,
+    attack: CreatureAttack, profile: AttackBalance = DEFAULT_PROFILE.attack
 ) -> Optional[int]:  # pragma: no cover
-    if attack.to_hit_bonus < 0:
-        return 6
-    elif attack.to_hit_bonus < 2:
-        return 5
-    elif attack.to_hit_bonus < 5:
-        return 4
-    elif attack.to_hit_bonus < 10:
-        return 3
-    return 2
-
-
-def _strength_value_from_attack(attack: CreatureAttack) -> int:  # pragma: no cover
+    return profile.attack_skill.lookup(attack.to_hit_bonus)
+
+
+def _strength_value_from_attack(
+    attack: CreatureAttack, profile: AttackBalance = DEFAULT_PROFILE.attack
+) -> int:  # pragma: no cover
     return max(
         math.floor(math.sqrt(attack.total_average_damage + 1))
         + attack.to_hit_bonus
-        - 1,
+        + profile.strength_offset,
         1,
     )
 
 
 def _armor_penetration_value_from_attack(
-    attack: CreatureAttack,
+    attack: CreatureAttack, profile: AttackBalance = DEFAULT_PROFILE.attack
 ) -> int:  # pragma: no cover
-    damage_pen = math.floor(attack.total_average_damage / 20)
+    damage_pen = math.floor(
+        attack.total_average_damage / profile.armor_penetration_damage_step
+    )
     to_hit_pen = (
-        math.floor(max(attack.to_hit_bonus, 0) / 7) if not attack.target.is_aoe else 1
+        math.floor(max(attack.to_hit_bonus, 0) / profile.armor_penetration_to_hit_step)
+        if not attack.target.is_aoe
+        else profile.area_of_effect_armor_penetration
     )
     total_pen = damage_pen + to_hit_pen
     return -total_pen
 
 
-def _damage_from_attack(attack: CreatureAttack) -> str:  # pragma: no cover
-    scaled_dice = math.ceil(attack.dice_average_damage / 20)
-    scale_fixed = math.ceil(attack.total_average_damage / 20) - scaled_dice
+def _damage_from_attack(
+    attack: CreatureAttack, profile: AttackBalance = DEFAULT_PROFILE.attack
+) -> str:  # pragma: no cover
+    scaled_dice = math.ceil(attack.dice_average_damage / profile.damage_scale)
+    scale_fixed = (
+        math.ceil(attack.total_average_damage / profile.damage_scale) - scaled_dice
+    )
     d6, d3, fixed = convert_to_d3_d6(scaled_dice)
     fixed += scale_fixed
     return convert_d6_d3_to_string(d6, d3, fixed)
 
 
-def _number_of_attacks_from_attack(attack: CreatureAttack) -> str:  # pragma: no cover
+def _number_of_attacks_from_attack(
+    attack: CreatureAttack, profile: AttackBalance = DEFAULT_PROFILE.attack
+) -> str:  # pragma: no cover
     attacks = attack.target.number_of_targets
     attacks *= attack.multiattack
     if attack.is_melee:
-        attacks *= 2
+        attacks *= profile.melee_attacks_multiplier
     if attack.target.is_aoe:
         d6, d3, fixed = convert_to_d3_d6(attacks)
         return convert_d6_d3_to_string(d6, d3, fixed)
     return str(attacks)
 
 
-def _is_aoe_from_attack(attack: CreatureAttack) -> bool:  # pragma: no cover
+def _is_aoe_from_attack(
+    attack: CreatureAttack, profile: AttackBalance = DEFAULT_PROFILE.attack
+) -> bool:  # pragma: no cover
     return attack.target.is_aoe
 
 
-def from_creature_attack(attack: CreatureAttack) -> UnitAttack:
-    weapon_range = _range_from_attack(attack)
-    damage = _damage_from_attack(attack)
-    ap = _armor_penetration_value_from_attack(attack)
-    attacks = _number_of_attacks_from_attack(attack)
-    strength = _strength_value_from_attack(attack)
-    skill = _attack_skill_from_attack(attack)
-    aoe = _is_aoe_from_attack(attack)
+def from_creature_attack(
+    attack: CreatureAttack, profile: BalanceProfile = DEFAULT_PROFILE
+) -> UnitAttack:
+    weapon_range = _range_from_attack(attack, profile.attack)
+    damage = _damage_from_attack(attack, profile.attack)
+    ap = _armor_penetration_value_from_attack(attack, profile.attack)
+    attacks = _number_of_attacks_from_attack(attack, profile.attack)
+    strength = _strength_value_from_attack(attack, profile.attack)
+    skill = _attack_skill_from_attack(attack, profile.attack)
+    aoe = _is_aoe_from_attack(attack, profile.attack)
     if attack.is_melee:
         return MeleeUnitAttack(
             attack.name, weapon_range, attacks, skill, strength, ap, damage, aoe
@@ -229,3 +240,15 @@ def from_creature_attack(attack: CreatureAttack) -> UnitAttack:
     return RangedUnitAttack(
         attack.name, weapon_range, attacks, skill, strength, ap, damage, aoe
     )
+
+
+def number_of_attacks_from_attack(
+    attack: CreatureAttack, profile: BalanceProfile = DEFAULT_PROFILE
+) -> str:
+    """
+    Returns the number of attacks of the unit attack converted from a creature attack
+    :param attack: The creature attack
+    :param profile: The balance profile to convert the attack with
+    :return: The number of attacks as a die expression
+    """
+    return _number_of_attacks_from_attack(attack, profile.attack)
@@ -1,11 +1,12 @@
 import math
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Mapping
 
 from .interfaces import (
     UnitStatBlock as UnitStatBlockInterface,
     StatBlock,
     UnitAttack,
 )
+from .balance import DefenseBalance, BalanceProfile, DEFAULT_PROFILE
 from .stat_block import InvalidStatBlockParamError
 from .unit_attacks import from_creature_attack
 
@@ -130,66 +131,121 @@ class UnitStatBlock(UnitStatBlockInterface):
         return self._multiattacks
 
 
-def _speed_from_stat_block(stat_block: StatBlock) -> int:  # pragma: no cover
+def _speed_from_stat_block(
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
+) -> int:  # pragma: no cover
     return stat_block.speed
 
 
-def _resistance_value_from_stat_block(stat_block: StatBlock) -> int:  # pragma: no cover
+def _resistance_value_from_stat_block(
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
+) -> int:  # pragma: no cover
     constitution_modifier = stat_block.ability_scores.constitution_modifier
     prof_modifier = stat_block.proficiency_modifier
-    return max(2 + constitution_modifier + prof_modifier // 2, 1)
+    return max(
+        profile.resistance_base
+        + constitution_modifier
+        + prof_modifier // profile.resistance_proficiency_divisor,
+        1,
+    )
 
 
 def _saving_throw_value_from_stat_block(
-    stat_block: StatBlock,
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
 ) -> int:  # pragma: no cover
-    ac = stat_block.armor_class
-    if ac < 10:
-        return 6
-    elif ac < 13:
-        return 5
-    elif ac < 16:
-        return 4
-    elif ac < 20:
-        return 3
-    return 2
+    return profile.saving_throw.lookup(stat_block.armor_class)
 
 
 def _invulnerable_saving_throw_value_from_stat_block(
-    stat_block: StatBlock,
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
 ) -> Optional[int]:  # pragma: no cover
-    ac = stat_block.armor_class
-    if ac < 17:
-        return None
-    elif ac < 21:
-        return 6
-    elif ac < 23:
-        return 5
-    return 4
+    return profile.invulnerable_saving_throw.lookup(stat_block.armor_class)
 
 
 def _hit_points_per_creature_from_stat_block(
-    stat_block: StatBlock,
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
 ) -> int:  # pragma: no cover
-    return math.ceil(stat_block.hit_points / 20)
+    return math.ceil(stat_block.hit_points / profile.hit_points_scale)
+
+
+def speed_from_stat_block(
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
+) -> int:
+    """
+    Returns the speed of the unit converted from a stat block
+    :param stat_block: The 5e stat block
+    :param profile: The defense balance to convert the stat block with
+    :return: The unit speed
+    """
+    return _speed_from_stat_block(stat_block, profile)
 
 
-def from_stat_block(stat_block: StatBlock) -> UnitStatBlock:
-    speed = _speed_from_stat_block(stat_block)
-    resistance = _resistance_value_from_stat_block(stat_block)
-    saving_throw = _saving_throw_value_from_stat_block(stat_block)
+def resistance_value_from_stat_block(
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
+) -> int:
+    """
+    Returns the resistance of the unit converted from a stat block
+    :param stat_block: The 5e stat block
+    :param profile: The defense balance to convert the stat block with
+    :return: The unit resistance
+    """
+    return _resistance_value_from_stat_block(stat_block, profile)
+
+
+def saving_throw_value_from_stat_block(
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
+) -> int:
+    """
+    Returns the saving throw of the unit converted from a stat block
+    :param stat_block: The 5e stat block
+    :param profile: The defense balance to convert the stat block with
+    :return: The unit saving throw
+    """
+    return _saving_throw_value_from_stat_block(stat_block, profile)
+
+
+def invulnerable_saving_throw_value_from_stat_block(
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
+) -> Optional[int]:
+    """
+    Returns the invulnerable saving throw of the unit converted from a stat block
+    :param stat_block: The 5e stat block
+    :param profile: The defense balance to convert the stat block with
+    :return: The unit invulnerable saving throw or None if it has none
+    """
+    return _invulnerable_saving_throw_value_from_stat_block(stat_block, profile)
+
+
+def hit_points_per_creature_from_stat_block(
+    stat_block: StatBlock, profile: DefenseBalance = DEFAULT_PROFILE.defense
+) -> int:
+    """
+    Returns the hit points of each creature of the unit converted from a stat block
+    :param stat_block: The 5e stat block
+    :param profile: The defense balance to convert the stat block with
+    :return: The hit points per creature
+    """
+    return _hit_points_per_creature_from_stat_block(stat_block, profile)
+
+
+def from_stat_block(
+    stat_block: StatBlock, profile: BalanceProfile = DEFAULT_PROFILE
+) -> UnitStatBlock:
+    speed = _speed_from_stat_block(stat_block, profile.defense)
+    resistance = _resistance_value_from_stat_block(stat_block, profile.defense)
+    saving_throw = _saving_throw_value_from_stat_block(stat_block, profile.defense)
     invulnerable_saving_throw = _invulnerable_saving_throw_value_from_stat_block(
-        stat_block
+        stat_block, profile.defense
     )
-    hp = _hit_points_per_creature_from_stat_block(stat_block)
+    hp = _hit_points_per_creature_from_stat_block(stat_block, profile.defense)
     attacks = []
     for attack in stat_block.attacks.values():
-        attacks.append(from_creature_attack(attack))
+        attacks.append(from_creature_attack(attack, profile))
     multiattacks = {}
     for multiattack_name, multiattack in stat_block.multiattacks.items():
         multi = []
         for attack in multiattack:
-            multi.append(from_creature_attack(attack))
+            multi.append(from_creature_attack(attack, profile))
         multiattacks[multiattack_name] = multi
     return UnitStatBlock(
         stat_block.name,
@@ -201,3 +257,17 @@ def from_stat_block(stat_block: StatBlock) -> UnitStatBlock:
         attacks,
         multiattacks,
     )
+
+
+def from_stat_block_profiles(
+    stat_block: StatBlock, profiles: Mapping[str, BalanceProfile]
+) -> Dict[str, UnitStatBlock]:
+    """
+    Converts a stat block under several balance profiles
+    :param stat_block: The 5e stat block
+    :param profiles: Mapping of profile names to balance profiles
+    :return: Mapping of profile names to the converted unit stat blocks
+    """
+    return {
+        name: from_stat_block(stat_block, profile) for name, profile in profiles.items()
+    }
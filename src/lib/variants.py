@@ -0,0 +1,348 @@
+import weakref
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .ability_scores import AbilityScores, Scores
+from .balance import BalanceProfile, DEFAULT_PROFILE
+from .incremental import (
+    DEFENSES,
+    DEPENDENCIES,
+    attack_dependencies,
+    stat_block_inputs,
+)
+from .interfaces import Attack, CreatureAttack, StatBlock as StatBlockInterface
+from .stat_block import StatBlock, _combine_attacks
+from .unit_attacks import from_creature_attack
+from .unit_stat_block import UnitStatBlock
+
+_FIELDS = ("name", "proficiency", "armor_class", "hit_points", "speed")
+# The number of derived values kept for each root stat block, least recently used first out
+FAMILY_CACHE_SIZE = 4096
+# Derived values shared by every variant of the same root stat block
+_family_caches: "weakref.WeakKeyDictionary[StatBlock, OrderedDict[Any, Any]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class InvalidVariantParamError(ValueError):
+    pass
+
+
+class StatBlockVariant(StatBlockInterface):
+    """
+    A 5e stat block stored as the changes over a base stat block
+    """
+
+    def __init__(
+        self,
+        base: Union[StatBlock, "StatBlockVariant"],
+        name: Optional[str] = None,
+        scores: Optional[Dict[Scores, int]] = None,
+        prof: Optional[int] = None,
+        ac: Optional[int] = None,
+        hp: Optional[int] = None,
+        speed: Optional[int] = None,
+        attacks: Optional[Dict[str, Optional[Attack]]] = None,
+        multiattacks: Optional[Dict[str, Optional[List[str]]]] = None,
+    ):
+        """
+        A variant of a 5e stat block. Every value left to None is read from the base.
+        Base multiattacks using a removed attack are removed, the ones using a replaced attack use the new one.
+        :param base: The base stat block (possibly another variant)
+        :param name: The variant's name
+        :param scores: The changed ability scores
+        :param prof: The variant's proficiency modifier
+        :param ac: The variant's armor class
+        :param hp: The variant's hit points
+        :param speed: The variant's speed in feet
+        :param attacks: Mapping of attack names to the new or replaced attack templates, or None to remove them
+        :param multiattacks: Mapping of multiattack names to the names of their attacks, or None to remove them
+        """
+        if not isinstance(base, (StatBlock, StatBlockVariant)):
+            raise InvalidVariantParamError(
+                f"base should be a StatBlock or a StatBlockVariant. Got {type(base)}: {base}."
+            )
+        if name is not None and (not name or not isinstance(name, str)):
+            raise InvalidVariantParamError(
+                f"name should be a non-empty string or None. Got {name}."
+            )
+        if prof is not None and not isinstance(prof, int):
+            raise InvalidVariantParamError(
+                f"prof should be an integer or None. Got {prof}."
+            )
+        for field, value in (("ac", ac), ("hp", hp)):
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise InvalidVariantParamError(
+                    f"{field} should be a positive integer or None. Got {value}."
+                )
+        if speed is not None and (not isinstance(speed, int) or speed < 0):
+            raise InvalidVariantParamError(
+                f"speed should be a non-negative integer or None. Got {speed}."
+            )
+        self._base: Union[StatBlock, StatBlockVariant] = base
+        self._root: StatBlock = (
+            base._root if isinstance(base, StatBlockVariant) else base
+        )
+        self._fields: Dict[str, Any] = {
+            field: value
+            for field, value in zip(_FIELDS, (name, prof, ac, hp, speed))
+            if value is not None
+        }
+        self._scores: Dict[Scores, int] = dict(scores or {})
+        self._ability_scores: Optional[AbilityScores] = None
+        if self._scores:
+            values = {
+                score: self._scores.get(
+                    score, base.ability_scores.get_ability_score(score)
+                )
+                for score in Scores
+            }
+            self._ability_scores = AbilityScores(
+                values[Scores.STRENGTH],
+                values[Scores.DEXTERITY],
+                values[Scores.CONSTITUTION],
+                values[Scores.INTELLIGENCE],
+                values[Scores.WISDOM],
+                values[Scores.CHARISMA],
+            )
+        self._attacks: Dict[str, Optional[Attack]] = {}
+        for attack_name, attack in (attacks or {}).items():
+            if attack is not None and (
+                not isinstance(attack, Attack) or attack.name != attack_name
+            ):
+                raise InvalidVariantParamError(
+                    f"attacks should map each name to an Attack with that name or None. Got {attack_name}: {attack}."
+                )
+            self._attacks[attack_name] = attack
+        self._multiattacks: Dict[str, Optional[List[str]]] = {}
+        # Multiattacks combined by this variant, built once so that conversions can reuse them
+        self._combined: Dict[str, List[Attack]] = {}
+        attack_templates = self.attack_templates
+        for multiattack_name, attack_names in (multiattacks or {}).items():
+            for attack_name in attack_names or []:
+                if attack_name not in attack_templates:
+                    raise InvalidVariantParamError(
+                        f"{attack_name} not in creature's attacks"
+                    )
+            self._multiattacks[multiattack_name] = (
+                None if attack_names is None else list(attack_names)
+            )
+
+    @property
+    def base(self) -> Union[StatBlock, "StatBlockVariant"]:
+        return self._base
+
+    @property
+    def overrides(self) -> Dict[str, Any]:
+        """
+        The values this variant changes over its base
+        """
+        overrides: Dict[str, Any] = dict(self._fields)
+        if self._scores:
+            overrides["scores"] = dict(self._scores)
+        if self._attacks:
+            overrides["attacks"] = dict(self._attacks)
+        if self._multiattacks:
+            overrides["multiattacks"] = {
+                name: None if names is None else list(names)
+                for name, names in self._multiattacks.items()
+            }
+        return overrides
+
+    @property
+    def name(self) -> str:
+        return self._fields.get("name", self._base.name)
+
+    @property
+    def ability_scores(self) -> AbilityScores:
+        if self._ability_scores is None:
+            return self._base.ability_scores
+        return self._ability_scores
+
+    @property
+    def proficiency_modifier(self) -> int:
+        return self._fields.get("proficiency", self._base.proficiency_modifier)
+
+    @property
+    def armor_class(self) -> int:
+        return self._fields.get("armor_class", self._base.armor_class)
+
+    @property
+    def hit_points(self) -> int:
+        return self._fields.get("hit_points", self._base.hit_points)
+
+    @property
+    def speed(self) -> int:
+        return self._fields.get("speed", self._base.speed)
+
+    @property
+    def attack_templates(self) -> Dict[str, Attack]:
+        """
+        The creature's attack templates by name
+        """
+        templates = self._base.attack_templates
+        for attack_name, attack in self._attacks.items():
+            if attack is None:
+                templates.pop(attack_name, None)
+            else:
+                templates[attack_name] = attack
+        return templates
+
+    @property
+    def multiattack_attack_names(self) -> Dict[str, List[str]]:
+        """
+        The names of the attacks each multiattack was created from
+        """
+        removed = {name for name, attack in self._attacks.items() if attack is None}
+        names = {
+            multiattack_name: attack_names
+            for multiattack_name, attack_names in self._base.multiattack_attack_names.items()
+            if not removed.intersection(attack_names)
+        }
+        for multiattack_name, attack_names in self._multiattacks.items():
+            if attack_names is None:
+                names.pop(multiattack_name, None)
+            else:
+                names[multiattack_name] = list(attack_names)
+        return names
+
+    @property
+    def multiattack_templates(self) -> Dict[str, List[Attack]]:
+        """
+        The creature's combined multiattack templates by name.
+        Multiattacks this variant does not change share the base's combined templates.
+        """
+        base_templates = self._base.multiattack_templates
+        attack_templates = self.attack_templates
+        templates = {}
+        for multiattack_name, attack_names in self.multiattack_attack_names.items():
+            if multiattack_name not in self._multiattacks and not set(
+                self._attacks
+            ).intersection(attack_names):
+                templates[multiattack_name] = base_templates[multiattack_name]
+            else:
+                if multiattack_name not in self._combined:
+                    self._combined[multiattack_name] = _combine_attacks(
+                        attack_templates, attack_names
+                    )
+                templates[multiattack_name] = list(self._combined[multiattack_name])
+        return templates
+
+    @property
+    def attacks(self) -> Dict[str, CreatureAttack]:
+        return {
+            attack_name: attack.from_creature(self)
+            for attack_name, attack in self.attack_templates.items()
+        }
+
+    @property
+    def multiattacks(self) -> Dict[str, List[CreatureAttack]]:
+        return {
+            multiattack_name: [attack.from_creature(self) for attack in multiattack]
+            for multiattack_name, multiattack in self.multiattack_templates.items()
+        }
+
+    def create_multiattack(self, name: str, attack_names: List[str]) -> None:
+        if name in self.multiattack_attack_names:
+            raise InvalidVariantParamError(f"multiattack {name} already present")
+        attack_templates = self.attack_templates
+        for attack_name in attack_names:
+            if attack_name not in attack_templates:
+                raise InvalidVariantParamError(
+                    f"{attack_name} not in creature's attacks"
+                )
+        self._multiattacks[name] = list(attack_names)
+        self._combined.pop(name, None)
+
+    def to_stat_block(self) -> StatBlock:
+        """
+        Materializes the variant as a standalone stat block
+        :return: The 5e stat block
+        """
+        stat_block = StatBlock(
+            self.name,
+            self.ability_scores,
+            self.proficiency_modifier,
+            self.armor_class,
+            self.hit_points,
+            self.speed,
+            list(self.attack_templates.values()),
+        )
+        for multiattack_name, attack_names in self.multiattack_attack_names.items():
+            stat_block.create_multiattack(multiattack_name, attack_names)
+        return stat_block
+
+
+def _family_cache(
+    stat_block: Union[StatBlock, StatBlockVariant],
+) -> "OrderedDict[Any, Any]":  # pragma: no cover
+    root = stat_block._root if isinstance(stat_block, StatBlockVariant) else stat_block
+    cache = _family_caches.get(root)
+    if cache is None:
+        cache = OrderedDict()
+        _family_caches[root] = cache
+    return cache
+
+
+def _cached(
+    cache: "OrderedDict[Any, Any]", key: Any, compute: Callable[[], Any]
+) -> Any:  # pragma: no cover
+    if key in cache:
+        cache.move_to_end(key)
+        return cache[key]
+    value = compute()
+    cache[key] = value
+    if len(cache) > FAMILY_CACHE_SIZE:
+        cache.popitem(last=False)
+    return value
+
+
+def to_unit_stat_block(
+    stat_block: Union[StatBlock, StatBlockVariant],
+    profile: BalanceProfile = DEFAULT_PROFILE,
+) -> UnitStatBlock:
+    """
+    Converts a stat block or a variant sharing the derived values of every variant of the same base.
+    A derived value is reused whenever its template and the inputs it depends on are unchanged.
+    :param stat_block: The stat block or variant
+    :param profile: The balance profile of the conversion
+    :return: The converted unit stat block
+    """
+    cache = _family_cache(stat_block)
+    inputs = stat_block_inputs(stat_block)
+
+    defenses = {}
+    for node, dependencies in DEPENDENCIES.items():
+        key = (node, tuple(inputs[name] for name in sorted(dependencies)), profile)
+        defenses[node] = _cached(
+            cache, key, lambda: DEFENSES[node](stat_block, profile.defense)
+        )
+
+    def convert(template: Attack):
+        dependencies = sorted(attack_dependencies(template))
+        key = (id(template), tuple(inputs[name] for name in dependencies), profile)
+        # The template is kept alive with its entry so that its id is not reused while the entry exists
+        entry = _cached(
+            cache,
+            key,
+            lambda: (
+                template,
+                from_creature_attack(template.from_creature(stat_block), profile),
+            ),
+        )
+        return entry[1]
+
+    return UnitStatBlock(
+        stat_block.name,
+        defenses["speed"],
+        defenses["resistance"],
+        defenses["saving_throw"],
+        defenses["invulnerable_saving_throw"],
+        defenses["hit_points"],
+        [convert(template) for template in stat_block.attack_templates.values()],
+        {
+            name: [convert(template) for template in templates]
+            for name, templates in stat_block.multiattack_templates.items()
+        },
+    )
@@ -1,19 +1,25 @@
-import copy
 import sys
 import threading
 import time
 import pathlib
-from PyQt6 import QtWidgets, QtGui
-from typing import Optional
+from PyQt6 import QtCore, QtWidgets, QtGui
+from typing import List, Optional
 
+from custom_ui.bestiary_browser import BestiaryBrowser
 from custom_ui.datasheet import (
-    datasheet_from_unit_stat_block,
-    datasheet_from_stat_block,
+    render_stat_block,
+    render_unit_stat_block,
     export_datasheet_from_unit_stat_block,
 )
 from custom_ui.matplotlib import MplCanvas
 from lib import __version__
 from lib.ability_scores import Scores
+from lib.block_format import stat_block_from_record
+from lib.history import History, Version
+from lib.incremental import IncrementalConverter
+from lib.journal import InvalidJournalError, Journal, journal_path, replay
+from lib.render_cache import RenderCache
+from lib.text_import import InvalidTextImportError, parse_stat_block
 from lib.unit_stat_block import from_stat_block
 from ui.edit_multiattack import Ui_Dialog as Ui_MultiattackDialog
 from ui.edit_roll_attack import Ui_Dialog as Ui_AttackRollDialog
@@ -26,18 +32,29 @@ from model import (
     MultiattackListModel,
     MultiattackDetailedListModel,
     SavingThrowModel,
-    from_model,
+    attack_to_record,
 )
 
 icon_path = pathlib.Path(__file__).parent.joinpath("resources", "icon.ico")
+data_path = pathlib.Path.home().joinpath(".medium_scale_combat_5e")
+render_cache_path = data_path.joinpath("render_cache")
+# Stat blocks that were never saved are autosaved here
+untitled_path = data_path.joinpath("untitled.5eblock")
 
 
 class Renderer(threading.Thread):
-    def __init__(self, srd_canvas: MplCanvas, medium_scale_canvas: MplCanvas):
+    def __init__(
+        self,
+        srd_canvas: MplCanvas,
+        medium_scale_canvas: MplCanvas,
+        cache: Optional[RenderCache] = None,
+    ):
         super().__init__()
         self._srd = srd_canvas
         self._medium_scale = medium_scale_canvas
-        self._model: Optional[StatBlockModel] = None
+        self._cache = cache
+        self._version: Optional[Version] = None
+        self._converter = IncrementalConverter()
         self._close = False
         self._lock = threading.Lock()
 
@@ -45,29 +62,86 @@ class Renderer(threading.Thread):
         with self._lock:
             current_close = self._close
         while not current_close:
-            current_model = None
-
             with self._lock:
-                if self._model:
-                    current_model = copy.deepcopy(self._model)
-                    self._model = None
-
-            if current_model:
-                srd_block = from_model(current_model)
-                medium_block = from_stat_block(srd_block)
-                self._srd.update_preview(datasheet_from_stat_block(srd_block))
-                self._medium_scale.update_preview(
-                    datasheet_from_unit_stat_block(medium_block)
-                )
+                # Versions are immutable: no copy is needed to use them in this thread
+                current_version = self._version
+                self._version = None
+
+            if current_version is not None:
+                srd_block = stat_block_from_record(current_version)
+                changes = self._converter.update(srd_block)
+                if changes.creature_changed:
+                    self._srd.update_preview_png(
+                        render_stat_block(srd_block, cache=self._cache)
+                    )
+                if changes.unit_changed:
+                    self._medium_scale.update_preview_png(
+                        render_unit_stat_block(
+                            changes.unit_stat_block, cache=self._cache
+                        )
+                    )
 
             with self._lock:
                 current_close = self._close
 
             time.sleep(0.5)
 
-    def queue_model(self, model: StatBlockModel):
+    def queue_version(self, version: Version):
         with self._lock:
-            self._model = copy.deepcopy(model)
+            self._version = version
+
+    def quit(self):
+        with self._lock:
+            self._close = True
+
+
+class Autosaver(threading.Thread):
+    def __init__(self):
+        super().__init__()
+        self._journal: Optional[Journal] = None
+        self._version: Optional[Version] = None
+        self._path: Optional[str] = None
+        self._discard: List[str] = []
+        self._close = False
+        self._lock = threading.Lock()
+
+    def run(self):
+        with self._lock:
+            current_close = self._close
+        while True:
+            with self._lock:
+                path, version, discard = self._path, self._version, self._discard
+                self._version = None
+                self._discard = []
+
+            for discard_path in discard:
+                Journal(discard_path).discard()
+                if self._journal is not None and self._journal.path == discard_path:
+                    self._journal = None
+            if version is not None:
+                if self._journal is None or self._journal.path != path:
+                    pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+                    self._journal = Journal(path)
+                self._journal.append(version.to_record())
+
+            if current_close:
+                break
+            with self._lock:
+                current_close = self._close
+
+            time.sleep(1)
+
+    def queue_version(self, path: str, version: Version):
+        with self._lock:
+            self._path = path
+            self._version = version
+
+    def queue_discard(self, path: str):
+        with self._lock:
+            # The pending record is already part of the saved file
+            if self._path == path:
+                self._version = None
+            self._discard.append(path)
 
     def quit(self):
         with self._lock:
@@ -75,23 +149,18 @@ class Renderer(threading.Thread):
 
 
 class AttackRollDialog(QtWidgets.QDialog, Ui_AttackRollDialog):
-    def __init__(
-        self, model: StatBlockModel, attack: AttackRollModel = None, parent=None
-    ):
+    def __init__(self, version: Version, attack: AttackRollModel = None, parent=None):
         super().__init__(parent)
         self.setupUi(self)
-        self.model = StatBlockModel()
-        self.model.copy_from(model)
+        self.version = version
+        self.old_name: Optional[str] = None
         self.saveButton = self.dialogButtons.button(
             QtWidgets.QDialogButtonBox.StandardButton.Save
         )
         self.attack = AttackRollModel()
         if attack:
             self.attack.copy_from(attack)
-            for a in self.model.attacks:
-                if a.name == attack.name:
-                    self.model.attacks.remove(a)
-                    break
+            self.old_name = attack.name
             self.load_attack()
         self.dialogButtons.rejected.connect(self.discard)
         self.dialogButtons.accepted.connect(self.save)
@@ -181,10 +250,11 @@ class AttackRollDialog(QtWidgets.QDialog, Ui_AttackRollDialog):
             self.secondParameterInput.setEnabled(True)
 
         try:
-            model = StatBlockModel()
-            model.copy_from(self.model)
-            model.attacks.append(self.attack)
-            from_model(model)
+            stat_block_from_record(
+                self.version.put_attack(
+                    attack_to_record(self.attack), replace=self.old_name
+                )
+            )
         except ValueError as e:
             self.saveButton.setEnabled(False)
             self.update_status(str(e), False)
@@ -207,23 +277,18 @@ class AttackRollDialog(QtWidgets.QDialog, Ui_AttackRollDialog):
 
 
 class SavingThrowDialog(QtWidgets.QDialog, Ui_SavingThrowDialog):
-    def __init__(
-        self, model: StatBlockModel, attack: SavingThrowModel = None, parent=None
-    ):
+    def __init__(self, version: Version, attack: SavingThrowModel = None, parent=None):
         super().__init__(parent)
         self.setupUi(self)
-        self.model = StatBlockModel()
-        self.model.copy_from(model)
+        self.version = version
+        self.old_name: Optional[str] = None
         self.saveButton = self.dialogButtons.button(
             QtWidgets.QDialogButtonBox.StandardButton.Save
         )
         self.attack = SavingThrowModel()
         if attack:
             self.attack.copy_from(attack)
-            for a in self.model.attacks:
-                if a.name == attack.name:
-                    self.model.attacks.remove(a)
-                    break
+            self.old_name = attack.name
             self.load_attack()
         self.dialogButtons.rejected.connect(self.discard)
         self.dialogButtons.accepted.connect(self.save)
@@ -307,10 +372,11 @@ class SavingThrowDialog(QtWidgets.QDialog, Ui_SavingThrowDialog):
             self.secondParameterInput.setEnabled(True)
 
         try:
-            model = StatBlockModel()
-            model.copy_from(self.model)
-            model.attacks.append(self.attack)
-            from_model(model)
+            stat_block_from_record(
+                self.version.put_attack(
+                    attack_to_record(self.attack), replace=self.old_name
+                )
+            )
         except ValueError as e:
             self.saveButton.setEnabled(False)
             self.update_status(str(e), False)
@@ -333,13 +399,13 @@ class SavingThrowDialog(QtWidgets.QDialog, Ui_SavingThrowDialog):
 
 
 class MultiattackDialog(QtWidgets.QDialog, Ui_MultiattackDialog):
-    def __init__(self, model: StatBlockModel, name: str = None, parent=None):
+    def __init__(self, version: Version, name: str = None, parent=None):
         super().__init__(parent)
         self.setupUi(self)
         self.old_name = name
         self.name = name or ""
-        self.model = StatBlockModel()
-        self.model.copy_from(model)
+        self.version = version
+        self.model = StatBlockModel.from_record(version.to_record())
         self.attacks = self.model.multiattacks.get(name, [])
         self.attacks_model = AttackListModel(self.model)
         self.multiattack_model = MultiattackDetailedListModel(self.attacks)
@@ -365,17 +431,15 @@ class MultiattackDialog(QtWidgets.QDialog, Ui_MultiattackDialog):
         self.update_model()
 
     def add(self):
-        selected_attack_name = self.model.attacks[
+        selected_attack_name = self.attacks_model.key(
             self.availableAttacksList.currentIndex().row()
-        ].name
+        )
         self.multiattack_model.add(selected_attack_name)
         self.update_model()
 
     def remove(self):
         self.multiattack_model.remove(
-            self.multiattack_model.attack_names[
-                self.multiattackList.currentIndex().row()
-            ]
+            self.multiattack_model.key(self.multiattackList.currentIndex().row())
         )
         self.update_model()
 
@@ -391,7 +455,6 @@ class MultiattackDialog(QtWidgets.QDialog, Ui_MultiattackDialog):
             self.statusText.setStyleSheet("QLabel {color: red}")
 
     def update_gui(self):
-        self.multiattack_model.layoutChanged.emit()
         self.addAttackButton.setEnabled(False)
         self.removeAttackButton.setEnabled(False)
         if self.availableAttacksList.selectedIndexes():
@@ -406,12 +469,12 @@ class MultiattackDialog(QtWidgets.QDialog, Ui_MultiattackDialog):
         if (
             self.old_name
             and self.old_name != self.name
-            and self.name in self.model.multiattacks.keys()
+            and self.name in self.version.multiattacks.keys()
         ):
             self.saveButton.setEnabled(False)
             self.update_status(f"Duplicate multiattack name: {self.name}", False)
             return
-        if not self.old_name and self.name in self.model.multiattacks.keys():
+        if not self.old_name and self.name in self.version.multiattacks.keys():
             self.saveButton.setEnabled(False)
             self.update_status(f"Duplicate multiattack name: {self.name}", False)
             return
@@ -421,19 +484,16 @@ class MultiattackDialog(QtWidgets.QDialog, Ui_MultiattackDialog):
                 f"At least 2 attacks must be selected. Got {len(self.attacks)}", False
             )
             return
+        version = self.version.put_multiattack(
+            self.name, self.attacks, replace=self.old_name or None
+        )
         try:
-            model = StatBlockModel()
-            model.copy_from(self.model)
-            model.multiattacks[self.name] = self.attacks
-            from_model(model)
+            stat_block_from_record(version)
         except ValueError as e:
             self.saveButton.setEnabled(False)
             self.update_status(str(e), False)
             if "Claw" in str(e):
-                model = StatBlockModel()
-                model.copy_from(self.model)
-                model.multiattacks[self.name] = self.attacks
-                from_model(model)
+                stat_block_from_record(version)
             return
         self.saveButton.setEnabled(True)
         self.update_status("Valid \u2714", True)
@@ -453,19 +513,40 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.setWindowIcon(QtGui.QIcon(str(icon_path)))
         self.file = ""
         self.model = StatBlockModel()
+        self.history = History(Version.from_record(self.model.to_record()))
+        self.journaled_version = self.history.current
+        self.menuEdit = QtWidgets.QMenu("Edit", parent=self.menubar)
+        self.menubar.insertMenu(self.menuHelp.menuAction(), self.menuEdit)
+        self.actionUndo = QtGui.QAction("Undo", parent=self)
+        self.actionUndo.setShortcut(QtGui.QKeySequence.StandardKey.Undo)
+        self.actionUndo.triggered.connect(self.undo)
+        self.menuEdit.addAction(self.actionUndo)
+        self.actionRedo = QtGui.QAction("Redo", parent=self)
+        self.actionRedo.setShortcut(QtGui.QKeySequence.StandardKey.Redo)
+        self.actionRedo.triggered.connect(self.redo)
+        self.menuEdit.addAction(self.actionRedo)
         self.attacks_model = AttackListModel(self.model)
         self.multiattacks_model = MultiattackListModel(self.model)
         self.attacksListView.setModel(self.attacks_model)
         self.multiattackListView.setModel(self.multiattacks_model)
-        self.srdPreviewPlot.update_preview(
-            datasheet_from_stat_block(from_model(self.model))
+        self.render_cache = RenderCache(render_cache_path)
+        stat_block = stat_block_from_record(self.history.current)
+        self.srdPreviewPlot.update_preview_png(
+            render_stat_block(stat_block, cache=self.render_cache)
+        )
+        self.mediumScalePreviewPlot.update_preview_png(
+            render_unit_stat_block(from_stat_block(stat_block), cache=self.render_cache)
         )
-        self.mediumScalePreviewPlot.update_preview(
-            datasheet_from_unit_stat_block(from_stat_block(from_model(self.model)))
+        self.renderer = Renderer(
+            self.srdPreviewPlot, self.mediumScalePreviewPlot, self.render_cache
         )
-        self.renderer = Renderer(self.srdPreviewPlot, self.mediumScalePreviewPlot)
         self.renderer.start()
-        self.update_gui()
+        self.autosaver = Autosaver()
+        self.autosaver.start()
+        if self.recover(str(untitled_path)):
+            self.reset(False)
+        else:
+            self.update_gui()
 
         self.strBox.valueChanged.connect(lambda x: self.update_model("str", x))
         self.dexBox.valueChanged.connect(lambda x: self.update_model("dex", x))
@@ -501,39 +582,57 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.actionSave_as.triggered.connect(self.save_as)
         self.actionExportDatasheet.triggered.connect(self.export)
         self.actionAbout.triggered.connect(self.about)
+        self.actionImportText = QtGui.QAction("Import from text...", parent=self)
+        self.menuFile.insertAction(
+            self.menuFile.actions()[self.menuFile.actions().index(self.actionOpen) + 1],
+            self.actionImportText,
+        )
+        self.actionImportText.triggered.connect(self.import_text)
+        self.bestiaryBrowser = BestiaryBrowser(self)
+        self.addDockWidget(
+            QtCore.Qt.DockWidgetArea.LeftDockWidgetArea, self.bestiaryBrowser
+        )
+        self.bestiaryBrowser.hide()
+        self.bestiaryBrowser.stat_block_opened.connect(self.open_record)
+        self.actionBestiary = self.bestiaryBrowser.toggleViewAction()
+        self.actionBestiary.setText("Bestiary")
+        self.menuFile.insertAction(
+            self.menuFile.actions()[
+                self.menuFile.actions().index(self.actionImportText) + 1
+            ],
+            self.actionBestiary,
+        )
 
     def delete_multiattack(self):
         indexes = self.multiattackListView.selectedIndexes()
         multiattacks_to_delete = [
-            self.multiattacks_model.multiattack_names[index.row()] for index in indexes
+            self.multiattacks_model.key(index.row()) for index in indexes
         ]
-        for multiattack_to_delete in multiattacks_to_delete:
-            self.model.multiattacks.pop(multiattack_to_delete)
-        self.multiattacks_model.layoutChanged.emit()
+        self.commit(self.history.current.remove_multiattacks(multiattacks_to_delete))
+        self.multiattacks_model.refresh()
         self.multiattackListView.clearSelection()
         self.update_gui()
 
     def delete_attack(self):
         indexes = self.attacksListView.selectedIndexes()
-        attacks_to_delete = [self.model.attacks[index.row()] for index in indexes]
-        for attack in attacks_to_delete:
-            to_pop = []
-            for multiattack_name, multiattack in self.model.multiattacks.items():
-                if attack.name in multiattack:
-                    to_pop.append(multiattack_name)
-            for multiattack_name in to_pop:
-                self.model.multiattacks.pop(multiattack_name)
-                self.multiattacks_model.layoutChanged.emit()
-                self.multiattackListView.clearSelection()
-            self.model.attacks.remove(attack)
-        self.attacks_model.layoutChanged.emit()
+        attacks_to_delete = [
+            self.attacks_model.attack(index.row()) for index in indexes
+        ]
+        self.commit(
+            self.history.current.remove_attacks(
+                attack.name for attack in attacks_to_delete
+            )
+        )
+        self.multiattacks_model.refresh()
+        self.multiattackListView.clearSelection()
+        self.attacks_model.refresh()
         self.attacksListView.clearSelection()
         self.update_gui()
 
     def edit_attack(self):
-        name_to_edit = self.model.attacks[
+        name_to_edit = self.attacks_model.key(
             self.attacksListView.selectedIndexes()[0].row()
-        ].name
+        )
         for attack in self.model.attacks:
             if attack.name == name_to_edit:
                 if isinstance(attack, AttackRollModel):
@@ -544,57 +643,94 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         raise RuntimeError(f"Invalid attack name")
 
     def edit_attack_roll_attack(self, attack: AttackRollModel = None):
-        dialog = AttackRollDialog(self.model, attack, self)
+        dialog = AttackRollDialog(self.history.current, attack, self)
         if dialog.exec():
-            if attack:
-                attack.copy_from(dialog.attack)
-            else:
+            if not attack:
                 for a in self.model.attacks:
                     if a.name == dialog.attack.name:
                         raise RuntimeError(f"Dupliacate name: {a.name}")
-                self.model.attacks.append(dialog.attack)
-        self.attacks_model.layoutChanged.emit()
+            self.commit(
+                self.history.current.put_attack(
+                    attack_to_record(dialog.attack), replace=dialog.old_name
+                )
+            )
+        self.attacks_model.refresh()
         self.update_gui()
 
     def edit_saving_throw_attack(self, attack: SavingThrowModel = None):
-        dialog = SavingThrowDialog(self.model, attack, self)
+        dialog = SavingThrowDialog(self.history.current, attack, self)
         if dialog.exec():
-            if attack:
-                attack.copy_from(dialog.attack)
-            else:
+            if not attack:
                 for a in self.model.attacks:
                     if a.name == dialog.attack.name:
                         raise RuntimeError(f"Dupliacate name: {a.name}")
-                self.model.attacks.append(dialog.attack)
-        self.attacks_model.layoutChanged.emit()
+            self.commit(
+                self.history.current.put_attack(
+                    attack_to_record(dialog.attack), replace=dialog.old_name
+                )
+            )
+        self.attacks_model.refresh()
         self.update_gui()
 
     def edit_multiattack(self, name: str = None):
         if name is None and self.multiattackListView.selectedIndexes():
-            name = self.multiattacks_model.multiattack_names[
+            name = self.multiattacks_model.key(
                 self.multiattackListView.selectedIndexes()[0].row()
-            ]
+            )
         if not name:
             name = ""
         if name and name not in self.model.multiattacks.keys():
             raise RuntimeError(f"Invalid multiattack name: {name}")
-        dialog = MultiattackDialog(self.model, name, self)
+        dialog = MultiattackDialog(self.history.current, name, self)
         if dialog.exec():
-            if name:
-                if name != dialog.name:
-                    if dialog.name in self.model.multiattacks.keys():
-                        raise RuntimeError(f"Duplicate name: {dialog.name}")
-                    self.model.multiattacks.pop(name)
-                self.model.multiattacks[dialog.name] = dialog.attacks
-            else:
-                if dialog.name in self.model.multiattacks.keys():
-                    raise RuntimeError(f"Duplicate name: {dialog.name}")
-                self.model.multiattacks[dialog.name] = dialog.attacks
-        self.multiattacks_model.layoutChanged.emit()
+            if name != dialog.name and dialog.name in self.model.multiattacks.keys():
+                raise RuntimeError(f"Duplicate name: {dialog.name}")
+            self.commit(
+                self.history.current.put_multiattack(
+                    dialog.name, dialog.attacks, replace=name or None
+                )
+            )
+        self.multiattacks_model.refresh()
         self.update_gui()
 
     def update_stat_block(self):
-        self.renderer.queue_model(self.model)
+        version = self.history.current
+        self.renderer.queue_version(version)
+        # Only edits are journaled, not opening or resetting a stat block
+        if version is not self.journaled_version:
+            self.journaled_version = version
+            self.autosaver.queue_version(self.journal_path(), version)
+
+    def commit(self, version: Version, group: Optional[str] = None):
+        self.history.commit(version, group=group)
+        # The model shown by the views is derived from the history, the only source of truth
+        self.model.copy_from(StatBlockModel.from_record(version.to_record()))
+
+    def clear_history(self, record: dict):
+        self.history.clear(Version.from_record(record))
+        self.model.copy_from(StatBlockModel.from_record(record))
+        self.journaled_version = self.history.current
+
+    def journal_path(self) -> str:
+        return journal_path(self.file or str(untitled_path))
+
+    def recover(self, path: str) -> bool:
+        try:
+            record = replay(journal_path(path))
+        except InvalidJournalError:
+            record = None
+        if record is None or record == self.model.to_record():
+            return False
+        answer = QtWidgets.QMessageBox.question(
+            self,
+            "Recover unsaved changes",
+            f"{record['name']} has unsaved changes from a previous session. Recover them?",
+        )
+        if answer == QtWidgets.QMessageBox.StandardButton.Yes:
+            self.clear_history(record)
+            return True
+        self.autosaver.queue_discard(journal_path(path))
+        return False
 
     def update_gui(self):
         self.editAttackButton.setEnabled(False)
@@ -610,18 +746,34 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             if self.multiattackListView.selectedIndexes():
                 self.editMultiattackButton.setEnabled(True)
                 self.deleteMultiattackButton.setEnabled(True)
-        self.multiattacks_model.layoutChanged.emit()
-        self.attacks_model.layoutChanged.emit()
+        self.actionUndo.setEnabled(self.history.can_undo)
+        self.actionRedo.setEnabled(self.history.can_redo)
         self.update_stat_block()
 
     def update_model(self, name, value):
-        self.model.__setattr__(name, value)
+        # Widgets also emit their signals when reset from an undone version
+        if self.history.current[name] != value:
+            self.commit(self.history.current.set(name, value), group=name)
         self.update_gui()
 
+    def restore(self, version: Optional[Version]):
+        if version is None:
+            return
+        self.model.copy_from(StatBlockModel.from_record(version.to_record()))
+        self.attacksListView.clearSelection()
+        self.multiattackListView.clearSelection()
+        self.reset(False)
+
+    def undo(self):
+        self.restore(self.history.undo())
+
+    def redo(self):
+        self.restore(self.history.redo())
+
     def reset(self, reset: bool = True):
         if reset:
             self.file = ""
-            self.model.reset()
+            self.clear_history(StatBlockModel().to_record())
             self.nameInput.clear()
         else:
             self.nameInput.setText(self.model.name)
@@ -635,6 +787,8 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
         self.acBox.setValue(self.model.ac)
         self.speedBox.setValue(self.model.speed)
         self.profBox.setValue(self.model.proficiency)
+        self.attacks_model.refresh()
+        self.multiattacks_model.refresh()
         self.update_gui()
 
     def save_as(self):
@@ -652,11 +806,14 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                 file += ".5eblock"
             self.file = file
             self.model.save(self.file)
+            self.autosaver.queue_discard(journal_path(str(untitled_path)))
+            self.autosaver.queue_discard(self.journal_path())
 
     def save(self):
         if not self.file:
             return self.save_as()
         self.model.save(self.file)
+        self.autosaver.queue_discard(self.journal_path())
 
     def open(self):
         dialog = QtWidgets.QFileDialog()
@@ -669,10 +826,31 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
             if not len(files) == 1:
                 raise RuntimeError
             self.file = files[0]
-            new_model = StatBlockModel.load(self.file)
-            self.model.copy_from(new_model)
+            self.clear_history(StatBlockModel.load(self.file).to_record())
+            # Recover before resetting the GUI, which autosaves over the previous journal
+            self.recover(self.file)
             self.reset(False)
 
+    def import_text(self):
+        text, ok = QtWidgets.QInputDialog.getMultiLineText(
+            self, "Import from text", "Paste a stat block:"
+        )
+        if not ok or not text.strip():
+            return
+        try:
+            record, skipped = parse_stat_block(text)
+        except InvalidTextImportError as e:
+            QtWidgets.QMessageBox.warning(self, "Import from text", str(e))
+            return
+        self.open_record(record)
+        if skipped:
+            QtWidgets.QMessageBox.information(
+                self,
+                "Import from text",
+                "These actions are not attacks and were not imported:\n"
+                + "\n".join(skipped),
+            )
+
     def export(self):
         dialog = QtWidgets.QFileDialog()
         dialog.setFileMode(QtWidgets.QFileDialog.FileMode.AnyFile)
@@ -688,12 +866,22 @@ class MainWindow(QtWidgets.QMainWindow, Ui_MainWindow):
                 file += ".png"
             filepath = pathlib.Path(file)
             export_datasheet_from_unit_stat_block(
-                from_stat_block(from_model(self.model)), filepath
+                from_stat_block(stat_block_from_record(self.history.current)),
+                filepath,
+                cache=self.render_cache,
             )
 
+    def open_record(self, record: dict):
+        self.file = ""
+        self.clear_history(record)
+        self.reset(False)
+
     def exit(self):
+        self.bestiaryBrowser.close_bestiary()
         self.renderer.quit()
         self.renderer.join()
+        self.autosaver.quit()
+        self.autosaver.join()
         sys.exit(0)
 
     def about(self):
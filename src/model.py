@@ -1,10 +1,11 @@
-import pickle
 from PyQt6 import QtCore
-from typing import List, Union, Dict, Optional, Tuple
+from typing import Callable, Iterable, List, Union, Dict, Optional, Tuple
 
+import lib.block_format as block_format
 import lib.targets as targets
 from lib.ability_scores import Scores, AbilityScores
 from lib.attacks import AttackRollAttack, SavingThrowAttack
+from lib.sorted_index import SortedIndex
 from lib.stat_block import StatBlock
 
 
@@ -66,6 +67,8 @@ class AttackRollModel:
         self.to_hit_proficiency: bool = True
         self.damage_scaling: bool = False
         self.damage_proficiency: bool = False
+        self.recharge: Optional[int] = None
+        self.uses_per_day: Optional[int] = None
 
     def copy_from(self, other: "AttackRollModel"):
         self.name = other.name
@@ -81,6 +84,8 @@ class AttackRollModel:
         self.to_hit_proficiency = other.to_hit_proficiency
         self.damage_scaling = other.damage_scaling
         self.damage_proficiency = other.damage_proficiency
+        self.recharge = other.recharge
+        self.uses_per_day = other.uses_per_day
 
 
 class SavingThrowModel:
@@ -95,6 +100,8 @@ class SavingThrowModel:
         self.ability_score_scaling: Optional[Scores] = None
         self.damage_scaling: bool = True
         self.damage_proficiency: bool = False
+        self.recharge: Optional[int] = None
+        self.uses_per_day: Optional[int] = None
 
     def copy_from(self, other: "SavingThrowModel"):
         self.name = other.name
@@ -108,6 +115,8 @@ class SavingThrowModel:
         self.ability_score_scaling = other.ability_score_scaling
         self.damage_scaling = other.damage_scaling
         self.damage_proficiency = other.damage_proficiency
+        self.recharge = other.recharge
+        self.uses_per_day = other.uses_per_day
 
 
 class StatBlockModel:
@@ -168,19 +177,69 @@ class StatBlockModel:
                 attacks.append(attack_name)
             self.multiattacks[name] = attacks
 
+    def to_record(self) -> dict:
+        record = {
+            field: getattr(self, field)
+            for field in (*block_format.ABILITY_FIELDS, "hp", "ac", "speed")
+        }
+        record["name"] = self.name
+        record["proficiency"] = self.proficiency
+        record["attacks"] = []
+        for attack in self.attacks:
+            record["attacks"].append(attack_to_record(attack))
+        record["multiattacks"] = {
+            name: list(multi) for name, multi in self.multiattacks.items()
+        }
+        return record
+
     @staticmethod
-    def load(path: str) -> "StatBlockModel":
-        with open(path, "rb") as file:
-            block = pickle.load(file)
-        if not isinstance(block, StatBlockModel):
-            raise RuntimeError(
-                f"Expected a StatBlockModel instance. Got a {type(block)} instance."
+    def from_record(record: dict) -> "StatBlockModel":
+        # Attributes are set directly: records are already decoded copies
+        block = StatBlockModel.__new__(StatBlockModel)
+        attacks = []
+        for attack_record in record["attacks"]:
+            attack_record = dict(attack_record)
+            kind = attack_record.pop("kind")
+            attack = (
+                AttackRollModel.__new__(AttackRollModel)
+                if kind == block_format.ATTACK_ROLL
+                else SavingThrowModel.__new__(SavingThrowModel)
             )
+            target = TargetModel.__new__(TargetModel)
+            target.__dict__.update(attack_record.pop("target"))
+            # Records written before the limited-use fields are at will
+            attack.recharge = None
+            attack.uses_per_day = None
+            attack.__dict__.update(attack_record)
+            attack.target = target
+            attacks.append(attack)
+        block.__dict__.update(record)
+        block.attacks = attacks
+        block.multiattacks = dict(record["multiattacks"])
         return block
 
+    @staticmethod
+    def load(path: str) -> "StatBlockModel":
+        with open(path, "rb") as file:
+            data = file.read()
+        # Legacy pickled files are read without unpickling arbitrary objects
+        record, _ = block_format.read(data)
+        return StatBlockModel.from_record(record)
+
     def save(self, path: str):
         with open(path, "wb") as file:
-            pickle.dump(self, file)
+            file.write(block_format.encode(self.to_record()))
+
+
+def attack_to_record(attack: Union[AttackRollModel, SavingThrowModel]) -> dict:
+    attack_record = dict(vars(attack))
+    attack_record["kind"] = (
+        block_format.ATTACK_ROLL
+        if isinstance(attack, AttackRollModel)
+        else block_format.SAVING_THROW
+    )
+    attack_record["target"] = dict(vars(attack.target))
+    return attack_record
 
 
 def from_model(stat_block: StatBlockModel) -> StatBlock:
@@ -210,6 +269,8 @@ def from_model(stat_block: StatBlockModel) -> StatBlock:
                     attack.to_hit_proficiency,
                     attack.damage_scaling,
                     attack.damage_proficiency,
+                    attack.recharge,
+                    attack.uses_per_day,
                 )
             )
         elif isinstance(attack, SavingThrowModel):
@@ -225,6 +286,8 @@ def from_model(stat_block: StatBlockModel) -> StatBlock:
                     attack.ability_score_scaling,
                     attack.damage_scaling,
                     attack.damage_proficiency,
+                    attack.recharge,
+                    attack.uses_per_day,
                 )
             )
         else:
@@ -243,73 +306,104 @@ def from_model(stat_block: StatBlockModel) -> StatBlock:
     return ret
 
 
-class AttackListModel(QtCore.QAbstractListModel):
-    def __init__(self, model: StatBlockModel, *args, **kwargs):
-        super(AttackListModel, self).__init__(*args, **kwargs)
-        self.model = model
+class SortedListModel(QtCore.QAbstractListModel):
+    """
+    List model showing names in sorted order. Changes are applied row by row with precise signals.
+    """
+
+    def __init__(self, keys: Callable[[], Iterable[str]], *args, **kwargs):
+        super(SortedListModel, self).__init__(*args, **kwargs)
+        # Returns the names currently in the underlying model, repeated names are counted
+        self.keys: Callable[[], Iterable[str]] = keys
+        self.sorted_index = SortedIndex(keys())
+
+    def label(self, key: str, count: int) -> str:
+        return key
+
+    def key(self, row: int) -> str:
+        return self.sorted_index[row]
 
     def data(self, index, role=None):
-        attacks = self.model.attacks
-        attacks.sort(key=lambda x: x.name)
         if role == QtCore.Qt.ItemDataRole.DisplayRole:
-            return attacks[index.row()].name
+            key = self.sorted_index[index.row()]
+            return self.label(key, self.sorted_index.count(key))
 
     def rowCount(self, parent=None):
-        return len(self.model.attacks)
+        return len(self.sorted_index)
+
+    def set_count(self, key: str, count: int) -> None:
+        row = self.sorted_index.row(key)
+        if row is None:
+            if count == 0:
+                return
+            row = self.sorted_index.insertion_row(key)
+            self.beginInsertRows(QtCore.QModelIndex(), row, row)
+            self.sorted_index.set_count(key, count)
+            self.endInsertRows()
+        elif count == 0:
+            self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+            self.sorted_index.discard(key)
+            self.endRemoveRows()
+        elif count != self.sorted_index.count(key):
+            self.sorted_index.set_count(key, count)
+            changed = self.index(row)
+            self.dataChanged.emit(changed, changed)
+
+    def refresh(self) -> None:
+        removed, changed = self.sorted_index.diff(self.keys())
+        for key in removed:
+            self.set_count(key, 0)
+        for key, count in changed.items():
+            self.set_count(key, count)
+
+
+class AttackListModel(SortedListModel):
+    def __init__(self, model: StatBlockModel, *args, **kwargs):
+        self.model = model
+        super(AttackListModel, self).__init__(
+            lambda: (attack.name for attack in self.model.attacks), *args, **kwargs
+        )
 
+    def attack(self, row: int) -> Union[AttackRollModel, SavingThrowModel]:
+        name = self.key(row)
+        for attack in self.model.attacks:
+            if attack.name == name:
+                return attack
+        raise KeyError(name)
 
-class MultiattackListModel(QtCore.QAbstractListModel):
+
+class MultiattackListModel(SortedListModel):
     def __init__(self, model: StatBlockModel, *args, **kwargs):
-        super(MultiattackListModel, self).__init__(*args, **kwargs)
         self.model = model
+        super(MultiattackListModel, self).__init__(
+            lambda: self.model.multiattacks.keys(), *args, **kwargs
+        )
 
     @property
     def multiattack_names(self) -> List[str]:
-        ret = []
-        for multiattack_name, _ in self.model.multiattacks.items():
-            ret.append(multiattack_name)
-        ret.sort()
-        return ret
-
-    def data(self, index, role=None):
-        if role == QtCore.Qt.ItemDataRole.DisplayRole:
-            return self.multiattack_names[index.row()]
-
-    def rowCount(self, parent=None):
-        return len(self.multiattack_names)
+        return list(self.sorted_index)
 
 
-class MultiattackDetailedListModel(QtCore.QAbstractListModel):
+class MultiattackDetailedListModel(SortedListModel):
     def __init__(self, attacks: List[str], *args, **kwargs):
-        super(MultiattackDetailedListModel, self).__init__(*args, **kwargs)
         self.model: List[str] = attacks
+        super(MultiattackDetailedListModel, self).__init__(
+            lambda: self.model, *args, **kwargs
+        )
+
+    def label(self, key: str, count: int) -> str:
+        if count > 1:
+            return f"{key} (x{count})"
+        return key
 
     @property
     def attack_names(self) -> List[str]:
-        ret = []
-        for attack in self.model:
-            if attack not in ret:
-                ret.append(attack)
-        ret.sort()
-        return ret
-
-    def data(self, index, role=None):
-        count = 0
-        name = self.attack_names[index.row()]
-        for attack in self.model:
-            if attack == name:
-                count += 1
-        if role == QtCore.Qt.ItemDataRole.DisplayRole:
-            ret = name
-            if count > 1:
-                ret += f" (x{count})"
-            return ret
-
-    def rowCount(self, parent=None):
-        return len(self.attack_names)
+        return list(self.sorted_index)
 
     def add(self, attack: str):
         self.model.append(attack)
+        self.set_count(attack, self.sorted_index.count(attack) + 1)
 
     def remove(self, attack: str):
         self.model.remove(attack)
+        self.set_count(attack, self.sorted_index.count(attack) - 1)
@@ -0,0 +1,80 @@
+import lib.block_format as block_format
+from lib.ability_scores import Scores
+
+
+def attack_record(name="greatclub", damage="2d8", to_hit=0):
+    return {
+        "kind": block_format.ATTACK_ROLL,
+        "name": name,
+        "weapon_range": 5,
+        "multiattack": 1,
+        "target": {"name": "single target", "first_param": 1, "second_param": 1},
+        "base_damage": damage,
+        "base_to_hit": to_hit,
+        "ranged": False,
+        "ability_score_scaling": Scores.STRENGTH,
+        "to_hit_scaling": True,
+        "to_hit_proficiency": True,
+        "damage_scaling": True,
+        "damage_proficiency": False,
+        "recharge": None,
+        "uses_per_day": None,
+    }
+
+
+def breath_record(name="fire breath", damage="6d6", dc=13, recharge=None):
+    return {
+        "kind": block_format.SAVING_THROW,
+        "name": name,
+        "weapon_range": 15,
+        "multiattack": 1,
+        "target": {"name": "cone", "first_param": 15, "second_param": 1},
+        "base_damage": damage,
+        "dc": dc,
+        "ranged": True,
+        "ability_score_scaling": None,
+        "damage_scaling": False,
+        "damage_proficiency": False,
+        "recharge": recharge,
+        "uses_per_day": None,
+    }
+
+
+def ogre_record(name="ogre", hp=59, ac=11, con=19, attacks=None, multiattacks=None):
+    return {
+        "str": 19,
+        "dex": 8,
+        "con": con,
+        "int": 5,
+        "wis": 7,
+        "cha": 7,
+        "hp": hp,
+        "ac": ac,
+        "speed": 40,
+        "name": name,
+        "proficiency": 2,
+        "attacks": [attack_record()] if attacks is None else attacks,
+        "multiattacks": {} if multiattacks is None else multiattacks,
+    }
+
+
+def knight_record(name="knight", hp=52, multiattacks=None):
+    return {
+        "str": 16,
+        "dex": 11,
+        "con": 14,
+        "int": 11,
+        "wis": 11,
+        "cha": 15,
+        "hp": hp,
+        "ac": 18,
+        "speed": 30,
+        "name": name,
+        "proficiency": 2,
+        "attacks": [attack_record("greatsword", "2d6"), breath_record()],
+        "multiattacks": (
+            {"attack": ["greatsword", "greatsword"]}
+            if multiattacks is None
+            else multiattacks
+        ),
+    }
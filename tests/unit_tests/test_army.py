@@ -0,0 +1,93 @@
+import itertools
+import pytest
+
+import lib.army as army
+from lib.combat import unsaved_wound_probability
+from lib.points import unit_points
+from lib.unit_attacks import MeleeUnitAttack, RangedUnitAttack
+from lib.unit_stat_block import UnitStatBlock
+
+
+def get_units():
+    spear = MeleeUnitAttack("spear", 5, "1", 4, 4, 0, "1", False)
+    axe = MeleeUnitAttack("axe", 5, "2", 3, 6, -1, "D3", False)
+    bow = RangedUnitAttack("bow", 60, "1", 4, 4, 0, "1", False)
+    return [
+        UnitStatBlock("militia", 30, 3, 6, None, 1, [spear], {}),
+        UnitStatBlock("veteran", 30, 4, 4, None, 3, [axe], {"axe and bow": [axe, bow]}),
+        UnitStatBlock("archer", 30, 3, 5, None, 1, [bow], {}),
+    ]
+
+
+def get_enemy():
+    claws = MeleeUnitAttack("claws", 5, "2", 4, 5, 0, "1", False)
+    return [(UnitStatBlock("ghoul", 30, 4, 5, None, 2, [claws], {}), 5)]
+
+
+def test_slain_per_activation():
+    militia, veteran, _ = get_units()
+    spear = militia.attacks[0]
+    assert army.slain_per_activation(militia, veteran) == pytest.approx(
+        unsaved_wound_probability(spear, 4, 4, None) / 3
+    )
+    # The best profile is used
+    axe_and_bow = army.slain_per_activation(veteran, militia)
+    assert axe_and_bow > army.slain_per_activation(
+        UnitStatBlock("axe only", 30, 4, 4, None, 3, [veteran.attacks[0]], {}), militia
+    )
+
+
+def test_matchup_matrix():
+    units = get_units()
+    matrix = army.matchup_matrix(units, units[:2])
+    assert matrix.shape == (3, 2)
+    assert matrix[1, 0] == army.slain_per_activation(units[1], units[0])
+
+
+def test_army_score():
+    units = get_units()
+    enemy = get_enemy()
+    small = army.army_score([(units[0], 2)], enemy)
+    large = army.army_score([(units[0], 4)], enemy)
+    # Doubling the army quadruples its advantage
+    assert large == pytest.approx(4 * small)
+    assert army.army_score([(units[0], 0)], enemy) == 0
+    with pytest.raises(army.InvalidArmyParamError):
+        army.army_score([(units[0], 2)], [(units[0], 0)])
+
+
+def test_optimize_army_matches_exhaustive_search():
+    units = get_units()
+    enemy = get_enemy()
+    costs = [unit_points(unit) for unit in units]
+    budget = 3 * max(costs)
+    best = 0.0
+    for counts in itertools.product(*(range(budget // cost + 1) for cost in costs)):
+        if sum(c * n for c, n in zip(costs, counts)) <= budget and sum(counts):
+            best = max(best, army.army_score(list(zip(units, counts)), enemy))
+    armies = army.optimize_army(units, enemy, budget, beam_width=64, top=3)
+    assert len(armies) == 3
+    assert armies[0].score == pytest.approx(best)
+    assert armies[0].score >= armies[1].score >= armies[2].score
+    assert armies[0].points <= budget
+    assert armies[0].points == sum(
+        costs[[unit.name for unit in units].index(name)] * count
+        for name, count in armies[0].counts.items()
+    )
+
+
+def test_optimize_army_max_creatures():
+    armies = army.optimize_army(get_units(), get_enemy(), 1000, max_creatures=2)
+    assert sum(armies[0].counts.values()) <= 2
+
+
+def test_invalid_optimize_army():
+    units = get_units()
+    with pytest.raises(army.InvalidArmyParamError):
+        army.optimize_army([units[0], units[0]], get_enemy(), 100)
+    with pytest.raises(army.InvalidArmyParamError):
+        army.optimize_army(units, get_enemy(), 0)
+    with pytest.raises(army.InvalidArmyParamError):
+        army.optimize_army(units, get_enemy(), 100, beam_width=0)
+    with pytest.raises(army.InvalidArmyParamError):
+        army.optimize_army(units, get_enemy(), 100, workers=0)
@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+
+import lib.attacks as attacks
+import lib.balance as balance
+import lib.targets as targets
+import lib.unit_attacks as unit_attacks
+import lib.unit_stat_block as unit_stat_block
+from lib.ability_scores import AbilityScores
+from lib.stat_block import StatBlock
+
+
+def test_threshold_table_lookup():
+    table = balance.ThresholdTable((0, 2, 5, 10), (6, 5, 4, 3, 2))
+    assert table.lookup(-1) == 6
+    assert table.lookup(0) == 5
+    assert table.lookup(9) == 3
+    assert table.lookup(10) == 2
+    optional = balance.ThresholdTable((17, 21, 23), (None, 6, 5, 4))
+    assert optional.lookup(16) is None
+    assert optional.lookup(17) == 6
+
+
+def test_threshold_table_lookup_array():
+    table = balance.DEFAULT_PROFILE.defense.invulnerable_saving_throw
+    armor_classes = np.arange(5, 31)
+    expected = [table.lookup(int(ac)) for ac in armor_classes]
+    expected = [7 if value is None else value for value in expected]
+    assert table.lookup_array(armor_classes, missing=7).tolist() == expected
+    assert table.lookup_array([[16, 23]]).tolist() == [[0, 4]]
+
+
+def test_invalid_threshold_table():
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.ThresholdTable((2, 1), (6, 5, 4)).validate("table", 2, 6)
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.ThresholdTable((1, 2), (6, 5)).validate("table", 2, 6)
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.ThresholdTable((1, 2), (6, 5, 1)).validate("table", 2, 6)
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.ThresholdTable((1, 2), (6, 5, None)).validate("table", 2, 6)
+    balance.ThresholdTable((1, 2), (None, 5, 4)).validate("table", 2, 6, True)
+
+
+def test_default_profile_is_valid():
+    balance.DEFAULT_PROFILE.validate()
+    assert balance.DEFAULT_PROFILE.attack.damage_scale == 20
+    assert balance.DEFAULT_PROFILE.defense.hit_points_scale == 20
+
+
+def test_replace():
+    profile = balance.DEFAULT_PROFILE.replace(
+        {
+            "attack.damage_scale": 10,
+            "defense.saving_throw": balance.ThresholdTable(
+                (9, 12, 15, 19), (6, 5, 4, 3, 2)
+            ),
+        }
+    )
+    assert profile.attack.damage_scale == 10
+    assert profile.defense.saving_throw.bounds == (9, 12, 15, 19)
+    assert profile.defense.hit_points_scale == 20
+    assert balance.DEFAULT_PROFILE.attack.damage_scale == 20
+    assert profile != balance.DEFAULT_PROFILE
+    assert hash(profile) != hash(balance.DEFAULT_PROFILE)
+
+
+def test_invalid_replace():
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.DEFAULT_PROFILE.replace({"attack.other": 1})
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.DEFAULT_PROFILE.replace({"other.damage_scale": 1})
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.DEFAULT_PROFILE.replace({"attack.damage_scale": 0})
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.DEFAULT_PROFILE.replace({"attack.attack_skill": (0, 2, 5, 10)})
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.DEFAULT_PROFILE.replace(
+            {"defense.saving_throw": balance.ThresholdTable((10, 13), (6, 5, 4, 3))}
+        )
+
+
+def test_conversion_with_profile():
+    attack = attacks.CreatureMeleeAttack(
+        "sword", 1, 5, targets.SingleTarget(), 5, 22.0, 20.0, 2.0
+    )
+    profile = balance.DEFAULT_PROFILE.replace(
+        {"attack.damage_scale": 10, "attack.melee_attacks_multiplier": 3}
+    )
+    default = unit_attacks.from_creature_attack(attack)
+    custom = unit_attacks.from_creature_attack(attack, profile)
+    assert default.damage == "2"
+    assert custom.damage == "D3+1"
+    assert default.number_of_attacks == "2"
+    assert custom.number_of_attacks == "3"
+    assert custom.attack_skill == default.attack_skill
+
+
+def test_stat_block_conversion_with_profile():
+    stat_block = StatBlock(
+        "creature", AbilityScores(10, 10, 14, 10, 10, 10), 2, 18, 45, 30, []
+    )
+    profile = balance.DEFAULT_PROFILE.replace(
+        {
+            "defense.saving_throw": balance.ThresholdTable(
+                (12, 15, 18, 22), (6, 5, 4, 3, 2)
+            ),
+            "defense.invulnerable_saving_throw": balance.ThresholdTable(
+                (25, 26, 27), (None, 6, 5, 4)
+            ),
+            "defense.hit_points_scale": 10,
+            "defense.resistance_base": 3,
+        }
+    )
+    default = unit_stat_block.from_stat_block(stat_block)
+    custom = unit_stat_block.from_stat_block(stat_block, profile)
+    assert default.saving_throw == 3
+    assert custom.saving_throw == 3
+    assert default.invulnerable_saving_throw == 6
+    assert custom.invulnerable_saving_throw is None
+    assert default.hit_points == 3
+    assert custom.hit_points == 5
+    assert custom.resistance == default.resistance + 1
+
+
+def test_profile_dict_round_trip():
+    profile = balance.DEFAULT_PROFILE.replace({"attack.damage_scale": 10})
+    data = balance.profile_to_dict(profile)
+    assert data["defense"]["invulnerable_saving_throw"] == {
+        "bounds": [17, 21, 23],
+        "values": [None, 6, 5, 4],
+    }
+    assert balance.profile_from_dict(data) == profile
+    assert balance.profile_from_dict({}) == balance.DEFAULT_PROFILE
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.profile_from_dict({"attack": {"attack_skill": {"bounds": [0]}}})
+    with pytest.raises(balance.InvalidBalanceProfileError):
+        balance.profile_from_dict({"attack": 1})
+
+
+def test_load_and_save_profiles(tmp_path):
+    path = str(tmp_path / "profiles.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(
+            '{"default": {}, "lethal": {"attack": {"damage_scale": 10, '
+            '"attack_skill": {"bounds": [0, 5], "values": [5, 4, 3]}}}}'
+        )
+    profiles = balance.load_profiles(path)
+    assert profiles["default"] == balance.DEFAULT_PROFILE
+    assert profiles["lethal"].attack.attack_skill.lookup(5) == 3
+    balance.save_profiles(path, profiles)
+    assert balance.load_profiles(path) == profiles
+
+
+def test_multiple_profiles_conversion():
+    stat_block = StatBlock(
+        "creature", AbilityScores(10, 10, 14, 10, 10, 10), 2, 18, 45, 30, []
+    )
+    profiles = {
+        "default": balance.DEFAULT_PROFILE,
+        "tough": balance.DEFAULT_PROFILE.replace({"defense.hit_points_scale": 5}),
+    }
+    converted = unit_stat_block.from_stat_block_profiles(stat_block, profiles)
+    assert converted["default"].hit_points == 3
+    assert converted["tough"].hit_points == 9
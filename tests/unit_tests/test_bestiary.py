@@ -0,0 +1,170 @@
+import pytest
+import sqlite3
+import time
+
+import lib.bestiary as bestiary
+import lib.block_format as block_format
+from lib.balance import DEFAULT_PROFILE
+from lib.challenge_rating import estimate_challenge_rating
+from records import attack_record, ogre_record
+
+
+def get_record(name="ogre", hp=59, ac=11, con=19, to_hit=0):
+    return ogre_record(name, hp, ac, con, [attack_record(to_hit=to_hit)])
+
+
+def test_add_and_materialize():
+    library = bestiary.Bestiary(":memory:")
+    record = get_record()
+    id_ = library.add(record)
+    assert len(library) == 1
+    assert library.record(id_) == record
+    stat_block = library.stat_block(id_)
+    assert stat_block.name == "ogre"
+    assert stat_block.attacks == block_format.stat_block_from_record(record).attacks
+    assert library.entry(id_) == bestiary.BestiaryEntry(
+        id_, "ogre", estimate_challenge_rating(stat_block), 11, 59, 5, 7
+    )
+    with pytest.raises(KeyError):
+        library.record(id_ + 1)
+    with pytest.raises(KeyError):
+        library.entry(id_ + 1)
+
+
+def test_add_many():
+    library = bestiary.Bestiary(":memory:")
+    ids = library.add_many(
+        [get_record(f"ogre {i}", hp=10 + i) for i in range(10)], batch_size=3
+    )
+    assert ids == list(range(1, 11))
+    assert [library.entry(id_).hit_points for id_ in ids] == list(range(10, 20))
+    assert library.add(get_record()) == 11
+    with pytest.raises(bestiary.InvalidBestiaryParamError):
+        library.add_many([], batch_size=0)
+
+
+def test_add_many_is_atomic():
+    library = bestiary.Bestiary(":memory:")
+    invalid = get_record()
+    del invalid["ac"]
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        library.add_many([get_record("a"), get_record("b"), invalid], batch_size=1)
+    assert len(library) == 0
+
+
+def test_search():
+    library = bestiary.Bestiary(":memory:")
+    library.add_many(
+        [
+            get_record("Ogre", hp=59, ac=11),
+            get_record("ogre chieftain", hp=120, ac=15),
+            get_record("Goblin", hp=7, ac=15, con=10),
+            get_record("100%_orc", hp=15, ac=13),
+        ]
+    )
+    assert [e.name for e in library.search()] == [
+        "100%_orc",
+        "Goblin",
+        "Ogre",
+        "ogre chieftain",
+    ]
+    assert [e.name for e in library.search("OGRE")] == ["Ogre", "ogre chieftain"]
+    assert [e.name for e in library.search("%_")] == ["100%_orc"]
+    assert [e.name for e in library.search(armor_class=(15, None))] == [
+        "Goblin",
+        "ogre chieftain",
+    ]
+    assert [
+        e.name for e in library.search(hit_points=(None, 60), order_by="hit_points")
+    ] == ["Goblin", "100%_orc", "Ogre"]
+    assert [
+        e.name
+        for e in library.search(
+            order_by="hit_points", descending=True, limit=2, offset=1
+        )
+    ] == ["Ogre", "100%_orc"]
+    assert [e.name for e in library.search("ogre", resistance=(None, 5))] == []
+    assert [e.name for e in library.search(resistance=(None, 5))] == ["Goblin"]
+    assert library.count() == 4
+    assert library.count("ogre", armor_class=(None, 12)) == 1
+    cr = library.entry(1).challenge_rating
+    assert all(
+        e.challenge_rating >= cr for e in library.search(challenge_rating=(cr, None))
+    )
+    for kwargs in ({"order_by": "block"}, {"limit": -1}, {"offset": -1}):
+        with pytest.raises(bestiary.InvalidBestiaryParamError):
+            library.search(**kwargs)
+
+
+def test_replace_and_remove():
+    library = bestiary.Bestiary(":memory:")
+    first, second = library.add_many([get_record("a"), get_record("b")])
+    library.replace(first, get_record("c", ac=20))
+    assert library.entry(first).name == "c"
+    assert library.entry(first).saving_throw == 2
+    assert library.record(first)["ac"] == 20
+    with pytest.raises(KeyError):
+        library.replace(10, get_record())
+    library.remove([first])
+    assert [e.id for e in library.search()] == [second]
+
+
+def test_profile_change(tmp_path):
+    path = str(tmp_path.joinpath("bestiary.sqlite"))
+    with bestiary.Bestiary(path) as library:
+        id_ = library.add(get_record())
+        assert library.entry(id_).resistance == 7
+    profile = DEFAULT_PROFILE._replace(
+        defense=DEFAULT_PROFILE.defense._replace(resistance_base=5)
+    )
+    with bestiary.Bestiary(path, profile) as library:
+        assert library.entry(id_).resistance == 10
+        assert library.record(id_) == get_record()
+    with pytest.raises(bestiary.InvalidBestiaryParamError):
+        bestiary.Bestiary(":memory:", "profile")
+
+
+def test_import_files(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path.joinpath(f"{i}.5eblock")
+        path.write_bytes(block_format.encode(get_record(f"ogre {i}")))
+        paths.append(str(path))
+    library = bestiary.Bestiary(":memory:")
+    assert library.import_files(paths) == [1, 2, 3]
+    assert library.record(3) == get_record("ogre 2")
+
+
+def test_large_library_search():
+    library = bestiary.Bestiary(":memory:")
+    library.add_many(
+        get_record(f"creature {i}", hp=1 + i % 300, ac=5 + i % 25) for i in range(5000)
+    )
+    start = time.perf_counter()
+    entries = library.search(
+        "creature 1", armor_class=(12, 16), order_by="hit_points", limit=50
+    )
+    assert time.perf_counter() - start < 0.1
+    assert len(entries) == 50
+    assert all(12 <= e.armor_class <= 16 for e in entries)
+
+
+def test_is_bestiary(tmp_path):
+    path = str(tmp_path.joinpath("bestiary.sqlite"))
+    assert not bestiary.is_bestiary(path)
+    bestiary.Bestiary(path).close()
+    assert bestiary.is_bestiary(path)
+    other = str(tmp_path.joinpath("other.db"))
+    connection = sqlite3.connect(other)
+    connection.execute("CREATE TABLE notes (text TEXT)")
+    connection.commit()
+    connection.close()
+    assert not bestiary.is_bestiary(other)
+    connection = sqlite3.connect(other)
+    tables = connection.execute("SELECT name FROM sqlite_master").fetchall()
+    connection.close()
+    # The check does not write to the database
+    assert tables == [("notes",)]
+    text = tmp_path.joinpath("notes.db")
+    text.write_bytes(b"not a database" * 100)
+    assert not bestiary.is_bestiary(str(text))
@@ -0,0 +1,122 @@
+import pytest
+import queue
+import sqlite3
+
+import lib.bestiary as bestiary
+import lib.bestiary_search as bestiary_search
+from records import ogre_record
+
+
+@pytest.fixture
+def library_path(tmp_path):
+    path = str(tmp_path.joinpath("bestiary.sqlite"))
+    with bestiary.Bestiary(path) as library:
+        library.add_many(
+            ogre_record(f"creature {i}", hp=1 + i % 300, ac=5 + i % 25)
+            for i in range(2000)
+        )
+    return path
+
+
+@pytest.fixture
+def worker(library_path):
+    pages = queue.Queue()
+    worker = bestiary_search.SearchWorker(library_path, pages.put, page_size=100)
+    worker.start()
+    yield worker, pages
+    worker.quit()
+    worker.join(5)
+    assert not worker.is_alive()
+
+
+def test_pages(worker):
+    worker, pages = worker
+    query = bestiary_search.SearchQuery(
+        armor_class=(10, 14), order_by="hit_points", descending=True
+    )
+    generation = worker.search(query)
+    page = pages.get(timeout=5)
+    assert page.generation == generation
+    assert page.query == query
+    assert page.offset == 0
+    assert page.total == 400
+    assert len(page.entries) == 100
+    assert all(10 <= entry.armor_class <= 14 for entry in page.entries)
+    hit_points = [entry.hit_points for entry in page.entries]
+    assert hit_points == sorted(hit_points, reverse=True)
+    worker.fetch(generation, 100)
+    # Repeated requests for a pending page are coalesced
+    worker.fetch(generation, 100)
+    page = pages.get(timeout=5)
+    assert page.offset == 100
+    assert page.total is None
+    assert page.entries[0].hit_points <= hit_points[-1]
+    worker.fetch(generation, 400)
+    assert pages.get(timeout=5).entries == []
+    assert pages.empty()
+
+
+def test_new_search_supersedes(worker):
+    worker, pages = worker
+    first = worker.search(bestiary_search.SearchQuery(name="creature"))
+    worker.fetch(first, 100)
+    second = worker.search(bestiary_search.SearchQuery(name="creature 19"))
+    # Requests for a superseded search are ignored
+    worker.fetch(first, 200)
+    page = pages.get(timeout=5)
+    while page.generation != second:
+        assert page.generation == first
+        page = pages.get(timeout=5)
+    assert page.total == 111
+    assert all("creature 19" in entry.name for entry in page.entries)
+    worker.search(bestiary_search.SearchQuery())
+    assert pages.get(timeout=5).total == 2000
+
+
+def test_errors_are_delivered(library_path, worker):
+    worker, pages = worker
+    generation = worker.search(bestiary_search.SearchQuery())
+    assert pages.get(timeout=5).error is None
+    connection = sqlite3.connect(library_path)
+    connection.execute("DROP TABLE stat_blocks")
+    connection.commit()
+    connection.close()
+    worker.fetch(generation, 100)
+    page = pages.get(timeout=5)
+    assert page.generation == generation
+    assert page.entries == []
+    assert "stat_blocks" in page.error
+
+
+def test_invalid_file(tmp_path):
+    path = tmp_path.joinpath("notes.db")
+    path.write_bytes(b"not a database" * 100)
+    pages = queue.Queue()
+    worker = bestiary_search.SearchWorker(str(path), pages.put)
+    worker.start()
+    # The worker stays alive and fails every search
+    for _ in range(2):
+        generation = worker.search(bestiary_search.SearchQuery())
+        page = pages.get(timeout=5)
+        assert page.generation == generation
+        assert page.entries == []
+        assert page.error
+    worker.quit()
+    worker.join(5)
+    assert not worker.is_alive()
+
+
+def test_invalid_params(library_path, worker):
+    worker, _ = worker
+    with pytest.raises(bestiary_search.InvalidSearchParamError):
+        worker.search(bestiary_search.SearchQuery(order_by="block"))
+    with pytest.raises(bestiary_search.InvalidSearchParamError):
+        bestiary_search.SearchWorker(library_path, print, page_size=0)
+
+
+def test_interrupt(library_path):
+    library = bestiary.Bestiary(library_path)
+    # Interrupting with no running query is harmless
+    library.interrupt()
+    assert library.count() == 2000
+    library.close()
@@ -0,0 +1,176 @@
+import os
+import pickle
+import pytest
+import sys
+import types
+
+import lib.block_format as block_format
+from lib.ability_scores import Scores
+from records import knight_record, ogre_record
+
+
+@pytest.mark.parametrize("encoding", [block_format.BINARY, block_format.JSON])
+def test_round_trip(encoding):
+    record = knight_record()
+    data = block_format.encode(record, encoding)
+    assert block_format.is_block_format(data)
+    assert data[len(block_format.MAGIC) + 1] == encoding
+    assert block_format.decode(data) == record
+    assert block_format.read(data) == (record, False)
+
+
+@pytest.mark.parametrize("encoding", [block_format.BINARY, block_format.JSON])
+def test_limited_use_round_trip(encoding):
+    record = knight_record()
+    record["attacks"][0]["uses_per_day"] = 3
+    record["attacks"][1]["recharge"] = 5
+    data = block_format.encode(record, encoding)
+    assert block_format.decode(data) == record
+    stat_block = block_format.stat_block_from_record(block_format.decode(data))
+    assert stat_block.attacks["greatsword"].uses == 3
+    assert stat_block.attacks["greatsword"].recharge is None
+    assert stat_block.attacks["fire breath"].recharge == 5
+    assert stat_block.attacks["fire breath"].uses is None
+
+
+def test_decode_version_1():
+    # An ogre written before the limited-use fields: its attacks are at will
+    data = bytes.fromhex(
+        "3545424c4f434b01001308130507073b0000000b0028000204006f67726501000005000000010000010000000100000000"
+        "000000010e09006772656174636c756203003264380000"
+    )
+    assert block_format.decode(data) == ogre_record()
+    json_data = block_format.encode(ogre_record(), block_format.JSON)
+    for field in block_format.LIMITED_USE_FIELDS:
+        json_data = json_data.replace(f',"{field}":null'.encode(), b"")
+    assert block_format.decode(json_data) == ogre_record()
+
+
+def test_binary_is_compact():
+    record = knight_record()
+    binary = block_format.encode(record)
+    assert len(binary) < len(block_format.encode(record, block_format.JSON)) / 3
+    assert len(binary) < len(pickle.dumps(record))
+
+
+def test_json_fallback():
+    record = knight_record()
+    record["hp"] = 2**40
+    data = block_format.encode(record)
+    assert data[len(block_format.MAGIC) + 1] == block_format.JSON
+    assert block_format.decode(data) == record
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.encode(record, block_format.BINARY)
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.encode(record, 2)
+
+
+def test_decode_errors():
+    data = block_format.encode(knight_record())
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.decode(b"not a block")
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.decode(data[:-3])
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.decode(data + b"\x00")
+    newer = bytearray(data)
+    newer[len(block_format.MAGIC)] = block_format.VERSION + 1
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.decode(bytes(newer))
+    unknown = bytearray(data)
+    unknown[len(block_format.MAGIC) + 1] = 7
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.decode(bytes(unknown))
+
+
+@pytest.fixture
+def legacy_model(monkeypatch):
+    # The pickled classes of files saved by previous versions
+    module = types.ModuleType("model")
+    for name in ("TargetModel", "AttackRollModel", "SavingThrowModel"):
+        setattr(module, name, type(name, (), {"__module__": "model"}))
+    module.StatBlockModel = type("StatBlockModel", (), {"__module__": "model"})
+    monkeypatch.setitem(sys.modules, "model", module)
+    return module
+
+
+def get_legacy_block(module):
+    record = knight_record()
+    block = module.StatBlockModel()
+    block.__dict__.update(
+        {
+            key: value
+            for key, value in record.items()
+            if key not in ("attacks", "multiattacks")
+        }
+    )
+    block.attacks = []
+    for attack_record in record["attacks"]:
+        attack_record = dict(attack_record)
+        kind = attack_record.pop("kind")
+        attack = (
+            module.AttackRollModel()
+            if kind == block_format.ATTACK_ROLL
+            else module.SavingThrowModel()
+        )
+        target = module.TargetModel()
+        target.__dict__.update(attack_record.pop("target"))
+        attack.__dict__.update(attack_record)
+        attack.target = target
+        block.attacks.append(attack)
+    block.multiattacks = record["multiattacks"]
+    return block
+
+
+@pytest.mark.parametrize("protocol", [0, 2, pickle.HIGHEST_PROTOCOL])
+def test_decode_legacy(legacy_model, protocol):
+    data = pickle.dumps(get_legacy_block(legacy_model), protocol)
+    assert not block_format.is_block_format(data)
+    assert block_format.decode_legacy(data) == knight_record()
+    assert block_format.read(data) == (knight_record(), True)
+
+
+def test_decode_legacy_defaults(legacy_model):
+    block = legacy_model.StatBlockModel()
+    block.name = "old"
+    record = block_format.decode_legacy(pickle.dumps(block))
+    assert record["name"] == "old"
+    assert record["hp"] == 1
+    assert record["attacks"] == []
+
+
+def test_decode_legacy_rejects_other_objects(legacy_model):
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.decode_legacy(pickle.dumps(legacy_model.TargetModel()))
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.decode_legacy(pickle.dumps(os.getcwd))
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.decode_legacy(b"garbage")
+
+
+def test_migrate_file(legacy_model, tmp_path):
+    path = tmp_path / "knight.5eblock"
+    path.write_bytes(pickle.dumps(get_legacy_block(legacy_model)))
+    assert block_format.migrate_file(str(path))
+    data = path.read_bytes()
+    assert block_format.is_block_format(data)
+    assert block_format.decode(data) == knight_record()
+    assert not block_format.migrate_file(str(path))
+    assert path.read_bytes() == data
+
+
+def test_stat_block_from_record():
+    stat_block = block_format.stat_block_from_record(knight_record())
+    assert stat_block.name == "knight"
+    assert stat_block.armor_class == 18
+    assert stat_block.hit_points == 52
+    assert stat_block.ability_scores.get_ability_score(Scores.CHARISMA) == 15
+    assert set(stat_block.attacks) == {"greatsword", "fire breath"}
+    assert stat_block.attacks["fire breath"].is_saving_throw
+    assert stat_block.multiattack_attack_names == {
+        "attack": ["greatsword", "greatsword"]
+    }
+    record = knight_record()
+    del record["proficiency"]
+    with pytest.raises(block_format.InvalidBlockFormatError):
+        block_format.stat_block_from_record(record)
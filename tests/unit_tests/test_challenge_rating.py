@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+import lib.attacks as attacks
+import lib.challenge_rating as challenge_rating
+import lib.targets as targets
+from lib.ability_scores import AbilityScores, Scores
+from lib.recharge import usage_rate
+from lib.stat_block import StatBlock
+
+
+def get_ogre():
+    greatclub = attacks.AttackRollAttack(
+        "greatclub", 5, 1, targets.SingleTarget(), "2d8", 0, False, Scores.STRENGTH
+    )
+    return StatBlock(
+        "ogre", AbilityScores(19, 8, 16, 5, 7, 7), 2, 11, 59, 40, [greatclub]
+    )
+
+
+def get_drake():
+    bite = attacks.AttackRollAttack(
+        "bite", 5, 1, targets.SingleTarget(), "1d10", 0, False, Scores.STRENGTH
+    )
+    breath = attacks.SavingThrowAttack(
+        "breath",
+        15,
+        1,
+        targets.Cone(15),
+        "6d6",
+        15,
+        True,
+        None,
+        False,
+        False,
+        5,
+    )
+    return StatBlock(
+        "drake",
+        AbilityScores(17, 10, 15, 8, 11, 12),
+        2,
+        17,
+        52,
+        30,
+        [bite, breath],
+    )
+
+
+def test_tables():
+    for table in (
+        challenge_rating.ARMOR_CLASSES,
+        challenge_rating.HIT_POINTS,
+        challenge_rating.ATTACK_BONUSES,
+        challenge_rating.DAMAGE_PER_ROUND,
+        challenge_rating.SAVE_DCS,
+    ):
+        assert table.size == challenge_rating.CHALLENGE_RATINGS.size
+    assert (np.diff(challenge_rating.HIT_POINTS) > 0).all()
+    assert (np.diff(challenge_rating.DAMAGE_PER_ROUND) > 0).all()
+
+
+def test_columns_from_stat_blocks():
+    columns = challenge_rating.columns_from_stat_blocks([get_ogre(), get_drake()])
+    assert columns.names == ("ogre", "drake")
+    assert columns.hit_points.tolist() == [59, 52]
+    assert columns.armor_class.tolist() == [11, 17]
+    # 2d8 + 4 against 6d6 on two targets used 1 round out of 3 on average
+    assert columns.damage_per_round[0] == pytest.approx(13)
+    assert columns.damage_per_round[1] == pytest.approx(21 * 2 * usage_rate(5, None, 3))
+    assert columns.to_hit.tolist() == [6, 7]
+    assert columns.is_saving_throw.tolist() == [False, True]
+
+
+def test_estimate_challenge_ratings():
+    estimate = challenge_rating.estimate_challenge_ratings(
+        challenge_rating.columns_from_stat_blocks([get_ogre()])
+    )
+    # 59 hit points (1/2) with 2 less AC than expected
+    assert estimate.defensive.tolist() == [0.25]
+    # 13 damage per round (1) with +3 more to hit than expected
+    assert estimate.offensive.tolist() == [2]
+    assert estimate.challenge_rating.tolist() == [1]
+    assert challenge_rating.estimate_challenge_rating(get_ogre()) == 1
+
+
+def test_vectorized_matches_single():
+    stat_blocks = [get_ogre(), get_drake()]
+    estimate = challenge_rating.estimate_challenge_ratings(
+        challenge_rating.columns_from_stat_blocks(stat_blocks)
+    )
+    assert estimate.challenge_rating.tolist() == [
+        challenge_rating.estimate_challenge_rating(stat_block)
+        for stat_block in stat_blocks
+    ]
+
+
+def test_saving_throw_offense():
+    columns = challenge_rating.ChallengeRatingColumns(
+        ("a", "b"),
+        np.array([100, 100]),
+        np.array([13, 13]),
+        np.array([30.0, 30.0]),
+        np.array([5, 7]),
+        np.array([True, True]),
+    )
+    estimate = challenge_rating.estimate_challenge_ratings(columns)
+    # Damage of CR 4 (DC 14): DC 13 keeps the row, DC 15 too (less than 2 points)
+    assert estimate.offensive.tolist() == [4, 4]
+    columns = columns._replace(to_hit=np.array([3, 9]))
+    assert challenge_rating.estimate_challenge_ratings(columns).offensive.tolist() == [
+        3,
+        5,
+    ]
+
+
+def test_out_of_table():
+    columns = challenge_rating.ChallengeRatingColumns(
+        ("small", "huge"),
+        np.array([1, 2000]),
+        np.array([5, 30]),
+        np.array([0.0, 1000.0]),
+        np.array([-2, 30]),
+        np.array([False, False]),
+    )
+    estimate = challenge_rating.estimate_challenge_ratings(columns)
+    assert estimate.challenge_rating.tolist() == [0, 30]
+
+
+def test_challenge_rating_label():
+    assert challenge_rating.challenge_rating_label(0.125) == "1/8"
+    assert challenge_rating.challenge_rating_label(0.5) == "1/2"
+    assert challenge_rating.challenge_rating_label(12.0) == "12"
+    with pytest.raises(challenge_rating.InvalidChallengeRatingParamError):
+        challenge_rating.challenge_rating_label(0.3)
+
+
+def test_challenge_rating_mask():
+    estimate = challenge_rating.ChallengeRatingEstimate(
+        np.zeros(3), np.zeros(3), np.array([0.5, 2, 5])
+    )
+    assert challenge_rating.challenge_rating_mask(estimate, 1, 5).tolist() == [
+        False,
+        True,
+        True,
+    ]
+    with pytest.raises(challenge_rating.InvalidChallengeRatingParamError):
+        challenge_rating.challenge_rating_mask(estimate, 5, 1)
+
+
+def test_calibration_dataset():
+    ogre = get_ogre()
+    assert challenge_rating.calibration_dataset([ogre]) == [(ogre, 1.0)]
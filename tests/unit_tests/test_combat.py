@@ -0,0 +1,78 @@
+import pytest
+
+import lib.combat as combat
+import lib.unit_attacks as unit_attacks
+
+
+def test_hit_probability():
+    assert combat.hit_roll(None) == 1
+    assert combat.hit_probability(None) == 1.0
+    assert combat.hit_probability(2) == pytest.approx(5 / 6)
+    assert combat.hit_probability(4) == pytest.approx(0.5)
+    assert combat.hit_probability(6) == pytest.approx(1 / 6)
+
+
+def test_wound_roll():
+    assert combat.wound_roll(8, 4) == 2
+    assert combat.wound_roll(5, 4) == 3
+    assert combat.wound_roll(4, 4) == 4
+    assert combat.wound_roll(3, 4) == 5
+    assert combat.wound_roll(2, 4) == 6
+    assert combat.wound_roll(1, 4) == 6
+    assert combat.wound_probability(4, 4) == pytest.approx(0.5)
+
+
+def test_save_roll():
+    assert combat.save_roll(3, None, 0) == 3
+    assert combat.save_roll(3, None, -2) == 5
+    assert combat.save_roll(5, None, -3) == 7
+    assert combat.save_roll(5, 4, -3) == 4
+    assert combat.save_roll(3, 5, 0) == 3
+    assert combat.save_roll(2, None, 1) == 2
+    assert combat.save_probability(5, None, -3) == 0.0
+    assert combat.save_probability(3, None, 0) == pytest.approx(4 / 6)
+
+
+def test_expected_damage():
+    attack = unit_attacks.MeleeUnitAttack("sword", 5, "4", 3, 5, -1, "2", False)
+    probability = combat.unsaved_wound_probability(attack, 4, 4, None)
+    assert probability == pytest.approx(4 / 6 * 4 / 6 * 4 / 6)
+    assert combat.expected_damage(attack, 4, 4, None) == pytest.approx(
+        4 * 2 * probability
+    )
+    assert combat.expected_damage(attack, 4, 4, None, 1) == pytest.approx(
+        4 * probability
+    )
+
+
+def test_array_probabilities_match_scalar():
+    skills = [2, 3, 4, 5, 6]
+    strengths = list(range(1, 13))
+    resistances = list(range(1, 9))
+    aps = [0, -1, -2, -4]
+    unsaved = combat.unsaved_wound_probability_array(
+        4,
+        [[s] for s in strengths],
+        -1,
+        [resistances],
+        3,
+        7,
+    )
+    for i, strength in enumerate(strengths):
+        for j, resistance in enumerate(resistances):
+            attack = unit_attacks.MeleeUnitAttack(
+                "attack", 5, "1", 4, strength, -1, "1", False
+            )
+            assert unsaved[i, j] == pytest.approx(
+                combat.unsaved_wound_probability(attack, resistance, 3, None)
+            )
+    assert combat.hit_probability_array(skills).tolist() == pytest.approx(
+        [combat.hit_probability(s) for s in skills]
+    )
+    for ap in aps:
+        for invulnerable in (None, 4, 6):
+            assert combat.save_probability_array(
+                [2, 4, 6], 7 if invulnerable is None else invulnerable, ap
+            ).tolist() == pytest.approx(
+                [combat.save_probability(s, invulnerable, ap) for s in (2, 4, 6)]
+            )
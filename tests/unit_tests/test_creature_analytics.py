@@ -0,0 +1,106 @@
+import io
+import csv
+import numpy as np
+import pytest
+
+import lib.creature_analytics as creature_analytics
+import lib.targets as targets
+from lib.attacks import CreatureMeleeAttack, CreatureRangedAttack
+from lib.recharge import usage_rate
+
+
+class MockStatBlock:
+    def __init__(self, attacks, multiattacks):
+        self.name = "creature"
+        self.attacks = attacks
+        self.multiattacks = multiattacks
+
+
+def get_sword():
+    return CreatureMeleeAttack("sword", 2, 5, targets.SingleTarget(), 5, 8.0, 4.5, 3.0)
+
+
+def get_breath(recharge=None):
+    return CreatureRangedAttack(
+        "breath",
+        1,
+        30,
+        targets.Cone(30),
+        6,
+        21.0,
+        21.0,
+        0.0,
+        recharge,
+        None,
+        True,
+    )
+
+
+def test_attack_roll_dpr():
+    grid = creature_analytics.attack_dpr(get_sword())
+    assert grid.shape == creature_analytics.SHAPE
+    assert not grid.flags.writeable
+    ac_15 = 15 - creature_analytics.ARMOR_CLASSES[0]
+    # 11+ hits on a d20, a natural 20 doubles the dice
+    assert grid[ac_15, 0] == pytest.approx(2 * (0.55 * 8.0 + 0.05 * 4.5))
+    # Natural 20 and natural 1
+    assert grid[0, 0] == pytest.approx(2 * (0.95 * 8.0 + 0.05 * 4.5))
+    assert grid[-1, 0] == pytest.approx(2 * (0.05 * 8.0 + 0.05 * 4.5))
+    assert (grid == grid[:, :1]).all()
+
+
+def test_saving_throw_dpr():
+    grid = creature_analytics.attack_dpr(get_breath())
+    plus_2 = 2 - creature_analytics.SAVE_BONUSES[0]
+    # DC 14: a +2 save fails on 11 or less
+    assert grid[0, plus_2] == pytest.approx(0.55 * 21.0 + 0.45 * 10.5)
+    assert grid[0, 0] == pytest.approx(0.9 * 21.0 + 0.1 * 10.5)
+    assert (grid == grid[:1, :]).all()
+    no_half = creature_analytics.attack_dpr(get_breath(), half_on_success=False)
+    assert no_half[0, plus_2] == pytest.approx(0.55 * 21.0)
+    assert no_half[0, -1] == 0
+
+
+def test_recharge_dpr():
+    base = creature_analytics.attack_dpr(get_breath(5))
+    assert creature_analytics.attack_dpr(get_breath(5), rounds=None) is base
+    averaged = creature_analytics.attack_dpr(get_breath(5), rounds=3)
+    assert np.allclose(averaged, base * usage_rate(5, None, 3))
+    with pytest.raises(creature_analytics.InvalidCreatureAnalyticsParamError):
+        creature_analytics.attack_dpr(get_breath(5), rounds=0)
+
+
+def test_stat_block_dpr():
+    sword = get_sword()
+    breath = get_breath()
+    dpr = creature_analytics.stat_block_dpr(
+        MockStatBlock(
+            {"sword": sword, "breath": breath}, {"multiattack": [sword, sword]}
+        )
+    )
+    assert set(dpr.attacks) == {"sword", "breath"}
+    assert np.allclose(dpr.multiattacks["multiattack"], 2 * dpr.attacks["sword"])
+    assert np.allclose(
+        dpr.best, np.maximum(dpr.multiattacks["multiattack"], dpr.attacks["breath"])
+    )
+    assert dpr.dpr(15, 2) == pytest.approx(float(dpr.best[10, 7]))
+    with pytest.raises(creature_analytics.InvalidCreatureAnalyticsParamError):
+        dpr.dpr(31, 2)
+    with pytest.raises(creature_analytics.InvalidCreatureAnalyticsParamError):
+        dpr.dpr(15, -6)
+
+
+def test_export_dpr():
+    stat_block = MockStatBlock(
+        {"sword": get_sword()}, {"multiattack": [get_sword(), get_sword()]}
+    )
+    file = io.StringIO()
+    assert creature_analytics.export_dpr([stat_block, stat_block], file) == 4
+    rows = list(csv.reader(io.StringIO(file.getvalue())))
+    assert len(rows) == 5
+    assert rows[0][:4] == ["stat_block", "kind", "name", "ac_5"]
+    assert rows[0][-1] == "save_15"
+    assert rows[1][:3] == ["creature", "attack", "sword"]
+    assert rows[2][:3] == ["creature", "multiattack", "multiattack"]
+    ac_15 = 3 + 15 - creature_analytics.ARMOR_CLASSES[0]
+    assert float(rows[1][ac_15]) == pytest.approx(2 * (0.55 * 8.0 + 0.05 * 4.5))
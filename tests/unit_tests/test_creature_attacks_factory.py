@@ -173,6 +173,7 @@ def test_melee_all_scaling_attack_roll():
     assert creature_attack.total_average_damage == 8.5
     assert creature_attack.dice_average_damage == 6.5
     assert creature_attack.fixed_damage == 2
+    assert creature_attack.is_saving_throw is False
 
 
 def test_base_melee_saving_throw():
@@ -202,6 +203,7 @@ def test_base_melee_saving_throw():
     assert creature_attack.total_average_damage == 17.5
     assert creature_attack.dice_average_damage == 16.5
     assert creature_attack.fixed_damage == 1
+    assert creature_attack.is_saving_throw is True
 
 
 def test_base_ranged_saving_throw():
@@ -289,3 +291,45 @@ def test_melee_all_scaling_saving_throw():
     assert creature_attack.total_average_damage == 67
     assert creature_attack.dice_average_damage == 65
     assert creature_attack.fixed_damage == 2
+
+
+def test_limited_use_saving_throw():
+    stat_block = MockStatBlock(12, 8, 16, 12, 8, 14, 3)
+    attack = attacks.SavingThrowAttack(
+        "breath weapon",
+        0,
+        1,
+        targets.Cone(30),
+        "8d6",
+        13,
+        True,
+        None,
+        False,
+        False,
+        recharge=5,
+    )
+
+    creature_attack = attack.from_creature(stat_block)
+
+    assert creature_attack.recharge == 5
+    assert creature_attack.uses is None
+
+
+def test_limited_use_attack_roll():
+    stat_block = MockStatBlock(12, 8, 16, 12, 8, 14, 3)
+    attack = attacks.AttackRollAttack(
+        "spear",
+        5,
+        1,
+        targets.SingleTarget(),
+        "1d6",
+        0,
+        False,
+        Scores.STRENGTH,
+        uses_per_day=2,
+    )
+
+    creature_attack = attack.from_creature(stat_block)
+
+    assert creature_attack.recharge is None
+    assert creature_attack.uses == 2
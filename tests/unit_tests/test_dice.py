@@ -93,3 +93,42 @@ def test_convert_to_d6_d3_str():
     assert dice.convert_d6_d3_to_string(0, 1, 1) == "D3+1"
     assert dice.convert_d6_d3_to_string(1, 1, 1) == "D6+D3+1"
     assert dice.convert_d6_d3_to_string(2, 2, 2) == "2D6+2D3+2"
+
+
+def test_parse_die_expression():
+    assert dice.parse_die_expression("D6+2") == (((1, 6),), 2)
+    assert dice.parse_die_expression("2d3") == (((2, 3),), 0)
+    assert dice.parse_die_expression("3") == ((), 3)
+    assert dice.parse_die_expression("1d8 - 1") == (((1, 8),), -1)
+    assert dice.parse_die_expression("2D6+D3+1") == (((2, 6), (1, 3)), 1)
+    with pytest.raises(dice.InvalidDamageExpressionError):
+        dice.parse_die_expression("no")
+    with pytest.raises(dice.InvalidDamageExpressionError):
+        dice.parse_die_expression("1d0")
+    with pytest.raises(dice.InvalidDamageExpressionError):
+        dice.parse_die_expression(1)  # noqa
+
+
+def test_die_expression_distribution():
+    assert dice.die_expression_distribution("1").tolist() == [0, 1]
+    assert dice.die_expression_distribution("D3+1").tolist() == pytest.approx(
+        [0, 0, 1 / 3, 1 / 3, 1 / 3]
+    )
+    two_d6 = dice.die_expression_distribution("2D6")
+    assert two_d6.sum() == pytest.approx(1)
+    assert two_d6[7] == pytest.approx(6 / 36)
+    assert (two_d6 * range(two_d6.size)).sum() == pytest.approx(7)
+    clamped = dice.die_expression_distribution("D6-3")
+    assert clamped.tolist() == pytest.approx([0.5, 1 / 6, 1 / 6, 1 / 6])
+    mixed = dice.die_expression_distribution("1d6-1d4+5")
+    assert (mixed * range(mixed.size)).sum() == pytest.approx(6)
+    assert not clamped.flags.writeable
+
+
+def test_add_dice():
+    assert dice.add_dice("2d6", 1) == "3d6"
+    assert dice.add_dice("1d4 + 2d6 + 3", 2) == "1d4+4d6+3"
+    assert dice.add_dice("2d8 - 1", -5) == "1d8-1"
+    assert dice.add_dice("4", 3) == "4"
+    with pytest.raises(dice.InvalidDamageExpressionError):
+        dice.add_dice("2d6", 1.5)  # noqa
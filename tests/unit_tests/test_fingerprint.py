@@ -0,0 +1,42 @@
+import lib.fingerprint as fingerprint
+import lib.unit_attacks as unit_attacks
+import lib.unit_stat_block as unit_stat_block
+
+
+def get_unit(name="unit name", attack_name="sword", strength=5):
+    return unit_stat_block.UnitStatBlock(
+        name,
+        30,
+        4,
+        4,
+        None,
+        2,
+        [
+            unit_attacks.MeleeUnitAttack(
+                attack_name, 5, "2", 3, strength, -1, "1", False
+            )
+        ],
+        {},
+    )
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint.fingerprint((1, "a", None)) == fingerprint.fingerprint(
+        [1, "a", None]
+    )
+    assert fingerprint.fingerprint({"a": 1, "b": 2}) == fingerprint.fingerprint(
+        {"b": 2, "a": 1}
+    )
+    assert len(fingerprint.fingerprint("x")) == 64
+
+
+def test_unit_fingerprint_ignores_names():
+    assert fingerprint.unit_fingerprint(get_unit()) == fingerprint.unit_fingerprint(
+        get_unit("other name", "other attack")
+    )
+
+
+def test_unit_fingerprint_changes_with_stats():
+    assert fingerprint.unit_fingerprint(get_unit()) != fingerprint.unit_fingerprint(
+        get_unit(strength=6)
+    )
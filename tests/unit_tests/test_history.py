@@ -0,0 +1,123 @@
+import pytest
+
+import lib.block_format as block_format
+import lib.history as history
+from records import attack_record, ogre_record
+
+
+def get_record():
+    return ogre_record(
+        con=16,
+        attacks=[attack_record(), attack_record("javelin")],
+        multiattacks={"multiattack": ["greatclub", "javelin"]},
+    )
+
+
+def test_version_round_trip():
+    record = get_record()
+    version = history.Version.from_record(record)
+    assert version.to_record() == record
+    assert version["hp"] == 59
+    assert version.attack_names() == ["greatclub", "javelin"]
+    # The version does not share mutable state with the record
+    record["attacks"][0]["target"]["name"] = "cone"
+    record["multiattacks"]["multiattack"].append("greatclub")
+    assert version.to_record() == get_record()
+    with pytest.raises(TypeError):
+        version.attacks[0]["name"] = "club"
+    stat_block = block_format.stat_block_from_record(version)
+    assert list(stat_block.attacks) == ["greatclub", "javelin"]
+    assert list(stat_block.multiattacks) == ["multiattack"]
+
+
+def test_structural_sharing():
+    version = history.Version.from_record(get_record())
+    edited = version.set("hp", 60)
+    assert edited["hp"] == 60
+    assert version["hp"] == 59
+    assert edited.attacks is version.attacks
+    assert edited.multiattacks is version.multiattacks
+    replaced = version.put_attack(attack_record("javelin", "1d6"), replace="javelin")
+    assert replaced.attacks[0] is version.attacks[0]
+    assert replaced.attacks[1]["base_damage"] == "1d6"
+    assert replaced.multiattacks is version.multiattacks
+    added = version.put_attack(attack_record("rock"))
+    assert added.attack_names() == ["greatclub", "javelin", "rock"]
+    assert added.attacks[1] is version.attacks[1]
+
+
+def test_edits():
+    version = history.Version.from_record(get_record())
+    removed = version.remove_attacks(["javelin"])
+    assert removed.attack_names() == ["greatclub"]
+    assert dict(removed.multiattacks) == {}
+    multiattacks = version.put_multiattack("double", ["greatclub", "greatclub"])
+    assert list(multiattacks.multiattacks) == ["multiattack", "double"]
+    renamed = multiattacks.put_multiattack(
+        "twice", ["javelin", "javelin"], replace="multiattack"
+    )
+    assert list(renamed.multiattacks) == ["double", "twice"]
+    assert renamed.multiattacks["double"] is multiattacks.multiattacks["double"]
+    changed = multiattacks.put_multiattack(
+        "multiattack", ["javelin", "javelin"], replace="multiattack"
+    )
+    assert list(changed.multiattacks) == ["multiattack", "double"]
+    assert dict(multiattacks.remove_multiattacks(["multiattack"]).multiattacks) == {
+        "double": ("greatclub", "greatclub")
+    }
+    with pytest.raises(history.InvalidHistoryParamError):
+        version.set("attacks", ())
+    with pytest.raises(history.InvalidHistoryParamError):
+        version.put_attack(attack_record(), replace="unknown")
+    with pytest.raises(history.InvalidHistoryParamError):
+        version.put_multiattack("a", [], replace="unknown")
+
+
+def test_undo_redo():
+    initial = history.Version.from_record(get_record())
+    log = history.History(initial)
+    assert not log.can_undo
+    assert log.undo() is None
+    first = log.commit(initial.set("hp", 60))
+    second = log.commit(first.set("ac", 12))
+    assert log.undo() is first
+    assert log.undo() is initial
+    assert log.can_redo
+    assert log.redo() is first
+    third = log.commit(first.set("speed", 30))
+    assert not log.can_redo
+    assert log.redo() is None
+    assert log.current is third
+    assert log.undo() is first
+    assert second is not log.current
+
+
+def test_grouped_commits():
+    initial = history.Version.from_record(get_record())
+    log = history.History(initial)
+    version = initial
+    for name in ["o", "og", "ogr"]:
+        version = log.commit(version.set("name", name), group="name")
+    log.commit(version.set("hp", 1), group="hp")
+    log.commit(log.current.set("hp", 2), group="hp")
+    assert log.undo()["name"] == "ogr"
+    assert log.undo() is initial
+    # An undo ends the group
+    log.redo()
+    log.commit(log.current.set("name", "ogre chief"), group="name")
+    assert log.undo()["name"] == "ogr"
+
+
+def test_limit_and_clear():
+    initial = history.Version.from_record(get_record())
+    log = history.History(initial, limit=2)
+    for hp in range(1, 5):
+        log.commit(log.current.set("hp", hp))
+    assert log.undo()["hp"] == 3
+    assert log.undo()["hp"] == 2
+    assert log.undo() is None
+    log.clear(initial)
+    assert log.current is initial
+    assert not log.can_undo and not log.can_redo
+    with pytest.raises(history.InvalidHistoryParamError):
+        history.History(initial, limit=0)
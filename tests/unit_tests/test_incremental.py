@@ -0,0 +1,165 @@
+import pytest
+
+import lib.balance as balance
+import lib.incremental as incremental
+import lib.targets as targets
+from lib.ability_scores import AbilityScores, Scores
+from lib.attacks import AttackRollAttack, SavingThrowAttack
+from lib.fingerprint import unit_fingerprint
+from lib.stat_block import StatBlock
+from lib.unit_stat_block import from_stat_block
+
+
+def get_stat_block(
+    dexterity=12, constitution=14, ac=15, names=("claw", "bite", "bow"), name="x"
+):
+    attacks = []
+    for attack_name in names:
+        if attack_name == "bow":
+            attacks.append(
+                AttackRollAttack(
+                    "bow",
+                    80,
+                    1,
+                    targets.SingleTarget(),
+                    "1d8",
+                    0,
+                    True,
+                    Scores.DEXTERITY,
+                )
+            )
+        elif attack_name == "breath":
+            attacks.append(
+                SavingThrowAttack(
+                    "breath", 30, 1, targets.Cone(30), "4d8", 13, True, None, True
+                )
+            )
+        else:
+            attacks.append(
+                AttackRollAttack(
+                    attack_name,
+                    5,
+                    1,
+                    targets.SingleTarget(),
+                    "2d6",
+                    0,
+                    False,
+                    Scores.STRENGTH,
+                )
+            )
+    stat_block = StatBlock(
+        name,
+        AbilityScores(16, dexterity, constitution, 10, 10, 8),
+        3,
+        ac,
+        90,
+        30,
+        attacks,
+    )
+    stat_block.create_multiattack("multiattack", [names[0], names[0]])
+    return stat_block
+
+
+def assert_converted(changes, stat_block):
+    assert unit_fingerprint(changes.unit_stat_block) == unit_fingerprint(
+        from_stat_block(stat_block)
+    )
+    assert [attack.name for attack in changes.unit_stat_block.attacks] == list(
+        stat_block.attack_templates
+    )
+    assert changes.unit_stat_block.name == stat_block.name
+
+
+def test_attack_dependencies():
+    bow, breath = get_stat_block(names=("bow", "breath")).attack_templates.values()
+    assert incremental.attack_dependencies(bow) == {"dexterity", "proficiency"}
+    assert incremental.attack_dependencies(breath) == {
+        "intelligence",
+        "wisdom",
+        "charisma",
+    }
+
+
+def test_first_update_converts_everything():
+    converter = incremental.IncrementalConverter()
+    assert converter.unit_stat_block is None
+    stat_block = get_stat_block()
+    changes = converter.update(stat_block)
+    assert_converted(changes, stat_block)
+    assert changes.changed_inputs == set(incremental.INPUTS)
+    assert {"resistance", "unit_attack:bow", "unit_multiattack:multiattack"} <= (
+        changes.changed
+    )
+    assert changes.creature_changed
+    assert changes.unit_changed
+    assert converter.unit_stat_block is changes.unit_stat_block
+
+
+def test_only_dependent_nodes_change():
+    converter = incremental.IncrementalConverter()
+    converter.update(get_stat_block())
+    stat_block = get_stat_block(dexterity=20)
+    changes = converter.update(stat_block)
+    assert changes.changed_inputs == {"dexterity"}
+    assert changes.changed == {"attack:bow", "unit_attack:bow"}
+    assert_converted(changes, stat_block)
+
+    stat_block = get_stat_block(dexterity=20, ac=21)
+    changes = converter.update(stat_block)
+    assert changes.changed == {"saving_throw", "invulnerable_saving_throw"}
+    assert_converted(changes, stat_block)
+
+
+def test_unchanged_update():
+    converter = incremental.IncrementalConverter()
+    first = converter.update(get_stat_block())
+    changes = converter.update(get_stat_block())
+    assert changes.changed_inputs == set()
+    assert changes.changed == set()
+    assert not changes.creature_changed
+    assert not changes.unit_changed
+    assert changes.unit_stat_block is first.unit_stat_block
+
+
+def test_creature_only_change():
+    converter = incremental.IncrementalConverter()
+    converter.update(get_stat_block())
+    changes = converter.update(get_stat_block(constitution=15))
+    assert changes.changed_inputs == {"constitution"}
+    assert changes.changed == set()
+    assert changes.creature_changed
+    assert not changes.unit_changed
+
+
+def test_name_change():
+    converter = incremental.IncrementalConverter()
+    converter.update(get_stat_block())
+    stat_block = get_stat_block(name="y")
+    changes = converter.update(stat_block)
+    assert changes.unit_changed
+    assert_converted(changes, stat_block)
+
+
+def test_attacks_added_removed_and_reordered():
+    converter = incremental.IncrementalConverter()
+    converter.update(get_stat_block())
+    stat_block = get_stat_block(names=("claw", "breath", "bow"))
+    changes = converter.update(stat_block)
+    assert {"attack:bite", "unit_attack:bite", "unit_attack:breath", "order"} <= (
+        changes.changed
+    )
+    assert_converted(changes, stat_block)
+    stat_block = get_stat_block(names=("bow", "claw", "breath"))
+    changes = converter.update(stat_block)
+    assert "order" in changes.changed
+    assert_converted(changes, stat_block)
+
+
+def test_profile_and_reset():
+    profile = balance.DEFAULT_PROFILE.replace({"defense.hit_points_scale": 10})
+    converter = incremental.IncrementalConverter(profile)
+    stat_block = get_stat_block()
+    assert converter.update(stat_block).unit_stat_block.hit_points == 9
+    converter.reset()
+    assert converter.unit_stat_block is None
+    assert converter.update(stat_block).changed_inputs == set(incremental.INPUTS)
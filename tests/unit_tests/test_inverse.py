@@ -0,0 +1,153 @@
+import pytest
+
+import lib.attacks as attacks
+import lib.balance as balance
+import lib.inverse as inverse
+import lib.targets as targets
+from lib.ability_scores import AbilityScores
+from lib.stat_block import StatBlock
+from lib.unit_attacks import from_creature_attack
+from lib.unit_stat_block import from_stat_block
+
+
+def test_interval():
+    interval = inverse.Interval(1, 3)
+    assert 1 in interval
+    assert 2.5 in interval
+    assert 3 not in interval
+    assert "2" not in interval
+    assert 100 in inverse.Interval(1, None)
+    assert -100 in inverse.Interval(None, 1)
+    assert inverse.Interval(3, 3).is_empty
+    assert not inverse.Interval(None, 3).is_empty
+    assert interval.intersect(inverse.Interval(2, None)) == inverse.Interval(2, 3)
+    assert interval.intersect(inverse.Interval(None, None)) == interval
+    assert interval.intersect(inverse.Interval(5, 6)).is_empty
+
+
+def test_inverse_table():
+    table = balance.ThresholdTable((0, 2, 2, 5), (6, 5, 4, 5, 3))
+    index = inverse.inverse_table(table)
+    assert index[6] == (inverse.Interval(None, 0),)
+    assert index[5] == (inverse.Interval(0, 5),)
+    assert 4 not in index
+    assert index[3] == (inverse.Interval(5, None),)
+    default = inverse.inverse_table(
+        balance.DEFAULT_PROFILE.defense.invulnerable_saving_throw
+    )
+    assert default[None] == (inverse.Interval(None, 17),)
+
+
+def test_armor_class_intervals():
+    assert inverse.armor_class_intervals(2, 4) == [inverse.Interval(23, None)]
+    assert inverse.armor_class_intervals(6, None) == [inverse.Interval(1, 10)]
+    assert inverse.armor_class_intervals(6, 4) == []
+
+
+def test_stat_block_regions_match_conversion():
+    for ac in range(1, 30):
+        for con in range(1, 31, 3):
+            for prof in range(2, 10):
+                for hp in (1, 20, 21, 75):
+                    unit = from_stat_block(
+                        StatBlock(
+                            "creature",
+                            AbilityScores(10, 10, con, 10, 10, 10),
+                            prof,
+                            ac,
+                            hp,
+                            30,
+                            [],
+                        )
+                    )
+                    regions = inverse.stat_block_regions(
+                        unit.saving_throw,
+                        unit.invulnerable_saving_throw,
+                        unit.resistance,
+                        unit.hit_points,
+                    )
+                    assert any(
+                        ac in region.armor_class
+                        and prof == region.proficiency
+                        and con in region.constitution
+                        and hp in region.hit_points
+                        for region in regions
+                    )
+
+
+def test_stat_block_regions_are_feasible():
+    for region in inverse.stat_block_regions(3, 6, 4, 2):
+        for ac in range(region.armor_class.low, region.armor_class.high):
+            for con in range(region.constitution.low, region.constitution.high):
+                unit = from_stat_block(
+                    StatBlock(
+                        "creature",
+                        AbilityScores(10, 10, con, 10, 10, 10),
+                        region.proficiency,
+                        ac,
+                        region.hit_points.low,
+                        30,
+                        [],
+                    )
+                )
+                assert unit.saving_throw == 3
+                assert unit.invulnerable_saving_throw == 6
+                assert unit.resistance == 4
+                assert unit.hit_points == 2
+    assert inverse.stat_block_regions(2, None, 4, 2) == []
+
+
+def test_resistance_one():
+    regions = inverse.resistance_regions(1, proficiencies=[2])
+    assert regions == [(2, inverse.Interval(1, 8))]
+
+
+def test_invalid_params():
+    with pytest.raises(inverse.InvalidInverseParamError):
+        inverse.stat_block_regions(3, None, 0, 1)
+    with pytest.raises(inverse.InvalidInverseParamError):
+        inverse.stat_block_regions(3, None, 1, 0)
+
+
+@pytest.mark.parametrize("aoe", [False, True])
+def test_attack_regions_match_conversion(aoe):
+    target = targets.Sphere(20) if aoe else targets.SingleTarget()
+    for to_hit in range(-5, 21):
+        for damage in range(1, 120, 3):
+            unit = from_creature_attack(
+                attacks.CreatureRangedAttack(
+                    "attack", 1, 30, target, to_hit, damage / 2, damage / 2, 0.0
+                )
+            )
+            regions = inverse.attack_regions(
+                unit.attack_skill, unit.strength, unit.armor_penetration, aoe
+            )
+            matches = [
+                region
+                for region in regions
+                if region.to_hit == to_hit and damage / 2 in region.total_average_damage
+            ]
+            assert len(matches) == 1
+
+
+def test_attack_regions_are_feasible():
+    regions = inverse.attack_regions(3, 10, -1)
+    assert regions
+    for region in regions:
+        damage = float(max(region.total_average_damage.low, 0.5))
+        unit = from_creature_attack(
+            attacks.CreatureRangedAttack(
+                "attack",
+                1,
+                30,
+                targets.SingleTarget(),
+                region.to_hit,
+                damage,
+                damage,
+                0.0,
+            )
+        )
+        assert unit.attack_skill == 3
+        assert unit.strength == 10
+        assert unit.armor_penetration == -1
+    assert inverse.attack_regions(2, 1, 0) == []
@@ -0,0 +1,138 @@
+import os
+import pytest
+
+import lib.journal as journal
+from records import attack_record, ogre_record
+
+
+def get_record():
+    return ogre_record(
+        con=16,
+        attacks=[attack_record(), attack_record("javelin"), attack_record("fist")],
+        multiattacks={"multiattack": ["greatclub", "greatclub"]},
+    )
+
+
+def edits():
+    record = get_record()
+    record["hp"] = 60
+    yield record
+    record["name"] = "ogre chief"
+    record["attacks"][1] = attack_record("javelin", "3d6")
+    yield record
+    record["attacks"].pop(1)
+    yield record
+    record["attacks"].append(attack_record("rock"))
+    record["attacks"][0]["target"] = {
+        "name": "cone",
+        "first_param": 15,
+        "second_param": 1,
+    }
+    yield record
+    record["multiattacks"]["throw"] = ["rock", "rock"]
+    yield record
+    record["multiattacks"].pop("multiattack")
+    record["multiattacks"]["multiattack"] = ["greatclub", "fist"]
+    yield record
+    record["attacks"] = [attack_record("bite")]
+    record["multiattacks"] = {}
+    yield record
+
+
+def test_diff_and_apply():
+    old = get_record()
+    for new in edits():
+        entries = journal.diff(old, new)
+        replayed = journal.apply(None, journal.snapshot(old))
+        for entry in entries:
+            replayed = journal.apply(replayed, entry)
+        assert replayed == new
+        assert list(replayed["multiattacks"]) == list(new["multiattacks"])
+        old = journal.apply(None, journal.snapshot(new))
+    assert journal.diff(old, old) == []
+
+
+def test_diff_is_small():
+    old = get_record()
+    new = get_record()
+    new["hp"] = 1
+    assert journal.diff(old, new) == [["set", "hp", 1]]
+    new["attacks"].pop(0)
+    assert [entry[0] for entry in journal.diff(old, new)] == ["set", "remove_attack"]
+
+
+def test_journal_replay(tmp_path):
+    path = str(tmp_path.joinpath("ogre.5eblock.journal"))
+    assert journal.replay(path) is None
+    log = journal.Journal(path)
+    log.append(get_record())
+    assert log.entries == 1
+    for record in edits():
+        log.append(record)
+        assert journal.replay(path) == record
+    assert log.append(record) == 0
+    size = os.path.getsize(path)
+    log.compact()
+    assert log.entries == 1
+    assert os.path.getsize(path) < size
+    assert journal.replay(path) == record
+    log.discard()
+    assert not os.path.exists(path)
+
+
+def test_journal_compacts(tmp_path):
+    path = str(tmp_path.joinpath("ogre.5eblock.journal"))
+    log = journal.Journal(path, compact_after=4, fsync=False)
+    record = get_record()
+    for hp in range(1, 20):
+        record["hp"] = hp
+        log.append(record)
+        assert log.entries <= 4
+        assert journal.replay(path) == record
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_torn_tail(tmp_path):
+    path = str(tmp_path.joinpath("ogre.5eblock.journal"))
+    log = journal.Journal(path)
+    record = get_record()
+    log.append(record)
+    record["hp"] = 5
+    log.append(record)
+    with open(path, "rb") as file:
+        data = file.read()
+    entries, length = journal.read_journal(data)
+    assert len(entries) == 2
+    assert length == len(data)
+    # A crash while appending leaves a partial entry
+    with open(path, "wb") as file:
+        file.write(data[:-3])
+    assert journal.replay(path)["hp"] == 59
+    corrupted = bytearray(data)
+    corrupted[-2] ^= 0xFF
+    assert journal.read_journal(bytes(corrupted))[0] == entries[:1]
+
+
+def test_invalid_journals(tmp_path):
+    with pytest.raises(journal.InvalidJournalError):
+        journal.read_journal(b"not a journal")
+    with pytest.raises(journal.InvalidJournalError):
+        journal.read_journal(journal.MAGIC + bytes([journal.VERSION + 1]))
+    with pytest.raises(journal.InvalidJournalError):
+        journal.apply(None, ["set", "hp", 1])
+    record = journal.apply(None, journal.snapshot(get_record()))
+    for entry in [
+        ["set", "unknown", 1],
+        ["remove_attack", 10],
+        ["attack", 10, journal.snapshot(get_record())[1]["attacks"][0]],
+        ["remove_multiattack", "unknown"],
+        ["unknown"],
+        [],
+    ]:
+        with pytest.raises(journal.InvalidJournalError):
+            journal.apply(record, entry)
+    with pytest.raises(journal.InvalidJournalError):
+        journal.Journal(str(tmp_path.joinpath("a")), compact_after=0)
+    with pytest.raises(journal.InvalidJournalError):
+        journal.Journal(str(tmp_path.joinpath("a"))).compact()
+    assert journal.journal_path("ogre.5eblock") == "ogre.5eblock.journal"
@@ -0,0 +1,266 @@
+import io
+import json
+import pytest
+
+import lib.json_import as json_import
+from lib.block_format import stat_block_from_record
+
+OGRE = {
+    "name": "Ogre",
+    "size": "Large",
+    "armor_class": [{"type": "armor", "value": 11}],
+    "hit_points": 59,
+    "speed": {"walk": "40 ft."},
+    "strength": 19,
+    "dexterity": 8,
+    "constitution": 16,
+    "intelligence": 5,
+    "wisdom": 7,
+    "charisma": 7,
+    "challenge_rating": 2,
+    "actions": [
+        {
+            "name": "Greatclub",
+            "desc": "Melee Weapon Attack: +6 to hit, reach 5 ft., one target. Hit: 13 (2d8 + 4) bludgeoning damage.",
+        },
+        {
+            "name": "Javelin",
+            "desc": "Melee or Ranged Weapon Attack: +6 to hit, reach 5 ft. or range 30/120 ft., one target. Hit: 11 (2d6 + 4) piercing damage.",
+        },
+    ],
+}
+DRAGON = {
+    "name": "Young Red Dragon",
+    "armor_class": 18,
+    "hit_points": 178,
+    "speed": "40 ft., climb 40 ft., fly 80 ft.",
+    "strength": 23,
+    "dexterity": 10,
+    "constitution": 21,
+    "intelligence": 14,
+    "wisdom": 11,
+    "charisma": 19,
+    "challenge_rating": "10",
+    "actions": [
+        {
+            "name": "Multiattack",
+            "desc": "The dragon makes three attacks: one with its bite and two with its claws.",
+        },
+        {
+            "name": "Bite",
+            "desc": "Melee Weapon Attack: +10 to hit, reach 10 ft., one target. Hit: 17 (2d10 + 6) piercing damage plus 3 (1d6) fire damage.",
+        },
+        {
+            "name": "Claw",
+            "desc": "Melee Weapon Attack: +10 to hit, reach 5 ft., one target. Hit: 13 (2d6 + 6) slashing damage.",
+        },
+        {
+            "name": "Fire Breath (Recharge 5-6)",
+            "desc": "The dragon exhales fire in a 30-foot cone. Each creature in that area must make a DC 17 Dexterity saving throw, taking 56 (16d6) fire damage on a failed save, or half as much damage on a successful one.",
+        },
+        {
+            "name": "Frightful Presence",
+            "desc": "Each creature of the dragon's choice that is within 120 feet of the dragon must succeed on a DC 16 Wisdom saving throw or become frightened for 1 minute.",
+        },
+    ],
+}
+
+
+def test_parse_attack_roll():
+    attack = json_import.parse_action_description(OGRE["actions"][1]["desc"])
+    assert attack["kind"] == json_import.ATTACK_ROLL
+    assert attack["base_to_hit"] == 6
+    assert attack["base_damage"] == "2d6+4"
+    assert attack["weapon_range"] == 5
+    assert not attack["ranged"]
+    assert not attack["to_hit_proficiency"]
+    ranged = json_import.parse_action_description(
+        "Ranged Weapon Attack: +4 to hit, range 80/320 ft., one target. Hit: 5 (1d6 + 2) piercing damage."
+    )
+    assert ranged["ranged"]
+    assert ranged["weapon_range"] == 80
+    fixed = json_import.parse_action_description(
+        "Melee Weapon Attack: +0 to hit, reach 5 ft., one target. Hit: 1 piercing damage."
+    )
+    assert fixed["base_damage"] == "1"
+
+
+def test_parse_alternative_damage():
+    longsword = json_import.parse_action_description(
+        "Melee Weapon Attack: +5 to hit, reach 5 ft., one target. Hit: 7 (1d8 + 3) slashing damage, "
+        "or 8 (1d10 + 3) slashing damage if used with two hands."
+    )
+    assert longsword["base_damage"] == "1d8+3"
+    spear = json_import.parse_action_description(
+        "Melee or Ranged Weapon Attack: +3 to hit, reach 5 ft. or range 20/60 ft., one target. Hit: 4 (1d6 + 1) "
+        "piercing damage, or 5 (1d8 + 1) piercing damage if used with two hands to make a melee attack."
+    )
+    assert spear["base_damage"] == "1d6+1"
+    flaming = json_import.parse_action_description(
+        "Melee Weapon Attack: +6 to hit, reach 5 ft., one target. Hit: 8 (1d8 + 4) slashing damage plus "
+        "3 (1d6) fire damage, or 9 (1d10 + 4) slashing damage plus 3 (1d6) fire damage if used with two hands."
+    )
+    assert flaming["base_damage"] == "1d8+4+1d6"
+
+
+def test_parse_saving_throw():
+    attack = json_import.parse_action_description(DRAGON["actions"][3]["desc"])
+    assert attack["kind"] == json_import.SAVING_THROW
+    assert attack["dc"] == 17
+    assert attack["base_damage"] == "16d6"
+    assert attack["target"] == {"name": "cone", "first_param": 30, "second_param": 1}
+    assert attack["weapon_range"] == 30
+    line = json_import.parse_action_description(
+        "The dragon exhales acid in a 60-foot line that is 5 feet wide. Each creature in that line must make a "
+        "DC 18 Dexterity saving throw, taking 54 (12d8) acid damage on a failed save."
+    )
+    assert line["target"] == {"name": "line", "first_param": 60, "second_param": 5}
+    sphere = json_import.parse_action_description(
+        "Each creature in a 20-foot-radius sphere must make a DC 15 Constitution saving throw, "
+        "taking 28 (8d6) thunder damage on a failed save."
+    )
+    assert sphere["target"]["name"] == "sphere"
+    assert sphere["target"]["first_param"] == 20
+
+
+def test_parse_non_attacks():
+    assert json_import.parse_action_description(DRAGON["actions"][4]["desc"]) is None
+    assert json_import.parse_action_description("The ogre roars.") is None
+
+
+def test_parse_action_name():
+    assert json_import.parse_action_name("Claw") == ("Claw", None, None)
+    assert json_import.parse_action_name("Fire Breath (Recharge 5-6)") == (
+        "Fire Breath",
+        5,
+        None,
+    )
+    assert json_import.parse_action_name("Lightning Breath (Recharge 6)") == (
+        "Lightning Breath",
+        6,
+        None,
+    )
+    assert json_import.parse_action_name("Fireball (3/Day)") == ("Fireball", None, 3)
+    assert json_import.parse_action_name(
+        "Leadership (Recharges after a Short or Long Rest)"
+    ) == ("Leadership", None, 1)
+
+
+def test_parse_multiattack():
+    assert json_import.parse_multiattack(
+        DRAGON["actions"][0]["desc"], ["Bite", "Claw"]
+    ) == ["Bite", "Claw", "Claw"]
+    assert json_import.parse_multiattack(
+        "The knight makes two melee attacks.", ["Greatsword"]
+    ) == ["Greatsword", "Greatsword"]
+    assert json_import.parse_multiattack(
+        "The orc makes two greataxe attacks.", ["Greataxe", "Javelin"]
+    ) == ["Greataxe", "Greataxe"]
+    assert (
+        json_import.parse_multiattack("The knight makes two melee attacks.", ["a", "b"])
+        is None
+    )
+
+
+def test_record_from_monster():
+    record, skipped = json_import.record_from_monster(DRAGON)
+    assert record["ac"] == 18
+    assert record["speed"] == 40
+    assert record["proficiency"] == 4
+    assert [attack["name"] for attack in record["attacks"]] == [
+        "Bite",
+        "Claw",
+        "Fire Breath",
+    ]
+    assert record["attacks"][0]["base_damage"] == "2d10+6+1d6"
+    assert record["attacks"][0]["recharge"] is None
+    assert record["attacks"][2]["recharge"] == 5
+    assert record["attacks"][2]["uses_per_day"] is None
+    assert record["multiattacks"] == {"Multiattack": ["Bite", "Claw", "Claw"]}
+    assert skipped == ("Frightful Presence",)
+    stat_block = stat_block_from_record(record)
+    assert stat_block.attacks["Bite"].to_hit_bonus == 10
+    assert stat_block.attacks["Bite"].total_average_damage == 20.5
+    assert stat_block.attacks["Fire Breath"].recharge == 5
+    record, skipped = json_import.record_from_monster(OGRE)
+    assert record["ac"] == 11
+    assert record["proficiency"] == 2
+    assert skipped == ()
+    with pytest.raises(json_import.InvalidJsonImportError):
+        json_import.record_from_monster({"name": "nothing"})
+    with pytest.raises(json_import.InvalidJsonImportError):
+        json_import.record_from_monster([])
+
+
+def test_convert_monster():
+    result = json_import.convert_monster(3, OGRE)
+    assert result.index == 3
+    assert result.name == "Ogre"
+    assert result.record["name"] == "Ogre"
+    assert result.error is None
+    result = json_import.convert_monster(4, {"name": "nothing"})
+    assert result.name == "nothing"
+    assert result.record is None
+    assert result.error
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 1 << 16])
+def test_iter_json(chunk_size):
+    values = [OGRE, DRAGON, {"a": [1, 2, {"b": "]"}]}, 12345]
+    array = json.dumps(values, indent=2)
+    assert list(json_import.iter_json(io.StringIO(array), chunk_size)) == values
+    ndjson = "\n".join(json.dumps(value) for value in values) + "\n"
+    assert list(json_import.iter_json(io.StringIO(ndjson), chunk_size)) == values
+    assert list(json_import.iter_json(io.StringIO(" \n "), chunk_size)) == []
+
+
+def test_iter_json_errors():
+    with pytest.raises(json_import.InvalidJsonImportError):
+        list(json_import.iter_json(io.StringIO('{"a": 1}\n{"b": }\n'), 4))
+    with pytest.raises(json_import.InvalidJsonImportError):
+        list(
+            json_import.iter_json(
+                io.StringIO('{"a": "' + "x" * 100), 8, max_record_size=32
+            )
+        )
+
+
+def get_source(count):
+    monsters = []
+    for i in range(count):
+        monster = dict(OGRE, name=f"Ogre {i}")
+        if i % 5 == 3:
+            del monster["hit_points"]
+        monsters.append(monster)
+    return "\n".join(json.dumps(monster) for monster in monsters)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_monsters(workers):
+    results = list(
+        json_import.import_monsters(
+            io.StringIO(get_source(23)), workers=workers, batch_size=4
+        )
+    )
+    assert [result.index for result in results] == list(range(23))
+    assert [result.name for result in results] == [f"Ogre {i}" for i in range(23)]
+    for result in results:
+        if result.index % 5 == 3:
+            assert result.record is None
+            assert "hit_points" in result.error
+        else:
+            assert result.error is None
+            assert result.record["name"] == result.name
+
+
+def test_import_pages():
+    pages = [{"count": 2, "results": [OGRE, DRAGON]}, {"results": [OGRE]}]
+    source = io.StringIO("\n".join(json.dumps(page) for page in pages))
+    results = list(json_import.import_monsters(source, key="results"))
+    assert [result.name for result in results] == ["Ogre", "Young Red Dragon", "Ogre"]
+    with pytest.raises(json_import.InvalidJsonImportError):
+        list(json_import.import_monsters(io.StringIO("[1]"), key="results"))
+    with pytest.raises(json_import.InvalidJsonImportError):
+        list(json_import.import_monsters(io.StringIO("[]"), workers=0))
+    with pytest.raises(json_import.InvalidJsonImportError):
+        list(json_import.import_monsters(io.StringIO("[]"), batch_size=0))
@@ -0,0 +1,85 @@
+import time
+import numpy as np
+import pytest
+
+import lib.points as points
+from lib.combat import expected_damage, unsaved_wound_probability
+from lib.reference import REFERENCE_ATTACK
+from lib.unit_attacks import MeleeUnitAttack, RangedUnitAttack
+from lib.unit_stat_block import UnitStatBlock
+
+
+def get_unit(name="unit", hit_points=3):
+    club = MeleeUnitAttack("club", 5, "2", 4, 6, -1, "D3", False)
+    bow = RangedUnitAttack("bow", 60, "1", 3, 5, 0, "1", False)
+    return UnitStatBlock(
+        name,
+        30,
+        5,
+        4,
+        None,
+        hit_points,
+        [club, bow],
+        {"both": [club, bow]},
+    )
+
+
+def test_attack_valuation_shared_by_profile():
+    club = MeleeUnitAttack("club", 5, "2", 4, 6, -1, "D3", False)
+    renamed = MeleeUnitAttack("mace", 5, "2", 4, 6, -1, "D3", False)
+    valuation = points.attack_valuation(club)
+    assert valuation.expected_damage == pytest.approx(
+        expected_damage(club, 4, 4, None, 1)
+    )
+    assert valuation.range == 5
+    assert points.attack_valuation(renamed) is valuation
+
+
+def test_durability():
+    assert points.durability(5, 4, None, 3) == pytest.approx(
+        3 / unsaved_wound_probability(REFERENCE_ATTACK, 5, 4, None)
+    )
+
+
+def test_unit_points():
+    unit = get_unit()
+    formula = points.PointsFormula(1, 2, 10, 0.01, 0.1, 1)
+    club, bow = (points.attack_valuation(attack) for attack in unit.attacks)
+    offense = max(
+        club.expected_damage * 1.05,
+        bow.expected_damage * 1.6,
+        club.expected_damage * 1.05 + bow.expected_damage * 1.6,
+    )
+    expected = 1 + 2 * points.durability(5, 4, None, 3) + 10 * offense + 3
+    assert points.unit_points(unit, formula) == int(np.ceil(expected))
+    assert points.unit_points(unit, formula._replace(step=5)) % 5 == 0
+
+
+def test_price_batch():
+    units = [get_unit(f"unit {i}", i % 5 + 1) for i in range(20)]
+    valuations = points.valuations(units)
+    assert valuations.names[3] == "unit 3"
+    assert valuations.profile_offsets.tolist() == list(range(0, 61, 3))
+    prices = points.price(valuations)
+    assert prices.tolist() == [points.unit_points(unit) for unit in units]
+    no_attacks = UnitStatBlock("empty", 30, 5, 4, None, 3, [], {})
+    mixed = points.price(points.valuations([no_attacks, units[2], no_attacks]))
+    assert mixed[1] == prices[2]
+    assert mixed[0] == points.unit_points(no_attacks)
+
+
+def test_repricing_is_fast():
+    valuations = points.valuations(
+        [get_unit(f"unit {i}", i % 10 + 1) for i in range(5000)]
+    )
+    start = time.perf_counter()
+    for offense in (5, 10, 15):
+        points.price(valuations, points.PointsFormula(offense=offense))
+    assert time.perf_counter() - start < 1
+
+
+def test_invalid_formula():
+    with pytest.raises(points.InvalidPointsFormulaError):
+        points.price(points.valuations([get_unit()]), points.PointsFormula(base=-1))
+    with pytest.raises(points.InvalidPointsFormulaError):
+        points.PointsFormula(step=0).validate()
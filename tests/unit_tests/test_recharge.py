@@ -0,0 +1,88 @@
+import pytest
+
+import lib.attacks as attacks
+import lib.recharge as recharge
+import lib.targets as targets
+
+
+def test_recharge_probability():
+    assert recharge.recharge_probability(None) == 1.0
+    assert recharge.recharge_probability(6) == pytest.approx(1 / 6)
+    assert recharge.recharge_probability(5) == pytest.approx(1 / 3)
+    assert recharge.recharge_probability(2) == pytest.approx(5 / 6)
+
+
+def test_invalid_params():
+    with pytest.raises(recharge.InvalidRechargeParamError):
+        recharge.solve_recharge(10.0, 1.0, 3, 1)
+    with pytest.raises(recharge.InvalidRechargeParamError):
+        recharge.solve_recharge(10.0, 1.0, 3, 7)
+    with pytest.raises(recharge.InvalidRechargeParamError):
+        recharge.solve_recharge(10.0, 1.0, 3, None, 0)
+    with pytest.raises(recharge.InvalidRechargeParamError):
+        recharge.solve_recharge(10.0, 1.0, -1)
+    recharge.check_limited_use(2, 1)
+    recharge.check_limited_use(None, None)
+    with pytest.raises(attacks.InvalidAttackParamError):
+        recharge.check_limited_use(7, None, attacks.InvalidAttackParamError)
+
+
+def test_always_available():
+    solution = recharge.solve_recharge(10.0, 1.0, 4)
+    assert solution.rounds == 4
+    assert solution.expected_damage == pytest.approx(40.0)
+    assert solution.expected_uses == pytest.approx(4.0)
+
+
+def test_recharge_five_six():
+    solution = recharge.solve_recharge(20.0, 5.0, 3, 5)
+    # Used in round 1, then available with probability 1/3 in round 2 and round 3
+    expected_uses = 1 + 1 / 3 + 1 / 3
+    assert solution.expected_uses == pytest.approx(expected_uses)
+    assert solution.expected_damage == pytest.approx(
+        20.0 * expected_uses + 5.0 * (3 - expected_uses)
+    )
+    assert solution.should_use(0, True, 0) is True
+    assert solution.should_use(1, False, 0) is False
+
+
+def test_uses_per_day():
+    solution = recharge.solve_recharge(10.0, 2.0, 5, None, 2)
+    assert solution.expected_uses == pytest.approx(2.0)
+    assert solution.expected_damage == pytest.approx(26.0)
+    assert solution.should_use(0, True, 2) is True
+    assert solution.should_use(3, True, 0) is False
+
+
+def test_weaker_special_is_never_used():
+    solution = recharge.solve_recharge(3.0, 5.0, 4, 5, 2)
+    assert solution.expected_uses == 0.0
+    assert solution.expected_damage == pytest.approx(20.0)
+
+
+def test_usage_rate():
+    assert recharge.usage_rate(None, None, 4) == 1.0
+    assert recharge.usage_rate(5, 1, 10) == pytest.approx(0.1)
+    assert recharge.usage_rate(None, 2, 5) == pytest.approx(0.4)
+    assert recharge.usage_rate(5, None, 0) == 0.0
+
+
+def test_expected_damage_creature_attack():
+    attack = attacks.CreatureRangedAttack(
+        "breath weapon",
+        1,
+        0,
+        targets.Cone(15),
+        5,
+        28.0,
+        28.0,
+        0.0,
+        recharge=5,
+    )
+    assert recharge.expected_damage(attack, 1) == pytest.approx(56.0)
+    assert recharge.expected_damage(attack, 2, 10.0) == pytest.approx(
+        56.0 + 56.0 / 3 + 20.0 / 3
+    )
+    assert recharge.solve_creature_attack(attack, 2).expected_uses == pytest.approx(
+        4 / 3
+    )
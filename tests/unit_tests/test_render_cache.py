@@ -0,0 +1,125 @@
+import os
+import pytest
+
+import lib.block_format as block_format
+import lib.render_cache as render_cache
+from lib.fingerprint import fingerprint
+from lib.unit_stat_block import from_stat_block
+from records import attack_record, ogre_record
+
+
+def get_stat_block(name="ogre", attack_name="greatclub", hp=59):
+    return block_format.stat_block_from_record(
+        ogre_record(name, hp, attacks=[attack_record(attack_name)])
+    )
+
+
+def get_key(i):
+    return fingerprint(i)
+
+
+def test_render_keys():
+    key = render_cache.render_key(
+        render_cache.stat_block_render_key(get_stat_block()), "1", 100, {}
+    )
+    assert key == render_cache.render_key(
+        render_cache.stat_block_render_key(get_stat_block()), "1", 100, {}
+    )
+    for other in [
+        render_cache.render_key(
+            render_cache.stat_block_render_key(get_stat_block("orc")), "1", 100, {}
+        ),
+        render_cache.render_key(
+            render_cache.stat_block_render_key(get_stat_block(hp=60)), "1", 100, {}
+        ),
+        render_cache.render_key(
+            render_cache.stat_block_render_key(get_stat_block()), "2", 100, {}
+        ),
+        render_cache.render_key(
+            render_cache.stat_block_render_key(get_stat_block()), "1", 200, {}
+        ),
+        render_cache.render_key(
+            render_cache.stat_block_render_key(get_stat_block()),
+            "1",
+            100,
+            {"efficiency": True},
+        ),
+    ]:
+        assert key != other
+    unit = render_cache.unit_stat_block_render_key(from_stat_block(get_stat_block()))
+    assert unit == render_cache.unit_stat_block_render_key(
+        from_stat_block(get_stat_block())
+    )
+    assert unit != render_cache.unit_stat_block_render_key(
+        from_stat_block(get_stat_block(attack_name="club"))
+    )
+
+
+def test_put_and_get(tmp_path):
+    cache = render_cache.RenderCache(tmp_path)
+    key = get_key(0)
+    assert cache.get(key) is None
+    assert key not in cache
+    cache.put(key, b"image")
+    assert key in cache
+    assert cache.get(key) == b"image"
+    assert len(cache) == 1
+    assert cache.size == 5
+    cache.put(key, b"new image")
+    assert cache.get(key) == b"new image"
+    assert cache.size == 9
+    assert not list(tmp_path.glob("*/*.tmp"))
+    reopened = render_cache.RenderCache(tmp_path)
+    assert reopened.size == 9
+    reopened.clear()
+    assert len(reopened) == 0
+    assert reopened.size == 0
+
+
+def test_get_or_render(tmp_path):
+    cache = render_cache.RenderCache(tmp_path)
+    calls = []
+
+    def render():
+        calls.append(None)
+        return b"image"
+
+    assert cache.get_or_render(get_key(0), render) == b"image"
+    assert cache.get_or_render(get_key(0), render) == b"image"
+    assert len(calls) == 1
+
+
+def test_lru_eviction(tmp_path):
+    cache = render_cache.RenderCache(tmp_path, max_size=30)
+    keys = [get_key(i) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, b"0123456789")
+        path = tmp_path.joinpath(key[:2], f"{key}.png")
+        os.utime(path, (1000 + i, 1000 + i))
+    # Using the oldest image makes the second one the least recently used
+    assert cache.get(keys[0]) is not None
+    cache.put(get_key(3), b"0123456789")
+    assert keys[0] in cache
+    assert keys[1] not in cache
+    assert keys[2] in cache
+    assert cache.size == 30
+    cache.put(get_key(4), b"0" * 25)
+    assert len(cache) == 1
+    assert cache.size == 25
+
+
+def test_failed_put_leaves_no_temporary_file(tmp_path):
+    cache = render_cache.RenderCache(tmp_path)
+    with pytest.raises(TypeError):
+        cache.put(get_key(0), "not bytes")
+    assert get_key(0) not in cache
+    assert not list(tmp_path.glob("*/*"))
+
+
+def test_invalid_params(tmp_path):
+    with pytest.raises(render_cache.InvalidRenderCacheParamError):
+        render_cache.RenderCache(tmp_path, max_size=0)
+    cache = render_cache.RenderCache(tmp_path)
+    for key in ["../escape", "A" * 64, get_key(0)[:-1], 5]:
+        with pytest.raises(render_cache.InvalidRenderCacheParamError):
+            cache.get(key)
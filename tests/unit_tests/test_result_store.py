@@ -0,0 +1,67 @@
+import pytest
+
+import lib.result_store as result_store
+
+
+def test_put_and_get():
+    store = result_store.ResultStore(":memory:")
+    assert store.get("matchup", "a", "b", "1", {"seed": 1}) is None
+    store.put("matchup", "a", "b", "1", {"seed": 1}, {"value": 0.5})
+    assert store.get("matchup", "a", "b", "1", {"seed": 1}) == {"value": 0.5}
+    assert store.get("matchup", "a", "b", "1", {"seed": 2}) is None
+    assert store.get("matchup", "a", "b", "2", {"seed": 1}) is None
+    assert store.get("matchup", "b", "a", "1", {"seed": 1}) is None
+    store.flush()
+    assert store.get("matchup", "a", "b", "1", {"seed": 1}) == {"value": 0.5}
+    assert len(store) == 1
+
+
+def test_single_unit_results():
+    store = result_store.ResultStore(":memory:")
+    store.put("points", "a", None, "1", {}, {"points": 10})
+    store.flush()
+    assert store.get("points", "a", None, "1", {}) == {"points": 10}
+
+
+def test_batched_writes():
+    store = result_store.ResultStore(":memory:", batch_size=3)
+    store.put("matchup", "a", "b", "1", {"seed": 1}, {})
+    store.put("matchup", "a", "b", "1", {"seed": 2}, {})
+    assert store.size == 0
+    store.put("matchup", "a", "b", "1", {"seed": 3}, {})
+    assert store.size > 0
+
+
+def test_size_eviction():
+    store = result_store.ResultStore(":memory:", max_size=100, batch_size=1)
+    for seed in range(20):
+        store.put("matchup", "a", "b", "1", {"seed": seed}, {"value": seed})
+    assert store.size <= 100
+    assert store.get("matchup", "a", "b", "1", {"seed": 19}) == {"value": 19}
+    assert store.get("matchup", "a", "b", "1", {"seed": 0}) is None
+
+
+def test_version_invalidation(tmp_path):
+    path = str(tmp_path.joinpath("results.sqlite"))
+    with result_store.ResultStore(path, balance_version="1.0.0") as store:
+        store.put("matchup", "a", "b", "1", {}, {"value": 1})
+    with result_store.ResultStore(path, balance_version="1.0.0") as store:
+        assert store.get("matchup", "a", "b", "1", {}) == {"value": 1}
+    with result_store.ResultStore(path, balance_version="1.1.0") as store:
+        assert store.get("matchup", "a", "b", "1", {}) is None
+        assert len(store) == 0
+
+
+def test_clear():
+    store = result_store.ResultStore(":memory:")
+    store.put("matchup", "a", "b", "1", {}, {"value": 1})
+    store.flush()
+    store.clear()
+    assert len(store) == 0
+
+
+def test_invalid_params():
+    with pytest.raises(result_store.InvalidResultStoreParamError):
+        result_store.ResultStore(":memory:", max_size=0)
+    with pytest.raises(result_store.InvalidResultStoreParamError):
+        result_store.ResultStore(":memory:", batch_size=0)
@@ -0,0 +1,97 @@
+import pytest
+
+import lib.scaling as scaling
+import lib.targets as targets
+from lib.ability_scores import AbilityScores, Scores
+from lib.attacks import AttackRollAttack, SavingThrowAttack
+from lib.fingerprint import unit_fingerprint
+from lib.stat_block import StatBlock
+from lib.unit_stat_block import from_stat_block
+
+
+def get_stat_block(name="knight"):
+    stat_block = StatBlock(
+        name,
+        AbilityScores(16, 11, 14, 11, 11, 15),
+        2,
+        18,
+        52,
+        30,
+        [
+            AttackRollAttack(
+                "greatsword",
+                5,
+                1,
+                targets.SingleTarget(),
+                "2d6",
+                0,
+                False,
+                Scores.STRENGTH,
+            ),
+            SavingThrowAttack(
+                "shout", 30, 1, targets.Sphere(30), "2d8", 12, True, None, False
+            ),
+        ],
+    )
+    stat_block.create_multiattack("multiattack", ["greatsword", "greatsword"])
+    return stat_block
+
+
+def test_scale_stat_block():
+    knight = get_stat_block()
+    veteran = scaling.scale_stat_block(
+        knight, scaling.ScalingTier("veteran", 1, 2, 1.5, 1)
+    )
+    assert veteran.name == "knight (veteran)"
+    assert veteran.proficiency_modifier == 3
+    assert veteran.hit_points == 78
+    assert veteran.ability_scores.get_ability_score(Scores.STRENGTH) == 18
+    assert veteran.attack_templates["greatsword"].scaling.base_damage == "3d6"
+    assert veteran.attack_templates["shout"].scaling.base_damage == "3d8"
+    assert veteran.multiattacks["multiattack"][0].multiattack == 2
+    assert veteran.multiattacks["multiattack"][0].total_average_damage == 14.5
+    # The original stat block is not changed
+    assert knight.attack_templates["greatsword"].scaling.base_damage == "2d6"
+    standard = scaling.scale_stat_block(knight, scaling.ScalingTier("standard"))
+    assert standard.attacks == knight.attacks
+    assert standard.hit_points == 52
+
+
+def test_scores_are_clamped():
+    tier = scaling.ScalingTier("godlike", ability_scores=20, hit_points=0.001)
+    scaled = scaling.scale_stat_block(get_stat_block(), tier)
+    assert scaled.ability_scores.get_ability_score(Scores.STRENGTH) == 30
+    assert scaled.hit_points == 1
+
+
+def test_scale_bestiary():
+    stat_blocks = [get_stat_block("knight"), get_stat_block("paladin")]
+    results = scaling.scale_bestiary(stat_blocks)
+    assert len(results) == 2
+    assert list(results[1]) == [tier.name for tier in scaling.DEFAULT_TIERS]
+    for stat_block, tiers in zip(stat_blocks, results):
+        for tier in scaling.DEFAULT_TIERS:
+            expected = from_stat_block(
+                scaling.scale_stat_block(stat_block, tier).to_stat_block()
+            )
+            assert unit_fingerprint(tiers[tier.name]) == unit_fingerprint(expected)
+    # The shout does not scale with the creature: tiers with the same dice share it
+    knight = results[0]
+    assert knight["veteran"].attacks[1] is knight["elite"].attacks[1]
+    assert knight["minion"].attacks[1] is knight["standard"].attacks[1]
+    assert knight["champion"].attacks[1] is not knight["elite"].attacks[1]
+
+
+def test_invalid_tiers():
+    with pytest.raises(scaling.InvalidScalingParamError):
+        scaling.scale_bestiary([get_stat_block()], [])
+    with pytest.raises(scaling.InvalidScalingParamError):
+        scaling.scale_bestiary(
+            [get_stat_block()], [scaling.ScalingTier("a"), scaling.ScalingTier("a")]
+        )
+    with pytest.raises(scaling.InvalidScalingParamError):
+        scaling.scale_stat_block(
+            get_stat_block(), scaling.ScalingTier("a", hit_points=0)
+        )
+    with pytest.raises(scaling.InvalidScalingParamError):
+        scaling.scale_stat_block(get_stat_block(), scaling.ScalingTier(""))
@@ -0,0 +1,153 @@
+import pytest
+
+import lib.result_store as result_store
+import lib.simulation as simulation
+import lib.unit_attacks as unit_attacks
+import lib.unit_stat_block as unit_stat_block
+
+
+def get_weak_unit():
+    return unit_stat_block.UnitStatBlock(
+        "goblin",
+        30,
+        3,
+        5,
+        None,
+        1,
+        [unit_attacks.MeleeUnitAttack("scimitar", 5, "2", 4, 3, 0, "1", False)],
+        {},
+    )
+
+
+def get_strong_unit(strength=6):
+    return unit_stat_block.UnitStatBlock(
+        "knight",
+        30,
+        5,
+        3,
+        None,
+        3,
+        [
+            unit_attacks.MeleeUnitAttack(
+                "greatsword", 5, "4", 3, strength, -1, "D3", False
+            ),
+            unit_attacks.RangedUnitAttack("crossbow", 100, "1", 4, 4, 0, "1", False),
+        ],
+        {},
+    )
+
+
+def test_dice_roller():
+    roller = simulation.DiceRoller(42)
+    mirrored = simulation.DiceRoller(42, antithetic=True)
+    for _ in range(100):
+        roll = roller.roll(6)
+        assert 1 <= roll <= 6
+        assert mirrored.roll(6) == 7 - roll
+    assert simulation.DiceRoller(1).roll_expression("3") == 3
+    assert 2 <= simulation.DiceRoller(1).roll_expression("D3+1") <= 4
+    assert simulation.DiceRoller(1).roll_expression("-10") == 0
+
+
+def test_best_profile():
+    strong = get_strong_unit()
+    weak = get_weak_unit()
+    profile = simulation.best_profile(strong, weak)
+    assert [attack.name for attack in profile] == ["greatsword"]
+
+
+def test_simulate_trial_reproducible():
+    first = simulation.simulate_trial(
+        get_strong_unit(), get_weak_unit(), simulation.DiceRoller(7)
+    )
+    second = simulation.simulate_trial(
+        get_strong_unit(), get_weak_unit(), simulation.DiceRoller(7)
+    )
+    assert first == second
+    assert first.attacker_won is True
+    assert first.defender_casualties == simulation.DEFAULT_UNIT_SIZE
+
+
+def test_simulate_matchup_fixed_trials():
+    result = simulation.simulate_matchup(
+        get_strong_unit(), get_weak_unit(), seed=1, max_trials=200
+    )
+    assert result.trials == 200
+    assert result.win_rate.mean == pytest.approx(1.0)
+    assert result.win_rate.lower <= 1.0 <= result.win_rate.upper + 1e-9
+    # The Wilson interval of an always won matchup stays within [0, 1]
+    assert result.win_rate.upper == pytest.approx(1.0)
+    assert result.win_rate.center < 1.0
+    assert result.defender_casualties.mean == pytest.approx(10.0)
+
+
+def test_simulate_matchup_adaptive_stops_early():
+    result = simulation.simulate_matchup(
+        get_weak_unit(),
+        get_strong_unit(),
+        seed=1,
+        target_width=0.05,
+        batch_size=100,
+        max_trials=10000,
+    )
+    assert result.trials < 10000
+    assert result.win_rate.width <= 0.05
+
+
+def test_simulate_matchup_antithetic():
+    result = simulation.simulate_matchup(
+        get_strong_unit(),
+        get_strong_unit(),
+        seed=3,
+        antithetic=True,
+        batch_size=50,
+        max_trials=100,
+    )
+    assert result.trials == 100
+    assert 0.0 <= result.win_rate.mean <= 1.0
+
+
+def test_compare_variants_common_random_numbers():
+    same = simulation.compare_variants(
+        get_strong_unit(), get_strong_unit(), get_strong_unit(), seed=5, max_trials=50
+    )
+    assert same.mean == 0.0
+    assert same.half_width == 0.0
+    better = simulation.compare_variants(
+        get_strong_unit(12),
+        get_strong_unit(),
+        get_strong_unit(),
+        seed=5,
+        metric="defender_casualties",
+        max_trials=200,
+    )
+    assert better.mean > 0
+
+
+def test_invalid_params():
+    with pytest.raises(simulation.InvalidSimulationParamError):
+        simulation.simulate_matchup(get_weak_unit(), get_weak_unit(), metric="other")
+    with pytest.raises(simulation.InvalidSimulationParamError):
+        simulation.simulate_matchup(get_weak_unit(), get_weak_unit(), target_width=0)
+    with pytest.raises(simulation.InvalidSimulationParamError):
+        simulation.simulate_matchup(get_weak_unit(), get_weak_unit(), confidence=1.5)
+    with pytest.raises(simulation.InvalidSimulationParamError):
+        simulation.simulate_matchup(get_weak_unit(), get_weak_unit(), batch_size=1)
+    with pytest.raises(simulation.InvalidSimulationParamError):
+        simulation.simulate_matchup(get_weak_unit(), get_weak_unit(), max_trials=0)
+
+
+def test_simulate_matchup_store():
+    store = result_store.ResultStore(":memory:")
+    first = simulation.simulate_matchup(
+        get_strong_unit(), get_weak_unit(), seed=1, max_trials=50, store=store
+    )
+    assert len(store) == 1
+    second = simulation.simulate_matchup(
+        get_strong_unit(), get_weak_unit(), seed=1, max_trials=50, store=store
+    )
+    assert first == second
+    simulation.simulate_matchup(
+        get_strong_unit(), get_weak_unit(), max_trials=50, store=store
+    )
+    assert len(store) == 1
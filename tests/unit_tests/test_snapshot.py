@@ -0,0 +1,122 @@
+import numpy as np
+import pickle
+import pytest
+
+from concurrent.futures import ProcessPoolExecutor
+
+import lib.block_format as block_format
+import lib.snapshot as snapshot
+from lib.fingerprint import unit_fingerprint
+from lib.unit_stat_block import from_stat_block
+from records import knight_record
+
+
+def get_record(name="knight", hp=52):
+    return knight_record(
+        name, hp, {"attack": ["greatsword", "fire breath", "greatsword"]}
+    )
+
+
+def get_records():
+    records = [get_record(f"knight {i}", hp=10 + i) for i in range(20)]
+    records[3]["attacks"] = []
+    records[3]["multiattacks"] = {}
+    records[5]["name"] = "chevalier ü"
+    records[7]["attacks"][1]["recharge"] = 5
+    records[8]["attacks"][0]["uses_per_day"] = 2
+    return records
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path.joinpath("bestiary.5esnap"))
+    assert snapshot.write_snapshot(path, get_records()) == 20
+    return path
+
+
+def test_records(path):
+    with snapshot.Snapshot(path) as snap:
+        assert len(snap) == 20
+        assert [snap.record(i) for i in range(len(snap))] == get_records()
+        assert snap.record(-1) == get_records()[-1]
+        assert snap.name(5) == "chevalier ü"
+        with pytest.raises(IndexError):
+            snap.record(20)
+
+
+def test_columns_are_mapped(path):
+    snap = snapshot.Snapshot(path)
+    hit_points = snap.column("hp")
+    assert isinstance(hit_points.base, np.memmap) or isinstance(
+        hit_points.base.base, np.memmap
+    )
+    assert not hit_points.flags.writeable
+    assert np.array_equal(hit_points, np.arange(10, 30))
+    assert np.array_equal(snap.column("ac"), np.full(20, 18))
+    with pytest.raises(snapshot.InvalidSnapshotError):
+        snap.column("block")
+
+
+def test_stat_blocks(path):
+    snap = snapshot.Snapshot(path)
+    records = get_records()
+    for i, stat_block in enumerate(snap):
+        expected = block_format.stat_block_from_record(records[i])
+        assert stat_block.name == expected.name
+        assert stat_block.multiattack_attack_names == expected.multiattack_attack_names
+        assert unit_fingerprint(snap.unit_stat_block(i)) == unit_fingerprint(
+            from_stat_block(expected)
+        )
+
+
+def test_find(path):
+    snap = snapshot.Snapshot(path)
+    assert snap.find("knight 7") == 7
+    assert snap.find("chevalier ü") == 5
+    assert snap.find("knight") is None
+
+
+def _hit_points(snap, index):
+    return snap.stat_block(index).hit_points
+
+
+def test_pickle_shares_file(path):
+    snap = snapshot.Snapshot(path)
+    assert len(pickle.dumps(snap)) < 200
+    assert pickle.loads(pickle.dumps(snap)).record(2) == snap.record(2)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert list(executor.map(_hit_points, [snap] * 3, [0, 1, 19])) == [
+            10,
+            11,
+            29,
+        ]
+
+
+def test_invalid_files(tmp_path):
+    path = tmp_path.joinpath("invalid")
+    path.write_bytes(b"")
+    with pytest.raises(snapshot.InvalidSnapshotError):
+        snapshot.Snapshot(str(path))
+    path.write_bytes(b"x" * 100)
+    with pytest.raises(snapshot.InvalidSnapshotError):
+        snapshot.Snapshot(str(path))
+    snapshot.write_snapshot(str(path), [get_record()])
+    data = path.read_bytes()
+    path.write_bytes(data[:-1])
+    with pytest.raises(snapshot.InvalidSnapshotError):
+        snapshot.Snapshot(str(path))
+    newer = bytearray(data)
+    newer[len(snapshot.MAGIC)] = snapshot.VERSION + 1
+    path.write_bytes(bytes(newer))
+    with pytest.raises(snapshot.InvalidSnapshotError):
+        snapshot.Snapshot(str(path))
+    with pytest.raises(snapshot.InvalidSnapshotError):
+        snapshot.write_snapshot(str(path), [get_record(hp=2**40)])
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path.joinpath("empty"))
+    assert snapshot.write_snapshot(path, []) == 0
+    snap = snapshot.Snapshot(path)
+    assert len(snap) == 0
+    assert list(snap) == []
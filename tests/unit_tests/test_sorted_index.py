@@ -0,0 +1,63 @@
+import pytest
+
+import lib.sorted_index as sorted_index
+
+
+def test_sorted_rows():
+    index = sorted_index.SortedIndex(["claw", "bite", "tail", "claw"])
+    assert list(index) == ["bite", "claw", "tail"]
+    assert len(index) == 3
+    assert index[1] == "claw"
+    assert index.count("claw") == 2
+    assert index.count("wing") == 0
+    assert index.row("tail") == 2
+    assert index.row("wing") is None
+    assert index.insertion_row("horn") == 2
+    assert "bite" in index
+    assert "wing" not in index
+
+
+def test_add_and_remove():
+    index = sorted_index.SortedIndex()
+    for key in ["tail", "bite", "claw", "claw"]:
+        index.add(key)
+    assert list(index) == ["bite", "claw", "tail"]
+    index.remove("claw")
+    assert index.count("claw") == 1
+    index.remove("claw")
+    assert list(index) == ["bite", "tail"]
+    index.discard("bite")
+    index.discard("bite")
+    assert list(index) == ["tail"]
+    index.set_count("tail", 3)
+    assert index.count("tail") == 3
+    index.set_count("tail", 0)
+    assert len(index) == 0
+    with pytest.raises(sorted_index.InvalidSortedIndexParamError):
+        index.remove("tail")
+    with pytest.raises(sorted_index.InvalidSortedIndexParamError):
+        index.set_count("tail", -1)
+
+
+def test_diff():
+    index = sorted_index.SortedIndex(["bite", "claw", "claw", "tail"])
+    removed, changed = index.diff(["claw", "tail", "wing", "wing"])
+    assert removed == ["bite"]
+    assert changed == {"claw": 1, "wing": 2}
+    for key in removed:
+        index.discard(key)
+    for key, count in changed.items():
+        index.set_count(key, count)
+    assert index.diff(["claw", "tail", "wing", "wing"]) == ([], {})
+    assert list(index) == ["claw", "tail", "wing"]
+
+
+def test_matches_sorting():
+    keys = [f"attack {i * 7919 % 1000}" for i in range(1000)]
+    index = sorted_index.SortedIndex()
+    for key in keys:
+        index.add(key)
+    assert list(index) == sorted(set(keys))
+    for key in keys[::2]:
+        index.discard(key)
+    assert list(index) == sorted(set(keys[1::2]) - set(keys[::2]))
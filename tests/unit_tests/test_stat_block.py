@@ -176,7 +176,15 @@ def test_attacks():
             "ranged attack name 1", 1, 80, targets.SingleTarget(), 5, 7.5, 5.5, 2.0
         ),
         "ranged spell attack name": attacks.CreatureRangedAttack(
-            "ranged spell attack name", 1, 120, targets.Sphere(30), 6, 14.0, 14.0, 0.0
+            "ranged spell attack name",
+            1,
+            120,
+            targets.Sphere(30),
+            6,
+            14.0,
+            14.0,
+            0.0,
+            is_saving_throw=True,
         ),
     }
 
@@ -228,3 +236,18 @@ def test_multiattacks_invalid_attack():
         block.create_multiattack("multiattack 1", ["melee attack name 1", "no attack"])
     with pytest.raises(stat_block.InvalidAttackNameError):
         block.create_multiattack("multiattack 1", ["melee attack name 1", None])
+
+
+def test_multiattack_attack_names():
+    block = stat_block.StatBlock(*get_stat_block_valid_params())
+    block.create_multiattack(
+        "multiattack 1",
+        ["melee attack name 1", "ranged attack name 1", "melee attack name 1"],
+    )
+    assert block.multiattack_attack_names == {
+        "multiattack 1": [
+            "melee attack name 1",
+            "ranged attack name 1",
+            "melee attack name 1",
+        ]
+    }
@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+import lib.sweep as sweep
+import lib.targets as targets
+from lib.ability_scores import AbilityScores, Scores
+from lib.attacks import AttackRollAttack, SavingThrowAttack
+from lib.combat import expected_damage, unsaved_wound_probability
+from lib.dice import get_average_damage
+from lib.stat_block import StatBlock
+from lib.reference import REFERENCE_ATTACK
+from lib.unit_stat_block import from_stat_block
+
+
+def get_stat_block(strength=16, proficiency=3, ac=15, wisdom=10, hp=90):
+    stat_block = StatBlock(
+        "creature",
+        AbilityScores(strength, 12, 14, 10, wisdom, 8),
+        proficiency,
+        ac,
+        hp,
+        30,
+        [
+            AttackRollAttack(
+                "claw", 5, 2, targets.SingleTarget(), "2d6", 0, False, Scores.STRENGTH
+            ),
+            SavingThrowAttack(
+                "breath", 30, 1, targets.Cone(30), "4d8", 13, True, None, True, True
+            ),
+        ],
+    )
+    stat_block.create_multiattack("multiattack", ["claw", "claw"])
+    return stat_block
+
+
+def test_sweep_matches_conversion():
+    axes = {
+        "strength": range(1, 31, 3),
+        "proficiency": range(2, 10, 2),
+        "armor_class": range(5, 30, 4),
+        "wisdom": [3, 20],
+    }
+    result = sweep.sweep(get_stat_block(), axes)
+    shape = (10, 4, 7, 2)
+    assert result.defense["saving_throw"].shape == shape
+    assert result.attacks["claw"]["strength"].shape == shape
+    assert result.multiattacks["multiattack"].shape == shape
+    for index in np.ndindex(*shape):
+        values = [list(axis)[i] for axis, i in zip(axes.values(), index)]
+        stat_block = get_stat_block(values[0], values[1], values[2], values[3])
+        unit = from_stat_block(stat_block)
+        assert unit.saving_throw == result.defense["saving_throw"][index]
+        assert (unit.invulnerable_saving_throw or 7) == result.defense[
+            "invulnerable_saving_throw"
+        ][index]
+        assert unit.resistance == result.defense["resistance"][index]
+        assert unit.hit_points == result.defense["hit_points"][index]
+        assert result.defense["durability"][index] == pytest.approx(
+            unit.hit_points
+            / unsaved_wound_probability(
+                REFERENCE_ATTACK,
+                unit.resistance,
+                unit.saving_throw,
+                unit.invulnerable_saving_throw,
+            )
+        )
+        for attack in unit.attacks:
+            grids = result.attacks[attack.name]
+            assert grids["valid"][index]
+            assert attack.attack_skill == grids["attack_skill"][index]
+            assert attack.strength == grids["strength"][index]
+            assert attack.armor_penetration == grids["armor_penetration"][index]
+            assert get_average_damage(attack.damage)[0] == grids["damage"][index]
+            assert grids["expected_damage"][index] == pytest.approx(
+                expected_damage(attack, 4, 4, None, 1)
+            )
+        assert result.multiattacks["multiattack"][index] == pytest.approx(
+            sum(
+                expected_damage(attack, 4, 4, None, 1)
+                for attack in unit.multiattacks["multiattack"]
+            )
+        )
+
+
+def test_sweep_damage_dice_and_default_ranges():
+    result = sweep.sweep(get_stat_block(), {"damage_dice": [1, 3], "hit_points": None})
+    assert result.axes["hit_points"].tolist() == list(
+        sweep.DEFAULT_RANGES["hit_points"]
+    )
+    damage = result.attacks["breath"]["damage"][:, 0]
+    assert damage[0] < damage[1]
+    assert result.defense["hit_points"][0, :3].tolist() == [1, 1, 2]
+
+
+def test_sweep_marks_invalid_cells():
+    result = sweep.sweep(get_stat_block(), {"strength": [1, 16]})
+    claw = result.attacks["claw"]
+    assert claw["valid"].tolist() == [True, True]
+    stat_block = StatBlock(
+        "creature",
+        AbilityScores(10, 10, 10, 10, 10, 10),
+        2,
+        10,
+        10,
+        30,
+        [
+            AttackRollAttack(
+                "punch", 5, 1, targets.SingleTarget(), "1", 0, False, Scores.STRENGTH
+            )
+        ],
+    )
+    result = sweep.sweep(stat_block, {"strength": [1, 12]})
+    assert result.attacks["punch"]["valid"].tolist() == [False, True]
+    assert result.attacks["punch"]["expected_damage"][0] == 0
+
+
+def test_invalid_sweep():
+    with pytest.raises(sweep.InvalidSweepParamError):
+        sweep.sweep(get_stat_block(), {})
+    with pytest.raises(sweep.InvalidSweepParamError):
+        sweep.sweep(get_stat_block(), {"speed": [10]})
+    with pytest.raises(sweep.InvalidSweepParamError):
+        sweep.sweep(get_stat_block(), {"strength": []})
@@ -191,6 +191,25 @@ def test_eq_attack_roll():
     assert attack != "other"
 
 
+def test_limited_use_attack_roll_constructor():
+    params = get_attack_roll_valid_params()
+    attack = attacks.AttackRollAttack(*params, recharge=5, uses_per_day=3)
+    assert attack._recharge == 5
+    assert attack._uses_per_day == 3
+    assert attack != attacks.AttackRollAttack(*params)
+    assert attack.combine(attack)._recharge == 5
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attacks.AttackRollAttack(*params, recharge=1)
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attacks.AttackRollAttack(*params, recharge=7)
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attacks.AttackRollAttack(*params, recharge=5.5)
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attacks.AttackRollAttack(*params, uses_per_day=0)
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attacks.AttackRollAttack(*params, uses_per_day="other")
+
+
 def get_saving_throw_valid_params():
     return [
         "attack name",
@@ -336,3 +355,70 @@ def test_eq_saving_throw():
     assert attack != attack_2
     assert attack_2 == attacks.SavingThrowAttack(*params)
     assert attack != "other"
+
+
+def test_limited_use_saving_throw_constructor():
+    params = get_saving_throw_valid_params()
+    attack = attacks.SavingThrowAttack(*params, recharge=5, uses_per_day=1)
+    assert attack._recharge == 5
+    assert attack._uses_per_day == 1
+    assert attack != attacks.SavingThrowAttack(*params)
+    assert attack.combine(attack)._uses_per_day == 1
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attacks.SavingThrowAttack(*params, recharge=0)
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attacks.SavingThrowAttack(*params, uses_per_day=-1)
+
+
+def test_attack_roll_scaling():
+    attack = attacks.AttackRollAttack(
+        "bow",
+        80,
+        1,
+        targets.SingleTarget(),
+        "1d8",
+        1,
+        True,
+        Scores.DEXTERITY,
+        True,
+        True,
+        False,
+        True,
+    )
+    assert attack.scaling == attacks.AttackScaling(
+        1, (Scores.DEXTERITY,), True, "1d8", (), True
+    )
+
+
+def test_saving_throw_scaling():
+    breath = attacks.SavingThrowAttack(
+        "breath", 30, 1, targets.Cone(30), "4d8", 13, True, None, True
+    )
+    assert breath.scaling == attacks.AttackScaling(
+        5,
+        (),
+        False,
+        "4d8",
+        (Scores.INTELLIGENCE, Scores.WISDOM, Scores.CHARISMA),
+        False,
+    )
+    spell = attacks.SavingThrowAttack(
+        "spell", 30, 1, targets.Cone(30), "4d8", 13, True, Scores.WISDOM, False
+    )
+    assert spell.scaling.damage_abilities == ()
+
+
+def test_with_base_damage():
+    attack = attacks.AttackRollAttack(*get_attack_roll_valid_params())
+    scaled = attack.with_base_damage("3d12")
+    assert scaled.scaling.base_damage == "3d12"
+    assert scaled.scaling._replace(base_damage="") == attack.scaling._replace(
+        base_damage=""
+    )
+    assert attack.scaling.base_damage != "3d12"
+    saving_throw = attacks.SavingThrowAttack(*get_saving_throw_valid_params())
+    assert saving_throw.with_base_damage("1d4").scaling.base_damage == "1d4"
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attack.with_base_damage("no")
+    with pytest.raises(attacks.InvalidAttackParamError):
+        attack.with_base_damage("1d4-5")
@@ -0,0 +1,142 @@
+import pytest
+import time
+
+import lib.text_import as text_import
+from lib.block_format import stat_block_from_record
+
+GOBLIN = """Goblin
+Small humanoid (goblinoid), neutral evil
+
+Armor Class 15 (leather armor, shield)
+Hit Points 7 (2d6)
+Speed 30 ft.
+
+STR DEX CON INT WIS CHA
+8 (-1) 14 (+2) 10 (+0) 10 (+0) 8 (-1) 8 (-1)
+
+Skills Stealth +6
+Senses darkvision 60 ft., passive Perception 9
+Languages Common, Goblin
+Challenge 1/4 (50 XP)
+
+Nimble Escape. The goblin can take the Disengage or Hide action as a bonus action on each of its turns.
+
+Actions
+Scimitar. Melee Weapon Attack: +4 to hit, reach 5 ft., one target. Hit: 5 (1d6 + 2) slashing
+damage.
+Shortbow. Ranged Weapon Attack: +4 to hit, range 80/320 ft., one target. Hit: 5 (1d6 + 2)
+piercing damage.
+"""
+DRAGON = """Young Red Dragon
+Large dragon, chaotic evil
+Armor Class 18 (natural armor)
+Hit Points 178 (17d10 + 85)
+Speed 40 ft., climb 40 ft., fly 80 ft.
+STR 23 (+6) DEX 10 (+0) CON 21 (+5) INT 14 (+2) WIS 11 (+0) CHA 19 (+4)
+Challenge 10 (5,900 XP)
+Proficiency Bonus +4
+Actions
+Multiattack. The dragon makes three attacks: one with its bite and two with its claws.
+Bite. Melee Weapon Attack: +10 to hit, reach 10 ft., one target. Hit: 17 (2d10 + 6) piercing
+damage plus 3 (1d6) fire damage.
+Claw. Melee Weapon Attack: +10 to hit, reach 5 ft., one target. Hit: 13 (2d6 + 6) slashing damage.
+Fire Breath (Recharge 5-6). The dragon exhales fire in a 30-foot cone. Each creature in that area must make a
+DC 17 Dexterity saving throw. On a failed save a creature takes 56 (16d6) fire damage, or half as much
+damage on a successful one.
+Legendary Actions
+Tail Attack. Melee Weapon Attack: +10 to hit, reach 15 ft., one target. Hit: 15 (2d8 + 6) bludgeoning damage.
+"""
+
+
+def test_parse_stat_block():
+    record, skipped = text_import.parse_stat_block(GOBLIN)
+    assert record["name"] == "Goblin"
+    assert (record["ac"], record["hp"], record["speed"]) == (15, 7, 30)
+    assert [record[field] for field in ("str", "dex", "con", "int", "wis", "cha")] == [
+        8,
+        14,
+        10,
+        10,
+        8,
+        8,
+    ]
+    assert record["proficiency"] == 2
+    assert [attack["name"] for attack in record["attacks"]] == ["Scimitar", "Shortbow"]
+    assert record["attacks"][0]["base_damage"] == "1d6+2"
+    assert record["attacks"][1]["ranged"]
+    assert skipped == ()
+
+
+def test_parse_wrapped_actions():
+    record, skipped = text_import.parse_stat_block(DRAGON)
+    assert record["proficiency"] == 4
+    assert record["dex"] == 10
+    assert [attack["name"] for attack in record["attacks"]] == [
+        "Bite",
+        "Claw",
+        "Fire Breath",
+    ]
+    assert record["attacks"][0]["base_damage"] == "2d10+6+1d6"
+    breath = record["attacks"][2]
+    assert breath["dc"] == 17
+    assert breath["base_damage"] == "16d6"
+    assert breath["recharge"] == 5
+    assert breath["target"]["name"] == "cone"
+    assert record["multiattacks"] == {"Multiattack": ["Bite", "Claw", "Claw"]}
+    stat_block = stat_block_from_record(record)
+    assert stat_block.attacks["Claw"].to_hit_bonus == 10
+
+
+def test_parse_versatile_weapon():
+    record, _ = text_import.parse_stat_block(
+        GOBLIN.replace(
+            "Hit: 5 (1d6 + 2) slashing\ndamage.",
+            "Hit: 5 (1d6 + 2) slashing\ndamage, or 6 (1d8 + 2) slashing damage if used with two hands.",
+        )
+    )
+    assert record["attacks"][0]["base_damage"] == "1d6+2"
+
+
+def test_split_stat_blocks():
+    blocks = text_import.split_stat_blocks("Bestiary\n\n" + GOBLIN + "\n\n" + DRAGON)
+    assert len(blocks) == 2
+    assert blocks[0].splitlines()[0] == "Goblin"
+    assert blocks[1].splitlines()[0] == "Young Red Dragon"
+    assert text_import.split_stat_blocks("no stat blocks") == []
+
+
+def test_parse_errors():
+    results = text_import.parse_stat_blocks(
+        GOBLIN + GOBLIN.replace("Hit Points 7", "Hit Points ?")
+    )
+    assert [result.error is None for result in results] == [True, False]
+    assert "Hit Points" in results[1].error
+    with pytest.raises(text_import.InvalidTextImportError):
+        text_import.parse_stat_block(GOBLIN + DRAGON)
+    with pytest.raises(text_import.InvalidTextImportError):
+        text_import.parse_stat_block(GOBLIN.replace("8 (-1) 14", "8 14"))
+    with pytest.raises(text_import.InvalidTextImportError):
+        text_import.monster_from_text("  \n ")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_files(tmp_path, workers):
+    paths = []
+    for i in range(3):
+        path = tmp_path.joinpath(f"{i}.txt")
+        path.write_text((GOBLIN + "\n" + DRAGON) * (i + 1), encoding="utf-8")
+        paths.append(str(path))
+    results = list(text_import.parse_files(paths, workers))
+    assert [path for path, _ in results] == paths
+    assert [len(blocks) for _, blocks in results] == [2, 4, 6]
+    assert all(result.error is None for _, blocks in results for result in blocks)
+    with pytest.raises(text_import.InvalidTextImportError):
+        list(text_import.parse_files(paths, 0))
+
+
+def test_linear_time():
+    text = (GOBLIN + "\n" + DRAGON) * 500
+    start = time.perf_counter()
+    results = text_import.parse_stat_blocks(text)
+    assert time.perf_counter() - start < 5
+    assert len(results) == 1000
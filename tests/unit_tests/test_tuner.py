@@ -0,0 +1,97 @@
+import pytest
+
+import lib.balance as balance
+import lib.targets as targets
+import lib.tuner as tuner
+from lib.ability_scores import AbilityScores, Scores
+from lib.attacks import AttackRollAttack
+from lib.stat_block import StatBlock
+
+
+def get_dataset():
+    dataset = []
+    for cr in range(1, 11):
+        stat_block = StatBlock(
+            f"creature {cr}",
+            AbilityScores(10 + cr, 10, 10 + cr, 10, 10, 10),
+            2 + cr // 4,
+            11 + cr // 2,
+            10 + 15 * cr,
+            30,
+            [
+                AttackRollAttack(
+                    "slam",
+                    5,
+                    1 + cr // 4,
+                    targets.SingleTarget(),
+                    f"{1 + cr // 2}d8",
+                    0,
+                    False,
+                    Scores.STRENGTH,
+                )
+            ],
+        )
+        dataset.append((stat_block, float(cr)))
+    return dataset
+
+
+def test_evaluate_profile():
+    score = tuner.evaluate_profile(balance.DEFAULT_PROFILE, get_dataset())
+    assert 0.5 < score <= 1.0
+
+
+def test_tune_in_process():
+    result = tuner.tune(
+        get_dataset(),
+        {"attack.damage_scale": [10, 20, 30], "defense.hit_points_scale": [10, 20]},
+        workers=1,
+        seed=1,
+    )
+    assert result.evaluated == 6
+    assert result.score >= tuner.evaluate_profile(
+        balance.DEFAULT_PROFILE, get_dataset()
+    )
+    assert result.profile.attack.damage_scale in (10, 20, 30)
+
+
+def test_tune_prunes():
+    result = tuner.tune(
+        get_dataset(),
+        {"defense.hit_points_scale": [1, 20, 1000]},
+        workers=1,
+        prune_fraction=0.5,
+        prune_margin=0.0,
+    )
+    assert result.pruned > 0
+
+
+def test_tune_sampling_and_invalid_candidates():
+    result = tuner.tune(
+        get_dataset(),
+        {
+            "attack.damage_scale": [0, 10, 20, 30, 40],
+            "attack.strength_offset": [-2, -1],
+        },
+        samples=3,
+        seed=2,
+        workers=1,
+    )
+    assert result.evaluated <= 4
+
+
+def test_tune_in_worker_processes():
+    result = tuner.tune(
+        get_dataset(), {"attack.damage_scale": [10, 20]}, workers=2, seed=1
+    )
+    assert result.evaluated == 2
+
+
+def test_invalid_params():
+    with pytest.raises(tuner.InvalidTunerParamError):
+        tuner.tune(get_dataset()[:1], {})
+    with pytest.raises(tuner.InvalidTunerParamError):
+        tuner.tune(get_dataset(), {}, samples=0)
+    with pytest.raises(tuner.InvalidTunerParamError):
+        tuner.tune(get_dataset(), {}, workers=0)
+    with pytest.raises(tuner.InvalidTunerParamError):
+        tuner.tune(get_dataset(), {}, prune_fraction=0)
@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+
+import lib.unit_analytics as unit_analytics
+from lib.combat import unsaved_wound_probability
+from lib.unit_attacks import MeleeUnitAttack, RangedUnitAttack
+from lib.unit_stat_block import UnitStatBlock
+
+
+def get_unit(name="unit"):
+    club = MeleeUnitAttack("club", 5, "2", 4, 6, -1, "D3", False)
+    return UnitStatBlock(
+        name,
+        30,
+        5,
+        4,
+        None,
+        3,
+        [club, RangedUnitAttack("fire", 30, "D6", None, 5, 0, "1", True)],
+        {"double": [MeleeUnitAttack("club", 5, "4", 4, 6, -1, "D3", False), club]},
+    )
+
+
+def test_wounds_per_kill():
+    assert unit_analytics.wounds_per_kill("1", 5).tolist() == [1, 2, 3, 4, 5]
+    assert unit_analytics.wounds_per_kill("2", 4).tolist() == [1, 1, 2, 2]
+    d3 = unit_analytics.wounds_per_kill("D3", 3)
+    assert d3[0] == 1
+    assert d3[1] == pytest.approx(4 / 3)
+    assert d3[2] == pytest.approx(1 + 1 / 3 * 4 / 3 + 1 / 3 * 1)
+    assert np.isinf(unit_analytics.wounds_per_kill("D3-3", 2)).all()
+
+
+def test_efficiency_table_shape_and_values():
+    table = unit_analytics.efficiency_table(get_unit())
+    assert table.name == "unit"
+    assert set(table.attacks) == {"club", "fire"}
+    assert set(table.multiattacks) == {"double"}
+    assert table.best.shape == unit_analytics.SHAPE
+    club = MeleeUnitAttack("club", 5, "2", 4, 6, -1, "D3", False)
+    for saving_throw, invulnerable, resistance, hit_points in (
+        (2, None, 1, 1),
+        (4, 5, 6, 3),
+        (6, 4, 12, 10),
+    ):
+        expected = (
+            2
+            * unsaved_wound_probability(club, resistance, saving_throw, invulnerable)
+            / unit_analytics.wounds_per_kill("D3")[hit_points - 1]
+        )
+        index = (
+            unit_analytics.SAVING_THROWS.index(saving_throw),
+            unit_analytics.INVULNERABLE_SAVING_THROWS.index(invulnerable),
+            unit_analytics.RESISTANCES.index(resistance),
+            unit_analytics.HIT_POINTS.index(hit_points),
+        )
+        assert table.attacks["club"][index] == pytest.approx(expected)
+        assert table.multiattacks["double"][index] == pytest.approx(3 * expected)
+        assert table.slain(
+            saving_throw, invulnerable, resistance, hit_points
+        ) == pytest.approx(
+            max(
+                table.multiattacks["double"][index],
+                table.attacks["fire"][index],
+            )
+        )
+
+
+def test_batch_matches_single():
+    units = [get_unit("first"), UnitStatBlock("empty", 30, 4, 4, None, 1, [], {})]
+    tables = unit_analytics.batch_efficiency_tables(units)
+    assert [table.name for table in tables] == ["first", "empty"]
+    assert np.array_equal(
+        tables[0].best, unit_analytics.efficiency_table(units[0]).best
+    )
+    assert tables[1].attacks == {}
+    assert tables[1].multiattacks == {}
+    assert not tables[1].best.any()
+    assert unit_analytics.batch_efficiency_tables([]) == []
+
+
+def test_empty_multiattacks():
+    sword = MeleeUnitAttack("sword", 5, "2", 4, 4, -1, "1", False)
+    axe = MeleeUnitAttack("axe", 5, "1", 4, 5, -2, "2", False)
+    for multiattacks in (
+        {"empty": [], "both": [sword, axe]},
+        {"both": [sword, axe], "empty": []},
+    ):
+        unit = UnitStatBlock("unit", 30, 5, 4, None, 3, [sword, axe], multiattacks)
+        table = unit_analytics.efficiency_table(unit)
+        assert not table.multiattacks["empty"].any()
+        assert np.allclose(
+            table.multiattacks["both"], table.attacks["sword"] + table.attacks["axe"]
+        )
+    only_empty = UnitStatBlock("unit", 30, 5, 4, None, 3, [], {"empty": []})
+    table = unit_analytics.efficiency_table(only_empty)
+    assert not table.multiattacks["empty"].any()
+    assert not table.best.any()
+
+
+def test_attack_and_multiattack_with_the_same_name():
+    club = MeleeUnitAttack("club", 5, "2", 4, 6, -1, "D3", False)
+    unit = UnitStatBlock("unit", 30, 5, 4, None, 3, [club], {"club": [club, club]})
+    table = unit_analytics.efficiency_table(unit)
+    assert np.allclose(table.multiattacks["club"], 2 * table.attacks["club"])
@@ -352,6 +352,9 @@ def test_from_creature_attack_melee():
     assert unit_attack.number_of_attacks == attacks._number_of_attacks_from_attack(
         creature_attack
     )
+    assert unit_attack.number_of_attacks == attacks.number_of_attacks_from_attack(
+        creature_attack
+    )
     assert unit_attack.attack_skill == attacks._attack_skill_from_attack(
         creature_attack
     )
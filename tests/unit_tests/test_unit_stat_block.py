@@ -535,6 +535,20 @@ def test_from_stat_block():
         block.invulnerable_saving_throw
         == stat_block._invulnerable_saving_throw_value_from_stat_block(mock_stat_block)
     )
+    assert block.speed == stat_block.speed_from_stat_block(mock_stat_block)
+    assert block.hit_points == stat_block.hit_points_per_creature_from_stat_block(
+        mock_stat_block
+    )
+    assert block.resistance == stat_block.resistance_value_from_stat_block(
+        mock_stat_block
+    )
+    assert block.saving_throw == stat_block.saving_throw_value_from_stat_block(
+        mock_stat_block
+    )
+    assert (
+        block.invulnerable_saving_throw
+        == stat_block.invulnerable_saving_throw_value_from_stat_block(mock_stat_block)
+    )
     assert block.attacks == [
         stat_block.from_creature_attack(attack) for _, attack in mock_attacks.items()
     ]
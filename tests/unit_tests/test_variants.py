@@ -0,0 +1,162 @@
+import pytest
+
+import lib.targets as targets
+import lib.variants as variants
+from lib.ability_scores import AbilityScores, Scores
+from lib.attacks import AttackRollAttack
+from lib.fingerprint import unit_fingerprint
+from lib.stat_block import StatBlock
+from lib.unit_stat_block import from_stat_block
+
+
+def get_attack(name="sword", damage="1d8", weapon_range=5, ranged=False):
+    return AttackRollAttack(
+        name,
+        weapon_range,
+        1,
+        targets.SingleTarget(),
+        damage,
+        0,
+        ranged,
+        Scores.DEXTERITY if ranged else Scores.STRENGTH,
+    )
+
+
+def get_base():
+    stat_block = StatBlock(
+        "guard",
+        AbilityScores(13, 12, 12, 10, 11, 10),
+        2,
+        16,
+        11,
+        30,
+        [get_attack(), get_attack("crossbow", "1d6", 80, True)],
+    )
+    stat_block.create_multiattack("multiattack", ["sword", "sword"])
+    stat_block.create_multiattack("volley", ["crossbow", "crossbow"])
+    return stat_block
+
+
+def assert_same_conversion(stat_block):
+    converted = variants.to_unit_stat_block(stat_block)
+    materialized = (
+        stat_block.to_stat_block()
+        if isinstance(stat_block, variants.StatBlockVariant)
+        else stat_block
+    )
+    assert unit_fingerprint(converted) == unit_fingerprint(
+        from_stat_block(materialized)
+    )
+    assert converted.name == stat_block.name
+
+
+def test_variant_reads_base():
+    base = get_base()
+    variant = variants.StatBlockVariant(base)
+    assert variant.name == "guard"
+    assert variant.ability_scores is base.ability_scores
+    assert variant.armor_class == 16
+    assert variant.attacks == base.attacks
+    assert variant.multiattacks == base.multiattacks
+    assert variant.overrides == {}
+    # Unchanged multiattacks share the base's combined templates
+    for name, templates in variant.multiattack_templates.items():
+        assert all(a is b for a, b in zip(templates, base.multiattack_templates[name]))
+
+
+def test_variant_overrides():
+    base = get_base()
+    veteran = variants.StatBlockVariant(
+        base, "veteran", {Scores.STRENGTH: 16}, prof=3, hp=58
+    )
+    assert veteran.name == "veteran"
+    assert veteran.ability_scores.get_ability_score(Scores.STRENGTH) == 16
+    assert veteran.ability_scores.get_ability_score(Scores.DEXTERITY) == 12
+    assert veteran.proficiency_modifier == 3
+    assert veteran.hit_points == 58
+    assert veteran.armor_class == 16
+    assert veteran.overrides == {
+        "name": "veteran",
+        "proficiency": 3,
+        "hit_points": 58,
+        "scores": {Scores.STRENGTH: 16},
+    }
+    assert veteran.attacks["sword"].to_hit_bonus == 6
+    assert base.attacks["sword"].to_hit_bonus == 3
+    assert_same_conversion(veteran)
+
+
+def test_variant_attacks():
+    base = get_base()
+    variant = variants.StatBlockVariant(
+        base,
+        "axeman",
+        attacks={"sword": get_attack("sword", "1d12"), "crossbow": None},
+        multiattacks={"flurry": ["sword", "sword", "sword"]},
+    )
+    assert list(variant.attack_templates) == ["sword"]
+    assert variant.multiattack_attack_names == {
+        "multiattack": ["sword", "sword"],
+        "flurry": ["sword", "sword", "sword"],
+    }
+    assert variant.multiattacks["multiattack"][0].multiattack == 2
+    assert variant.multiattacks["multiattack"][0].total_average_damage == 7.5
+    assert variant.multiattacks["flurry"][0].multiattack == 3
+    assert_same_conversion(variant)
+    removed = variants.StatBlockVariant(variant, multiattacks={"flurry": None})
+    assert list(removed.multiattack_templates) == ["multiattack"]
+    assert_same_conversion(removed)
+
+
+def test_create_multiattack():
+    variant = variants.StatBlockVariant(get_base())
+    variant.create_multiattack("mixed", ["sword", "crossbow"])
+    assert list(variant.multiattacks) == ["multiattack", "volley", "mixed"]
+    with pytest.raises(variants.InvalidVariantParamError):
+        variant.create_multiattack("mixed", ["sword"])
+    with pytest.raises(variants.InvalidVariantParamError):
+        variant.create_multiattack("other", ["missing"])
+
+
+def test_conversion_reuses_derived_attacks():
+    base = get_base()
+    base_unit = variants.to_unit_stat_block(base)
+    tougher = variants.StatBlockVariant(base, "tough guard", hp=40, ac=18)
+    unit = variants.to_unit_stat_block(tougher)
+    assert unit.attacks[0] is base_unit.attacks[0]
+    assert unit.multiattacks["volley"][0] is base_unit.multiattacks["volley"][0]
+    assert unit.hit_points != base_unit.hit_points
+    stronger = variants.StatBlockVariant(base, scores={Scores.STRENGTH: 18})
+    unit = variants.to_unit_stat_block(stronger)
+    # Only the strength based attacks are converted again
+    assert unit.attacks[0] is not base_unit.attacks[0]
+    assert unit.attacks[1] is base_unit.attacks[1]
+    again = variants.to_unit_stat_block(stronger)
+    assert again.multiattacks["multiattack"][0] is unit.multiattacks["multiattack"][0]
+    assert_same_conversion(stronger)
+
+
+def test_invalid_variant():
+    base = get_base()
+    with pytest.raises(variants.InvalidVariantParamError):
+        variants.StatBlockVariant("base")
+    with pytest.raises(variants.InvalidVariantParamError):
+        variants.StatBlockVariant(base, hp=0)
+    with pytest.raises(variants.InvalidVariantParamError):
+        variants.StatBlockVariant(base, speed=-5)
+    with pytest.raises(variants.InvalidVariantParamError):
+        variants.StatBlockVariant(base, attacks={"axe": get_attack("sword")})
+    with pytest.raises(variants.InvalidVariantParamError):
+        variants.StatBlockVariant(base, multiattacks={"double": ["axe", "axe"]})
+
+
+def test_family_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(variants, "FAMILY_CACHE_SIZE", 20)
+    base = get_base()
+    for hit_points in range(1, 50):
+        variant = variants.StatBlockVariant(
+            base, hp=hit_points, scores={Scores.STRENGTH: 10 + hit_points % 9}
+        )
+        variants.to_unit_stat_block(variant)
+        assert len(variants._family_caches[base]) <= 20
+    assert_same_conversion(variant)